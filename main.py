@@ -2,10 +2,18 @@
 
 Configures structured logging, wires up the **MVC** layers
 (Model / View / Controller), and starts the PySide6 event loop.
+With ``--daemon`` it runs the headless analysis daemon instead, and with
+``--stream`` it analyses a live PCM stream from stdin or a named pipe.
+``--report DIR file ...`` renders a PNG/SVG report per file (and, with
+``--sheet``, a contact sheet) without starting Qt.  In every mode,
+``--metrics-port`` serves Prometheus metrics on localhost and
+``--metrics-file`` dumps them to a file periodically, and ``--trace``
+writes a Chrome trace-event file of the run on exit.
 """
 
 from __future__ import annotations
 
+import argparse
 import logging
 import logging.handlers
 import os
@@ -42,40 +50,217 @@ src_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
-from PySide6.QtWidgets import QApplication
+from config import (
+    DAEMON_HOST,
+    DAEMON_MAX_IN_FLIGHT,
+    DAEMON_PORT,
+    MAX_WORKER_THREADS,
+    METRICS_FILE_INTERVAL_S,
+    REPORT_FORMAT,
+)
+import tracing
+from metrics import MetricsFileWriter, MetricsServer
 
-from model.audio_file import AudioFile
-from model.feature_extractor import FeatureExtractor
-from view.main_window import MainWindow
-from controller.main_controller import MainController
 
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    """Parse command-line options; unknown arguments are left for Qt."""
+    parser = argparse.ArgumentParser(description="TuneScope — DSP Music Analyzer")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="run the headless analysis daemon instead of the GUI",
+    )
+    parser.add_argument(
+        "--stream",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="analyse raw PCM from stdin ('-') or a named pipe, printing JSON updates",
+    )
+    parser.add_argument("--rate", type=int, default=44100, help="stream: sample rate (Hz)")
+    parser.add_argument(
+        "--format",
+        dest="pcm_format",
+        default="s16le",
+        choices=["s16le", "s32le", "f32le"],
+        help="stream: sample format",
+    )
+    parser.add_argument("--channels", type=int, default=1, help="stream: interleaved channels")
+    parser.add_argument("--socket", metavar="PATH", help="daemon: listen on a Unix socket")
+    parser.add_argument("--host", default=DAEMON_HOST, help="daemon: TCP host")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help="daemon: TCP port")
+    parser.add_argument(
+        "--report",
+        metavar="DIR",
+        help="render a report per audio file into DIR instead of starting the GUI",
+    )
+    parser.add_argument(
+        "--report-format",
+        default=REPORT_FORMAT,
+        choices=["png", "svg"],
+        help="report: image format",
+    )
+    parser.add_argument("--sheet", metavar="PATH", help="report: also write a contact sheet")
+    parser.add_argument("files", nargs="*", help="report: audio files")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_WORKER_THREADS,
+        help="daemon / report: worker processes",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DAEMON_MAX_IN_FLIGHT,
+        help="daemon: files analysed concurrently before backpressure",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="rewrite Prometheus metrics to PATH periodically (and on exit)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=METRICS_FILE_INTERVAL_S,
+        help="metrics file: seconds between dumps",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="record spans and write them to PATH (Chrome trace-event JSON) on exit",
+    )
+    args, _ = parser.parse_known_args(argv)
+    return args
 
-def main() -> None:
-    """Application entry point.
+
+def run_gui() -> None:
+    """Start the desktop application.
 
     Steps
     1. Create the PySide6 application object.
-    2. Instantiate the Model layer (``AudioFile``, ``FeatureExtractor``).
+    2. Instantiate the Model layer (``FeatureExtractor``; every analysis
+       job creates its own ``AudioFile``).
     3. Instantiate the View layer (``MainWindow``).
     4. Wire everything together with the Controller (``MainController``).
     5. Show the window and start the Qt event loop.
     """
+    # Qt is imported lazily so that headless modes (and the daemon's
+    # spawned worker processes) never load it.
+    from PySide6.QtWidgets import QApplication
+
+    from controller.main_controller import MainController
+    from model.feature_extractor import FeatureExtractor
+    from view.main_window import MainWindow
+
     app = QApplication(sys.argv)
 
     # Model
-    model_audio = AudioFile()
     model_extractor = FeatureExtractor()
 
     # View
     main_window = MainWindow()
 
     # Controller
-    controller = MainController(model_audio, model_extractor, main_window)  # noqa: F841
+    controller = MainController(model_extractor, main_window)
+    app.aboutToQuit.connect(controller.shutdown)
 
     logger.info("Application started — main window displayed")
     main_window.show()
     sys.exit(app.exec())
 
 
+def run_stream(source: str, sr: int, fmt: str, channels: int) -> None:
+    """Print rolling tempo / key updates for a live PCM stream as JSON lines."""
+    import json
+
+    from model.stream_analyzer import analyze_stream
+
+    stream = sys.stdin.buffer if source == "-" else open(source, "rb")  # noqa: SIM115
+    try:
+        for update in analyze_stream(stream, sr, fmt=fmt, channels=channels):
+            print(json.dumps(update), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def run_report(paths: list[str], out_dir: str, fmt: str, sheet: str | None, workers: int) -> None:
+    """Render reports for *paths*, printing one JSON line per finished file."""
+    import json
+
+    from view.report import render_reports
+
+    try:
+        for record in render_reports(paths, out_dir, fmt=fmt, sheet=sheet, workers=workers):
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+def start_metrics(args: argparse.Namespace) -> list[MetricsServer | MetricsFileWriter]:
+    """Start the requested metrics exporters and return them (for ``close()``)."""
+    exporters: list[MetricsServer | MetricsFileWriter] = []
+    if args.metrics_port is not None:
+        try:
+            exporters.append(MetricsServer(args.metrics_port))
+        except OSError as exc:
+            logger.error("Could not serve metrics on port %d: %s", args.metrics_port, exc)
+    if args.metrics_file:
+        exporters.append(MetricsFileWriter(args.metrics_file, args.metrics_interval))
+    return exporters
+
+
+def main() -> None:
+    """Application entry point: dispatch to the GUI or a headless mode."""
+    args = _parse_args(sys.argv[1:])
+    exporters = start_metrics(args)
+    if args.trace:
+        tracing.start()
+    try:
+        _dispatch(args)
+    finally:
+        for exporter in exporters:
+            exporter.close()
+        if args.trace:
+            try:
+                tracing.write_trace(args.trace, tracing.stop())
+            except OSError as exc:
+                logger.error("Could not write the trace to %s: %s", args.trace, exc)
+
+
+def _dispatch(args: argparse.Namespace) -> None:
+    """Run the mode selected on the command line."""
+    if args.daemon:
+        from analysis_daemon import run_daemon
+
+        run_daemon(
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            workers=args.workers,
+            max_in_flight=args.max_in_flight,
+        )
+        return
+
+    if args.stream:
+        run_stream(args.stream, args.rate, args.pcm_format, args.channels)
+        return
+
+    if args.report:
+        run_report(args.files, args.report, args.report_format, args.sheet, args.workers)
+        return
+
+    run_gui()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,356 @@
+"""Headless analysis daemon — a long-running, socket-based analyzer.
+
+Lets an ingest pipeline push tracks to a warm analyzer instead of
+spawning the GUI.  The daemon listens on a Unix socket or a localhost
+TCP port and speaks **newline-delimited JSON**: one request object per
+line, one or more response objects per line.
+
+Requests::
+
+    {"op": "analyze", "id": "job-1", "paths": ["a.mp3", ...], "options": {"sr": 22050}}
+    {"op": "analyze", "paths": [...], "options": {"tempo_mode": "fast"}}
+    {"op": "health"}
+    {"op": "metrics"}
+
+Responses to ``analyze`` are streamed as each file finishes (completion
+order), followed by a terminating ``done`` event::
+
+    {"id": "job-1", "event": "result", "result": {"path": ..., "tempo": ...}}
+    {"id": "job-1", "event": "done", "count": 2}
+
+Files run on a :class:`ProcessPoolExecutor` whose workers are warmed up
+with :func:`model.pipeline.warm_up` when the daemon starts.  At most
+``max_in_flight`` files are in the pool at once.  ``analyze`` requests
+wait for free slots in a per-connection backlog of up to
+``max_in_flight`` requests; once it is full the daemon stops reading
+from the connection, so clients feel TCP/socket backpressure.
+``health`` and ``metrics`` are answered as soon as they are read, even
+while analyses wait for slots.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from config import (
+    DAEMON_HOST,
+    DAEMON_MAX_IN_FLIGHT,
+    DAEMON_MAX_LINE_BYTES,
+    DAEMON_PORT,
+    MAX_WORKER_THREADS,
+)
+from metrics import QUEUE_DEPTH, call_with_metrics, merge_worker_metrics
+from model.pipeline import analyze_file, validate_options, warm_up
+
+logger = logging.getLogger(__name__)
+
+_Sender = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+def _init_worker() -> None:
+    """Pool initializer: leave Ctrl+C handling to the parent, then warm up."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    warm_up()
+
+
+class AnalysisDaemon:
+    """Asyncio server that runs analyses on a warm process pool.
+
+    Args:
+        workers: Number of worker processes.
+        max_in_flight: Maximum number of files submitted to the pool at
+            the same time (across all connections).
+    """
+
+    def __init__(
+        self,
+        workers: int = MAX_WORKER_THREADS,
+        max_in_flight: int = DAEMON_MAX_IN_FLIGHT,
+    ) -> None:
+        self._workers = max(1, workers)
+        self._max_in_flight = max(1, max_in_flight)
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._server: asyncio.base_events.Server | None = None
+        self._started_at = time.monotonic()
+
+        self._in_flight = 0
+        self._connections = 0
+        self._counters: dict[str, int] = {
+            "requests": 0,
+            "files_submitted": 0,
+            "files_completed": 0,
+            "files_failed": 0,
+        }
+        self._latency_total = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(
+        self,
+        host: str = DAEMON_HOST,
+        port: int = DAEMON_PORT,
+        socket_path: str | None = None,
+    ) -> None:
+        """Warm up the process pool and start listening.
+
+        Args:
+            host: TCP host (ignored when *socket_path* is given).
+            port: TCP port; ``0`` picks a free port.
+            socket_path: Listen on this Unix socket instead of TCP.
+        """
+        self._slots = asyncio.Semaphore(self._max_in_flight)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # Spawn every worker now so the initializer runs before traffic.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, os.getpid) for _ in range(self._workers))
+        )
+
+        if socket_path:
+            self._server = await asyncio.start_unix_server(
+                self._handle_client, path=socket_path, limit=DAEMON_MAX_LINE_BYTES
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_client, host=host, port=port, limit=DAEMON_MAX_LINE_BYTES
+            )
+        logger.info("Analysis daemon listening on %s", self.address)
+
+    @property
+    def address(self) -> Any:
+        """Return the bound socket address (path or ``(host, port)``)."""
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self) -> None:
+        """Serve until :meth:`stop` is called or the task is cancelled."""
+        assert self._server is not None, "start() must be awaited first"
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        """Stop accepting connections and shut the process pool down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        logger.info("Analysis daemon stopped")
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def health(self) -> dict[str, Any]:
+        """Return a liveness snapshot."""
+        return {
+            "status": "ok" if self._executor is not None else "stopping",
+            "uptime": time.monotonic() - self._started_at,
+            "workers": self._workers,
+            "in_flight": self._in_flight,
+            "max_in_flight": self._max_in_flight,
+        }
+
+    def metrics(self) -> dict[str, Any]:
+        """Return cumulative counters and mean per-file latency."""
+        done = self._counters["files_completed"] + self._counters["files_failed"]
+        return {
+            **self._counters,
+            "in_flight": self._in_flight,
+            "connections": self._connections,
+            "mean_latency": self._latency_total / done if done else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one client connection until it closes."""
+        self._connections += 1
+        write_lock = asyncio.Lock()
+        pending: set[asyncio.Task[None]] = set()
+        backlog: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(self._max_in_flight)
+
+        async def send(message: dict[str, Any]) -> None:
+            async with write_lock:
+                writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+
+        async def submit_backlog() -> None:
+            # Analyses wait for pool slots here, not in the read loop
+            while (request := await backlog.get()) is not None:
+                task = await self._dispatch_analyze(request, send)
+                if task is not None:
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+
+        submitter = asyncio.create_task(submit_backlog())
+        try:
+            while not submitter.done():
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await send({"event": "error", "error": "Solicitud demasiado grande."})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as exc:
+                    await send({"event": "error", "error": f"JSON inválido: {exc}"})
+                    continue
+
+                self._counters["requests"] += 1
+                op = request.get("op")
+                if op == "health":
+                    await send({"event": "health", **self.health()})
+                elif op == "metrics":
+                    await send({"event": "metrics", **self.metrics()})
+                elif op == "analyze":
+                    await backlog.put(request)
+                else:
+                    await send(
+                        {
+                            "id": request.get("id"),
+                            "event": "error",
+                            "error": f"Operación desconocida: {op!r}",
+                        }
+                    )
+
+            if not submitter.done():
+                await backlog.put(None)
+            await submitter
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            logger.info("Client disconnected mid-request")
+        finally:
+            submitter.cancel()
+            self._connections -= 1
+            writer.close()
+
+    async def _dispatch_analyze(
+        self, request: dict[str, Any], send: _Sender
+    ) -> asyncio.Task[None] | None:
+        """Submit every path of an ``analyze`` request to the pool.
+
+        Waits for a free in-flight slot before each submission, which
+        holds up the connection's backlog (and, once it is full, reading
+        from the client) under load.
+
+        Returns:
+            A task that sends the ``done`` event once all files finish,
+            or ``None`` if the request was rejected.
+        """
+        req_id = request.get("id")
+        paths = request.get("paths")
+        options = request.get("options") or {}
+
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            await send({"id": req_id, "event": "error", "error": "'paths' debe ser una lista."})
+            return None
+        if not isinstance(options, dict):
+            await send({"id": req_id, "event": "error", "error": "'options' debe ser un objeto."})
+            return None
+        problem = validate_options(options)
+        if problem:
+            await send({"id": req_id, "event": "error", "error": problem})
+            return None
+
+        assert self._slots is not None
+        tasks: list[asyncio.Task[None]] = []
+        for path in paths:
+            await self._slots.acquire()
+            tasks.append(asyncio.create_task(self._run_one(req_id, path, options, send)))
+
+        async def finish() -> None:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await send({"id": req_id, "event": "done", "count": len(tasks)})
+
+        return asyncio.create_task(finish())
+
+    async def _run_one(
+        self, req_id: Any, path: str, options: dict[str, Any], send: _Sender
+    ) -> None:
+        """Analyse one file in the pool and stream its result back."""
+        assert self._executor is not None and self._slots is not None
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        self._in_flight += 1
+        QUEUE_DEPTH.set(self._in_flight, queue="daemon")
+        self._counters["files_submitted"] += 1
+        try:
+            result, shipped = await loop.run_in_executor(
+                self._executor, call_with_metrics, analyze_file, path, options
+            )
+            merge_worker_metrics(shipped)
+        except Exception as exc:
+            logger.exception("Worker failed on %s", path)
+            result = {"path": path, "error": f"Error inesperado durante el análisis: {exc}"}
+        finally:
+            self._in_flight -= 1
+            QUEUE_DEPTH.set(self._in_flight, queue="daemon")
+            self._slots.release()
+            self._latency_total += time.monotonic() - started
+
+        self._counters["files_failed" if "error" in result else "files_completed"] += 1
+        await send({"id": req_id, "event": "result", "result": result})
+
+
+def run_daemon(
+    host: str = DAEMON_HOST,
+    port: int = DAEMON_PORT,
+    socket_path: str | None = None,
+    workers: int = MAX_WORKER_THREADS,
+    max_in_flight: int = DAEMON_MAX_IN_FLIGHT,
+) -> None:
+    """Run an :class:`AnalysisDaemon` until SIGINT/SIGTERM."""
+
+    async def _main() -> None:
+        daemon = AnalysisDaemon(workers=workers, max_in_flight=max_in_flight)
+        await daemon.start(host=host, port=port, socket_path=socket_path)
+        serve = asyncio.create_task(daemon.serve_forever())
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # Windows has no add_signal_handler; KeyboardInterrupt still works.
+            with contextlib.suppress(NotImplementedError, RuntimeError):
+                loop.add_signal_handler(sig, serve.cancel)
+
+        try:
+            await serve
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await daemon.stop()
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+    asyncio.run(_main())
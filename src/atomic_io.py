@@ -0,0 +1,66 @@
+"""Crash-safe file replacement.
+
+:func:`write_text` and :func:`write_bytes` write to a temporary file in
+the target's directory, fsync it, rename it over the target and fsync
+the directory, so readers — and the file system after a crash — see
+either the previous file or the new one, never a truncated mix.
+Temporary names start with a dot, which directory scans such as
+:meth:`~model.feature_archive.FeatureArchive.prune` skip.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import stat
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def write_bytes(path: Path | str, data: bytes, mode: int | None = None) -> None:
+    """Replace *path* with *data*; readers see the old or the new file.
+
+    Args:
+        path: Target file; its directory must exist.
+        data: New contents.
+        mode: Permission bits of the new file.  ``None`` keeps those of
+            the file being replaced, or gives a new file the usual
+            ``0o666`` minus the umask.
+
+    Raises:
+        OSError: If the file could not be written or renamed.
+    """
+    path = Path(path)
+    if mode is None:
+        with contextlib.suppress(FileNotFoundError):
+            mode = stat.S_IMODE(path.stat().st_mode)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    # Created like open() would, so the umask applies (mkstemp forces 0o600)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    # Persist the rename itself (not possible on Windows, where it is not needed)
+    with contextlib.suppress(OSError):
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_text(path: Path | str, text: str, mode: int | None = None) -> None:
+    """Replace *path* with UTF-8 *text* (see :func:`write_bytes`)."""
+    write_bytes(path, text.encode("utf-8"), mode)
@@ -5,6 +5,7 @@ and application settings. Import these values instead of defining them
 inline in domain modules.
 """
 
+import os
 from typing import Final
 
 import numpy as np
@@ -35,6 +36,18 @@ WINDOW_MIN_WIDTH: Final[int] = 1200
 WINDOW_MIN_HEIGHT: Final[int] = 780
 CONTROL_PANEL_WIDTH: Final[int] = 350
 
+HISTORY_FETCH_BATCH: Final[int] = 256
+"""History rows handed to the list view per lazy fetch."""
+
+SEARCH_DEBOUNCE_MS: Final[int] = 150
+"""Pause in typing (ms) before the history search runs."""
+
+SEARCH_CHUNK_ROWS: Final[int] = 2000
+"""Matching rows delivered to the list per streamed chunk."""
+
+SEARCH_SCAN_THRESHOLD: Final[int] = 4000
+"""Below this many candidates, path terms are checked row by row."""
+
 # ---------------------------------------------------------------------------
 # Audio analysis defaults
 # ---------------------------------------------------------------------------
@@ -42,6 +55,319 @@ CONTROL_PANEL_WIDTH: Final[int] = 350
 AUDIO_FILE_PATTERNS: Final[str] = "Audio Files (*.mp3 *.wav *.flac)"
 """QFileDialog filter string for supported audio formats."""
 
+N_FFT: Final[int] = 2048
+HOP_LENGTH: Final[int] = 512
+"""STFT size / hop of the full-resolution analysis (librosa defaults)."""
+
+DEFAULT_FEATURES: Final[frozenset[str]] = frozenset(
+    {
+        "tempo",
+        "key",
+        "D",
+        "chroma",
+        "tuning",
+        "y",
+        "times",
+        "fingerprint",
+        "timbre",
+        "loudness",
+    }
+)
+"""Features computed by ``extract_all_features`` when no subset is given.
+
+The compact magnitude STFT (``stft``) that
+:meth:`~model.feature_extractor.FeatureExtractor.redisplay` needs is left
+out: it costs half the spectrogram's memory again, so only callers that
+re-render ask for it."""
+
+PROGRESSIVE_RENDERING: Final[bool] = True
+"""Show a cheap preview (waveform + coarse spectrogram) before full DSP."""
+
+PREVIEW_SR: Final[int] = 8000
+"""Sample rate (Hz) of the decimated signal used for previews."""
+
+PREVIEW_N_FFT: Final[int] = 512
+PREVIEW_HOP_LENGTH: Final[int] = 256
+"""STFT size / hop of the coarse preview spectrogram."""
+
+# ---------------------------------------------------------------------------
+# Spectrogram display
+# ---------------------------------------------------------------------------
+
+SPECTROGRAM_TOP_DB: Final[float] = 80.0
+"""Dynamic range (dB) drawn below the spectrogram's reference level."""
+
+CHROMA_NORM: Final[float | None] = np.inf
+"""Per-frame chroma normalisation (``np.inf``: max = 1, ``None``: raw energy)."""
+
+DISPLAY_CHOICES: Final[dict[str, tuple[tuple[str, object], ...]]] = {
+    "ref": (("Pico", None), ("Escala completa", 1.0)),
+    "top_db": (
+        (f"{SPECTROGRAM_TOP_DB:.0f} dB", SPECTROGRAM_TOP_DB),
+        ("60 dB", 60.0),
+        ("100 dB", 100.0),
+        ("Sin límite", None),
+    ),
+    "freq_scale": (("Logarítmica", "log"), ("Lineal", "linear")),
+    "chroma_norm": (("Máximo", CHROMA_NORM), ("L1", 1.0), ("L2", 2.0), ("Ninguna", None)),
+}
+"""Display settings offered by the window, as ``(label, value)`` choices.
+
+Keyed by the argument of ``FeatureExtractor.redisplay`` they set; the
+first choice of each is what the analysis draws."""
+
+# ---------------------------------------------------------------------------
+# Tempo estimation
+# ---------------------------------------------------------------------------
+
+TEMPO_MODE: Final[str] = "accurate"
+"""``"accurate"`` (librosa tempogram) or ``"fast"`` (FFT autocorrelation)."""
+
+TEMPO_FAST_FRAME_RATE: Final[float] = 40.0
+"""Onset-envelope rate (frames/s) the fast estimator resamples to, at any sample rate."""
+
+TEMPO_PRIOR_BPM: Final[float] = 120.0
+TEMPO_PRIOR_OCTAVES: Final[float] = 1.0
+"""Centre and width (octaves) of the fast estimator's log-normal BPM prior."""
+
+TEMPO_MIN_BPM: Final[float] = 60.0
+TEMPO_MAX_BPM: Final[float] = 200.0
+"""Tempo range searched by the fast estimator."""
+
+TEMPO_CANDIDATES: Final[int] = 3
+"""Tempo candidates (with confidences) reported by the fast estimator."""
+
+# ---------------------------------------------------------------------------
+# Timbre descriptors
+# ---------------------------------------------------------------------------
+
+N_MELS: Final[int] = 128
+"""Mel bands of the full-resolution mel spectrogram (onsets and MFCCs)."""
+
+N_MFCC: Final[int] = 13
+"""MFCC coefficients summarised per track."""
+
+ROLLOFF_PERCENT: Final[float] = 0.85
+"""Fraction of spectral energy below the reported roll-off frequency."""
+
+# ---------------------------------------------------------------------------
+# Loudness and dynamics
+# ---------------------------------------------------------------------------
+
+LOUDNESS_BLOCK_FRAMES: Final[int] = 65536
+"""Samples the loudness meter filters at a time (bounds its temp buffers)."""
+
+TRUE_PEAK_OVERSAMPLING: Final[int] = 4
+"""Oversampling factor of the true-peak approximation (BS.1770 uses 4×)."""
+
+# ---------------------------------------------------------------------------
+# Duplicate detection (audio fingerprints)
+# ---------------------------------------------------------------------------
+
+FINGERPRINT_BLOCK_FRAMES: Final[int] = 16
+"""Preview STFT frames averaged into one fingerprint block (~0.5 s)."""
+
+FINGERPRINT_MAX_BER: Final[float] = 0.2
+"""Maximum aligned bit error rate for two fingerprints to match."""
+
+FINGERPRINT_MIN_VOTES: Final[float] = 0.1
+"""Fraction of query codes that must agree on one track and offset."""
+
+FINGERPRINT_MAX_POSTINGS: Final[int] = 5000
+"""Codes shared by more index entries than this are ignored on lookup."""
+
+DUPLICATE_POLICY: Final[str] = "link"
+"""What to do with a re-analysed recording: ``"link"`` reuses the
+original's features and records ``duplicate_of``; ``"skip"`` also keeps
+it out of the history; ``"off"`` disables detection."""
+
+# ---------------------------------------------------------------------------
+# History persistence
+# ---------------------------------------------------------------------------
+
+HISTORY_FLUSH_INTERVAL_S: Final[float] = 2.0
+"""Longest time (s) a new history entry waits before being written to disk."""
+
+HISTORY_FLUSH_BATCH: Final[int] = 32
+"""Pending history entries that trigger a write before the interval ends."""
+
+# ---------------------------------------------------------------------------
+# Feature archive (restoring past analyses)
+# ---------------------------------------------------------------------------
+
+ARCHIVE_FEATURES: Final[bool] = True
+"""Archive spectrogram, chromagram and waveform of every analysed track."""
+
+ARCHIVE_WAVE_SR: Final[int] = 8000
+"""Sample rate (Hz) of archived waveforms (drawn only as an envelope)."""
+
+ARCHIVE_STFT: Final[bool] = True
+"""Also archive the compact magnitude STFT so past tracks can be re-rendered.
+
+Only results that include ``stft`` (not part of :data:`DEFAULT_FEATURES`,
+but requested by the GUI for its display settings) have one to archive."""
+
+ARCHIVE_PRUNE_GRACE_S: Final[float] = HISTORY_FLUSH_INTERVAL_S + 600.0
+"""Minimum age (s) of an archive entry before pruning may delete it.
+
+History is written behind (:data:`HISTORY_FLUSH_INTERVAL_S`), so a
+recent entry may belong to a record not on disk yet, e.g. one written
+by another running instance."""
+
+# ---------------------------------------------------------------------------
+# History thumbnails
+# ---------------------------------------------------------------------------
+
+THUMBNAIL_PX: Final[tuple[int, int]] = (96, 32)
+"""Width and height (pixels) of a history-list thumbnail."""
+
+THUMBNAIL_MEMORY_ITEMS: Final[int] = 512
+"""Decoded thumbnails kept in memory for the history list."""
+
+# ---------------------------------------------------------------------------
+# Plot viewports (zoom and pan)
+# ---------------------------------------------------------------------------
+
+VIEWPORT_DEBOUNCE_MS: Final[int] = 150
+"""Quiet time (ms) after a zoom or pan before the visible window is re-rendered."""
+
+# ---------------------------------------------------------------------------
+# Batch reports (headless rendering)
+# ---------------------------------------------------------------------------
+
+REPORT_FORMAT: Final[str] = "png"
+"""Default image format of batch reports (``"png"`` or ``"svg"``)."""
+
+REPORT_SIZE_IN: Final[tuple[float, float]] = (10.0, 9.0)
+"""Width and height (inches) of a per-track report."""
+
+REPORT_DPI: Final[int] = 100
+"""Resolution of raster reports and contact-sheet cells."""
+
+SHEET_COLUMNS: Final[int] = 6
+"""Tracks per row of a contact sheet."""
+
+SHEET_CELL_PX: Final[tuple[int, int]] = (320, 180)
+"""Width and height (pixels) of one contact-sheet thumbnail."""
+
+# ---------------------------------------------------------------------------
+# Live stream analysis
+# ---------------------------------------------------------------------------
+
+STREAM_WINDOW_SECONDS: Final[float] = 12.0
+"""Length of the rolling analysis window for live streams."""
+
+STREAM_UPDATE_SECONDS: Final[float] = 3.0
+"""Interval between tempo / key updates for live streams."""
+
+STREAM_N_FFT: Final[int] = 2048
+STREAM_HOP_LENGTH: Final[int] = 512
+"""STFT frame size / hop used for incremental stream frames."""
+
+STREAM_N_MELS: Final[int] = 128
+"""Mel bands used for the streaming onset envelope."""
+
+# ---------------------------------------------------------------------------
+# Job scheduling
+# ---------------------------------------------------------------------------
+
+MAX_WORKER_THREADS: Final[int] = max(1, os.cpu_count() or 1)
+"""Maximum number of analysis jobs running concurrently."""
+
+MAX_QUEUED_JOBS: Final[int] = 64
+"""Upper bound on submitted-but-unfinished jobs held by the scheduler."""
+
+STFT_WORKERS: Final[int] = max(1, os.cpu_count() or 1)
+"""Threads shared by all tracks for chunked STFTs of long signals."""
+
+STFT_CHUNK_FRAMES: Final[int] = 2048
+"""Largest STFT chunk (frames) handed to one thread (~47 s at 22.05 kHz)."""
+
+DECODE_WORKERS: Final[int] = 2
+"""Threads decoding upcoming files while ``analyze_many`` runs the DSP."""
+
+DECODE_PREFETCH: Final[int] = 4
+"""Files ``analyze_many`` decodes ahead of its analysis workers."""
+
+# ---------------------------------------------------------------------------
+# Memory admission
+# ---------------------------------------------------------------------------
+
+MEMORY_BUDGET_FRACTION: Final[float] = 0.5
+"""Share of physical memory that running analyses may reserve together."""
+
+REDUCED_SAMPLE_RATES: Final[tuple[int, ...]] = (22050, 11025)
+"""Rates tried, in order, for files too large to analyse at their native rate.
+
+Files that do not fit even at the lowest rate are analysed block by
+block (tempo and key only, no graphs)."""
+
+COMPRESSED_SIZE_RATIO: Final[float] = 11.0
+"""Bytes of 16-bit PCM assumed per file byte when a header cannot be read.
+
+Applies to formats soundfile cannot probe (MP3, AAC, ...); 11 is CD
+audio (1411 kbit/s) over a 128 kbit/s encoding."""
+
+# ---------------------------------------------------------------------------
+# Decoded PCM cache
+# ---------------------------------------------------------------------------
+
+PCM_CACHE_BYTES: Final[int] = 512 * 1024**2
+"""Decoded audio the GUI keeps in memory for re-analysis (``0`` disables the cache).
+
+Whatever it holds is reserved in the scheduler's memory budget, and
+trimmed when a waiting analysis needs the room."""
+
+PCM_CACHE_SPILL_DIR: Final[str | None] = None
+"""Scratch directory that evicted PCM spills to, memory-mapped (``None``: off)."""
+
+PCM_CACHE_SPILL_BYTES: Final[int] = 4 * 1024**3
+"""Decoded audio kept in the spill directory."""
+
+# ---------------------------------------------------------------------------
+# Analysis daemon
+# ---------------------------------------------------------------------------
+
+DAEMON_HOST: Final[str] = "127.0.0.1"
+DAEMON_PORT: Final[int] = 8765
+DAEMON_MAX_IN_FLIGHT: Final[int] = 2 * MAX_WORKER_THREADS
+"""Files submitted to the process pool at once; further reads wait."""
+
+DAEMON_MAX_LINE_BYTES: Final[int] = 1024 * 1024
+"""Maximum size of a single JSON request line."""
+
+# ---------------------------------------------------------------------------
+# Metrics and tracing
+# ---------------------------------------------------------------------------
+
+METRICS_HOST: Final[str] = "127.0.0.1"
+"""Interface the ``--metrics-port`` endpoint listens on (local only)."""
+
+METRICS_FILE_INTERVAL_S: Final[float] = 15.0
+"""Seconds between rewrites of the ``--metrics-file`` dump."""
+
+METRICS_BUCKETS_S: Final[tuple[float, ...]] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+"""Upper bounds (seconds) of the timing histogram buckets."""
+
+TRACE_MAX_EVENTS: Final[int] = 500_000
+"""Trace events kept per ``--trace`` run (~100 MB); later spans are dropped."""
+
 # ---------------------------------------------------------------------------
 # UI styles (Qt stylesheets)
 # ---------------------------------------------------------------------------
@@ -80,4 +406,13 @@ SUMMARY_ICONS: Final[dict[str, str]] = {
     "File": "📁",
     "BPM": "🎵",
     "Key": "🎹",
+    "Duplicate of": "🔗",
+    "Centroid": "🌗",
+    "Roll-off": "📉",
+    "Flatness": "〰️",
+    "ZCR": "⚡",
+    "MFCC": "🎛️",
+    "Loudness": "🔊",
+    "True peak": "📈",
+    "RMS": "📶",
 }
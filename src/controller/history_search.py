@@ -0,0 +1,120 @@
+"""Background history search.
+
+:class:`HistorySearch` runs :class:`~model.history_index.HistoryIndex`
+queries on a dedicated single-thread :class:`QThreadPool` and streams
+the matching rows back in chunks.  Every call to :meth:`search` starts a
+new *generation*; results of older generations are dropped, so typing
+quickly never shows stale matches.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from config import SEARCH_CHUNK_ROWS
+from model.history_index import HistoryIndex, HistoryQuery
+from model.history_store import HistoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class _SearchSignals(QObject):
+    """Signals of a :class:`_SearchJob` (``QRunnable`` has none)."""
+
+    rows = Signal(int, list)
+    finished = Signal(int, int, float)
+
+
+class _SearchJob(QRunnable):
+    """Runs one query on a pool thread and emits its rows in chunks."""
+
+    def __init__(self, generation: int, query: HistoryQuery, owner: HistorySearch) -> None:
+        super().__init__()
+        self.generation = generation
+        self.signals = _SearchSignals()
+        self._query = query
+        self._owner = owner
+        self.setAutoDelete(False)
+
+    def run(self) -> None:
+        total, elapsed = 0, 0.0
+        # Skip the work entirely if a newer query was already submitted
+        if self._owner.generation == self.generation:
+            started = time.perf_counter()
+            rows = self._owner.index.search(self._query)
+            elapsed = time.perf_counter() - started
+            total = len(rows)
+            for start in range(0, total, SEARCH_CHUNK_ROWS):
+                if self._owner.generation != self.generation:
+                    break
+                chunk = rows[start : start + SEARCH_CHUNK_ROWS].tolist()
+                self.signals.rows.emit(self.generation, chunk)
+        self.signals.finished.emit(self.generation, total, elapsed)
+
+
+class HistorySearch(QObject):
+    """Runs history queries off the GUI thread.
+
+    Signals
+    -------
+    rows_found(rows: list):
+        A chunk of matching store rows (ascending) for the current query.
+    finished(total: int, seconds: float):
+        The current query completed with *total* matches; *seconds* is
+        the index lookup time.
+
+    Args:
+        store: History records to search.
+        parent: Optional Qt parent.
+    """
+
+    rows_found = Signal(list)
+    finished = Signal(int, float)
+
+    def __init__(self, store: HistoryStore, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.index = HistoryIndex(store)
+        self.generation = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._jobs: dict[int, _SearchJob] = {}
+
+    def search(self, text: str) -> HistoryQuery:
+        """Start searching for *text* (see :meth:`HistoryQuery.parse`).
+
+        Any query still running is abandoned.
+
+        Returns:
+            The parsed query.
+        """
+        query = HistoryQuery.parse(text)
+        self.generation += 1
+        job = _SearchJob(self.generation, query, self)
+        job.signals.rows.connect(self._on_rows)
+        job.signals.finished.connect(self._on_finished)
+        self._jobs[job.generation] = job
+        self._pool.start(job)
+        return query
+
+    def cancel(self) -> None:
+        """Drop the results of any running query."""
+        self.generation += 1
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Block until the running query finishes (used on shutdown)."""
+        return self._pool.waitForDone(msecs)
+
+    @Slot(int, list)
+    def _on_rows(self, generation: int, rows: list[int]) -> None:
+        if generation == self.generation:
+            self.rows_found.emit(rows)
+
+    @Slot(int, int, float)
+    def _on_finished(self, generation: int, total: int, seconds: float) -> None:
+        self._jobs.pop(generation, None)
+        if generation == self.generation:
+            logger.debug("History search: %d rows in %.1f ms", total, seconds * 1000)
+            self.finished.emit(total, seconds)
@@ -0,0 +1,551 @@
+"""Background job scheduling for DSP analyses.
+
+Provides :class:`AnalysisJob` (a :class:`QRunnable` that analyses one
+file with its **own** :class:`AudioFile` instance) and
+:class:`JobScheduler`, which runs jobs on a :class:`QThreadPool`, hands
+out job IDs, bounds the number of outstanding jobs, and re-orders
+results so that they are delivered in submission order.
+
+Jobs also look their file up in a shared :class:`FingerprintIndex`
+right after decoding; a recording that was already analysed under
+another name is linked to (or skipped in favour of) the earlier result
+instead of running the full DSP pipeline again.
+
+Before a job starts, the scheduler estimates its peak memory from the
+file header (:mod:`model.memory_budget`) and admits it only while the
+running jobs fit in a global :class:`MemoryBudget`.  Headers are read
+on a separate one-thread pool, never on the GUI thread; files whose
+header cannot be read are estimated from their size.  Jobs load through
+the shared PCM cache; the decoded audio it keeps once a job ends stays
+reserved in the budget until a waiting job needs the room, which trims
+the cache.  Files too large for the budget are analysed at a reduced
+sample rate or, as a last resort, streamed block by block (tempo and
+key only).
+"""
+
+from __future__ import annotations
+
+import functools
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+from config import (
+    DEFAULT_FEATURES,
+    DUPLICATE_POLICY,
+    MAX_QUEUED_JOBS,
+    MAX_WORKER_THREADS,
+    PROGRESSIVE_RENDERING,
+    TEMPO_MODE,
+)
+from metrics import QUEUE_DEPTH, file_done
+from model.audio_file import AudioFile
+from model.feature_archive import FeatureArchive
+from model.feature_extractor import FeatureExtractor
+from model.fingerprint import FingerprintIndex, decode_fingerprint
+from model.memory_budget import (
+    MODE_FULL,
+    MODE_STREAM,
+    AnalysisPlan,
+    MemoryBudget,
+    guess_probe,
+    plan_analysis,
+    probe_audio,
+)
+from model.pcm_cache import shared_cache
+from model.stream_analyzer import analyze_file_blocks
+from persist import to_record
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class JobSignals(QObject):
+    """Signals emitted by an :class:`AnalysisJob` from a pool thread.
+
+    :class:`QRunnable` is not a :class:`QObject`, so each job owns one
+    of these to talk back to the GUI thread.
+
+    Signals
+    -------
+    progress(job_id: int, value: int):
+        Emitted with 0-100 during analysis.
+    preview(job_id: int, preview: dict):
+        Emitted once the audio is decoded, with a cheap low-resolution
+        preview (see :meth:`FeatureExtractor.extract_preview`).
+    finished(job_id: int, features: dict):
+        Emitted when analysis completes successfully.
+    error(job_id: int, message: str):
+        Emitted when loading or analysis fails.
+    """
+
+    progress = Signal(int, int)
+    preview = Signal(int, dict)
+    finished = Signal(int, dict)
+    error = Signal(int, str)
+
+
+class AnalysisJob(QRunnable):
+    """Loads and analyses a single file on a :class:`QThreadPool` thread.
+
+    Every job creates a private :class:`AudioFile`, so concurrent jobs
+    never share signal buffers or feature caches.  The
+    :class:`FeatureExtractor` is stateless and may be shared.
+
+    When *progressive* is set, a preview is emitted right after decoding
+    and before the (much slower) full pipeline runs.
+
+    With an *archive*, the drawable arrays of every new result are
+    written to disk (on the pool thread) and the result records their
+    ``archive`` ID.
+
+    When a *fingerprints* index is given, the preview's fingerprint is
+    looked up before the full pipeline.  A match is delivered with
+    ``duplicate_of`` set to the original's path (and ``skipped`` set
+    under the ``"skip"`` *duplicate_policy*); otherwise the new result
+    is added to the index.
+
+    The *plan* sets the resolution: files loaded at a reduced rate are
+    marked with ``analysis_mode``, and ``"stream"`` plans skip decoding
+    and deliver only ``tempo`` and ``key``.
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        filepath: str,
+        model_extractor: FeatureExtractor,
+        progressive: bool = PROGRESSIVE_RENDERING,
+        fingerprints: FingerprintIndex | None = None,
+        duplicate_policy: str = DUPLICATE_POLICY,
+        features: frozenset[str] | None = None,
+        archive: FeatureArchive | None = None,
+        plan: AnalysisPlan | None = None,
+        tempo_mode: str = TEMPO_MODE,
+    ) -> None:
+        super().__init__()
+        self.job_id = job_id
+        self.filepath = filepath
+        self.signals = JobSignals()
+        self._extractor = model_extractor
+        self._progressive = progressive
+        self._fingerprints = fingerprints
+        self._duplicate_policy = duplicate_policy
+        self._features = features
+        self._archive = archive
+        self.plan = plan or AnalysisPlan()
+        self._tempo_mode = tempo_mode
+        # perf_counter() when run() began (read by the scheduler's metrics)
+        self.started: float | None = None
+        # The scheduler owns the Python reference; Qt must not delete us.
+        self.setAutoDelete(False)
+
+    def run(self) -> None:
+        """Load audio and run the DSP pipeline.
+
+        This method runs **on a pool thread** — it must not touch the
+        UI directly.  Results are delivered via :attr:`signals`.
+        """
+        logger.info("Job %d started for %s", self.job_id, self.filepath)
+        self.started = time.perf_counter()
+        try:
+            if self.plan.mode == MODE_STREAM:
+                self._run_streaming()
+                return
+
+            audio = AudioFile()
+            self.signals.progress.emit(self.job_id, 10)
+            if not audio.load_audio(self.filepath, sr=self.plan.sr, use_cache=True):
+                self.signals.error.emit(
+                    self.job_id, "ERROR: No se pudo cargar el archivo de audio."
+                )
+                return
+
+            preview: dict[str, Any] = {}
+            if self._progressive or self._fingerprints is not None:
+                self.signals.progress.emit(self.job_id, 30)
+                preview = self._extractor.extract_preview(audio)
+                if self._progressive and not preview.get("error"):
+                    with span("emit preview", "signal", job=self.job_id):
+                        self.signals.preview.emit(self.job_id, preview)
+
+            codes = None
+            if self._fingerprints is not None and preview.get("fingerprint"):
+                codes = decode_fingerprint(preview["fingerprint"])
+                duplicate = self._match_duplicate(codes, preview)
+                if duplicate is not None:
+                    self.signals.progress.emit(self.job_id, 90)
+                    self.signals.finished.emit(self.job_id, duplicate)
+                    self.signals.progress.emit(self.job_id, 100)
+                    return
+
+            self.signals.progress.emit(self.job_id, 50)
+            features = self._extractor.extract_all_features(
+                audio, features=self._features, tempo_mode=self._tempo_mode
+            )
+            if features.get("error"):
+                self.signals.error.emit(self.job_id, f"ERROR: {features['error']}")
+                return
+            if self.plan.mode != MODE_FULL:
+                features["analysis_mode"] = self.plan.mode
+            if self._archive is not None:
+                archive_id = self._archive.save(features)
+                if archive_id:
+                    features["archive"] = archive_id
+            if codes is not None and self._fingerprints is not None:
+                # Only the scalars (and archive ID), like persisted entries:
+                # the index lives as long as the session
+                self._fingerprints.add(self.filepath, codes, to_record(features))
+
+            self.signals.progress.emit(self.job_id, 90)
+            logger.info("Job %d finished — emitting results", self.job_id)
+            with span("emit finished", "signal", job=self.job_id):
+                self.signals.finished.emit(self.job_id, features)
+            self.signals.progress.emit(self.job_id, 100)
+
+        except Exception as exc:
+            logger.exception("Job %d crashed", self.job_id)
+            self.signals.error.emit(self.job_id, f"Error inesperado durante el análisis: {exc}")
+
+    def _run_streaming(self) -> None:
+        """Analyse the file block by block, never decoding it whole."""
+        self.signals.progress.emit(self.job_id, 10)
+        features = analyze_file_blocks(self.filepath)
+        if features.get("error"):
+            self.signals.error.emit(self.job_id, "ERROR: No se pudo cargar el archivo de audio.")
+            return
+        features["analysis_mode"] = MODE_STREAM
+        self.signals.progress.emit(self.job_id, 90)
+        self.signals.finished.emit(self.job_id, features)
+        self.signals.progress.emit(self.job_id, 100)
+
+    def _match_duplicate(self, codes: Any, preview: dict[str, Any]) -> dict[str, Any] | None:
+        """Return a result built from an indexed copy of this recording.
+
+        Matches (from this session or persisted) are restored from the
+        feature archive; if that is not possible, their scalars (tempo,
+        key) are combined with the preview arrays for display.
+
+        Returns:
+            The result to deliver, or ``None`` to run the full pipeline.
+        """
+        assert self._fingerprints is not None
+        match = self._fingerprints.match(codes)
+        if match is None:
+            return None
+        original, payload, _ber = match
+        if original == self.filepath:
+            # Re-analysing the very same file is not a duplicate.
+            return None
+        # Always link to the first copy, not to an earlier duplicate.
+        original = payload.get("duplicate_of", original)
+
+        logger.info("Job %d: %s duplicates %s", self.job_id, self.filepath, original)
+        restored = None
+        if payload.get("archive") and self._archive is not None:
+            restored = self._archive.load(str(payload["archive"]))
+        if restored is not None:
+            result = restored
+        else:
+            result = {k: v for k, v in preview.items() if k != "preview"}
+            result.update(tempo=payload.get("tempo", 0.0), key=payload.get("key", "N/A"))
+        result.update(path=self.filepath, duplicate_of=original)
+        if self._duplicate_policy == "skip":
+            result["skipped"] = True
+        return result
+
+
+class JobScheduler(QObject):
+    """Runs :class:`AnalysisJob` instances on a bounded thread pool.
+
+    Jobs may complete in any order; :attr:`job_finished` and
+    :attr:`job_failed` are nevertheless emitted in **submission order**
+    (a finished job waits until every earlier job has been delivered).
+    :attr:`job_progress` and :attr:`job_preview` are forwarded
+    immediately.
+
+    Every job shares :attr:`fingerprints`, so duplicates are detected
+    across a whole session (callers may pre-load it with persisted
+    fingerprints).  It is ``None`` when *duplicate_policy* is ``"off"``.
+
+    Signals
+    -------
+    job_progress(job_id: int, value: int):
+        Raw per-job progress (0-100).
+    job_preview(job_id: int, preview: dict):
+        Raw per-job preview, forwarded as soon as it is available.
+    job_finished(job_id: int, features: dict):
+        Ordered delivery of a successful result.
+    job_failed(job_id: int, message: str):
+        Ordered delivery of a failure.
+    idle():
+        Emitted once every submitted job has been delivered.
+
+    Args:
+        model_extractor: Shared, stateless feature extractor.
+        max_workers: Number of concurrent pool threads.
+        max_queued: Maximum number of outstanding (queued + running,
+            not yet delivered) jobs.  :meth:`submit` refuses new jobs
+            beyond this bound.
+        duplicate_policy: ``"link"``, ``"skip"`` or ``"off"`` (see
+            :data:`~config.DUPLICATE_POLICY`).
+        features: Feature subset computed by every job (``None`` for
+            the full set, see :meth:`FeatureExtractor.extract_all_features`).
+        archive: Where jobs archive their results (``None`` disables
+            archiving); :attr:`archive` exposes it for restores.
+        memory: Budget that running jobs reserve their estimated peak
+            memory from (defaults to a share of physical memory).
+            Submitted jobs wait, in order, until their reservation fits.
+        tempo_mode: Tempo estimator used by every job (``"accurate"``
+            or ``"fast"``, see :mod:`model.tempo`).
+    """
+
+    job_progress = Signal(int, int)
+    job_preview = Signal(int, dict)
+    job_finished = Signal(int, dict)
+    job_failed = Signal(int, str)
+    idle = Signal()
+    # Emitted from the probe pool with (job_id, AnalysisPlan)
+    _job_planned = Signal(int, object)
+
+    def __init__(
+        self,
+        model_extractor: FeatureExtractor,
+        max_workers: int = MAX_WORKER_THREADS,
+        max_queued: int = MAX_QUEUED_JOBS,
+        duplicate_policy: str = DUPLICATE_POLICY,
+        features: frozenset[str] | None = None,
+        archive: FeatureArchive | None = None,
+        memory: MemoryBudget | None = None,
+        tempo_mode: str = TEMPO_MODE,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self._extractor = model_extractor
+        self._duplicate_policy = duplicate_policy
+        self._features = features
+        self._tempo_mode = tempo_mode
+        self.archive = archive
+        self.memory = memory if memory is not None else MemoryBudget()
+        self.fingerprints: FingerprintIndex | None = (
+            None if duplicate_policy == "off" else FingerprintIndex()
+        )
+        self._max_queued = max(1, max_queued)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, max_workers))
+        # Reads headers in submission order, off the GUI thread
+        self._probe_pool = QThreadPool(self)
+        self._probe_pool.setMaxThreadCount(1)
+        self._job_planned.connect(self._on_job_planned)
+
+        self._ids = itertools.count(1)
+        self._next_delivery: int = 1
+        # Jobs submitted but not yet delivered, keyed by job ID
+        self._outstanding: dict[int, AnalysisJob] = {}
+        # Completed results waiting for earlier jobs: id -> (ok, payload)
+        self._completed: dict[int, tuple[bool, Any]] = {}
+        # Jobs waiting for their plan or memory reservation, in submission order
+        self._waiting: deque[AnalysisJob] = deque()
+        # Jobs whose header is still being probed
+        self._probing: set[int] = set()
+        # Reservations of the running jobs, keyed by job ID
+        self._reserved: dict[int, int] = {}
+        # Bytes reserved for the decoded audio held by the PCM cache
+        self._cache_reserved: int = 0
+        # Jobs dropped by cancel_pending(), skipped by ordered delivery
+        self._cancelled: set[int] = set()
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def has_capacity(self) -> bool:
+        """Return ``True`` if :meth:`submit` would accept another job."""
+        return len(self._outstanding) < self._max_queued
+
+    def pending_count(self) -> int:
+        """Return the number of submitted jobs not yet delivered."""
+        return len(self._outstanding)
+
+    def next_delivery_id(self) -> int:
+        """Return the ID of the job whose result will be delivered next."""
+        return self._next_delivery
+
+    def submit(self, filepath: str) -> int | None:
+        """Queue *filepath* for analysis.
+
+        The file is planned (see :func:`plan_analysis`) on the probe
+        pool; the job waits until then.
+
+        Returns:
+            The new job ID, or ``None`` if the queue is full.
+        """
+        if not self.has_capacity():
+            logger.warning("Job queue full (%d) — rejecting %s", self._max_queued, filepath)
+            return None
+
+        job_id = next(self._ids)
+        job = AnalysisJob(
+            job_id,
+            filepath,
+            self._extractor,
+            fingerprints=self.fingerprints,
+            duplicate_policy=self._duplicate_policy,
+            features=self._features,
+            archive=self.archive,
+            tempo_mode=self._tempo_mode,
+        )
+        job.signals.progress.connect(self.job_progress)
+        job.signals.preview.connect(self.job_preview)
+        job.signals.finished.connect(self._on_job_finished)
+        job.signals.error.connect(self._on_job_error)
+
+        # Keep a Python reference until delivery so the signals object
+        # outlives the runnable.
+        self._outstanding[job_id] = job
+        QUEUE_DEPTH.set(len(self._outstanding), queue="scheduler")
+        self._waiting.append(job)
+        self._probing.add(job_id)
+        self._probe_pool.start(
+            functools.partial(self._plan, job_id, filepath, self.memory.capacity)
+        )
+        logger.debug("Job %d queued for %s", job_id, filepath)
+        return job_id
+
+    def _plan(self, job_id: int, filepath: str, budget: int) -> None:
+        """Plan a job from its file's header (runs on the probe pool)."""
+        probe = probe_audio(filepath) or guess_probe(filepath)
+        features = self._features if self._features is not None else DEFAULT_FEATURES
+        self._job_planned.emit(job_id, plan_analysis(probe, budget, features))
+
+    @Slot(int, object)
+    def _on_job_planned(self, job_id: int, plan: AnalysisPlan) -> None:
+        self._probing.discard(job_id)
+        job = self._outstanding.get(job_id)
+        if job is None:  # cancelled while probing
+            return
+        job.plan = plan
+        logger.debug("Job %d planned: %r", job_id, plan)
+        self._admit()
+
+    def _admit(self) -> None:
+        """Start planned jobs, in order, while their memory fits the budget.
+
+        A job that does not fit trims the PCM cache first.
+        """
+        while self._waiting and self._waiting[0].job_id not in self._probing:
+            job = self._waiting[0]
+            if not self.memory.try_acquire(job.plan.nbytes):
+                shortfall = job.plan.nbytes - self.memory.available
+                if not self._reserve_cache(self._cache_reserved - shortfall):
+                    break
+                continue
+            self._waiting.popleft()
+            self._reserved[job.job_id] = job.plan.nbytes
+            self._pool.start(job)
+
+    def _reserve_cache(self, limit: int) -> bool:
+        """Trim the PCM cache to *limit* bytes and reserve what it still holds.
+
+        The cache never takes more than the budget has free.
+
+        Returns:
+            ``True`` if the reservation shrank.
+        """
+        cache = shared_cache()
+        limit = max(0, min(limit, self._cache_reserved + self.memory.available))
+        held = cache.trim(limit)
+        self.memory.release(self._cache_reserved)
+        self.memory.try_acquire(held)
+        shrank = held < self._cache_reserved
+        self._cache_reserved = held
+        return shrank
+
+    def _release(self, job_id: int) -> None:
+        """Return a finished job's reservation and admit waiting jobs.
+
+        The decoded audio it left in the PCM cache is reserved instead.
+        """
+        self.memory.release(self._reserved.pop(job_id, 0))
+        self._reserve_cache(shared_cache().memory_bytes)
+        self._admit()
+
+    def cancel_pending(self) -> int:
+        """Drop every job that has not started running yet.
+
+        Jobs still waiting for memory and jobs queued in the thread pool
+        are discarded (their reservations released) and never delivered;
+        running jobs are left to finish.
+
+        Returns:
+            The number of jobs cancelled.
+        """
+        cancelled = list(self._waiting)
+        self._waiting.clear()
+        for job_id in list(self._reserved):
+            job = self._outstanding.get(job_id)
+            if job is not None and self._pool.tryTake(job):
+                self.memory.release(self._reserved.pop(job_id))
+                cancelled.append(job)
+        for job in cancelled:
+            self._outstanding.pop(job.job_id, None)
+            self._cancelled.add(job.job_id)
+        if cancelled:
+            logger.info("Cancelled %d queued jobs", len(cancelled))
+            self._deliver_ready()
+        return len(cancelled)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Block until all probes and running jobs finish (used on shutdown)."""
+        return self._probe_pool.waitForDone(msecs) and self._pool.waitForDone(msecs)
+
+    # ------------------------------------------------------------------
+    # Ordered delivery
+    # ------------------------------------------------------------------
+
+    def _record(self, job_id: int, ok: bool) -> None:
+        job = self._outstanding.get(job_id)
+        if job is not None and job.started is not None:
+            file_done(ok, job.started)
+
+    @Slot(int, dict)
+    def _on_job_finished(self, job_id: int, features: dict[str, Any]) -> None:
+        self._record(job_id, True)
+        self._release(job_id)
+        self._completed[job_id] = (True, features)
+        self._deliver_ready()
+
+    @Slot(int, str)
+    def _on_job_error(self, job_id: int, message: str) -> None:
+        self._record(job_id, False)
+        self._release(job_id)
+        self._completed[job_id] = (False, message)
+        self._deliver_ready()
+
+    def _deliver_ready(self) -> None:
+        """Emit every completed result that is next in submission order."""
+        while True:
+            if self._next_delivery in self._cancelled:
+                self._cancelled.discard(self._next_delivery)
+                self._next_delivery += 1
+                continue
+            if self._next_delivery not in self._completed:
+                break
+            job_id = self._next_delivery
+            ok, payload = self._completed.pop(job_id)
+            self._outstanding.pop(job_id, None)
+            self._next_delivery += 1
+            # Connected slots (summary, plots, history) run inside the span
+            with span("deliver job", "signal", job=job_id, ok=ok):
+                if ok:
+                    self.job_finished.emit(job_id, payload)
+                else:
+                    self.job_failed.emit(job_id, payload)
+
+        QUEUE_DEPTH.set(len(self._outstanding), queue="scheduler")
+        if not self._outstanding:
+            self.idle.emit()
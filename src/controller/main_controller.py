@@ -9,120 +9,88 @@ from __future__ import annotations
 import json
 import logging
 import os
+from collections import deque
 from typing import Any
 
-from PySide6.QtCore import QObject, QThread, Signal, Slot
+from PySide6.QtCore import QObject, Signal, Slot
 from PySide6.QtWidgets import QFileDialog, QMessageBox, QWidget
 
-from config import AUDIO_FILE_PATTERNS
-from model.audio_file import AudioFile
+from config import ARCHIVE_FEATURES, AUDIO_FILE_PATTERNS, DEFAULT_FEATURES
+from controller.history_search import HistorySearch
+from controller.job_scheduler import JobScheduler
+from controller.thumbnail_loader import ThumbnailLoader
+from model.feature_archive import FeatureArchive
 from model.feature_extractor import FeatureExtractor
+from model.fingerprint import decode_fingerprint
+from model.history_store import HistoryStore
 from model.playlist_analyzer import PlaylistAnalyzer, SingleTrackResult
-from persist import load_history, save_entry
+from model.thumbnail_cache import ThumbnailCache
+from persist import HistoryWriter, load_history, to_record
+from tracing import span
+from view.history_model import HistoryFilterModel, HistoryListModel
 from view.main_window import MainWindow
 
 logger = logging.getLogger(__name__)
 
 
-class WorkerObject(QObject):
-    """Performs DSP analysis in a background :class:`QThread`.
-
-    Signals
-    -------
-    progress(value: int):
-        Emitted with 0-100 during analysis for progress bar updates.
-    finished(features: dict):
-        Emitted when analysis completes successfully.
-    error(message: str):
-        Emitted when any error occurs during loading or analysis.
-    """
-
-    progress = Signal(int)
-    finished = Signal(dict)
-    error = Signal(str)
-
-    def __init__(
-        self,
-        model_audio: AudioFile,
-        model_extractor: FeatureExtractor,
-        filepath: str,
-    ) -> None:
-        super().__init__()
-        self._audio = model_audio
-        self._extractor = model_extractor
-        self._filepath = filepath
-        # Batch context — set externally before starting the thread
-        self._batch_current: int = 1
-        self._batch_total: int = 1
-
-    @Slot()
-    def run(self) -> None:
-        """Load audio and run the DSP pipeline.
-
-        This method runs **on the worker thread** — it must not touch
-        the UI directly.  Results are delivered via Qt signals.
-        """
-        logger.info("Worker started for %s", self._filepath)
-        try:
-            self.progress.emit(10)
-            if not self._audio.load_audio(self._filepath):
-                self.error.emit("ERROR: No se pudo cargar el archivo de audio.")
-                return
-
-            self.progress.emit(50)
-            features = self._extractor.extract_all_features(self._audio)
-            if features.get("error"):
-                self.error.emit(f"ERROR: {features['error']}")
-                return
-
-            self.progress.emit(90)
-            logger.info("Worker finished — emitting results")
-            self.finished.emit(features)
-            self.progress.emit(100)
-
-        except Exception as exc:
-            logger.exception("Worker crashed")
-            self.error.emit(f"Error inesperado durante el análisis: {exc}")
-
-
 class MainController(QObject):
     """Orchestrates Model <-> View communication.
 
     Responsible for
-    - Handling UI requests (file dialog -> analysis).
-    - Running DSP on a background thread via :class:`WorkerObject`.
+    - Handling UI requests (file dialog / drag & drop -> analysis).
+    - Running DSP on a thread pool via :class:`JobScheduler`.
     - Maintaining an analysis history (:class:`PlaylistAnalyzer`).
     - Pushing results back to the View thread-safely via Qt signals.
     """
 
-    # Signals used to push data from the worker thread back to the UI
+    # Signals used to push data from the worker threads back to the UI
     signal_status_update = Signal(str, str)
     signal_summary_update = Signal(dict)
     signal_graph_update = Signal(dict)
+    signal_preview_update = Signal(dict)
     signal_filepath_update = Signal(str)
     signal_progress = Signal(int)
-    signal_history_update = Signal(list)
     signal_history_restore = Signal(int)
 
     def __init__(
         self,
-        model_audio: AudioFile,
         model_extractor: FeatureExtractor,
         view_window: MainWindow,
     ) -> None:
         super().__init__()
-        self.model_audio = model_audio
         self.model_extractor = model_extractor
         self.model_playlist = PlaylistAnalyzer()
         self.view_window = view_window
-
-        # Keep track of each result's features keyed by list index
-        self._history_features: list[dict[str, Any]] = []
-        # Scalar-only list of previous sessions (persisted)
-        self._persisted_history: list[dict[str, Any]] = []
-        # Batch processing state
-        self._batch_files: list[str] = []
-        self._batch_index: int = 0
+        # The compact STFT lets display settings redraw a result without DSP
+        self.scheduler = JobScheduler(
+            model_extractor,
+            features=DEFAULT_FEATURES | {"stft"},
+            archive=FeatureArchive() if ARCHIVE_FEATURES else None,
+            parent=self,
+        )
+        # Display settings chosen in the view (empty: as analysed)
+        self._display_settings: dict[str, Any] = {}
+
+        # Scalar history records (previous sessions first), shown lazily
+        self.history = HistoryListModel(HistoryStore(), parent=self)
+        # Full features of this session's tracks, keyed by history row
+        self._session_features: dict[int, dict[str, Any]] = {}
+        # Search over the history, run off the GUI thread
+        self.search = HistorySearch(self.history.store, parent=self)
+        self.search_results = HistoryFilterModel(self.history.store, parent=self)
+        self._search_text: str = ""
+        # History thumbnails, rendered and loaded off the GUI thread
+        self.thumbnails = ThumbnailLoader(ThumbnailCache(), self.scheduler.archive, parent=self)
+        self.history.set_thumbnails(self.thumbnails)
+        self.search_results.set_thumbnails(self.thumbnails)
+        # Saves new history entries to disk in the background
+        self._history_writer = HistoryWriter()
+        # Files waiting for scheduler capacity
+        self._pending_files: deque[str] = deque()
+        # Progress of the current run (reset whenever the scheduler idles)
+        self._run_total: int = 0
+        self._run_done: int = 0
+        self._job_progress: dict[int, int] = {}
 
         self._connect_signals_to_slots()
 
@@ -136,179 +104,332 @@ class MainController(QObject):
         self.view_window.signal_analyze_request.connect(self.handle_analyze_request)
         self.view_window.signal_history_item_selected.connect(self._restore_from_history)
         self.view_window.signal_export_request.connect(self._handle_export_request)
+        self.view_window.signal_history_search.connect(self._on_history_search)
+        self.view_window.signal_display_settings.connect(self._on_display_settings)
+
+        # History search -> Controller
+        self.search.rows_found.connect(self.search_results.append_rows)
+        self.search.finished.connect(self._on_search_finished)
+
+        # Scheduler -> Controller
+        self.scheduler.job_progress.connect(self._on_job_progress)
+        self.scheduler.job_preview.connect(self._on_job_preview)
+        self.scheduler.job_finished.connect(self._on_analysis_finished)
+        self.scheduler.job_failed.connect(self._on_analysis_error)
+        self.scheduler.idle.connect(self._on_scheduler_idle)
 
         # Controller -> View
         self.signal_status_update.connect(self.view_window.update_status)
         self.signal_summary_update.connect(self.view_window.display_summary)
         self.signal_graph_update.connect(self.view_window.display_analysis)
+        self.signal_preview_update.connect(self.view_window.display_preview)
         self.signal_filepath_update.connect(self.view_window.update_filepath)
         self.signal_progress.connect(self.view_window.update_progress)
-        self.signal_history_update.connect(self.view_window.update_history_list)
         self.signal_history_restore.connect(self.view_window.highlight_history_item)
 
         # Load persisted history from previous sessions
         self._load_persisted_history()
+        self.view_window.set_history_model(self.history)
 
     # ------------------------------------------------------------------
     # Entry point: user wants to analyse files
     # ------------------------------------------------------------------
 
     @Slot(str)
-    def handle_analyze_request(self, _dummy: str = "") -> None:
-        """Open a file dialog and start background analysis.
+    def handle_analyze_request(self, path: str = "") -> None:
+        """Start background analysis of *path*, or ask the user for files.
 
-        Supports multiple file selection for batch processing.
-        Files are analysed sequentially.
+        A non-empty *path* comes from a drag & drop; otherwise a file
+        dialog supporting multiple selection is opened.  Requests made
+        while a previous run is still in progress are appended to it.
         """
-        filepaths, _ = QFileDialog.getOpenFileNames(
-            QWidget(self.view_window),
-            "Seleccionar Archivos de Audio",
-            "",
-            AUDIO_FILE_PATTERNS,
-        )
+        if path:
+            filepaths = [path]
+        else:
+            filepaths, _ = QFileDialog.getOpenFileNames(
+                QWidget(self.view_window),
+                "Seleccionar Archivos de Audio",
+                "",
+                AUDIO_FILE_PATTERNS,
+            )
         if not filepaths:
             self.signal_status_update.emit("Seleccion cancelada.", "orange")
             return
 
-        if len(filepaths) == 1:
-            # Single file — normal path
-            fp = filepaths[0]
-            self.signal_filepath_update.emit(fp)
+        if len(filepaths) == 1 and self._run_total == 0:
+            self.signal_filepath_update.emit(filepaths[0])
             self.signal_status_update.emit("Cargando y analizando...", "blue")
-            self._start_worker(fp)
-        else:
-            # Multiple files — batch path
-            self._batch_files = filepaths
-            self._batch_index = 0
-            self._start_next_batch()
-
-    def _start_next_batch(self) -> None:
-        """Start the next file in the batch queue."""
-        if self._batch_index >= len(self._batch_files):
-            self.signal_status_update.emit(
-                f"Batch completo: {len(self._batch_files)} archivos analizados.",
-                "green",
-            )
-            return
 
-        fp = self._batch_files[self._batch_index]
-        total = len(self._batch_files)
-        current = self._batch_index + 1
+        self._run_total += len(filepaths)
+        self._pending_files.extend(filepaths)
+        self._submit_pending()
 
-        self.signal_filepath_update.emit(fp)
-        self.signal_status_update.emit(f"Analizando archivo {current}/{total}...", "blue")
-        self._start_worker(fp, batch_current=current, batch_total=total)
+    def _submit_pending(self) -> None:
+        """Move queued files into the scheduler while it has capacity."""
+        while self._pending_files and self.scheduler.has_capacity():
+            fp = self._pending_files.popleft()
+            job_id = self.scheduler.submit(fp)
+            if job_id is not None:
+                self._job_progress[job_id] = 0
+
+        if self._run_total > 1 and self._run_done < self._run_total:
+            self.signal_status_update.emit(
+                f"Analizando archivo {self._run_done + 1}/{self._run_total}...", "blue"
+            )
 
     # ------------------------------------------------------------------
-    # QThread worker management
+    # Scheduler callbacks
     # ------------------------------------------------------------------
 
-    def _start_worker(
-        self,
-        filepath: str,
-        batch_current: int = 1,
-        batch_total: int = 1,
-    ) -> None:
-        """Create a :class:`WorkerObject`, move it to a :class:`QThread`,
-        and start processing."""
-        self._thread = QThread(self)
-        self._worker = WorkerObject(self.model_audio, self.model_extractor, filepath)
-        self._worker.moveToThread(self._thread)
-
-        # Capture batch context for the finished callback
-        self._worker._batch_current = batch_current
-        self._worker._batch_total = batch_total
-
-        # Wire worker signals
-        self._worker.progress.connect(self.signal_progress.emit)
-        self._worker.finished.connect(self._on_analysis_finished)
-        self._worker.error.connect(self._on_analysis_error)
-        self._thread.started.connect(self._worker.run)
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.error.connect(self._thread.quit)
-
-        # Clean up when done
-        self._thread.finished.connect(self._thread.deleteLater)
-
-        self._thread.start()
-
-    def _on_analysis_finished(self, features: dict[str, Any]) -> None:
-        """Handle a successful DSP result: store, summarise, display."""
+    @Slot(int, int)
+    def _on_job_progress(self, job_id: int, value: int) -> None:
+        """Aggregate per-job progress into a single run percentage."""
+        if job_id not in self._job_progress or self._run_total == 0:
+            return
+        self._job_progress[job_id] = value
+        running = sum(self._job_progress.values())
+        overall = (self._run_done * 100 + running) // self._run_total
+        # Only the last delivered job may report completion.
+        self.signal_progress.emit(min(overall, 99))
+
+    @Slot(int, dict)
+    def _on_job_preview(self, job_id: int, preview: dict[str, Any]) -> None:
+        """Show a job's preview if its result is the next to be displayed.
+
+        Previews of jobs further back in the queue are dropped; their
+        full results will replace whatever is on screen anyway.
+        """
+        if job_id != self.scheduler.next_delivery_id():
+            return
+        self.signal_filepath_update.emit(str(preview.get("path", "")))
+        self.signal_preview_update.emit(preview)
+        if self._run_total <= 1:
+            self.signal_status_update.emit("Vista previa lista, calculando detalle...", "blue")
+
+    def _finish_job(self, job_id: int) -> None:
+        """Book-keeping shared by successful and failed deliveries."""
+        self._job_progress.pop(job_id, None)
+        self._run_done += 1
+        self._submit_pending()
+
+    @Slot(int, dict)
+    def _on_analysis_finished(self, job_id: int, features: dict[str, Any]) -> None:
+        """Handle a successful DSP result: store, summarise, display.
+
+        Duplicates skipped by the scheduler (``"skipped"`` results) are
+        only reported in the status bar and kept out of the history.
+        Files too large to decode were streamed and have no graphs.
+        """
+        self._finish_job(job_id)
+
+        if features.get("skipped"):
+            name = os.path.basename(str(features.get("path", "")))
+            original = os.path.basename(str(features.get("duplicate_of", "")))
+            self.signal_status_update.emit(
+                f"Duplicado omitido: {name} (igual a {original})", "orange"
+            )
+            return
+
         result_obj = SingleTrackResult(features)
         self.model_playlist.add_analysis(features)
-        self._history_features.append(features)
+        record = to_record(features)
+        row = self.history.append(record)
+        if self._search_text:
+            self._on_history_search(self._search_text)
 
+        self.signal_filepath_update.emit(str(features.get("path", "")))
         self.signal_summary_update.emit(result_obj.get_summary())
-        self.signal_graph_update.emit(features)
-        self.signal_status_update.emit("Analisis completado exitosamente.", "green")
-
-        # Persist scalar data to disk
-        save_entry(features)
-
-        # Notify the View to refresh the history list
-        history_names = self._build_history_names()
-        self.signal_history_update.emit(history_names)
-
-        # Continue batch if there are more files
-        if self._batch_index < len(self._batch_files):
-            self._batch_index += 1
-            self._start_next_batch()
-
-    def _build_history_names(self) -> list[str]:
-        """Build a combined list of persisted and session history names."""
-        names: list[str] = []
-        for entry in self._persisted_history:
-            fname = str(entry.get("file", "N/A")).split("/")[-1]
-            names.append(f"{fname} (prev)")
-        for i, r in enumerate(self.model_playlist._results):  # noqa: SLF001
-            names.append(str(r.get_summary().get("File", f"Track {i}")))
-        return names
-
-    def _on_analysis_error(self, message: str) -> None:
-        """Handle an error from the worker thread.
-
-        Updates the status label AND shows a modal error dialog.
+        if "D" in features:
+            self._session_features[row] = features
+            self.thumbnails.add(record, features)
+            self.signal_graph_update.emit(self._displayed(features))
+            self.signal_status_update.emit("Analisis completado exitosamente.", "green")
+        else:
+            self.signal_status_update.emit(
+                "Analisis completado sin gráficos (archivo demasiado grande).", "orange"
+            )
+
+        # Persist scalar data to disk (batched on the writer thread)
+        self._history_writer.submit(features)
+
+    @Slot(int, str)
+    def _on_analysis_error(self, job_id: int, message: str) -> None:
+        """Handle an error from a worker job.
+
+        Updates the status label; a modal error dialog is shown only
+        for single-file runs so that a batch keeps going.
         """
+        batch = self._run_total > 1
+        self._finish_job(job_id)
         self.signal_status_update.emit(message, "red")
-        QMessageBox.critical(self.view_window, "Error de Análisis", message)
+        if not batch:
+            QMessageBox.critical(self.view_window, "Error de Análisis", message)
+
+    @Slot()
+    def _on_scheduler_idle(self) -> None:
+        """Close the current run once every job has been delivered."""
+        if self._pending_files:
+            return
+        if self._run_total > 1:
+            self.signal_status_update.emit(
+                f"Batch completo: {self._run_total} archivos analizados.",
+                "green",
+            )
+        self.signal_progress.emit(100)
+        self._run_total = 0
+        self._run_done = 0
+
+    def shutdown(self) -> None:
+        """Drop queued files and jobs, wait for running jobs and save the history."""
+        self._pending_files.clear()
+        self.search.cancel()
+        self.search.wait_for_done()
+        self.scheduler.cancel_pending()
+        self.scheduler.wait_for_done()
+        self.thumbnails.wait_for_done()
+        self._history_writer.close()
 
     # ------------------------------------------------------------------
     # History navigation
     # ------------------------------------------------------------------
 
     @Slot(int)
-    def _restore_from_history(self, index: int) -> None:
+    def _restore_from_history(self, row: int) -> None:
         """Restore the summary and graphs for a previously analysed track.
 
+        Entries from previous sessions are redrawn from the feature
+        archive; entries without an archive only show their summary.
+
         Args:
-            index: Position of the track in the history list.
+            row: Row of the track in the history model.
         """
-        if index < 0 or index >= len(self._history_features):
-            logger.warning("Invalid history index: %d", index)
+        store = self.history.store
+        if row < 0 or row >= len(store):
+            logger.warning("Invalid history row: %d", row)
+            return
+
+        features = self._session_features.get(row)
+        if features is None:
+            features = self._load_archived(store[row])
+        if features is None:
+            record = store[row]
+            # Older history files stored the tempo as "bpm"
+            tempo = float(record.get("tempo", record.get("bpm", 0.0)))
+            summary = SingleTrackResult({**record, "tempo": tempo}).get_summary()
+            self.signal_summary_update.emit(summary)
+            self.signal_status_update.emit(
+                f"Entrada anterior: {summary.get('File', 'Track')} (sin gráficos)", "orange"
+            )
+            self.signal_history_restore.emit(row)
             return
 
-        features = self._history_features[index]
         result_obj = SingleTrackResult(features)
 
         self.signal_summary_update.emit(result_obj.get_summary())
-        self.signal_graph_update.emit(features)
+        self.signal_graph_update.emit(self._displayed(features))
         self.signal_status_update.emit(
             f"Restaurado: {result_obj.get_summary().get('File', 'Track')}",
             "blue",
         )
-        self.signal_history_restore.emit(index)
+        self.signal_history_restore.emit(row)
+
+    def _load_archived(self, record: dict[str, Any]) -> dict[str, Any] | None:
+        """Return the archived features of a history *record*, if any."""
+        archive = self.scheduler.archive
+        if archive is None or not record.get("archive"):
+            return None
+        features = archive.load(str(record["archive"]))
+        if features is not None and record.get("duplicate_of"):
+            features["duplicate_of"] = record["duplicate_of"]
+        return features
+
+    # ------------------------------------------------------------------
+    # Display settings
+    # ------------------------------------------------------------------
+
+    @Slot(dict)
+    def _on_display_settings(self, settings: dict[str, Any]) -> None:
+        """Redraw the result on screen with the display *settings* chosen.
+
+        The settings also apply to every result shown afterwards.
+        Results without a cached STFT (archived before it was kept)
+        keep their analysed rendering.
+        """
+        self._display_settings = dict(settings)
+        features = self.view_window._last_features  # noqa: SLF001
+        if not features:
+            return
+        if features.get("stft") is None:
+            self.signal_status_update.emit(
+                "Este resultado no conserva la STFT; vuelva a analizarlo para cambiar la vista.",
+                "orange",
+            )
+            return
+        self.signal_graph_update.emit(self._displayed(features))
+
+    def _displayed(self, features: dict[str, Any]) -> dict[str, Any]:
+        """Return *features* rendered with the current display settings."""
+        if not self._display_settings or features.get("stft") is None:
+            return features
+        with span("redisplay", "view"):
+            shown = self.model_extractor.redisplay(features, **self._display_settings)
+        if shown.get("error"):
+            logger.warning("Cannot redisplay %s: %s", features.get("path"), shown["error"])
+            return features
+        # The key stays the analysed one: the chroma norm is only a view setting
+        shown["key"] = features.get("key")
+        return shown
+
+    # ------------------------------------------------------------------
+    # History search
+    # ------------------------------------------------------------------
+
+    @Slot(str)
+    def _on_history_search(self, text: str) -> None:
+        """Filter the history list by *text*; an empty text shows it all."""
+        self._search_text = text.strip()
+        if not self._search_text:
+            self.search.cancel()
+            self.view_window.set_history_model(self.history)
+            return
+        self.search_results.clear()
+        self.view_window.set_history_model(self.search_results)
+        self.search.search(self._search_text)
+
+    @Slot(int, float)
+    def _on_search_finished(self, total: int, seconds: float) -> None:
+        """Report the number of matches of the current search."""
+        self.signal_status_update.emit(
+            f"{total} coincidencias en el historial ({seconds * 1000:.0f} ms)", "blue"
+        )
 
     # ------------------------------------------------------------------
     # Persisted history
     # ------------------------------------------------------------------
 
     def _load_persisted_history(self) -> None:
-        """Load history from disk and populate the view."""
-        self._persisted_history = load_history()
-        if self._persisted_history:
-            names = self._build_history_names()
-            self.signal_history_update.emit(names)
-            logger.info("Loaded %d persisted entries", len(self._persisted_history))
+        """Load history from disk, index its fingerprints, populate the view.
+
+        Archived features (older than a grace period) and thumbnails no
+        record refers to any more are deleted.
+        """
+        records = load_history()
+        index = self.scheduler.fingerprints
+        if index is not None:
+            for entry in records:
+                if entry.get("fingerprint") and entry.get("path"):
+                    codes = decode_fingerprint(str(entry["fingerprint"]))
+                    index.add(str(entry["path"]), codes, entry)
+        if records:
+            self.history.extend(records, persisted=True)
+            logger.info("Loaded %d persisted entries", len(records))
+            # An empty (or unreadable) history prunes nothing, and recent
+            # entries (whose records may not be flushed yet, e.g. by another
+            # instance) are spared for ARCHIVE_PRUNE_GRACE_S
+            archive = self.scheduler.archive
+            if archive is not None:
+                archive.prune(str(entry["archive"]) for entry in records if entry.get("archive"))
+            self.thumbnails.prune(records)
 
     # ------------------------------------------------------------------
     # Export
@@ -334,6 +455,8 @@ class MainController(QObject):
             "file": str(features.get("path", "")),
             "bpm": features.get("tempo", 0),
             "key": features.get("key", ""),
+            **features.get("timbre", {}),
+            **features.get("loudness", {}),
         }
 
         if filepath.endswith(".csv"):
@@ -0,0 +1,176 @@
+"""Background loading of history-list thumbnails.
+
+:class:`ThumbnailLoader` renders (see :mod:`view.thumbnails`), caches
+(see :mod:`model.thumbnail_cache`) and loads thumbnails on a dedicated
+single-thread :class:`QThreadPool`, so neither a new analysis nor a
+scroll through thousands of history rows ever draws on the GUI thread.
+
+A thumbnail is requested only when the list first asks for a row's
+icon, i.e. when the row scrolls into view.  A missing thumbnail of a
+past session's entry is rendered from its feature archive on demand.
+Loaded images stay in a small in-memory LRU.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from PySide6.QtGui import QImage
+
+from config import THUMBNAIL_MEMORY_ITEMS
+from model.feature_archive import FeatureArchive
+from model.thumbnail_cache import ThumbnailCache, thumbnail_key
+from view.thumbnails import render_thumbnail
+
+logger = logging.getLogger(__name__)
+
+
+class _ThumbnailSignals(QObject):
+    """Signals of a :class:`_ThumbnailJob` (``QRunnable`` has none)."""
+
+    done = Signal(int, str, object)
+
+
+class _ThumbnailJob(QRunnable):
+    """Loads, or renders and stores, one thumbnail on a pool thread."""
+
+    def __init__(
+        self,
+        serial: int,
+        key: str,
+        record: dict[str, Any],
+        features: dict[str, Any] | None,
+        cache: ThumbnailCache,
+        archive: FeatureArchive | None,
+    ) -> None:
+        super().__init__()
+        self.serial = serial
+        self.key = key
+        self.signals = _ThumbnailSignals()
+        self._record = record
+        self._features = features
+        self._cache = cache
+        self._archive = archive
+        self.setAutoDelete(False)
+
+    def run(self) -> None:
+        # A fresh result always replaces what is cached under its key
+        pixels = None if self._features is not None else self._cache.get(self.key)
+        if pixels is None:
+            features = self._features
+            if features is None and self._archive is not None and self._record.get("archive"):
+                features = self._archive.load(str(self._record["archive"]))
+            pixels = render_thumbnail(features) if features is not None else None
+            if pixels is not None:
+                self._cache.put(self.key, pixels)
+        if pixels is None:
+            self.signals.done.emit(self.serial, self.key, None)
+            return
+        height, width, _ = pixels.shape
+        image = QImage(pixels.data, width, height, 4 * width, QImage.Format.Format_RGBA8888)
+        # QImage does not own the NumPy buffer; give it its own copy
+        self.signals.done.emit(self.serial, self.key, image.copy())
+
+
+class ThumbnailLoader(QObject):
+    """Supplies history thumbnails, loading them off the GUI thread.
+
+    Signals
+    -------
+    ready(key: str):
+        The thumbnail of *key* is now available from :meth:`thumbnail`.
+
+    Args:
+        cache: On-disk thumbnail cache.
+        archive: Feature archive used to render missing thumbnails of
+            archived records (``None``: only new results get one).
+        capacity: Thumbnails kept in memory.
+        parent: Optional Qt parent.
+    """
+
+    ready = Signal(str)
+
+    def __init__(
+        self,
+        cache: ThumbnailCache,
+        archive: FeatureArchive | None = None,
+        capacity: int = THUMBNAIL_MEMORY_ITEMS,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self._cache = cache
+        self._archive = archive
+        self._capacity = max(1, capacity)
+        self._images: OrderedDict[str, QImage] = OrderedDict()
+        self._missing: set[str] = set()
+        # Queued jobs by serial (kept alive until done) and per key
+        self._jobs: dict[int, _ThumbnailJob] = {}
+        self._pending: dict[str, int] = {}
+        self._serial = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+    def thumbnail(self, record: dict[str, Any]) -> QImage | None:
+        """Return the thumbnail of *record*, or ``None`` until it is ready.
+
+        A thumbnail that is not in memory is loaded (or rendered) in the
+        background; :attr:`ready` announces it.
+        """
+        key = thumbnail_key(record)
+        if key is None or key in self._missing or key in self._pending:
+            return None
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+        self._start(key, record, None)
+        return None
+
+    def add(self, record: dict[str, Any], features: dict[str, Any]) -> None:
+        """Render and cache the thumbnail of a new analysis in the background."""
+        key = thumbnail_key(record)
+        if key is None:
+            return
+        self._missing.discard(key)
+        self._start(key, record, features)
+
+    def prune(self, records: Iterable[dict[str, Any]]) -> int:
+        """Delete cached thumbnails none of *records* refers to.
+
+        Returns:
+            The number of thumbnails deleted.
+        """
+        return self._cache.prune(key for key in map(thumbnail_key, records) if key is not None)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Block until queued thumbnails are done (used on shutdown and in tests)."""
+        return self._pool.waitForDone(msecs)
+
+    def _start(self, key: str, record: dict[str, Any], features: dict[str, Any] | None) -> None:
+        self._serial += 1
+        job = _ThumbnailJob(self._serial, key, record, features, self._cache, self._archive)
+        job.signals.done.connect(self._on_done)
+        self._jobs[job.serial] = job
+        self._pending[key] = self._pending.get(key, 0) + 1
+        self._pool.start(job)
+
+    @Slot(int, str, object)
+    def _on_done(self, serial: int, key: str, image: QImage | None) -> None:
+        self._jobs.pop(serial, None)
+        self._pending[key] -= 1
+        if not self._pending[key]:
+            del self._pending[key]
+        if image is None:
+            # A render queued by add() may still be on its way
+            if key not in self._pending:
+                self._missing.add(key)
+            return
+        self._images[key] = image
+        self._images.move_to_end(key)
+        while len(self._images) > self._capacity:
+            self._images.popitem(last=False)
+        self.ready.emit(key)
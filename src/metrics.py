@@ -0,0 +1,528 @@
+"""Process-wide metrics: counters, gauges and histograms.
+
+The analysis code records what it does into one :class:`MetricsRegistry`
+(see :func:`registry`), whatever front end drives it — the GUI, the
+daemon, ``analyze_many`` or batch reports:
+
+- ``tunescope_files_analysed_total{status}`` and
+  ``tunescope_file_seconds`` — throughput and per-file latency
+  (decoding included).
+- ``tunescope_decode_seconds`` — audio decoding time (cache misses).
+- ``tunescope_stage_seconds{stage}`` — time spent in each DSP stage of
+  the feature graph (dependencies excluded).
+- ``tunescope_queue_depth{queue}`` — files waiting or running in the
+  GUI scheduler, ``analyze_many`` and the daemon.
+- ``tunescope_cache_requests_total{cache,result}`` — hits and misses of
+  the PCM and thumbnail caches.
+- ``tunescope_peak_rss_bytes{process}`` — peak resident memory of this
+  process (and of the daemon's workers).
+
+The registry renders the Prometheus text exposition format, served on
+a local port by :class:`MetricsServer` or rewritten periodically to a
+file by :class:`MetricsFileWriter` (e.g. for node_exporter's textfile
+collector).  Worker processes record into their own registry; their
+counters and histograms are shipped back with each result (see
+:func:`call_with_metrics`) and merged into the parent's.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import logging
+import math
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import tracing
+from atomic_io import write_text
+from config import METRICS_BUCKETS_S, METRICS_FILE_INTERVAL_S, METRICS_HOST
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+"""HTTP content type of the Prometheus text format."""
+
+_LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: tuple[str, ...], values: _LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base of the metric types: a value per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> _LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(
+                f"{self.name} expects labels {list(self.labels)}, got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Return the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Add *amount* (non-negative) to the count for *labels*."""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Return the current count for *labels*."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels_text(self.labels, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """A value that goes up and down (queue depth, memory)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: dict[_LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the gauge for *labels* to *value*."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def set_max(self, value: float, **labels: Any) -> None:
+        """Raise the gauge for *labels* to *value* if it is higher."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, -math.inf), float(value))
+
+    def value(self, **labels: Any) -> float:
+        """Return the current value for *labels* (``0.0`` if never set)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels_text(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets.
+
+    Args:
+        name: Metric name.
+        help_text: One-line description.
+        labels: Label names.
+        buckets: Increasing upper bounds; ``+Inf`` is implied.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = METRICS_BUCKETS_S,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: [per-bucket counts (+Inf last), sum]
+        self._series: dict[_LabelValues, tuple[list[int], list[float]]] = {}
+
+    def _get(self, key: _LabelValues) -> tuple[list[int], list[float]]:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        return series
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation of *value* for *labels*."""
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._get(key)
+            counts[slot] += 1
+            total[0] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the wall-clock duration of the ``with`` block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        """Return the number of observations for *labels*."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def total(self, **labels: Any) -> float:
+        """Return the sum of the observations for *labels*."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[1][0] if series else 0.0
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((key, (list(c), t[0])) for key, (c, t) in self._series.items())
+        bounds = [*self.buckets, math.inf]
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels_text(self.labels, key, le)} {cumulative}"
+            labels = _labels_text(self.labels, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """A named set of metrics.
+
+    Metrics are created on first request and shared afterwards, so any
+    module can ask for the metric it records into by name.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _metric(self, cls: type[_Metric], name: str, *args: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name!r} is already a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+        """Return the counter *name*, creating it if needed."""
+        return self._metric(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Gauge:
+        """Return the gauge *name*, creating it if needed."""
+        return self._metric(Gauge, name, help_text, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = METRICS_BUCKETS_S,
+    ) -> Histogram:
+        """Return the histogram *name*, creating it if needed."""
+        return self._metric(Histogram, name, help_text, labels, buckets)
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Call *collect* before every render (to refresh sampled gauges)."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for collect in collectors:
+            try:
+                collect()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        return "".join(metric.render() for metric in metrics)
+
+    # ------------------------------------------------------------------
+    # Shipping metrics between processes
+    # ------------------------------------------------------------------
+
+    def snapshot(self, reset: bool = False) -> dict[str, Any]:
+        """Return the counters and histograms as plain, picklable data.
+
+        Args:
+            reset: Clear them afterwards, so the next snapshot holds only
+                what was recorded in between.
+        """
+        data: dict[str, Any] = {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            with metric._lock:  # noqa: SLF001
+                if isinstance(metric, Counter):
+                    values: Any = dict(metric._values)  # noqa: SLF001
+                    if reset:
+                        metric._values.clear()  # noqa: SLF001
+                elif isinstance(metric, Histogram):
+                    values = {
+                        key: (list(counts), total[0])
+                        for key, (counts, total) in metric._series.items()  # noqa: SLF001
+                    }
+                    if reset:
+                        metric._series.clear()  # noqa: SLF001
+                else:
+                    continue
+            if values:
+                data[metric.name] = (metric.kind, metric.help, metric.labels, values)
+        return data
+
+    def merge(self, snapshot: dict[str, Any]) -> None:
+        """Add the counters and histograms of another process's snapshot."""
+        for name, (kind, help_text, labels, values) in snapshot.items():
+            if kind == "counter":
+                counter = self.counter(name, help_text, labels)
+                for key, amount in values.items():
+                    counter.inc(amount, **dict(zip(labels, key)))
+            elif kind == "histogram":
+                histogram = self.histogram(name, help_text, labels)
+                with histogram._lock:  # noqa: SLF001
+                    for key, (counts, total) in values.items():
+                        own_counts, own_total = histogram._get(key)  # noqa: SLF001
+                        if len(counts) != len(own_counts):
+                            logger.warning("Histogram %s has other buckets; skipped", name)
+                            continue
+                        for i, count in enumerate(counts):
+                            own_counts[i] += count
+                        own_total[0] += total
+
+
+def peak_rss_bytes() -> int | None:
+    """Return the peak resident set size of this process, if the OS reports it."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+_registry = MetricsRegistry()
+
+FILES_ANALYSED = _registry.counter(
+    "tunescope_files_analysed_total", "Files whose analysis finished.", ("status",)
+)
+FILE_SECONDS = _registry.histogram(
+    "tunescope_file_seconds", "Wall-clock time per analysed file, decoding included."
+)
+DECODE_SECONDS = _registry.histogram(
+    "tunescope_decode_seconds", "Time spent decoding audio files."
+)
+STAGE_SECONDS = _registry.histogram(
+    "tunescope_stage_seconds", "Time spent computing each DSP feature.", ("stage",)
+)
+QUEUE_DEPTH = _registry.gauge(
+    "tunescope_queue_depth", "Files queued or running, per queue.", ("queue",)
+)
+CACHE_REQUESTS = _registry.counter(
+    "tunescope_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+PEAK_RSS = _registry.gauge(
+    "tunescope_peak_rss_bytes", "Peak resident set size in bytes.", ("process",)
+)
+
+
+def _collect_rss() -> None:
+    peak = peak_rss_bytes()
+    if peak is not None:
+        PEAK_RSS.set(peak, process="main")
+
+
+_registry.add_collector(_collect_rss)
+
+
+def registry() -> MetricsRegistry:
+    """Return the process-wide registry the analysis code records into."""
+    return _registry
+
+
+def file_done(ok: bool, started: float) -> None:
+    """Count a finished file and its latency since ``perf_counter()`` *started*."""
+    FILES_ANALYSED.inc(status="ok" if ok else "error")
+    FILE_SECONDS.observe(time.perf_counter() - started)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """Count a hit or miss of *cache*."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def call_with_metrics(func: Callable[..., Any], *args: Any) -> tuple[Any, dict[str, Any]]:
+    """Run *func* in a worker process and return its result with the metrics it recorded.
+
+    The worker's counters and histograms are reset by the call, so the
+    parent can :meth:`MetricsRegistry.merge` each snapshot exactly once.
+    The worker's peak memory travels as ``"peak_rss"`` and, when
+    tracing, its spans as ``"trace"`` (see :mod:`tracing`).
+    """
+    result = func(*args)
+    snapshot = _registry.snapshot(reset=True)
+    return result, {"metrics": snapshot, "peak_rss": peak_rss_bytes(), "trace": tracing.drain()}
+
+
+def merge_worker_metrics(shipped: dict[str, Any]) -> None:
+    """Merge what :func:`call_with_metrics` shipped back from a worker."""
+    _registry.merge(shipped.get("metrics", {}))
+    if shipped.get("peak_rss") is not None:
+        PEAK_RSS.set_max(shipped["peak_rss"], process="worker")
+    tracing.add_events(shipped.get("trace", []))
+
+
+# ----------------------------------------------------------------------
+# Exporters
+# ----------------------------------------------------------------------
+
+
+class MetricsServer:
+    """Serves ``GET /metrics`` over HTTP on a background thread.
+
+    Args:
+        port: TCP port; ``0`` picks a free one (see :attr:`address`).
+        host: Interface to bind (local-only by default).
+        source: Registry to serve.
+    """
+
+    def __init__(
+        self,
+        port: int,
+        host: str = METRICS_HOST,
+        source: MetricsRegistry | None = None,
+    ) -> None:
+        metrics = source or _registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                logger.debug("metrics %s - %s", self.address_string(), format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        )
+        self._thread.start()
+        logger.info("Metrics served on http://%s:%d/metrics", *self.address[:2])
+
+    @property
+    def address(self) -> tuple[Any, ...]:
+        """The bound ``(host, port)``."""
+        return self._server.server_address
+
+    def close(self) -> None:
+        """Stop serving and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class MetricsFileWriter:
+    """Rewrites a Prometheus text file every *interval* seconds.
+
+    The file is replaced atomically, so scrapers never read a partial
+    dump; a final dump is written by :meth:`close`.
+
+    Args:
+        path: Output file (``*.prom`` for node_exporter).
+        interval: Seconds between dumps.
+        source: Registry to dump.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        interval: float = METRICS_FILE_INTERVAL_S,
+        source: MetricsRegistry | None = None,
+    ) -> None:
+        self._path = Path(path)
+        self._interval = max(0.1, interval)
+        self._source = source or _registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def write(self) -> bool:
+        """Dump the metrics now; returns ``True`` if the file was written."""
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            # World-readable, like the files node_exporter's textfile collector picks up
+            write_text(self._path, self._source.render(), mode=0o644)
+        except OSError as exc:
+            logger.warning("Could not write metrics to %s: %s", self._path, exc)
+            return False
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.write()
+
+    def close(self) -> None:
+        """Stop the periodic dumps and write a final one."""
+        self._stop.set()
+        self._thread.join()
+        self.write()
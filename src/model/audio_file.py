@@ -2,16 +2,29 @@
 
 Provides the :class:`AudioFile` class which wraps a loaded audio signal
 and its sample rate behind a controlled API (encapsulation pattern).
+Loads that opt in share decoded signals through the process-wide
+:class:`~model.pcm_cache.PCMCache`, so reloading a file skips decoding.
+
+The analysis works on a mono downmix, but loudness sums the energies of
+the channels (BS.1770), so a multichannel file's channels are metered
+from the same decode, before the downmix; the meter (a few values per
+100 ms) is kept instead of the channels.
 """
 
 from __future__ import annotations
 
 import logging
+import time
 from typing import Any
 
 import librosa
 import numpy as np
 
+from metrics import DECODE_SECONDS
+from model.loudness import LoudnessMeter, measure_loudness
+from model.pcm_cache import shared_cache
+from tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,31 +40,59 @@ class AudioFile:
         self._path: str | None = None
         self._y: np.ndarray | None = None  # Audio signal (protected)
         self._sr: int | None = None  # Sample rate (protected)
+        self._channel_meter: LoudnessMeter | None = None  # Multichannel files only
         self._features_cache: dict[str, Any] = {}
 
-    def load_audio(self, path: str) -> bool:
-        """Load an audio file via ``librosa.load``.
+    def load_audio(self, path: str, sr: int | None = None, use_cache: bool = False) -> bool:
+        """Load an audio file via ``librosa.load`` (downmixed to mono).
+
+        With *use_cache*, a file decoded earlier at the same *sr* (and
+        not modified since) is served from the shared PCM cache instead;
+        its signal is then read-only.
 
         Args:
             path: Absolute or relative path to a supported audio file
                   (``.mp3``, ``.wav``, ``.flac``, etc.).
+            sr: Target sample rate, or ``None`` to keep the native rate.
+            use_cache: Look the signal up in (and add it to) the cache.
 
         Returns:
             ``True`` on success, ``False`` if loading failed.
         """
-        self._path = path
-        self._features_cache = {}
-        try:
-            y, sr = librosa.load(path, sr=None, mono=True)
-            self._y = y
-            self._sr = int(sr)
-            logger.info("Loaded audio: %s (%d samples @ %d Hz)", path, len(self._y), self._sr)
-            return True
-        except Exception as exc:
-            logger.error("Failed to load audio: %s", exc, exc_info=True)
-            self._y = None
-            self._sr = None
-            return False
+        with span("load_audio", "io", path=path):
+            self._path = path
+            self._features_cache = {}
+            cache = shared_cache() if use_cache else None
+            cached = cache.get(path, sr) if cache is not None else None
+            if cached is not None:
+                self._y, self._sr, self._channel_meter = cached
+                logger.info("Loaded audio from cache: %s (%d samples)", path, len(self._y))
+                return True
+            try:
+                started = time.perf_counter()
+                # What librosa.load(sr=sr) does, with the channels metered
+                # (at the native rate) before the downmix
+                y, loaded_sr = librosa.load(path, sr=None, mono=False)
+                meter = None
+                if y.ndim > 1:
+                    meter = measure_loudness(y.T, int(loaded_sr))
+                    y = librosa.to_mono(y)
+                if sr is not None and sr != loaded_sr:
+                    y, loaded_sr = librosa.resample(y, orig_sr=loaded_sr, target_sr=sr), sr
+                DECODE_SECONDS.observe(time.perf_counter() - started)
+                if cache is not None:
+                    y = cache.put(path, sr, y, int(loaded_sr), meter)
+                self._y = y
+                self._sr = int(loaded_sr)
+                self._channel_meter = meter
+                logger.info("Loaded audio: %s (%d samples @ %d Hz)", path, len(self._y), self._sr)
+                return True
+            except Exception as exc:
+                logger.error("Failed to load audio: %s", exc, exc_info=True)
+                self._y = None
+                self._sr = None
+                self._channel_meter = None
+                return False
 
     # ------------------------------------------------------------------
     # Getters  (encapsulation)
@@ -65,6 +106,14 @@ class AudioFile:
         """Return the sample rate in Hz, or ``None`` if not loaded."""
         return self._sr
 
+    def get_channel_meter(self) -> LoudnessMeter | None:
+        """Return the loudness meter of a multichannel file's channels, or ``None``.
+
+        ``None`` for mono files and signals not decoded by
+        :meth:`load_audio`; their loudness is metered on the signal.
+        """
+        return self._channel_meter
+
     def get_path(self) -> str | None:
         """Return the file path of the loaded audio, or ``None``."""
         return self._path
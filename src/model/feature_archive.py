@@ -0,0 +1,299 @@
+"""On-disk archive of the arrays needed to redraw an analysis.
+
+Each archived track is a directory under the archive root holding
+plain ``.npy`` files (memory-mappable with ``np.load(mmap_mode="r")``)
+and a small ``meta.json``::
+
+    <root>/<archive_id>/meta.json
+    <root>/<archive_id>/D.npy        # dB spectrogram, uint8
+    <root>/<archive_id>/chroma.npy   # chromagram, uint8
+    <root>/<archive_id>/wave.npy     # waveform at ARCHIVE_WAVE_SR, int16
+    <root>/<archive_id>/stft.npy     # magnitude STFT, float16 (optional)
+
+Arrays are compressed by quantisation rather than by a codec, so they
+stay memory-mappable: the spectrogram spans at most 80 dB, which
+8 bits resolve to ~0.3 dB, and the waveform is only ever drawn as an
+envelope, so it is decimated to :data:`~config.ARCHIVE_WAVE_SR`.  A
+typical track takes roughly a quarter of its in-memory size.  With
+:data:`~config.ARCHIVE_STFT` the compact magnitude STFT is kept too
+(about twice the spectrogram's size), so a restored track can be
+re-rendered with other display settings by
+:meth:`FeatureExtractor.redisplay`.
+
+Restored arrays stay quantised and memory-mapped: :meth:`FeatureArchive.load`
+wraps them in :class:`QuantizedArray`, which de-quantises only what is
+read from it, so a zoomed window or a thumbnail never expands the whole
+spectrogram to ``float32``.  Entries that no history record refers to
+any more are deleted by :meth:`FeatureArchive.prune`.
+
+Tracks are written to a temporary directory and renamed into place, so
+a crash never leaves a half-written entry behind.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import librosa
+import numpy as np
+
+from config import ARCHIVE_PRUNE_GRACE_S, ARCHIVE_STFT, ARCHIVE_WAVE_SR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = Path.home() / ".music-analyzer" / "archive"
+
+_FORMAT_VERSION = 1
+
+_SCALAR_GROUPS = ("timbre", "loudness")
+"""Dicts of scalar statistics kept in ``meta.json``."""
+
+
+def _quantize(values: np.ndarray) -> tuple[np.ndarray, float, float]:
+    """Map *values* linearly onto ``uint8``; return the array and its range."""
+    lo, hi = float(np.min(values)), float(np.max(values))
+    scale = (hi - lo) or 1.0
+    q = np.rint((values - lo) * (255.0 / scale)).astype(np.uint8)
+    return q, lo, hi
+
+
+class QuantizedArray:
+    """Read-only ``float32`` view of an integer-quantised array.
+
+    Holds the stored integers (typically memory-mapped) and the linear
+    map back to values, ``q * scale + offset``.  Indexing de-quantises
+    only the selected elements; :func:`numpy.asarray` de-quantises it
+    all, for callers that need the whole matrix at once.
+
+    Args:
+        data: The stored integers.
+        scale: Value of one quantisation step.
+        offset: Value of a stored zero.
+    """
+
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, data: np.ndarray, scale: float, offset: float = 0.0) -> None:
+        self._data = data
+        self._scale = np.float32(scale)
+        self._offset = np.float32(offset)
+
+    @classmethod
+    def from_range(cls, data: np.ndarray, lo: float, hi: float) -> QuantizedArray:
+        """Wrap ``uint8`` *data* written by :func:`_quantize` with range *lo*-*hi*."""
+        return cls(data, ((hi - lo) or 1.0) / 255.0, lo)
+
+    @property
+    def data(self) -> np.ndarray:
+        """The stored integers."""
+        return self._data
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self._data.shape
+
+    @property
+    def ndim(self) -> int:
+        return self._data.ndim
+
+    @property
+    def size(self) -> int:
+        return self._data.size
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        return self._expand(self._data[key])
+
+    def __array__(self, dtype: Any = None, copy: bool | None = None) -> np.ndarray:
+        values = self._expand(self._data)
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+    def _expand(self, q: np.ndarray) -> np.ndarray:
+        values = np.asarray(q, dtype=np.float32) * self._scale
+        if self._offset:
+            values += self._offset
+        return values
+
+
+class FeatureArchive:
+    """Stores and restores the drawable arrays of analysed tracks.
+
+    Args:
+        root: Archive directory (created on first write).
+        keep_stft: Also archive the compact magnitude STFT (``stft``).
+    """
+
+    def __init__(
+        self, root: Path | str = DEFAULT_ARCHIVE_DIR, keep_stft: bool = ARCHIVE_STFT
+    ) -> None:
+        self._root = Path(root)
+        self._keep_stft = keep_stft
+
+    @property
+    def root(self) -> Path:
+        """The archive directory."""
+        return self._root
+
+    def exists(self, archive_id: str) -> bool:
+        """Return ``True`` if *archive_id* has a complete entry."""
+        return (self._root / archive_id / "meta.json").is_file()
+
+    def save(self, features: dict[str, Any]) -> str | None:
+        """Archive the drawable arrays of *features*.
+
+        Args:
+            features: A result of
+                :meth:`FeatureExtractor.extract_all_features` with at
+                least ``y``, ``sr`` and ``D``.
+
+        Returns:
+            The new archive ID, or ``None`` if the features lack arrays
+            or the write failed.
+        """
+        if features.get("D") is None or features.get("y") is None:
+            return None
+
+        archive_id = uuid.uuid4().hex
+        sr = int(features["sr"])
+        y = np.asarray(features["y"], dtype=np.float32)
+        wave_sr = min(sr, ARCHIVE_WAVE_SR)
+        if wave_sr < sr:
+            y = librosa.resample(y, orig_sr=sr, target_sr=wave_sr, res_type="polyphase")
+        peak = float(np.max(np.abs(y))) if y.size else 0.0
+        wave = np.rint(y * (32767.0 / (peak or 1.0))).astype(np.int16)
+
+        d_q, d_lo, d_hi = _quantize(np.asarray(features["D"]))
+        meta: dict[str, Any] = {
+            "version": _FORMAT_VERSION,
+            "path": str(features.get("path", "")),
+            "tempo": float(features.get("tempo", 0.0)),
+            "key": str(features.get("key", "")),
+            "sr": sr,
+            "hop_length": int(features.get("hop_length", 512)),
+            "wave_sr": wave_sr,
+            "wave_peak": peak,
+            "D_range": [d_lo, d_hi],
+        }
+        for name in _SCALAR_GROUPS:
+            if features.get(name):
+                meta[name] = {k: float(v) for k, v in features[name].items()}
+        arrays = {"D": d_q, "wave": wave}
+        if features.get("chroma") is not None:
+            c_q, c_lo, c_hi = _quantize(np.asarray(features["chroma"]))
+            arrays["chroma"] = c_q
+            meta["chroma_range"] = [c_lo, c_hi]
+        if features.get("tuning") is not None:
+            meta["tuning"] = float(features["tuning"])
+        if self._keep_stft and features.get("stft") is not None:
+            arrays["stft"] = np.asarray(features["stft"], dtype=np.float16)
+            meta["stft"] = True
+
+        try:
+            self._root.mkdir(parents=True, exist_ok=True)
+            tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self._root))
+            try:
+                for name, array in arrays.items():
+                    np.save(tmp / f"{name}.npy", array)
+                # meta.json is written last: its presence marks a complete entry
+                (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+                os.replace(tmp, self._root / archive_id)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+        except OSError as exc:
+            logger.warning("Could not archive features of %s: %s", meta["path"], exc)
+            return None
+
+        logger.debug("Archived %s as %s", meta["path"], archive_id)
+        return archive_id
+
+    def load(self, archive_id: str) -> dict[str, Any] | None:
+        """Restore a features dictionary that the visualisers can draw.
+
+        No audio is decoded and nothing is de-quantised up front: ``D``,
+        ``chroma`` and ``y`` stay memory-mapped, wrapped in
+        :class:`QuantizedArray`.  The waveform comes back at its archived rate, given as ``y_sr``;
+        an archived ``stft`` stays memory-mapped.
+
+        Returns:
+            The features, or ``None`` if the entry is missing or unreadable.
+        """
+        entry = self._root / archive_id
+        try:
+            meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+            d_q = np.load(entry / "D.npy", mmap_mode="r")
+            wave = np.load(entry / "wave.npy", mmap_mode="r")
+            chroma = None
+            if "chroma_range" in meta:
+                chroma = QuantizedArray.from_range(
+                    np.load(entry / "chroma.npy", mmap_mode="r"), *meta["chroma_range"]
+                )
+            stft = np.load(entry / "stft.npy", mmap_mode="r") if meta.get("stft") else None
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Archive entry %s is unreadable: %s", archive_id, exc)
+            return None
+
+        peak = meta["wave_peak"] or 1.0
+        return {
+            "path": meta["path"],
+            "tempo": meta["tempo"],
+            "key": meta["key"],
+            "sr": meta["sr"],
+            "hop_length": meta["hop_length"],
+            "D": QuantizedArray.from_range(d_q, *meta["D_range"]),
+            "chroma": chroma,
+            "stft": stft,
+            "tuning": meta.get("tuning"),
+            "y": QuantizedArray(wave, peak / 32767.0),
+            "y_sr": meta["wave_sr"],
+            "archive": archive_id,
+            **{name: meta[name] for name in _SCALAR_GROUPS if name in meta},
+        }
+
+    def remove(self, archive_id: str) -> None:
+        """Delete an archived entry (missing entries are ignored)."""
+        shutil.rmtree(self._root / archive_id, ignore_errors=True)
+
+    def prune(self, keep: Iterable[str], min_age: float = ARCHIVE_PRUNE_GRACE_S) -> int:
+        """Delete every entry whose ID is not in *keep*.
+
+        Temporary directories of writes in progress, and entries written
+        less than *min_age* seconds ago, are left alone: their history
+        record may simply not have been flushed yet.
+
+        Args:
+            keep: IDs still referenced (e.g. by the history records).
+            min_age: Grace period in seconds.
+
+        Returns:
+            The number of entries deleted.
+        """
+        kept = set(keep)
+        cutoff = time.time() - min_age
+        try:
+            orphans = [
+                entry
+                for entry in self._root.iterdir()
+                if entry.is_dir()
+                and not entry.name.startswith(".")
+                and entry.name not in kept
+                and entry.stat().st_mtime < cutoff
+            ]
+        except OSError:
+            return 0
+        for entry in orphans:
+            shutil.rmtree(entry, ignore_errors=True)
+        if orphans:
+            logger.info("Pruned %d archive entries", len(orphans))
+        return len(orphans)
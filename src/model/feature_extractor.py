@@ -3,22 +3,271 @@
 The :class:`FeatureExtractor` hides the complexity of ``librosa`` behind
 a simple ``extract_all_features()`` API (abstraction pattern).  Key detection
 uses the **Krumhansl-Schmuckler** algorithm.
+
+Features are declared in :data:`FEATURES` as a dependency graph
+(``stft_mag → power → tuning → chroma → key``, ``power → mel_db → onset → tempo``,
+``mel_db → mfcc → timbre``, ``y → loudness_meter → loudness``,
+``stft_mag → stft``, ``stft_mag → D``) and computed lazily through
+:class:`~model.feature_graph.FeatureGraph`, so a caller asking only for
+tempo and key never builds the dB spectrogram, and every feature shares
+the single full-resolution STFT (computed in parallel chunks for long
+signals, see :mod:`model.parallel_stft`).  The timbre descriptors of
+:mod:`model.timbre` reuse that STFT and the tempo path's mel spectrogram.
+
+On request, a compact copy of the magnitude STFT (``stft``) is returned
+and cached, so :meth:`FeatureExtractor.redisplay` can re-render the spectrogram and
+chromagram with other display settings without touching the audio.
 """
 
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterable
 from typing import Any
 
 import librosa
 import numpy as np
 
-from config import CHROMA_NAMES, K_MAJOR, K_MINOR
+from config import (
+    CHROMA_NAMES,
+    CHROMA_NORM,
+    DEFAULT_FEATURES,
+    HOP_LENGTH,
+    K_MAJOR,
+    K_MINOR,
+    N_FFT,
+    N_MFCC,
+    PREVIEW_HOP_LENGTH,
+    PREVIEW_N_FFT,
+    PREVIEW_SR,
+    ROLLOFF_PERCENT,
+    SPECTROGRAM_TOP_DB,
+    TEMPO_MODE,
+)
 from model.audio_file import AudioFile
+from model.feature_graph import FeatureGraph, FeatureRegistry
+from model.fingerprint import encode_fingerprint, fingerprint_from_spectrogram
+from model.loudness import LoudnessMeter, measure_loudness
+from model.parallel_stft import stft_magnitude
+from model.spectral_view import FREQ_SCALES, chromagram, compact_magnitude, spectrogram_db
+from model.tempo import TEMPO_MODES, estimate_tempo, estimate_tempo_fast, tempo_candidates
+from model.timbre import mel_power, summarize_timbre
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
 
+def determine_key(chroma_mean: np.ndarray) -> str:
+    """Determine the musical key from a normalised chroma vector.
+
+    Implements the **Krumhansl-Schmuckler** algorithm: the 12-bin
+    chroma profile is correlated against rotated major and minor
+    templates; the rotation with the highest score wins.
+
+    Args:
+        chroma_mean: 12-element array of mean chroma energy.
+
+    Returns:
+        A string like ``"C Mayor"`` or ``"A Menor"``.
+    """
+    chroma_mean = chroma_mean / np.sum(chroma_mean)  # normalise
+
+    best_match: float = -1.0
+    best_key: str = "Desconocida"
+
+    for i in range(12):
+        major_score = float(np.dot(chroma_mean, np.roll(K_MAJOR, i)))
+        minor_score = float(np.dot(chroma_mean, np.roll(K_MINOR, i)))
+
+        if major_score > best_match:
+            best_match = major_score
+            best_key = f"{CHROMA_NAMES[i]} Mayor"
+
+        if minor_score > best_match:
+            best_match = minor_score
+            best_key = f"{CHROMA_NAMES[i]} Menor"
+
+    return best_key
+
+
+# ---------------------------------------------------------------------------
+# Feature graph
+# ---------------------------------------------------------------------------
+
+FEATURES = FeatureRegistry()
+"""Feature declarations; sources are ``y``, ``sr``, ``path`` and ``tempo_mode``."""
+
+
+@FEATURES.feature("stft_mag", "y")
+def _stft_mag(y: np.ndarray) -> np.ndarray:
+    # Chunked across threads for long signals; identical to one librosa.stft call
+    return stft_magnitude(y, n_fft=N_FFT, hop_length=HOP_LENGTH)
+
+
+@FEATURES.feature("power", "stft_mag")
+def _power(stft_mag: np.ndarray) -> np.ndarray:
+    return stft_mag**2
+
+
+@FEATURES.feature("tuning", "power", "sr")
+def _tuning(power: np.ndarray, sr: int) -> float:
+    # What ``chroma_stft`` estimates internally; kept so re-renders skip it
+    return float(librosa.estimate_tuning(S=power, sr=sr, bins_per_octave=12))
+
+
+@FEATURES.feature("chroma", "power", "sr", "tuning")
+def _chroma(power: np.ndarray, sr: int, tuning: float) -> np.ndarray:
+    # Same result as ``chroma_stft(y=y)``, without a second STFT
+    return librosa.feature.chroma_stft(
+        S=power, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH, norm=CHROMA_NORM, tuning=tuning
+    )
+
+
+@FEATURES.feature("key", "chroma")
+def _key(chroma: np.ndarray) -> str:
+    return determine_key(np.mean(chroma, axis=1))
+
+
+@FEATURES.feature("mel_db", "power", "sr")
+def _mel_db(power: np.ndarray, sr: int) -> np.ndarray:
+    # Cached filter bank; same values as ``melspectrogram(S=power, sr=sr)``
+    return librosa.power_to_db(mel_power(power, sr, n_fft=N_FFT))
+
+
+@FEATURES.feature("onset", "mel_db", "sr")
+def _onset(mel_db: np.ndarray, sr: int) -> np.ndarray:
+    # Same envelope ``tempo(y=y)`` would compute internally
+    return librosa.onset.onset_strength(S=mel_db, sr=sr, hop_length=HOP_LENGTH)
+
+
+@FEATURES.feature("tempo_candidates", "onset", "sr")
+def _tempo_candidates(onset: np.ndarray, sr: int) -> list[tuple[float, float]]:
+    return tempo_candidates(onset, sr, hop_length=HOP_LENGTH)
+
+
+@FEATURES.feature("tempo", "onset", "sr", "tempo_mode")
+def _tempo(onset: np.ndarray, sr: int, tempo_mode: str) -> float:
+    if tempo_mode == "fast":
+        return estimate_tempo_fast(onset, sr, hop_length=HOP_LENGTH)
+    return estimate_tempo(onset_envelope=onset, sr=sr, hop_length=HOP_LENGTH)
+
+
+@FEATURES.feature("mfcc", "mel_db")
+def _mfcc(mel_db: np.ndarray) -> np.ndarray:
+    return librosa.feature.mfcc(S=mel_db, n_mfcc=N_MFCC)
+
+
+@FEATURES.feature("spectral_centroid", "stft_mag", "sr")
+def _spectral_centroid(stft_mag: np.ndarray, sr: int) -> np.ndarray:
+    return librosa.feature.spectral_centroid(S=stft_mag, sr=sr, n_fft=N_FFT)[0]
+
+
+@FEATURES.feature("spectral_rolloff", "stft_mag", "sr")
+def _spectral_rolloff(stft_mag: np.ndarray, sr: int) -> np.ndarray:
+    return librosa.feature.spectral_rolloff(
+        S=stft_mag, sr=sr, n_fft=N_FFT, roll_percent=ROLLOFF_PERCENT
+    )[0]
+
+
+@FEATURES.feature("spectral_flatness", "power")
+def _spectral_flatness(power: np.ndarray) -> np.ndarray:
+    # ``power`` is already squared, so no second exponent
+    return librosa.feature.spectral_flatness(S=power, power=1.0)[0]
+
+
+@FEATURES.feature("zcr", "y")
+def _zcr(y: np.ndarray) -> np.ndarray:
+    # Framed like the STFT (centred, same hop), but in the time domain
+    return librosa.feature.zero_crossing_rate(y, frame_length=N_FFT, hop_length=HOP_LENGTH)[0]
+
+
+@FEATURES.feature(
+    "timbre", "mfcc", "spectral_centroid", "spectral_rolloff", "spectral_flatness", "zcr"
+)
+def _timbre(
+    mfcc: np.ndarray,
+    spectral_centroid: np.ndarray,
+    spectral_rolloff: np.ndarray,
+    spectral_flatness: np.ndarray,
+    zcr: np.ndarray,
+) -> dict[str, float]:
+    return summarize_timbre(mfcc, spectral_centroid, spectral_rolloff, spectral_flatness, zcr)
+
+
+@FEATURES.feature("loudness_meter", "y", "sr")
+def _loudness_meter(y: np.ndarray, sr: int) -> LoudnessMeter:
+    # Mono signals only: a multichannel file's meter is seeded from its decode
+    return measure_loudness(y, sr)
+
+
+@FEATURES.feature("loudness", "loudness_meter")
+def _loudness(loudness_meter: LoudnessMeter) -> dict[str, float]:
+    return loudness_meter.summary()
+
+
+@FEATURES.feature("short_term_loudness", "loudness_meter")
+def _short_term_loudness(loudness_meter: LoudnessMeter) -> np.ndarray:
+    return loudness_meter.short_term()
+
+
+@FEATURES.feature("stft", "stft_mag")
+def _stft(stft_mag: np.ndarray) -> np.ndarray:
+    return compact_magnitude(stft_mag)
+
+
+@FEATURES.feature("D", "stft_mag")
+def _spectrogram_db(stft_mag: np.ndarray) -> np.ndarray:
+    return spectrogram_db(stft_mag)
+
+
+@FEATURES.feature("times", "stft_mag", "sr")
+def _times(stft_mag: np.ndarray, sr: int) -> np.ndarray:
+    return librosa.times_like(stft_mag, sr=sr, hop_length=HOP_LENGTH)
+
+
+@FEATURES.feature("preview_signal", "y", "sr")
+def _preview_signal(y: np.ndarray, sr: int) -> tuple[np.ndarray, int]:
+    if sr > PREVIEW_SR:
+        return librosa.resample(
+            y, orig_sr=sr, target_sr=PREVIEW_SR, res_type="polyphase"
+        ), PREVIEW_SR
+    return y, sr
+
+
+@FEATURES.feature("preview_mag", "preview_signal")
+def _preview_mag(preview_signal: tuple[np.ndarray, int]) -> np.ndarray:
+    y_low, _ = preview_signal
+    return np.abs(librosa.stft(y_low, n_fft=PREVIEW_N_FFT, hop_length=PREVIEW_HOP_LENGTH))
+
+
+@FEATURES.feature("fingerprint", "preview_mag", "preview_signal")
+def _fingerprint(preview_mag: np.ndarray, preview_signal: tuple[np.ndarray, int]) -> str:
+    codes = fingerprint_from_spectrogram(preview_mag, preview_signal[1], PREVIEW_N_FFT)
+    return encode_fingerprint(codes)
+
+
+_CACHEABLE = frozenset(
+    {
+        "tempo",
+        "key",
+        "chroma",
+        "tuning",
+        "D",
+        "stft",
+        "times",
+        "fingerprint",
+        "timbre",
+        "loudness",
+    }
+)
+"""Graph values kept in the :class:`AudioFile` feature cache."""
+
+
+def _cacheable(tempo_mode: str) -> frozenset[str]:
+    """Return the cacheable features for *tempo_mode* (fast tempi are not cached)."""
+    return _CACHEABLE if tempo_mode == "accurate" else _CACHEABLE - {"tempo"}
+
+
 class FeatureExtractor:
     """High-level DSP feature extraction.
 
@@ -27,88 +276,179 @@ class FeatureExtractor:
     """
 
     def _determine_key(self, chroma_mean: np.ndarray) -> str:
-        """Determine the musical key from a normalised chroma vector.
+        """Determine the musical key from a chroma vector.
 
-        Implements the **Krumhansl-Schmuckler** algorithm: the 12-bin
-        chroma profile is correlated against rotated major and minor
-        templates; the rotation with the highest score wins.
+        See :func:`determine_key`.
+        """
+        return determine_key(chroma_mean)
 
-        Args:
-            chroma_mean: 12-element array of mean chroma energy.
+    def feature_graph(
+        self, audio_file: AudioFile, tempo_mode: str = TEMPO_MODE
+    ) -> FeatureGraph | None:
+        """Return a lazy :class:`FeatureGraph` over a loaded file.
+
+        Features already in the file's feature cache, and the loudness
+        meter of a multichannel file's channels, are seeded into the
+        graph and never recomputed.  Only ``"accurate"`` tempi are
+        cached, so *tempo_mode* always gets the estimator it asks for.
 
         Returns:
-            A string like ``"C Mayor"`` or ``"A Menor"``.
+            The graph, or ``None`` if no audio is loaded.
         """
-        chroma_mean = chroma_mean / np.sum(chroma_mean)  # normalise
+        y = audio_file.get_signal()
+        sr = audio_file.get_sample_rate()
+        if y is None or sr is None:
+            return None
+        cacheable = _cacheable(tempo_mode)
+        cached = {k: v for k, v in audio_file.get_features_cache().items() if k in cacheable}
+        channel_meter = audio_file.get_channel_meter()
+        if channel_meter is not None:
+            cached["loudness_meter"] = channel_meter
+        return FeatureGraph(
+            FEATURES, y=y, sr=sr, path=audio_file.get_path(), tempo_mode=tempo_mode, **cached
+        )
 
-        best_match: float = -1.0
-        best_key: str = "Desconocida"
+    def extract_preview(self, audio_file: AudioFile) -> dict[str, Any]:
+        """Compute a cheap, low-resolution preview of a loaded file.
 
-        for i in range(12):
-            major_score = float(np.dot(chroma_mean, np.roll(K_MAJOR, i)))
-            minor_score = float(np.dot(chroma_mean, np.roll(K_MINOR, i)))
+        The signal is decimated to :data:`~config.PREVIEW_SR` and a
+        small-window STFT is taken, which costs a fraction of the full
+        pipeline.  The result can be drawn by the same visualisers as
+        :meth:`extract_all_features` output (no ``chroma``, ``tempo``
+        or ``key`` yet).
 
-            if major_score > best_match:
-                best_match = major_score
-                best_key = f"{CHROMA_NAMES[i]} Mayor"
+        The same STFT yields the track's audio fingerprint (see
+        :mod:`model.fingerprint`), which is also stored in the file's
+        feature cache so :meth:`extract_all_features` can reuse it.
+
+        Args:
+            audio_file: An already-loaded :class:`AudioFile` instance.
 
-            if minor_score > best_match:
-                best_match = minor_score
-                best_key = f"{CHROMA_NAMES[i]} Menor"
+        Returns:
+            A dictionary with keys ``path``, ``preview`` (``True``),
+            ``y``, ``sr``, ``D``, ``hop_length`` and ``fingerprint`` — or
+            ``{"error": ...}`` if no audio is loaded.
+        """
+        graph = self.feature_graph(audio_file)
+        if graph is None:
+            return {"error": "Archivo de audio no cargado."}
 
-        return best_key
+        y_low, sr_low = graph["preview_signal"]
+        fingerprint = graph["fingerprint"]
+        cache = audio_file.get_features_cache()
+        audio_file.set_features_cache({**cache, "fingerprint": fingerprint})
+        return {
+            "path": audio_file.get_path(),
+            "preview": True,
+            "y": y_low,
+            "sr": sr_low,
+            "D": librosa.amplitude_to_db(graph["preview_mag"], ref=np.max),
+            "hop_length": PREVIEW_HOP_LENGTH,
+            "fingerprint": fingerprint,
+        }
 
-    def extract_all_features(self, audio_file: AudioFile) -> dict[str, Any]:
-        """Run the full DSP pipeline on a loaded audio file.
+    def extract_all_features(
+        self,
+        audio_file: AudioFile,
+        features: Iterable[str] | None = None,
+        tempo_mode: str = TEMPO_MODE,
+    ) -> dict[str, Any]:
+        """Run the DSP pipeline on a loaded audio file.
 
         Extracts **tempo** (BPM), **musical key**, an STFT-based
-        **spectrogram** (in dB), and a **chromagram**.
+        **spectrogram** (in dB), a **chromagram**, the **timbre**
+        summary (see :mod:`model.timbre`) and **loudness** / dynamics
+        (see :mod:`model.loudness`) — or only the requested subset and
+        what it depends on.
 
         Args:
             audio_file: An already-loaded :class:`AudioFile` instance.
+            features: Names of the features to compute (see
+                :data:`FEATURES`); defaults to
+                :data:`~config.DEFAULT_FEATURES`.  ``{"tempo", "key"}``
+                skips the spectrogram entirely.
+            tempo_mode: ``"accurate"`` or ``"fast"`` (see
+                :mod:`model.tempo`).  In fast mode a requested ``tempo``
+                comes with its ``tempo_candidates``.
 
         Returns:
-            A dictionary with keys ``path``, ``tempo``, ``key``, ``D``,
-            ``chroma``, ``sr``, and ``times`` — or ``{"error": ...}`` if
-            no audio is loaded.
+            A dictionary with ``path``, ``sr``, ``hop_length`` and the
+            requested features (by default ``tempo``, ``key``, ``D``,
+            ``chroma``, ``tuning``, ``y``, ``times``, ``fingerprint``, ``timbre`` and ``loudness``,
+            dicts of scalar statistics) — or
+            ``{"error": ...}`` if no audio is loaded or a feature name
+            or tempo mode is unknown.
         """
-        y = audio_file.get_signal()
-        sr = audio_file.get_sample_rate()
-
-        if y is None or sr is None:
+        if tempo_mode not in TEMPO_MODES:
+            return {"error": f"Modo de tempo desconocido: {tempo_mode}"}
+        graph = self.feature_graph(audio_file, tempo_mode=tempo_mode)
+        if graph is None:
             logger.warning("extract_all_features called with no audio loaded")
             return {"error": "Archivo de audio no cargado."}
 
-        logger.info("Starting DSP pipeline on %s", audio_file.get_path())
+        wanted = DEFAULT_FEATURES if features is None else frozenset(features)
+        if tempo_mode == "fast" and "tempo" in wanted:
+            wanted |= {"tempo_candidates"}
+        unknown = wanted - set(graph)
+        if unknown:
+            return {"error": f"Características desconocidas: {', '.join(sorted(unknown))}"}
 
-        # 1. Tempo (BPM)
-        # Use the modern API path (librosa >= 0.10).  Fall back to the
-        # old path for very old installations.
-        try:
-            (tempo,) = librosa.feature.rhythm.tempo(y=y, sr=sr)  # type: ignore[attr-defined]
-        except AttributeError:
-            (tempo,) = librosa.beat.tempo(y=y, sr=sr)
+        logger.info("Starting DSP pipeline on %s (%s)", audio_file.get_path(), sorted(wanted))
+        with span("extract_all_features", "dsp", path=audio_file.get_path()):
+            result: dict[str, Any] = {
+                "path": audio_file.get_path(),
+                "sr": graph["sr"],
+                "hop_length": HOP_LENGTH,
+                **graph.select(sorted(wanted)),
+            }
 
-        # 2. Key (chroma-based)
-        chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-        chroma_mean = np.mean(chroma, axis=1)
-        key = self._determine_key(chroma_mean)
+        cache = audio_file.get_features_cache()
+        audio_file.set_features_cache(
+            {**cache, **{k: v for k, v in result.items() if k in _cacheable(tempo_mode)}}
+        )
+        logger.info("DSP pipeline complete — %s", sorted(graph.computed() - {"y", "sr", "path"}))
+        return result
 
-        # 3. Power spectrogram
-        spec_db = librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max)
-        times = librosa.times_like(spec_db, sr=sr)
+    def redisplay(
+        self,
+        features: dict[str, Any],
+        ref: float | None = None,
+        top_db: float | None = SPECTROGRAM_TOP_DB,
+        chroma_norm: float | None = CHROMA_NORM,
+        freq_scale: str = "log",
+    ) -> dict[str, Any]:
+        """Re-render a result with other display settings, without DSP.
 
-        features: dict[str, Any] = {
-            "path": audio_file.get_path(),
-            "tempo": float(tempo),
-            "key": key,
-            "D": spec_db,
+        ``D``, ``chroma`` and ``key`` are re-derived from the result's
+        cached ``stft`` (see :mod:`model.spectral_view`); the audio is
+        not decoded or transformed again.
+
+        Args:
+            features: A result of :meth:`extract_all_features` (or an
+                archived one) that includes ``stft`` and ``sr`` (and
+                ``tuning``, else it is re-estimated).
+            ref: Magnitude drawn as 0 dB; ``None`` uses the loudest bin.
+            top_db: Dynamic range of the spectrogram (``None``: unclipped).
+            chroma_norm: Per-frame chroma normalisation.
+            freq_scale: Frequency axis of the spectrogram view
+                (``"log"`` or ``"linear"``).
+
+        Returns:
+            A copy of *features* with the new ``D``, ``chroma``, ``key``
+            and ``freq_scale`` — or ``{"error": ...}`` if the result has
+            no cached STFT or a setting is invalid.
+        """
+        stft = features.get("stft")
+        if stft is None:
+            return {"error": "El resultado no conserva la STFT; vuelva a analizar el archivo."}
+        if freq_scale not in FREQ_SCALES:
+            return {"error": f"Escala de frecuencia desconocida: {freq_scale}"}
+
+        chroma = chromagram(stft, features["sr"], norm=chroma_norm, tuning=features.get("tuning"))
+        return {
+            **features,
+            "D": spectrogram_db(stft, ref=ref, top_db=top_db),
             "chroma": chroma,
-            "y": y,  # raw signal for waveform visualization
-            "sr": sr,
-            "times": times,
+            "key": determine_key(np.mean(chroma, axis=1)),
+            "freq_scale": freq_scale,
         }
-
-        audio_file.set_features_cache(features)
-        logger.info("DSP pipeline complete — BPM=%.1f, Key=%s", tempo, key)
-        return features
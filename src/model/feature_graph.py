@@ -0,0 +1,130 @@
+"""Lazy, memoised feature graph.
+
+Features are declared once in a :class:`FeatureRegistry`, each with the
+names of the features it is computed from::
+
+    registry = FeatureRegistry()
+
+    @registry.feature("chroma", "power", "sr")
+    def _chroma(power, sr):
+        ...
+
+A :class:`FeatureGraph` binds a registry to *source* values (the signal,
+sample rate, ...) and computes a feature only when it is first read,
+pulling in exactly the dependencies it needs.  Every value is computed
+at most once per graph, and its computation time (dependencies
+excluded) is recorded as ``tunescope_stage_seconds`` (see :mod:`metrics`)
+and, when tracing, as a span (see :mod:`tracing`).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from typing import Any
+
+from metrics import STAGE_SECONDS
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+_Compute = Callable[..., Any]
+
+
+class FeatureRegistry:
+    """Declarations of computable features and their dependencies."""
+
+    def __init__(self) -> None:
+        self._nodes: dict[str, tuple[tuple[str, ...], _Compute]] = {}
+
+    def feature(self, name: str, *deps: str) -> Callable[[_Compute], _Compute]:
+        """Decorator registering a function that computes *name* from *deps*.
+
+        The function receives the dependency values positionally, in
+        the order they are declared.
+        """
+
+        def register(func: _Compute) -> _Compute:
+            if name in self._nodes:
+                raise ValueError(f"Feature {name!r} is already registered")
+            self._nodes[name] = (deps, func)
+            return func
+
+        return register
+
+    def names(self) -> frozenset[str]:
+        """Return the names of all registered features."""
+        return frozenset(self._nodes)
+
+    def dependencies(self, name: str) -> tuple[str, ...]:
+        """Return the direct dependencies of *name*."""
+        return self._nodes[name][0]
+
+    def requires(self, names: Iterable[str]) -> set[str]:
+        """Return *names* plus everything they transitively depend on."""
+        seen: set[str] = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            if name in self._nodes:
+                stack.extend(self._nodes[name][0])
+        return seen
+
+    def compute(self, name: str, args: list[Any]) -> Any:
+        """Run the function registered for *name*."""
+        return self._nodes[name][1](*args)
+
+
+class FeatureGraph(Mapping[str, Any]):
+    """Read-only mapping whose values are computed on first access.
+
+    Args:
+        registry: Feature declarations.
+        sources: Values that are known up front — raw inputs such as
+            ``y`` and ``sr``, or features computed earlier (these are
+            never recomputed).
+    """
+
+    def __init__(self, registry: FeatureRegistry, **sources: Any) -> None:
+        self._registry = registry
+        self._values: dict[str, Any] = dict(sources)
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name: str) -> Any:
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            if name not in self._registry.names():
+                raise KeyError(name)
+            args = [self[dep] for dep in self._registry.dependencies(name)]
+            logger.debug("Computing feature %r", name)
+            with span(name, "dsp"):
+                started = time.perf_counter()
+                value = self._registry.compute(name, args)
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+            self._values[name] = value
+            return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._registry.names() | self._values.keys())
+
+    def __len__(self) -> int:
+        return len(self._registry.names() | self._values.keys())
+
+    def __contains__(self, name: object) -> bool:
+        # Membership must not trigger computation.
+        return name in self._values or name in self._registry.names()
+
+    def computed(self) -> frozenset[str]:
+        """Return the names whose values are already available."""
+        with self._lock:
+            return frozenset(self._values)
+
+    def select(self, names: Iterable[str]) -> dict[str, Any]:
+        """Compute *names* (and only what they need) into a plain dict."""
+        return {name: self[name] for name in names}
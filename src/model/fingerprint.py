@@ -0,0 +1,175 @@
+"""Compact audio fingerprints and a duplicate-track index.
+
+A fingerprint is a short array of 24-bit codes derived from the coarse
+preview spectrogram (see :meth:`FeatureExtractor.extract_preview`), so
+computing it costs no extra decode or full-resolution STFT:
+
+1. the magnitude spectrogram is folded into a 12-bin chromagram with a
+   fixed (cached) chroma filter bank;
+2. chroma frames are averaged over blocks of
+   :data:`~config.FINGERPRINT_BLOCK_FRAMES` frames;
+3. each block becomes a 12-bit pattern (bins above the block median) and
+   two consecutive patterns form one 24-bit code.
+
+:class:`FingerprintIndex` keeps an inverted index ``code -> tracks`` so a
+query only touches the posting lists of its own codes (sub-linear in the
+number of indexed tracks), then verifies candidates by bit error rate.
+"""
+
+from __future__ import annotations
+
+import base64
+import functools
+import logging
+import threading
+from collections import defaultdict
+from typing import Any
+
+import librosa
+import numpy as np
+
+from config import (
+    FINGERPRINT_BLOCK_FRAMES,
+    FINGERPRINT_MAX_BER,
+    FINGERPRINT_MAX_POSTINGS,
+    FINGERPRINT_MIN_VOTES,
+)
+
+logger = logging.getLogger(__name__)
+
+_SILENCE = 1e-6
+
+
+@functools.lru_cache(maxsize=8)
+def _chroma_filter(sr: int, n_fft: int) -> np.ndarray:
+    """Return a cached 12 × (1 + n_fft/2) chroma filter bank."""
+    return librosa.filters.chroma(sr=sr, n_fft=n_fft).astype(np.float32)
+
+
+def fingerprint_from_spectrogram(spec: np.ndarray, sr: int, n_fft: int) -> np.ndarray:
+    """Compute a fingerprint from a linear magnitude spectrogram.
+
+    Args:
+        spec: Magnitude STFT, shape ``(1 + n_fft // 2, n_frames)``.
+        sr: Sample rate the STFT was computed at.
+        n_fft: FFT size of the STFT.
+
+    Returns:
+        A ``uint32`` array of 24-bit codes (one per block pair).  Silent
+        blocks produce code ``0``.
+    """
+    chroma = _chroma_filter(sr, n_fft) @ (spec.astype(np.float32) ** 2)
+    n_blocks = chroma.shape[1] // FINGERPRINT_BLOCK_FRAMES
+    if n_blocks < 2:
+        return np.zeros(0, dtype=np.uint32)
+
+    blocks = chroma[:, : n_blocks * FINGERPRINT_BLOCK_FRAMES]
+    blocks = blocks.reshape(12, n_blocks, FINGERPRINT_BLOCK_FRAMES).mean(axis=2)
+
+    energy = blocks.sum(axis=0)
+    bits = blocks > np.median(blocks, axis=0, keepdims=True)
+    patterns = (bits.T.astype(np.uint32) << np.arange(12, dtype=np.uint32)).sum(axis=1)
+    patterns[energy <= _SILENCE * energy.max(initial=0.0)] = 0
+
+    codes = patterns[:-1] | (patterns[1:] << np.uint32(12))
+    codes[(patterns[:-1] == 0) | (patterns[1:] == 0)] = 0
+    return codes.astype(np.uint32)
+
+
+def encode_fingerprint(codes: np.ndarray) -> str:
+    """Encode fingerprint codes as a compact ASCII string for persistence."""
+    return base64.b64encode(codes.astype("<u4").tobytes()).decode("ascii")
+
+
+def decode_fingerprint(text: str) -> np.ndarray:
+    """Inverse of :func:`encode_fingerprint`."""
+    return np.frombuffer(base64.b64decode(text), dtype="<u4").astype(np.uint32)
+
+
+def bit_error_rate(a: np.ndarray, b: np.ndarray, offset: int = 0) -> float:
+    """Return the fraction of differing bits between aligned fingerprints.
+
+    *offset* shifts *b* relative to *a* (``a[i]`` vs ``b[i - offset]``).
+    Only non-silent, overlapping codes are compared.
+    """
+    if offset >= 0:
+        a_part, b_part = a[offset:], b
+    else:
+        a_part, b_part = a, b[-offset:]
+    n = min(len(a_part), len(b_part))
+    if n == 0:
+        return 1.0
+    a_part, b_part = a_part[:n], b_part[:n]
+    mask = (a_part != 0) & (b_part != 0)
+    if not mask.any():
+        return 1.0
+    diff = np.bitwise_xor(a_part[mask], b_part[mask])
+    flipped = np.unpackbits(diff.view(np.uint8)).sum()
+    return float(flipped) / (24.0 * mask.sum())
+
+
+class FingerprintIndex:
+    """Thread-safe inverted index for finding duplicate recordings.
+
+    Each indexed track has an ID, its fingerprint, and an arbitrary
+    *payload* (e.g. a history record: tempo, key, archive ID) that
+    is handed back on a match.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._postings: dict[int, list[tuple[str, int]]] = defaultdict(list)
+        self._tracks: dict[str, tuple[np.ndarray, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def add(self, track_id: str, codes: np.ndarray, payload: Any = None) -> None:
+        """Index *codes* under *track_id* (re-adding replaces the payload)."""
+        with self._lock:
+            if track_id in self._tracks:
+                self._tracks[track_id] = (self._tracks[track_id][0], payload)
+                return
+            self._tracks[track_id] = (codes, payload)
+            for pos, code in enumerate(codes.tolist()):
+                if code:
+                    self._postings[code].append((track_id, pos))
+
+    def match(self, codes: np.ndarray) -> tuple[str, Any, float] | None:
+        """Find an indexed track that is the same recording as *codes*.
+
+        Candidates are collected by voting on ``(track, time offset)``
+        through the posting lists of the query codes; the best candidate
+        is accepted if its aligned bit error rate is below
+        :data:`~config.FINGERPRINT_MAX_BER`.
+
+        Returns:
+            ``(track_id, payload, ber)`` or ``None``.
+        """
+        query = [(pos, code) for pos, code in enumerate(codes.tolist()) if code]
+        if not query:
+            return None
+
+        votes: dict[tuple[str, int], int] = defaultdict(int)
+        with self._lock:
+            for pos, code in query:
+                postings = self._postings.get(code)
+                # Very common codes (steady tones, near-silence) carry
+                # little information and would make lookups linear.
+                if not postings or len(postings) > FINGERPRINT_MAX_POSTINGS:
+                    continue
+                for track_id, track_pos in postings:
+                    votes[(track_id, pos - track_pos)] += 1
+
+            if not votes:
+                return None
+            (track_id, offset), count = max(votes.items(), key=lambda kv: kv[1])
+            if count < FINGERPRINT_MIN_VOTES * len(query):
+                return None
+            ref_codes, payload = self._tracks[track_id]
+
+        ber = bit_error_rate(codes, ref_codes, offset)
+        if ber > FINGERPRINT_MAX_BER:
+            return None
+        logger.info("Fingerprint match: %s (BER=%.3f, offset=%d)", track_id, ber, offset)
+        return track_id, payload, ber
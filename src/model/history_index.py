@@ -0,0 +1,256 @@
+"""Search index over the analysis history.
+
+:class:`HistoryIndex` answers :class:`HistoryQuery` filters (BPM range,
+exact or harmonically compatible keys, path substrings) over a
+:class:`~model.history_store.HistoryStore` without scanning every
+record in Python:
+
+- tempos are kept in a sorted array, so a BPM range is two binary
+  searches;
+- keys are stored as one small integer per row, so key filters are a
+  single vectorised membership test;
+- path substrings are tested only against the rows that survived the
+  other criteria (or, for broad queries, with one C-level ``in`` per
+  lower-cased path).
+
+The index catches up with rows appended to the store lazily, on the
+next search, and is safe to query from a worker thread.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import operator
+import re
+import threading
+from typing import Any
+
+import numpy as np
+
+from config import CHROMA_NAMES, SEARCH_SCAN_THRESHOLD
+from model.history_store import HistoryStore
+
+logger = logging.getLogger(__name__)
+
+_MODES = {"Mayor": 0, "Menor": 1}
+
+_KEY_TOKEN = re.compile(r"^([A-Ga-g])([#b]?)(m?)$")
+_FLATS = {"Db": "C#", "Eb": "D#", "Gb": "F#", "Ab": "G#", "Bb": "A#"}
+
+
+def compatible_keys(key: str) -> frozenset[str]:
+    """Return *key* and the keys that mix harmonically with it.
+
+    Uses the Camelot-wheel neighbours: the relative major/minor and the
+    keys a fifth above and below in the same mode.
+
+    Args:
+        key: A key name as produced by the analyser (``"A Menor"``).
+
+    Returns:
+        The set of compatible key names (empty if *key* is unknown).
+    """
+    try:
+        name, mode = key.split()
+        tonic = CHROMA_NAMES.index(name)
+        minor = _MODES[mode]
+    except (ValueError, KeyError):
+        return frozenset()
+
+    def _name(pc: int, is_minor: int) -> str:
+        return f"{CHROMA_NAMES[pc % 12]} {'Menor' if is_minor else 'Mayor'}"
+
+    relative = tonic + 3 if minor else tonic - 3
+    return frozenset(
+        {
+            _name(tonic, minor),
+            _name(tonic + 7, minor),
+            _name(tonic - 7, minor),
+            _name(relative, 1 - minor),
+        }
+    )
+
+
+def parse_key(token: str) -> str | None:
+    """Parse short key notation (``Am``, ``C#``, ``Bbm``) into a key name."""
+    match = _KEY_TOKEN.match(token)
+    if not match:
+        return None
+    letter, accidental, minor = match.groups()
+    name = letter.upper() + accidental
+    name = _FLATS.get(name, name)
+    if name not in CHROMA_NAMES:
+        # Enharmonic spellings without a sharp equivalent (Cb, Fb, E#, B#)
+        return None
+    return f"{name} {'Menor' if minor else 'Mayor'}"
+
+
+class HistoryQuery:
+    """A history filter; every given criterion must match.
+
+    Args:
+        bpm_min: Lowest tempo (inclusive), or ``None``.
+        bpm_max: Highest tempo (inclusive), or ``None``.
+        keys: Accepted key names, or ``None`` for any key.
+        terms: Case-insensitive path substrings.
+    """
+
+    def __init__(
+        self,
+        bpm_min: float | None = None,
+        bpm_max: float | None = None,
+        keys: frozenset[str] | None = None,
+        terms: tuple[str, ...] = (),
+    ) -> None:
+        self.bpm_min = bpm_min
+        self.bpm_max = bpm_max
+        self.keys = keys
+        self.terms = tuple(t.lower() for t in terms if t)
+
+    def is_empty(self) -> bool:
+        """Return ``True`` if the query matches every record."""
+        return self.bpm_min is None and self.bpm_max is None and not self.keys and not self.terms
+
+    @classmethod
+    def parse(cls, text: str) -> HistoryQuery:
+        """Parse the search box syntax.
+
+        Whitespace-separated tokens:
+
+        - ``bpm:120-130``, ``bpm:120-``, ``bpm:-100`` — tempo range;
+          ``bpm:128`` matches 127.5–128.5;
+        - ``key:Am`` — exact key; ``key:~Am`` — compatible keys;
+        - anything else — a path substring.
+
+        Malformed ``bpm:``/``key:`` tokens are treated as path terms.
+        """
+        bpm_min: float | None = None
+        bpm_max: float | None = None
+        keys: frozenset[str] | None = None
+        terms: list[str] = []
+
+        for token in text.split():
+            lowered = token.lower()
+            if lowered.startswith("bpm:"):
+                bounds = _parse_bpm(token[4:])
+                if bounds is not None:
+                    bpm_min, bpm_max = bounds
+                    continue
+            elif lowered.startswith("key:"):
+                spec = token[4:]
+                compatible = spec.startswith("~")
+                key = parse_key(spec.lstrip("~"))
+                if key is not None:
+                    keys = compatible_keys(key) if compatible else frozenset({key})
+                    continue
+            terms.append(token)
+
+        return cls(bpm_min, bpm_max, keys, tuple(terms))
+
+
+def _parse_bpm(spec: str) -> tuple[float | None, float | None] | None:
+    """Parse ``a-b`` / ``a-`` / ``-b`` / ``a`` into inclusive bounds."""
+    try:
+        if "-" not in spec:
+            value = float(spec)
+            return value - 0.5, value + 0.5
+        low, high = spec.split("-", 1)
+        return (float(low) if low else None, float(high) if high else None)
+    except ValueError:
+        return None
+
+
+class HistoryIndex:
+    """Incrementally maintained search index over a :class:`HistoryStore`."""
+
+    def __init__(self, store: HistoryStore) -> None:
+        self._store = store
+        self._lock = threading.Lock()
+        self._size = 0
+
+        self._tempos = np.empty(0, dtype=np.float64)
+        # Rows ordered by tempo, and the tempos in that order
+        self._by_tempo = np.empty(0, dtype=np.int64)
+        self._sorted_tempos = np.empty(0, dtype=np.float64)
+
+        # Small integer per distinct key name, one entry per row
+        self._key_ids: dict[str, int] = {}
+        self._key_codes = np.empty(0, dtype=np.int32)
+
+        self._paths: list[str] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _sync(self) -> None:
+        """Index the rows appended to the store since the last call."""
+        start, end = self._size, len(self._store)
+        if start == end:
+            return
+        records = [self._store[row] for row in range(start, end)]
+
+        tempos = np.array([_tempo(r) for r in records], dtype=np.float64)
+        self._tempos = np.concatenate([self._tempos, tempos])
+        if start and end - start <= SEARCH_SCAN_THRESHOLD:
+            # A few new rows: insert them into the sorted order (O(n))
+            order = np.argsort(tempos, kind="stable")
+            at = np.searchsorted(self._sorted_tempos, tempos[order], side="right")
+            self._sorted_tempos = np.insert(self._sorted_tempos, at, tempos[order])
+            self._by_tempo = np.insert(self._by_tempo, at, start + order)
+        else:
+            self._by_tempo = np.argsort(self._tempos, kind="stable")
+            self._sorted_tempos = self._tempos[self._by_tempo]
+
+        codes = [
+            self._key_ids.setdefault(str(r.get("key", "")), len(self._key_ids)) for r in records
+        ]
+        self._key_codes = np.concatenate([self._key_codes, np.array(codes, dtype=np.int32)])
+
+        self._paths.extend(str(r.get("path") or r.get("file") or "").lower() for r in records)
+
+        self._size = end
+        logger.debug("History index synced (%d rows)", end)
+
+    def search(self, query: HistoryQuery) -> np.ndarray:
+        """Return the rows matching *query*, in ascending order."""
+        with self._lock:
+            self._sync()
+
+            if query.bpm_min is not None or query.bpm_max is not None:
+                lo = 0
+                hi = self._size
+                if query.bpm_min is not None:
+                    lo = int(np.searchsorted(self._sorted_tempos, query.bpm_min, side="left"))
+                if query.bpm_max is not None:
+                    hi = int(np.searchsorted(self._sorted_tempos, query.bpm_max, side="right"))
+                rows = np.sort(self._by_tempo[lo:hi])
+            else:
+                rows = np.arange(self._size, dtype=np.int64)
+
+            if query.keys is not None:
+                wanted = [self._key_ids[k] for k in query.keys if k in self._key_ids]
+                rows = rows[np.isin(self._key_codes[rows], wanted)]
+
+            paths = self._paths
+            for term in query.terms:
+                if len(rows) <= SEARCH_SCAN_THRESHOLD:
+                    rows = rows[[term in paths[r] for r in rows.tolist()]]
+                else:
+                    # map() keeps the per-path loop in C
+                    hits = np.fromiter(
+                        map(operator.contains, paths, itertools.repeat(term)),
+                        dtype=bool,
+                        count=len(paths),
+                    )
+                    rows = rows[hits[rows]]
+
+            return rows
+
+
+def _tempo(record: dict[str, Any]) -> float:
+    """Return a record's tempo (older files used ``bpm``), NaN if missing."""
+    try:
+        return float(record.get("tempo", record.get("bpm", np.nan)))
+    except (TypeError, ValueError):
+        return float("nan")
@@ -0,0 +1,55 @@
+"""In-memory analysis history.
+
+:class:`HistoryStore` keeps one scalar record per analysed track, in
+the order they were added: entries loaded from previous sessions first
+(``persisted``), then this session's results.  Rows are stable — a row
+number always refers to the same record — so views can address records
+by row without copying them.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Iterable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryStore:
+    """Append-only, row-addressable list of history records."""
+
+    def __init__(self) -> None:
+        self._records: list[dict[str, Any]] = []
+        self._persisted = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, row: int) -> dict[str, Any]:
+        return self._records[row]
+
+    def append(self, record: dict[str, Any], persisted: bool = False) -> int:
+        """Add *record* and return its row."""
+        self._records.append(record)
+        self._persisted.append(persisted)
+        return len(self._records) - 1
+
+    def extend(self, records: Iterable[dict[str, Any]], persisted: bool = False) -> range:
+        """Add several records and return their rows."""
+        start = len(self._records)
+        for record in records:
+            self.append(record, persisted)
+        return range(start, len(self._records))
+
+    def is_persisted(self, row: int) -> bool:
+        """Return ``True`` if *row* was loaded from a previous session."""
+        return bool(self._persisted[row])
+
+    def label(self, row: int) -> str:
+        """Return the display name of *row* (``"name (prev)"`` if persisted)."""
+        record = self._records[row]
+        # Older history files used "file" instead of "path"
+        name = os.path.basename(str(record.get("path") or record.get("file") or "N/A"))
+        return f"{name} (prev)" if self._persisted[row] else name
@@ -0,0 +1,285 @@
+"""Memory admission control for analyses.
+
+Before a file is decoded, :func:`probe_audio` reads its duration,
+sample rate and channel count from the header (:func:`guess_probe`
+infers them from the file size when soundfile cannot read the header),
+and
+:func:`estimate_peak_bytes` predicts the peak memory of decoding plus
+the DSP pipeline: the signal and spectrograms it keeps, plus the
+temporaries of its hungriest step (STFT chunks, pitch tracking or the
+tempogram).
+
+:func:`plan_analysis` picks the best resolution that fits a budget:
+the native rate, one of :data:`~config.REDUCED_SAMPLE_RATES`, or, as a
+last resort, block-by-block streaming analysis.  A
+:class:`MemoryBudget` then admits plans while their reservations fit.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+from collections.abc import Collection
+
+import soundfile as sf
+
+from config import (
+    COMPRESSED_SIZE_RATIO,
+    DEFAULT_FEATURES,
+    HOP_LENGTH,
+    MEMORY_BUDGET_FRACTION,
+    N_FFT,
+    N_MELS,
+    N_MFCC,
+    REDUCED_SAMPLE_RATES,
+    STFT_CHUNK_FRAMES,
+    STFT_WORKERS,
+)
+from model.stream_analyzer import FILE_BLOCK_FRAMES
+
+logger = logging.getLogger(__name__)
+
+_F16 = 2
+_F32 = 4
+_F64 = 8
+_C64 = 8
+
+# Spectrogram-sized arrays ``estimate_tuning`` (pitch tracking) holds at
+# once; 7.3 measured
+_PIPTRACK_COPIES = 8
+
+# ``librosa.feature.tempo`` takes one autocorrelation of ``ac_size``
+# seconds per frame and holds about 6.2 such float64 tempograms at once
+_TEMPOGRAM_SECONDS = 8.0
+_TEMPOGRAM_COPIES = 7
+
+# Assumed physical memory where the OS does not report it (Windows)
+_FALLBACK_RAM = 4 * 1024**3
+
+MODE_FULL = "full"
+MODE_REDUCED = "reduced"
+MODE_STREAM = "stream"
+
+
+class AudioProbe:
+    """Header information of an audio file (nothing is decoded).
+
+    Args:
+        path: The probed file.
+        samplerate: Native sample rate (Hz).
+        channels: Channel count.
+        frames: Length in sample frames.
+        estimated: The figures are guessed (see :func:`guess_probe`).
+    """
+
+    def __init__(
+        self, path: str, samplerate: int, channels: int, frames: int, estimated: bool = False
+    ) -> None:
+        self.path = path
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frames = frames
+        self.estimated = estimated
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds."""
+        return self.frames / self.samplerate if self.samplerate else 0.0
+
+
+def probe_audio(path: str) -> AudioProbe | None:
+    """Read *path*'s header, or return ``None`` if it cannot be parsed."""
+    try:
+        info = sf.info(path)
+    except (RuntimeError, OSError, TypeError) as exc:
+        logger.debug("Cannot probe %s: %s", path, exc)
+        return None
+    return AudioProbe(path, int(info.samplerate), int(info.channels), int(info.frames))
+
+
+def guess_probe(
+    path: str, ratio: float = COMPRESSED_SIZE_RATIO, samplerate: int = 44100, channels: int = 2
+) -> AudioProbe | None:
+    """Guess the decoded size of a file whose header cannot be read.
+
+    Assumes a compressed stream that decodes to *ratio* times its size
+    of 16-bit PCM at *samplerate* Hz and *channels* channels.
+
+    Returns:
+        An :attr:`~AudioProbe.estimated` probe, or ``None`` if the file
+        does not exist.
+    """
+    try:
+        size = os.path.getsize(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    frames = int(size * ratio) // (2 * channels)
+    return AudioProbe(path, samplerate, channels, frames, estimated=True)
+
+
+def estimate_peak_bytes(
+    probe: AudioProbe,
+    sr: int | None = None,
+    n_fft: int = N_FFT,
+    hop_length: int = HOP_LENGTH,
+    features: Collection[str] = DEFAULT_FEATURES,
+) -> int:
+    """Estimate the peak memory of loading and analysing a file.
+
+    Args:
+        probe: Header information of the file.
+        sr: Analysis sample rate (``None`` for the native rate).
+        n_fft: STFT size.
+        hop_length: STFT hop.
+        features: Features that will be extracted; ``stft`` adds its
+            float16 copy of the magnitude.
+
+    Returns:
+        The larger of the decoding peak and the analysis peak, in bytes.
+    """
+    rate = sr or probe.samplerate
+    samples = math.ceil(probe.duration * rate)
+
+    # Decoding: interleaved native PCM plus the mono signal (and the
+    # native-rate mono copy when resampling)
+    decode = probe.frames * probe.channels * _F32 + samples * _F32
+    if rate != probe.samplerate:
+        decode += probe.frames * _F32
+
+    frames = 1 + samples // hop_length
+    bins = 1 + n_fft // 2
+    spectrogram = bins * frames * _F32
+
+    # Held for the whole analysis: signal, magnitude, power and dB
+    # spectrograms, the mel dB / MFCC / chroma matrices and, when asked
+    # for, the compact STFT
+    resident = samples * _F32 + 3 * spectrogram + (N_MELS + N_MFCC + 12) * frames * _F32
+    if "stft" in features:
+        resident += bins * frames * _F16
+
+    # Plus the largest step's temporaries: the complex STFT (whole, or
+    # the chunks in flight), the mel projection and its dB copy, the
+    # pitch tracking behind the tuning estimate, and the tempogram (one
+    # autocorrelation window per frame, in float64)
+    in_flight = frames if STFT_WORKERS <= 1 else min(frames, STFT_WORKERS * STFT_CHUNK_FRAMES)
+    lags = round(_TEMPOGRAM_SECONDS * rate / hop_length)
+    transient = max(
+        2 * bins * in_flight * _C64,
+        2 * N_MELS * frames * _F32,
+        _PIPTRACK_COPIES * spectrogram,
+        _TEMPOGRAM_COPIES * lags * frames * _F64,
+    )
+
+    return max(decode, resident + transient)
+
+
+def estimate_stream_bytes(probe: AudioProbe, hop_length: int = HOP_LENGTH) -> int:
+    """Estimate the memory of analysing a file block by block."""
+    frames = 1 + probe.frames // hop_length
+    # 12 chroma bins + 1 onset value per frame, plus two blocks of PCM
+    return frames * 13 * _F32 + 2 * FILE_BLOCK_FRAMES * probe.channels * _F32
+
+
+class AnalysisPlan:
+    """How a file will be analysed and how much memory it reserves.
+
+    Args:
+        mode: :data:`MODE_FULL`, :data:`MODE_REDUCED` or :data:`MODE_STREAM`.
+        sr: Sample rate to load at (``None`` for the native rate).
+        nbytes: Estimated peak memory.
+    """
+
+    def __init__(self, mode: str = MODE_FULL, sr: int | None = None, nbytes: int = 0) -> None:
+        self.mode = mode
+        self.sr = sr
+        self.nbytes = nbytes
+
+    def __repr__(self) -> str:
+        return f"AnalysisPlan({self.mode!r}, sr={self.sr}, nbytes={self.nbytes})"
+
+
+def plan_analysis(
+    probe: AudioProbe | None, budget: int, features: Collection[str] = DEFAULT_FEATURES
+) -> AnalysisPlan:
+    """Choose the highest resolution whose estimate fits *budget* bytes.
+
+    Missing files get a full plan that reserves nothing.  Streaming
+    needs a header soundfile can read, so :attr:`~AudioProbe.estimated`
+    probes that do not fit fall back to the lowest reduced rate instead.
+    *features* are the features the analysis extracts (see
+    :func:`estimate_peak_bytes`).
+    """
+    if probe is None:
+        return AnalysisPlan()
+
+    nbytes = estimate_peak_bytes(probe, features=features)
+    if nbytes <= budget:
+        return AnalysisPlan(MODE_FULL, None, nbytes)
+
+    for rate in REDUCED_SAMPLE_RATES:
+        if rate < probe.samplerate:
+            nbytes = estimate_peak_bytes(probe, sr=rate, features=features)
+            if nbytes <= budget:
+                logger.info("%s is analysed at %d Hz to fit in memory", probe.path, rate)
+                return AnalysisPlan(MODE_REDUCED, rate, nbytes)
+
+    if probe.estimated:
+        rate = min(REDUCED_SAMPLE_RATES)
+        nbytes = estimate_peak_bytes(probe, sr=rate, features=features)
+        return AnalysisPlan(MODE_REDUCED, rate, nbytes)
+
+    logger.info("%s is too large to decode in memory; streaming it", probe.path)
+    return AnalysisPlan(MODE_STREAM, None, estimate_stream_bytes(probe))
+
+
+def physical_memory() -> int:
+    """Return the machine's physical memory in bytes (a guess if unknown)."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return _FALLBACK_RAM
+
+
+class MemoryBudget:
+    """Thread-safe reservation counter for analysis memory.
+
+    A reservation that exceeds the remaining budget is refused, unless
+    nothing is reserved at all (so an oversized job still runs, alone).
+
+    Args:
+        capacity: Budget in bytes (defaults to
+            :data:`~config.MEMORY_BUDGET_FRACTION` of physical memory).
+    """
+
+    def __init__(self, capacity: int | None = None) -> None:
+        if capacity is None:
+            capacity = int(physical_memory() * MEMORY_BUDGET_FRACTION)
+        self.capacity = capacity
+        self._used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used(self) -> int:
+        """Bytes currently reserved."""
+        return self._used
+
+    @property
+    def available(self) -> int:
+        """Bytes that can still be reserved without exceeding the capacity."""
+        with self._lock:
+            return max(0, self.capacity - self._used)
+
+    def try_acquire(self, nbytes: int) -> bool:
+        """Reserve *nbytes* if they fit; return whether they were reserved."""
+        with self._lock:
+            if self._used and self._used + nbytes > self.capacity:
+                return False
+            self._used += nbytes
+            return True
+
+    def release(self, nbytes: int) -> None:
+        """Return a reservation made with :meth:`try_acquire`."""
+        with self._lock:
+            self._used = max(0, self._used - nbytes)
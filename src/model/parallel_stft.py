@@ -0,0 +1,91 @@
+"""Multi-threaded magnitude STFT for long signals.
+
+NumPy's FFT releases the GIL, so a long signal is split into
+overlapping time chunks whose STFTs run on a shared thread pool.  The
+signal is zero-padded once, exactly as ``librosa.stft(center=True)``
+does, and each chunk covers the padded samples of a whole number of
+frames, so the stitched result matches the single call frame for
+frame.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import librosa
+import numpy as np
+
+from config import HOP_LENGTH, N_FFT, STFT_CHUNK_FRAMES, STFT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Below this many frames per chunk the thread hand-off costs more than it saves
+_MIN_CHUNK_FRAMES = 256
+
+_pools: dict[int, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _executor(workers: int) -> ThreadPoolExecutor:
+    """Return the process-wide pool with *workers* threads."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stft")
+            _pools[workers] = pool
+        return pool
+
+
+def stft_magnitude(
+    y: np.ndarray,
+    n_fft: int = N_FFT,
+    hop_length: int = HOP_LENGTH,
+    workers: int = STFT_WORKERS,
+    chunk_frames: int = STFT_CHUNK_FRAMES,
+) -> np.ndarray:
+    """Return the magnitude of ``librosa.stft(y, n_fft=n_fft, hop_length=hop_length)``.
+
+    Both paths zero-pad the signal (``pad_mode="constant"``), whatever
+    the librosa version's default.
+
+    Signals long enough to be worth splitting are processed in chunks
+    of at most *chunk_frames* frames on *workers* threads; shorter
+    ones (or ``workers=1``) use a single ``librosa.stft`` call.
+
+    Args:
+        y: Mono signal.
+        n_fft: FFT size.
+        hop_length: Hop between frames, in samples.
+        workers: Threads to spread the chunks over.
+        chunk_frames: Largest chunk, in frames (bounds the temporary
+            complex spectrum held per thread).
+
+    Returns:
+        Magnitude spectrogram of shape ``(1 + n_fft // 2, 1 + len(y) // hop_length)``.
+    """
+    n_frames = 1 + len(y) // hop_length
+    size = min(chunk_frames, math.ceil(n_frames / workers))
+    if workers <= 1 or size < _MIN_CHUNK_FRAMES or len(y) < n_fft:
+        # Explicit padding: librosa < 0.10 defaulted to "reflect"
+        return np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length, pad_mode="constant"))
+
+    # Same zero padding as librosa's centred STFT (pad_mode="constant")
+    padded = np.pad(y, n_fft // 2)
+    dtype = np.float64 if y.dtype == np.float64 else np.float32
+    out = np.empty((1 + n_fft // 2, n_frames), dtype=dtype)
+
+    def _chunk(start: int) -> None:
+        stop = min(start + size, n_frames)
+        # Frame t starts at padded[t * hop_length]
+        segment = padded[start * hop_length : (stop - 1) * hop_length + n_fft]
+        spec = librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, center=False)
+        np.abs(spec, out=out[:, start:stop])
+
+    starts = range(0, n_frames, size)
+    # list() re-raises the first exception of any chunk
+    list(_executor(workers).map(_chunk, starts))
+    logger.debug("STFT of %d frames in %d chunks", n_frames, len(starts))
+    return out
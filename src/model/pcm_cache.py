@@ -0,0 +1,236 @@
+"""In-process LRU cache of decoded PCM.
+
+Re-analysing a file with different settings used to decode it from
+scratch every time.  :class:`PCMCache` keeps recently decoded signals,
+keyed by the file's real path, modification time, size and the
+requested sample rate, so an edited file is never served stale.  A
+multichannel file's entry also keeps the loudness meter of its channels
+(see :class:`~model.audio_file.AudioFile`), which the mono signal alone
+cannot reproduce.
+
+The memory tier is bounded in bytes and evicts least-recently-used
+signals.  With a *spill_dir*, evicted signals are written as ``.npy``
+files to a private scratch directory and served back memory-mapped
+(read-only, paged in by the OS) until the disk tier's own byte limit
+evicts them too.  The scratch directory is removed with the cache.
+
+Cached arrays are shared between :class:`~model.audio_file.AudioFile`
+instances, so they are marked read-only.  Loads only use the cache when
+they ask for it (the GUI's :class:`~controller.job_scheduler.JobScheduler`
+does, and reserves what it holds in its memory budget, see
+:meth:`PCMCache.trim`); headless batch runs never re-read a file and
+leave it empty.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from config import PCM_CACHE_BYTES, PCM_CACHE_SPILL_BYTES, PCM_CACHE_SPILL_DIR
+from metrics import cache_lookup
+from model.loudness import LoudnessMeter
+
+logger = logging.getLogger(__name__)
+
+_Key = tuple[str, int, int, int | None]
+
+
+def cache_key(path: str, sr: int | None) -> _Key | None:
+    """Return the cache key of *path* loaded at *sr* (``None`` if unreadable)."""
+    try:
+        real = os.path.realpath(path)
+        st = os.stat(real)
+    except (OSError, TypeError, ValueError):
+        return None
+    return real, st.st_mtime_ns, st.st_size, sr
+
+
+class PCMCache:
+    """Byte-bounded LRU cache of decoded signals.
+
+    Args:
+        capacity: Bytes of PCM kept in memory (``0`` disables the cache).
+        spill_dir: Directory under which evicted signals are spilled
+            (``None`` disables spilling).
+        spill_capacity: Bytes of PCM kept on disk.
+    """
+
+    def __init__(
+        self,
+        capacity: int = PCM_CACHE_BYTES,
+        spill_dir: Path | str | None = None,
+        spill_capacity: int = PCM_CACHE_SPILL_BYTES,
+    ) -> None:
+        self.capacity = capacity
+        self.spill_capacity = spill_capacity
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[_Key, tuple[np.ndarray, int, LoudnessMeter | None]] = (
+            OrderedDict()
+        )
+        self._spilled: OrderedDict[_Key, tuple[Path, int, int, LoudnessMeter | None]] = (
+            OrderedDict()
+        )
+        self._memory_bytes = 0
+        self._spilled_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._scratch: Path | None = None
+        if spill_dir is not None:
+            Path(spill_dir).mkdir(parents=True, exist_ok=True)
+            self._scratch = Path(tempfile.mkdtemp(prefix="pcm-", dir=spill_dir))
+            self._finalizer = weakref.finalize(
+                self, shutil.rmtree, self._scratch, ignore_errors=True
+            )
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of PCM held in memory."""
+        return self._memory_bytes
+
+    @property
+    def spilled_bytes(self) -> int:
+        """Bytes of PCM spilled to the scratch directory."""
+        return self._spilled_bytes
+
+    def get(
+        self, path: str, sr: int | None
+    ) -> tuple[np.ndarray, int, LoudnessMeter | None] | None:
+        """Return the cached ``(y, sr, channel_meter)`` of *path* at *sr*, or ``None``."""
+        key = cache_key(path, sr)
+        if key is None or not self.capacity:
+            return None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                cache_lookup("pcm", hit=True)
+                return entry
+            spilled = self._spilled.get(key)
+            if spilled is not None:
+                self._spilled.move_to_end(key)
+        if spilled is not None:
+            file, loaded_sr, _nbytes, meter = spilled
+            try:
+                y = np.load(file, mmap_mode="r")
+            except (OSError, ValueError) as exc:
+                logger.warning("Spilled PCM of %s is unreadable: %s", path, exc)
+            else:
+                with self._lock:
+                    self.hits += 1
+                cache_lookup("pcm", hit=True)
+                return y, loaded_sr, meter
+        with self._lock:
+            self.misses += 1
+        cache_lookup("pcm", hit=False)
+        return None
+
+    def put(
+        self,
+        path: str,
+        sr: int | None,
+        y: np.ndarray,
+        loaded_sr: int,
+        channel_meter: LoudnessMeter | None = None,
+    ) -> np.ndarray:
+        """Cache the decoded signal of *path* at *sr* (and its channels' meter).
+
+        Returns:
+            *y* itself, now read-only (it may be shared from here on).
+        """
+        y.setflags(write=False)
+        key = cache_key(path, sr)
+        if key is None or not self.capacity or y.nbytes > self.capacity:
+            return y
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old[0].nbytes
+            self._memory[key] = (y, loaded_sr, channel_meter)
+            self._memory_bytes += y.nbytes
+            evicted = []
+            while self._memory_bytes > self.capacity:
+                old_key, old_entry = self._memory.popitem(last=False)
+                self._memory_bytes -= old_entry[0].nbytes
+                evicted.append((old_key, old_entry))
+        for old_key, old_entry in evicted:
+            self._spill(old_key, *old_entry)
+        return y
+
+    def _spill(
+        self, key: _Key, y: np.ndarray, loaded_sr: int, channel_meter: LoudnessMeter | None
+    ) -> None:
+        """Write an evicted signal to the scratch directory (if enabled)."""
+        if self._scratch is None or y.nbytes > self.spill_capacity:
+            return
+        with self._lock:
+            if key in self._spilled:
+                return
+        file = self._scratch / f"{hashlib.sha1(repr(key).encode()).hexdigest()}.npy"
+        try:
+            np.save(file, y)
+        except OSError as exc:
+            logger.warning("Could not spill PCM of %s: %s", key[0], exc)
+            return
+        with self._lock:
+            self._spilled[key] = (file, loaded_sr, y.nbytes, channel_meter)
+            self._spilled_bytes += y.nbytes
+            removed = []
+            while self._spilled_bytes > self.spill_capacity:
+                _, (old_file, _sr, nbytes, _meter) = self._spilled.popitem(last=False)
+                self._spilled_bytes -= nbytes
+                removed.append(old_file)
+        for old_file in removed:
+            # Open memory maps keep their pages; the name just goes away
+            old_file.unlink(missing_ok=True)
+
+    def trim(self, max_bytes: int) -> int:
+        """Evict (or spill) least-recently-used signals until at most *max_bytes* remain.
+
+        Returns:
+            The bytes still held in memory.
+        """
+        with self._lock:
+            evicted = []
+            while self._memory and self._memory_bytes > max_bytes:
+                key, entry = self._memory.popitem(last=False)
+                self._memory_bytes -= entry[0].nbytes
+                evicted.append((key, entry))
+            remaining = self._memory_bytes
+        for key, entry in evicted:
+            self._spill(key, *entry)
+        return remaining
+
+    def clear(self) -> None:
+        """Drop every cached signal, in memory and on disk."""
+        with self._lock:
+            files = [file for file, _sr, _nbytes, _meter in self._spilled.values()]
+            self._memory.clear()
+            self._spilled.clear()
+            self._memory_bytes = self._spilled_bytes = 0
+        for file in files:
+            file.unlink(missing_ok=True)
+
+
+_shared: PCMCache | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> PCMCache:
+    """Return the process-wide cache used by :meth:`AudioFile.load_audio`."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PCMCache(PCM_CACHE_BYTES, PCM_CACHE_SPILL_DIR, PCM_CACHE_SPILL_BYTES)
+        return _shared
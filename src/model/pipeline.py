@@ -0,0 +1,344 @@
+"""Qt-free analysis entry points for headless use.
+
+Provides picklable, module-level functions that run the full DSP
+pipeline on a file path and return only JSON-serialisable scalars.
+They are designed to be executed inside a process pool:
+
+- :func:`warm_up` — pool initializer that imports ``librosa`` and
+  builds its filter banks once per worker process.
+- :func:`analyze_file` — load + analyse one path with its own
+  :class:`AudioFile`.
+
+For scripts and notebooks, :func:`analyze_many` streams a whole catalog
+through shared decoding and analysis thread pools and yields each
+track's features as soon as they are ready.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+import numpy as np
+
+from config import DECODE_PREFETCH, DECODE_WORKERS, MAX_WORKER_THREADS, TEMPO_MODE
+from metrics import QUEUE_DEPTH, file_done
+from model.audio_file import AudioFile
+from model.feature_extractor import FEATURES, FeatureExtractor
+from model.tempo import TEMPO_MODES
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_OPTIONS: frozenset[str] = frozenset({"sr", "tempo_mode"})
+"""Option names accepted by :func:`analyze_file`."""
+
+SCALAR_FEATURES: frozenset[str] = frozenset({"tempo", "key", "timbre", "loudness"})
+"""Features computed for headless (JSON) results."""
+
+_WARM_UP_RATES: tuple[int, ...] = (22050, 44100, 48000)
+
+_extractor: FeatureExtractor | None = None
+
+_pools: dict[tuple[str, int], ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_extractor() -> FeatureExtractor:
+    """Return the per-process :class:`FeatureExtractor` singleton."""
+    global _extractor
+    if _extractor is None:
+        _extractor = FeatureExtractor()
+    return _extractor
+
+
+def warm_up() -> None:
+    """Prepare a worker process for low-latency analyses.
+
+    Runs the pipeline once on a short noise burst at each common sample
+    rate, so that imports, numba JIT compilation and filter-bank
+    construction happen before the first real request.
+    """
+    rng = np.random.default_rng(0)
+    extractor = _get_extractor()
+    for sr in _WARM_UP_RATES:
+        audio = AudioFile()
+        audio._y = rng.standard_normal(sr).astype(np.float32)  # noqa: SLF001
+        audio._sr = sr  # noqa: SLF001
+        extractor.extract_all_features(audio)
+    logger.info("Analysis worker warmed up")
+
+
+def validate_options(options: dict[str, Any]) -> str | None:
+    """Return an error message if *options* is not acceptable, else ``None``."""
+    unknown = set(options) - ANALYSIS_OPTIONS
+    if unknown:
+        return f"Opciones desconocidas: {', '.join(sorted(unknown))}"
+    sr = options.get("sr")
+    # bool is an int subclass, but ``"sr": true`` is not a sample rate
+    if sr is not None and (not isinstance(sr, int) or isinstance(sr, bool) or sr <= 0):
+        return "La opción 'sr' debe ser un entero positivo."
+    if options.get("tempo_mode", "accurate") not in TEMPO_MODES:
+        return f"La opción 'tempo_mode' debe ser una de: {', '.join(sorted(TEMPO_MODES))}."
+    return None
+
+
+def analyze_file(path: str, options: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Load *path* and run the DSP pipeline on it.
+
+    Args:
+        path: Audio file to analyse.
+        options: Optional settings — ``sr`` resamples on load;
+            ``tempo_mode`` (``"accurate"``/``"fast"``) picks the tempo
+            estimator.
+
+    Returns:
+        A JSON-serialisable dict with ``path``, ``tempo``, ``key``,
+        ``timbre`` (descriptor means and deviations, see
+        :mod:`model.timbre`), ``loudness`` (see :mod:`model.loudness`),
+        ``sr``, ``duration`` and ``elapsed`` (plus
+        ``tempo_candidates`` as ``[bpm, confidence]`` pairs in fast
+        mode) — or
+        ``{"path", "error"}``.
+    """
+    options = options or {}
+    started = time.perf_counter()
+
+    audio = AudioFile()
+    loaded = audio.load_audio(path, sr=options.get("sr"))
+    y = audio.get_signal() if loaded else None
+    if y is None:
+        file_done(False, started)
+        return {"path": path, "error": "No se pudo cargar el archivo de audio."}
+
+    # Only scalars are returned, so skip the spectrogram and chromagram output
+    # (the timbre summary reuses the STFT that tempo and key need anyway)
+    features = _get_extractor().extract_all_features(
+        audio, features=SCALAR_FEATURES, tempo_mode=options.get("tempo_mode", TEMPO_MODE)
+    )
+    if features.get("error"):
+        file_done(False, started)
+        return {"path": path, "error": str(features["error"])}
+
+    sr = int(features["sr"])
+    result = {
+        "path": path,
+        "tempo": float(features["tempo"]),
+        "key": str(features["key"]),
+        "timbre": {name: float(value) for name, value in features["timbre"].items()},
+        "loudness": {name: float(value) for name, value in features["loudness"].items()},
+        "sr": sr,
+        "duration": len(y) / sr,
+        "elapsed": time.perf_counter() - started,
+    }
+    if "tempo_candidates" in features:
+        result["tempo_candidates"] = [
+            [float(bpm), float(confidence)] for bpm, confidence in features["tempo_candidates"]
+        ]
+    file_done(True, started)
+    return result
+
+
+def _executor(workers: int, name: str = "analysis") -> ThreadPoolExecutor:
+    """Return the process-wide *name* pool with *workers* threads."""
+    with _pools_lock:
+        pool = _pools.get((name, workers))
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+            _pools[(name, workers)] = pool
+        return pool
+
+
+def _decode(path: str, sr: int | None) -> AudioFile | dict[str, Any]:
+    """Decode *path* into its own :class:`AudioFile` (or return an error)."""
+    audio = AudioFile()
+    try:
+        if audio.load_audio(path, sr=sr):
+            return audio
+    except Exception as exc:
+        logger.exception("Decoding %s failed", path)
+        return {"path": path, "error": f"Error inesperado durante el análisis: {exc}"}
+    return {"path": path, "error": "No se pudo cargar el archivo de audio."}
+
+
+def _extract(
+    path: str,
+    audio: AudioFile | dict[str, Any],
+    features: frozenset[str],
+    options: dict[str, Any],
+    started: float,
+) -> dict[str, Any]:
+    """Extract *features* from a decoded file (errors pass through)."""
+    if isinstance(audio, dict):
+        file_done(False, started)
+        return audio
+    try:
+        result = _get_extractor().extract_all_features(
+            audio, features=features, tempo_mode=options.get("tempo_mode", TEMPO_MODE)
+        )
+    except Exception as exc:
+        logger.exception("Analysis of %s failed", path)
+        file_done(False, started)
+        return {"path": path, "error": f"Error inesperado durante el análisis: {exc}"}
+    if result.get("error"):
+        file_done(False, started)
+        return {"path": path, "error": str(result["error"])}
+    file_done(True, started)
+    result["elapsed"] = time.perf_counter() - started
+    return result
+
+
+def _submit_track(
+    path: str,
+    features: frozenset[str],
+    options: dict[str, Any],
+    analysis: ThreadPoolExecutor,
+    decoding: ThreadPoolExecutor | None,
+) -> Future[dict[str, Any]]:
+    """Decode *path* on *decoding*, then analyse it on *analysis*.
+
+    Without a *decoding* pool both stages run back to back on one
+    analysis thread.  The returned future can be cancelled until the
+    file has been decoded.  The file's clock (``elapsed`` and the
+    latency metric) starts when decoding does, not while it is queued.
+    """
+    sr = options.get("sr")
+    if decoding is None:
+
+        def run() -> dict[str, Any]:
+            started = time.perf_counter()
+            return _extract(path, _decode(path, sr), features, options, started)
+
+        return analysis.submit(run)
+
+    result: Future[dict[str, Any]] = Future()
+
+    def decode() -> tuple[AudioFile | dict[str, Any], float]:
+        started = time.perf_counter()
+        return _decode(path, sr), started
+
+    def extracted(stage: Future[dict[str, Any]]) -> None:
+        exc = stage.exception()
+        if exc is None:
+            result.set_result(stage.result())
+        else:
+            result.set_exception(exc)
+
+    def decoded(stage: Future[tuple[AudioFile | dict[str, Any], float]]) -> None:
+        # A file cancelled before it was decoded never reaches the analysis pool
+        if stage.cancelled() or not result.set_running_or_notify_cancel():
+            return
+        try:
+            audio, started = stage.result()
+            extract = analysis.submit(_extract, path, audio, features, options, started)
+        except BaseException as exc:
+            result.set_exception(exc)
+            return
+        extract.add_done_callback(extracted)
+
+    pending = decoding.submit(decode)
+
+    def cancelled(done: Future[dict[str, Any]]) -> None:
+        # Drop the file from the decoding queue if it has not started yet
+        if done.cancelled():
+            pending.cancel()
+
+    result.add_done_callback(cancelled)
+    pending.add_done_callback(decoded)
+    return result
+
+
+def analyze_many(
+    paths: Iterable[str],
+    features: Iterable[str] | None = None,
+    workers: int = MAX_WORKER_THREADS,
+    ordered: bool = False,
+    prefetch: int = DECODE_PREFETCH,
+    decoders: int = DECODE_WORKERS,
+    options: dict[str, Any] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Analyse many files concurrently, yielding each result when ready.
+
+    Every file gets its own :class:`AudioFile`, so nothing is shared
+    between tracks.  Decoding and analysis are pipelined: *decoders*
+    threads decode the next files while *workers* threads run the DSP
+    on the current ones, so audio I/O and codec work overlap with the
+    FFT stages.  Both pools are created once per size and reused by
+    later calls.
+
+    *paths* is consumed lazily: at most ``workers + prefetch`` files are
+    being decoded, waiting for a worker, analysed, or finished but not
+    yet yielded, which bounds the decoded signals alive at once.
+    Closing the generator early cancels the files not yet decoded.
+
+    Example::
+
+        for track in analyze_many(catalog, features={"tempo", "key", "loudness"}):
+            print(track["path"], track.get("tempo"), track.get("error"))
+
+    Args:
+        paths: Audio files to analyse.
+        features: Feature names to extract (see
+            :data:`~model.feature_extractor.FEATURES`); defaults to
+            :data:`SCALAR_FEATURES`.
+        workers: Analysis threads.
+        ordered: Yield in input order instead of completion order.
+        prefetch: Files decoded ahead of the analysis workers.
+        decoders: Decoding threads; ``0`` decodes on the analysis
+            threads, right before each file's DSP.
+        options: ``sr`` and ``tempo_mode``, as for :func:`analyze_file`.
+
+    Yields:
+        For each path, the features dict of
+        :meth:`FeatureExtractor.extract_all_features` plus ``elapsed``
+        (seconds, decoding included) — or ``{"path", "error"}``.
+
+    Raises:
+        ValueError: If *options* or a feature name is invalid.
+    """
+    options = options or {}
+    error = validate_options(options)
+    if error:
+        raise ValueError(error)
+    wanted = SCALAR_FEATURES if features is None else frozenset(features)
+    unknown = wanted - FEATURES.names()
+    if unknown:
+        raise ValueError(f"Características desconocidas: {', '.join(sorted(unknown))}")
+
+    workers = max(1, workers)
+    analysis = _executor(workers)
+    decoding = _executor(decoders, "decode") if decoders > 0 else None
+    window = workers + max(0, prefetch)
+    remaining = iter(paths)
+    pending: deque[Future[dict[str, Any]]] = deque()
+
+    def submit_next() -> bool:
+        for path in remaining:
+            pending.append(_submit_track(str(path), wanted, options, analysis, decoding))
+            QUEUE_DEPTH.set(len(pending), queue="pipeline")
+            return True
+        return False
+
+    try:
+        while len(pending) < window and submit_next():
+            pass
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = next(f for f in pending if f in done)
+                pending.remove(future)
+            QUEUE_DEPTH.set(len(pending), queue="pipeline")
+            result = future.result()
+            # Refill before handing the result over, so the pools stay busy
+            submit_next()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        QUEUE_DEPTH.set(0, queue="pipeline")
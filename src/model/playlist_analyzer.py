@@ -15,6 +15,8 @@ from typing import Any
 
 import numpy as np
 
+from config import N_MFCC
+
 
 class AnalysisResultBase:
     """Abstract base class for analysis results.
@@ -42,12 +44,59 @@ class SingleTrackResult(AnalysisResultBase):
     """
 
     def get_summary(self) -> dict[str, str]:
-        """Return a dictionary with ``File``, ``BPM``, and ``Key`` entries."""
-        return {
+        """Return a dictionary with ``File``, ``BPM``, and ``Key`` entries.
+
+        A ``Duplicate of`` entry is added when the track was recognised
+        as a copy of an earlier one, and ``Centroid``, ``Roll-off``,
+        ``Flatness``, ``ZCR`` (mean ± standard deviation) and ``MFCC``
+        (coefficient means) entries when the timbre summary is present,
+        and ``Loudness``, ``True peak`` and ``RMS`` entries when the
+        loudness is.
+        """
+        summary = {
             "File": str(self._raw_data.get("path", "N/A")).split("/")[-1],
             "BPM": f"{self._raw_data['tempo']:.2f}",
             "Key": str(self._raw_data.get("key", "N/A")),
         }
+        if self._raw_data.get("duplicate_of"):
+            summary["Duplicate of"] = str(self._raw_data["duplicate_of"]).split("/")[-1]
+        timbre = self._raw_data.get("timbre")
+        if timbre:
+            summary.update(_timbre_summary(timbre))
+        loudness = self._raw_data.get("loudness")
+        if loudness:
+            summary.update(_loudness_summary(loudness))
+        return summary
+
+
+def _timbre_summary(timbre: dict[str, float]) -> dict[str, str]:
+    """Format the timbre descriptor statistics for display."""
+
+    def spread(name: str, fmt: str, unit: str = "") -> str:
+        return f"{timbre[name + '_mean']:{fmt}} ± {timbre[name + '_std']:{fmt}}{unit}"
+
+    means = (timbre.get(f"mfcc{i}_mean") for i in range(1, N_MFCC + 1))
+    mfcc: list[str] = [f"{mean:.1f}" for mean in means if mean is not None]
+    return {
+        "Centroid": spread("centroid", ".0f", " Hz"),
+        "Roll-off": spread("rolloff", ".0f", " Hz"),
+        "Flatness": spread("flatness", ".3f"),
+        "ZCR": spread("zcr", ".3f"),
+        "MFCC": ", ".join(mfcc),
+    }
+
+
+def _loudness_summary(loudness: dict[str, float]) -> dict[str, str]:
+    """Format the loudness and dynamics measures for display."""
+    return {
+        "Loudness": (
+            f"{loudness['integrated_lufs']:.1f} LUFS "
+            f"(LRA {loudness['loudness_range_lu']:.1f} LU, "
+            f"máx. corto plazo {loudness['short_term_max_lufs']:.1f} LUFS)"
+        ),
+        "True peak": f"{loudness['true_peak_dbtp']:.1f} dBTP",
+        "RMS": f"{loudness['rms_dbfs']:.1f} dBFS (cresta {loudness['crest_factor_db']:.1f} dB)",
+    }
 
 
 class AggregatePlaylistResult(AnalysisResultBase):
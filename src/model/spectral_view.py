@@ -0,0 +1,61 @@
+"""Display transforms of the magnitude STFT.
+
+The analysis keeps the full-resolution magnitude STFT as a compact
+``float16`` intermediate (the ``stft`` feature, ~0.05 % relative error,
+half the size of the working copy).  Everything the views derive from
+it — the dB spectrogram with its reference and dynamic range, the
+chromagram with its per-frame normalisation — is a cheap element-wise
+or 12-band projection, so changing how a track is displayed re-derives
+those arrays in milliseconds instead of decoding and transforming the
+audio again (see :meth:`FeatureExtractor.redisplay`).
+"""
+
+from __future__ import annotations
+
+import logging
+
+import librosa
+import numpy as np
+
+from config import CHROMA_NORM, HOP_LENGTH, N_FFT, SPECTROGRAM_TOP_DB
+
+logger = logging.getLogger(__name__)
+
+FREQ_SCALES: frozenset[str] = frozenset({"log", "linear"})
+"""Frequency axes the spectrogram view can draw."""
+
+_FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+def compact_magnitude(stft_mag: np.ndarray) -> np.ndarray:
+    """Return *stft_mag* as ``float16`` (the cached ``stft`` feature)."""
+    return np.minimum(stft_mag, _FLOAT16_MAX).astype(np.float16)
+
+
+def spectrogram_db(
+    stft_mag: np.ndarray, ref: float | None = None, top_db: float | None = SPECTROGRAM_TOP_DB
+) -> np.ndarray:
+    """Convert a magnitude STFT to decibels for display.
+
+    Args:
+        stft_mag: Magnitude STFT (any float dtype).
+        ref: Magnitude drawn as 0 dB; ``None`` uses the loudest bin.
+        top_db: Dynamic range kept below the peak (``None``: unclipped).
+    """
+    mag = np.asarray(stft_mag, dtype=np.float32)
+    return librosa.amplitude_to_db(mag, ref=np.max if ref is None else ref, top_db=top_db)
+
+
+def chromagram(
+    stft_mag: np.ndarray, sr: int, norm: float | None = CHROMA_NORM, tuning: float | None = None
+) -> np.ndarray:
+    """Compute the chromagram of a magnitude STFT.
+
+    With the default *norm* this equals ``chroma_stft(S=power)`` on the
+    analysis STFT.  Pass the analysis' *tuning* to skip re-estimating it,
+    which costs more than the chromagram itself.
+    """
+    mag = np.asarray(stft_mag, dtype=np.float32)
+    return librosa.feature.chroma_stft(
+        S=mag * mag, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH, norm=norm, tuning=tuning
+    )
@@ -0,0 +1,313 @@
+"""Live analysis of continuous PCM streams.
+
+Provides :class:`RingBuffer` (a fixed-capacity FIFO over a preallocated
+array) and :class:`StreamAnalyzer`, which turns an unbounded sequence of
+PCM blocks into periodic **tempo**, **chroma** and **key** updates over a
+rolling window.
+
+Each incoming block is cut into STFT frames as soon as enough samples
+are available; only the *new* frames are transformed.  Per-frame chroma
+and onset strength go into ring buffers sized to the rolling window, so
+memory stays constant over unbounded run time and every update costs a
+fixed amount of work.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from typing import Any, BinaryIO
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from config import (
+    STREAM_HOP_LENGTH,
+    STREAM_N_FFT,
+    STREAM_N_MELS,
+    STREAM_UPDATE_SECONDS,
+    STREAM_WINDOW_SECONDS,
+)
+from model.feature_extractor import determine_key
+from model.loudness import LoudnessMeter
+from model.tempo import estimate_tempo
+
+logger = logging.getLogger(__name__)
+
+PCM_FORMATS: dict[str, tuple[np.dtype[Any], float]] = {
+    "s16le": (np.dtype("<i2"), 32768.0),
+    "s32le": (np.dtype("<i4"), 2147483648.0),
+    "f32le": (np.dtype("<f4"), 1.0),
+}
+"""Supported raw PCM sample formats: ``name -> (dtype, full scale)``."""
+
+FILE_BLOCK_FRAMES = 65536
+"""Sample frames read at a time by :func:`analyze_file_blocks`."""
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO of rows stored in a preallocated array.
+
+    Once full, every append overwrites the oldest rows.
+
+    Args:
+        capacity: Maximum number of rows kept.
+        width: Row width (``None`` for a 1-D buffer of scalars).
+    """
+
+    def __init__(self, capacity: int, width: int | None = None) -> None:
+        shape = (capacity,) if width is None else (capacity, width)
+        self._data = np.zeros(shape, dtype=np.float32)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of rows."""
+        return self._capacity
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Append *rows* (oldest first), dropping the oldest on overflow."""
+        rows = rows[-self._capacity :]
+        n = len(rows)
+        if n == 0:
+            return
+        end = (self._start + self._size) % self._capacity
+        first = min(n, self._capacity - end)
+        self._data[end : end + first] = rows[:first]
+        self._data[: n - first] = rows[first:]
+
+        overflow = max(0, self._size + n - self._capacity)
+        self._start = (self._start + overflow) % self._capacity
+        self._size = min(self._capacity, self._size + n)
+
+    def values(self) -> np.ndarray:
+        """Return the stored rows in arrival order (oldest first)."""
+        idx = (self._start + np.arange(self._size)) % self._capacity
+        return self._data[idx]
+
+    def unordered(self) -> np.ndarray:
+        """Return the stored rows without re-ordering (no copy).
+
+        Useful for order-independent reductions such as means.
+        """
+        # The start index only moves once the buffer is full, so the
+        # first ``_size`` rows are always the valid ones.
+        return self._data[: self._size]
+
+
+class StreamAnalyzer:
+    """Incremental tempo / chroma / key analysis of a PCM stream.
+
+    Feed mono float blocks with :meth:`push`; an update dictionary is
+    returned every *update_seconds* of audio once at least one update
+    interval has been seen.
+
+    Args:
+        sr: Sample rate of the incoming stream (Hz).
+        window_seconds: Length of the rolling analysis window.
+        update_seconds: Interval between updates.
+        n_fft: STFT frame size.
+        hop_length: STFT hop size.
+    """
+
+    def __init__(
+        self,
+        sr: int,
+        window_seconds: float = STREAM_WINDOW_SECONDS,
+        update_seconds: float = STREAM_UPDATE_SECONDS,
+        n_fft: int = STREAM_N_FFT,
+        hop_length: int = STREAM_HOP_LENGTH,
+    ) -> None:
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+
+        window_frames = max(2, int(round(window_seconds * sr / hop_length)))
+        self._update_frames = max(1, int(round(update_seconds * sr / hop_length)))
+
+        # Filter banks are built once per stream
+        self._window = librosa.filters.get_window("hann", n_fft, fftbins=True).astype(np.float32)
+        self._chroma_fb = librosa.filters.chroma(sr=sr, n_fft=n_fft).astype(np.float32)
+        self._mel_fb = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=STREAM_N_MELS).astype(
+            np.float32
+        )
+
+        # Samples not yet consumed by a full frame (always < n_fft)
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._prev_mel_db: np.ndarray | None = None
+
+        self._chroma = RingBuffer(window_frames, width=12)
+        self._onset = RingBuffer(window_frames)
+        self._frames_seen = 0
+        self._frames_since_update = 0
+
+    @property
+    def seconds_processed(self) -> float:
+        """Stream time covered by the frames analysed so far."""
+        return self._frames_seen * self.hop_length / self.sr
+
+    def push(self, block: np.ndarray) -> list[dict[str, Any]]:
+        """Consume a block of mono samples.
+
+        Args:
+            block: 1-D float array in ``[-1, 1]`` at :attr:`sr`.
+
+        Returns:
+            The updates that became due while consuming *block* (usually
+            zero or one).
+        """
+        samples = np.concatenate([self._tail, np.asarray(block, dtype=np.float32)])
+        n_frames = (
+            0 if len(samples) < self.n_fft else 1 + (len(samples) - self.n_fft) // self.hop_length
+        )
+
+        updates: list[dict[str, Any]] = []
+        done = 0
+        while done < n_frames:
+            # Stop at the next update boundary so each update sees
+            # exactly the frames that precede it.
+            take = min(n_frames - done, self._update_frames - self._frames_since_update)
+            start = done * self.hop_length
+            stop = start + (take - 1) * self.hop_length + self.n_fft
+            self._analyse_frames(samples[start:stop], take)
+            done += take
+            self._frames_since_update += take
+            if self._frames_since_update >= self._update_frames:
+                self._frames_since_update = 0
+                updates.append(self.current())
+
+        self._tail = samples[n_frames * self.hop_length :].copy()
+        return updates
+
+    def _analyse_frames(self, samples: np.ndarray, n_frames: int) -> None:
+        """Transform *n_frames* new frames and append their features."""
+        frames = librosa.util.frame(samples, frame_length=self.n_fft, hop_length=self.hop_length)
+        power = np.abs(np.fft.rfft(frames[:, :n_frames] * self._window[:, None], axis=0)) ** 2
+
+        chroma = self._chroma_fb @ power
+        chroma /= np.maximum(chroma.max(axis=0, keepdims=True), 1e-10)
+        self._chroma.extend(chroma.T)
+
+        mel_db = librosa.power_to_db(self._mel_fb @ power, ref=1.0, top_db=None)
+        prev = mel_db[:, :1] if self._prev_mel_db is None else self._prev_mel_db
+        diff = np.diff(np.concatenate([prev, mel_db], axis=1), axis=1)
+        self._onset.extend(np.maximum(0.0, diff).mean(axis=0))
+        self._prev_mel_db = mel_db[:, -1:]
+
+        self._frames_seen += n_frames
+
+    def current(self) -> dict[str, Any]:
+        """Return tempo, chroma and key over the current rolling window."""
+        chroma_mean = self._chroma.unordered().mean(axis=0)
+        onset = self._onset.values()
+
+        tempo = 0.0
+        if len(onset) > 1 and np.any(onset > 0):
+            tempo = estimate_tempo(onset_envelope=onset, sr=self.sr, hop_length=self.hop_length)
+        key = determine_key(chroma_mean) if np.sum(chroma_mean) > 0 else "Desconocida"
+
+        return {
+            "time": self.seconds_processed,
+            "window": len(onset) * self.hop_length / self.sr,
+            "tempo": tempo,
+            "key": key,
+            "chroma": [float(c) for c in chroma_mean],
+        }
+
+
+def read_pcm_blocks(
+    stream: BinaryIO,
+    fmt: str = "s16le",
+    channels: int = 1,
+    block_frames: int = 4096,
+) -> Iterator[np.ndarray]:
+    """Decode raw interleaved PCM from *stream* into mono float blocks.
+
+    Reads at most *block_frames* sample frames at a time, so the memory
+    used is independent of how long the stream runs.
+
+    Args:
+        stream: Binary file object (``sys.stdin.buffer``, a FIFO, ...).
+        fmt: One of :data:`PCM_FORMATS`.
+        channels: Interleaved channel count; channels are averaged.
+        block_frames: Sample frames per yielded block.
+    """
+    dtype, scale = PCM_FORMATS[fmt]
+    frame_bytes = dtype.itemsize * channels
+    pending = b""
+    while True:
+        chunk = stream.read(block_frames * frame_bytes)
+        if not chunk:
+            break
+        pending += chunk
+        usable = len(pending) - len(pending) % frame_bytes
+        if usable == 0:
+            continue
+        data = np.frombuffer(pending[:usable], dtype=dtype).astype(np.float32) / scale
+        pending = pending[usable:]
+        if channels > 1:
+            data = data.reshape(-1, channels).mean(axis=1)
+        yield data
+
+
+def analyze_stream(
+    stream: BinaryIO,
+    sr: int,
+    fmt: str = "s16le",
+    channels: int = 1,
+    **analyzer_kwargs: Any,
+) -> Iterator[dict[str, Any]]:
+    """Yield rolling analysis updates for a raw PCM byte stream.
+
+    Runs until *stream* reaches EOF (never, for a live feed).
+    """
+    analyzer = StreamAnalyzer(sr, **analyzer_kwargs)
+    logger.info("Streaming analysis started (%d Hz, %s, %d ch)", sr, fmt, channels)
+    for block in read_pcm_blocks(stream, fmt=fmt, channels=channels):
+        yield from analyzer.push(block)
+    logger.info("Stream ended after %.1f s", analyzer.seconds_processed)
+
+
+def analyze_file_blocks(path: str, block_frames: int = FILE_BLOCK_FRAMES) -> dict[str, Any]:
+    """Analyse a whole audio file without holding its signal in memory.
+
+    The file is read *block_frames* at a time and fed to a
+    :class:`StreamAnalyzer` whose window spans the entire file, so the
+    result covers every frame while only per-frame chroma and onset
+    values are kept.  The same blocks, with their channels, feed a
+    :class:`~model.loudness.LoudnessMeter`.  Used for files too large to
+    decode at once.
+
+    Returns:
+        ``path``, ``sr``, ``hop_length``, ``tempo``, ``key`` and
+        ``loudness`` (no arrays), or ``{"error": ...}`` if the file
+        cannot be read.
+    """
+    try:
+        info = sf.info(path)
+        span = info.duration + 1.0
+        analyzer = StreamAnalyzer(info.samplerate, window_seconds=span, update_seconds=span)
+        meter = LoudnessMeter(info.samplerate, channels=info.channels)
+        for block in sf.blocks(path, blocksize=block_frames, dtype="float32", always_2d=True):
+            analyzer.push(block.mean(axis=1))
+            meter.push(block)
+    except (RuntimeError, OSError) as exc:
+        logger.error("Block analysis of %s failed: %s", path, exc)
+        return {"error": str(exc)}
+
+    result = analyzer.current()
+    logger.info("Block analysis of %s covered %.1f s", path, analyzer.seconds_processed)
+    return {
+        "path": path,
+        "sr": info.samplerate,
+        "hop_length": analyzer.hop_length,
+        "tempo": result["tempo"],
+        "key": result["key"],
+        "loudness": meter.summary(),
+    }
@@ -0,0 +1,135 @@
+"""Tempo estimation.
+
+Two estimators share the onset-strength envelope computed by the
+feature graph:
+
+- ``"accurate"`` — ``librosa.feature.tempo``: a local autocorrelation
+  tempogram (one ACF per 8-second window, every frame) averaged over
+  time;
+- ``"fast"`` — :func:`tempo_candidates`: the envelope is resampled to
+  a fixed frame rate, a single global autocorrelation is taken with one FFT, weighted by a
+  log-normal BPM prior and searched for peaks inside a BPM range.  It
+  also reports the runner-up tempi with confidences, which is what bulk
+  library tagging needs.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import librosa
+import numpy as np
+
+from config import (
+    HOP_LENGTH,
+    TEMPO_CANDIDATES,
+    TEMPO_FAST_FRAME_RATE,
+    TEMPO_MAX_BPM,
+    TEMPO_MIN_BPM,
+    TEMPO_PRIOR_BPM,
+    TEMPO_PRIOR_OCTAVES,
+)
+
+logger = logging.getLogger(__name__)
+
+TEMPO_MODES: frozenset[str] = frozenset({"accurate", "fast"})
+"""Accepted values of :data:`~config.TEMPO_MODE`."""
+
+
+def estimate_tempo(**kwargs: Any) -> float:
+    """Estimate a global tempo (BPM) with ``librosa``.
+
+    Accepts the keyword arguments of ``librosa.feature.tempo``
+    (``y``/``sr`` or ``onset_envelope``/``sr``/``hop_length``).
+    """
+    # librosa >= 0.10 exposes tempo under ``feature``; older releases
+    # only have the (now deprecated) ``beat.tempo``.
+    tempo_fn = getattr(librosa.feature, "tempo", None) or librosa.beat.tempo
+    (tempo,) = tempo_fn(**kwargs)
+    return float(tempo)
+
+
+def tempo_candidates(
+    onset: np.ndarray,
+    sr: int,
+    hop_length: int = HOP_LENGTH,
+    frame_rate: float = TEMPO_FAST_FRAME_RATE,
+    prior_bpm: float = TEMPO_PRIOR_BPM,
+    prior_octaves: float = TEMPO_PRIOR_OCTAVES,
+    bpm_range: tuple[float, float] = (TEMPO_MIN_BPM, TEMPO_MAX_BPM),
+    top_n: int = TEMPO_CANDIDATES,
+) -> list[tuple[float, float]]:
+    """Return the strongest tempo candidates of an onset envelope.
+
+    Args:
+        onset: Onset-strength envelope (one value per STFT frame).
+        sr: Sample rate of the analysed signal.
+        hop_length: Hop of the envelope's frames, in samples.
+        frame_rate: Rate (frames/s) the envelope is resampled to before
+            the autocorrelation, so every sample rate searches the same
+            lag grid; a coarser envelope blurs the autocorrelation peaks.
+        prior_bpm: Centre of the log-normal tempo prior.
+        prior_octaves: Standard deviation of the prior, in octaves.
+        bpm_range: Lowest and highest tempo considered.
+        top_n: Number of candidates returned.
+
+    Returns:
+        Up to *top_n* ``(bpm, confidence)`` pairs, strongest first; the
+        confidences sum to 1.  Empty if the envelope has no periodicity
+        in *bpm_range*.
+    """
+    env = np.asarray(onset, dtype=np.float64)
+    source_rate = sr / hop_length
+    if len(env) > 1 and source_rate != frame_rate:
+        # Averaging over one target frame first keeps onsets from falling
+        # between the new samples; a whole-frame decimation instead leaves
+        # 44.1 kHz envelopes on a lag grid that splits the beat peak.
+        width = int(source_rate // frame_rate)
+        if width > 1:
+            env = np.convolve(env, np.full(width, 1.0 / width), mode="same")
+        times = np.arange(len(env)) / source_rate
+        env = np.interp(np.arange(int(times[-1] * frame_rate) + 1) / frame_rate, times, env)
+    env = env - env.mean() if len(env) else env
+
+    low_bpm, high_bpm = bpm_range
+    lag_min = max(1, int(np.floor(60.0 * frame_rate / high_bpm)))
+    lag_max = min(len(env) - 2, int(np.ceil(60.0 * frame_rate / low_bpm)))
+    if lag_max <= lag_min or not np.any(env):
+        return []
+
+    # Autocorrelation of the whole envelope with one zero-padded FFT
+    n_fft = 1 << (2 * len(env) - 1).bit_length()
+    spectrum = np.fft.rfft(env, n_fft)
+    ac = np.fft.irfft(spectrum.real**2 + spectrum.imag**2, n_fft)[: len(env)]
+    # Unbiased estimate: long lags overlap fewer frames
+    ac /= np.arange(len(env), 0, -1)
+
+    lags = np.arange(lag_min, lag_max + 1)
+    prior = np.exp(-0.5 * (np.log2(60.0 * frame_rate / lags / prior_bpm) / prior_octaves) ** 2)
+    score = np.maximum(ac[lags], 0.0) * prior
+
+    is_peak = (score[1:-1] > score[:-2]) & (score[1:-1] >= score[2:])
+    peaks = np.flatnonzero(is_peak) + 1
+    if not len(peaks):
+        peaks = np.array([int(np.argmax(score))])
+    peaks = peaks[np.argsort(score[peaks])[::-1][:top_n]]
+    total = float(np.sum(score[peaks]))
+    if total <= 0.0:
+        return []
+
+    candidates = []
+    for i in peaks:
+        lag = int(lags[i])
+        # Parabolic interpolation refines the peak below one (coarse) frame
+        before, at, after = ac[lag - 1], ac[lag], ac[lag + 1]
+        curvature = before - 2.0 * at + after
+        shift = 0.5 * (before - after) / curvature if curvature < 0 else 0.0
+        candidates.append((60.0 * frame_rate / (lag + shift), float(score[i]) / total))
+    return candidates
+
+
+def estimate_tempo_fast(onset: np.ndarray, sr: int, hop_length: int = HOP_LENGTH) -> float:
+    """Return the top :func:`tempo_candidates` tempo (``0.0`` if none)."""
+    candidates = tempo_candidates(onset, sr, hop_length)
+    return candidates[0][0] if candidates else 0.0
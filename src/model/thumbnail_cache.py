@@ -0,0 +1,132 @@
+"""On-disk cache of history-list thumbnails.
+
+Each thumbnail is a small RGBA ``uint8`` image stored as a plain
+``.npy`` file, named after the history record it belongs to (see
+:func:`thumbnail_key`)::
+
+    <root>/<key>.npy
+
+Files are replaced atomically (see :mod:`atomic_io`), so a
+reader never sees a half-written thumbnail.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import logging
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from atomic_io import write_bytes
+from metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THUMBNAIL_DIR = Path.home() / ".music-analyzer" / "thumbnails"
+
+
+def thumbnail_key(record: dict[str, Any]) -> str | None:
+    """Return the cache key of a history *record*.
+
+    Archived records use their archive ID, which is unique per
+    analysis.  Others are keyed by path and fingerprint (or tempo and
+    key), so re-analysing a file replaces its thumbnail only if the
+    audio changed.  Records without a path have no key.
+    """
+    if record.get("archive"):
+        return str(record["archive"])
+    path = record.get("path") or record.get("file")
+    if not path:
+        return None
+    ident = record.get("fingerprint") or f"{record.get('tempo')}|{record.get('key')}"
+    return hashlib.sha1(f"{path}\0{ident}".encode()).hexdigest()
+
+
+class ThumbnailCache:
+    """Stores and loads thumbnails by key.
+
+    Args:
+        root: Cache directory (created on first write).
+    """
+
+    def __init__(self, root: Path | str = DEFAULT_THUMBNAIL_DIR) -> None:
+        self._root = Path(root)
+
+    @property
+    def root(self) -> Path:
+        """The cache directory."""
+        return self._root
+
+    def _file(self, key: str) -> Path:
+        return self._root / f"{key}.npy"
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Return the thumbnail stored under *key*, or ``None``."""
+        try:
+            image = np.load(self._file(key))
+        except FileNotFoundError:
+            cache_lookup("thumbnail", hit=False)
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Thumbnail %s is unreadable: %s", key, exc)
+            return None
+        if image.dtype != np.uint8 or image.ndim != 3 or image.shape[2] != 4:
+            logger.warning("Thumbnail %s has an unexpected layout %s", key, image.shape)
+            return None
+        cache_lookup("thumbnail", hit=True)
+        return image
+
+    def put(self, key: str, image: np.ndarray) -> bool:
+        """Store an ``(height, width, 4)`` ``uint8`` *image* under *key*.
+
+        Returns:
+            ``True`` if the thumbnail was written.
+        """
+        try:
+            self._root.mkdir(parents=True, exist_ok=True)
+            buffer = io.BytesIO()
+            np.save(buffer, np.ascontiguousarray(image, dtype=np.uint8))
+            write_bytes(self._file(key), buffer.getvalue())
+        except OSError as exc:
+            logger.warning("Could not cache thumbnail %s: %s", key, exc)
+            return False
+        return True
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """Delete every thumbnail whose key is not in *keep*.
+
+        Temporary files of writes in progress are left alone.
+
+        Args:
+            keep: Keys still referenced (see :func:`thumbnail_key`).
+
+        Returns:
+            The number of thumbnails deleted.
+        """
+        kept = set(keep)
+        try:
+            orphans = [
+                entry
+                for entry in self._root.glob("*.npy")
+                if not entry.name.startswith(".") and entry.stem not in kept
+            ]
+        except OSError:
+            return 0
+        removed = 0
+        for entry in orphans:
+            with contextlib.suppress(OSError):
+                entry.unlink()
+                removed += 1
+        if removed:
+            logger.info("Pruned %d thumbnails", removed)
+        return removed
+
+    def remove(self, key: str) -> None:
+        """Delete the thumbnail of *key* (missing thumbnails are ignored)."""
+        with contextlib.suppress(OSError):
+            self._file(key).unlink()
@@ -0,0 +1,82 @@
+"""Timbre and spectral descriptors.
+
+Every descriptor is derived from arrays the feature graph already holds
+— the magnitude / power STFT, the dB mel spectrogram and the signal —
+so adding them costs no extra decode or STFT:
+
+- **MFCCs** — DCT of the dB mel spectrogram, whose mel filter bank is
+  built once per ``(sr, n_fft, n_mels)`` by :func:`mel_filter_bank`;
+- **spectral centroid** and **roll-off** (Hz) — from the magnitude STFT;
+- **spectral flatness** — from the power STFT;
+- **zero-crossing rate** — framed on the signal with the STFT's hop.
+
+:func:`summarize_timbre` reduces the frame-wise descriptors to their
+mean and standard deviation, as flat JSON-safe scalars.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+
+import librosa
+import numpy as np
+
+from config import N_FFT, N_MELS
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=8)
+def mel_filter_bank(sr: int, n_fft: int = N_FFT, n_mels: int = N_MELS) -> np.ndarray:
+    """Return a cached, read-only ``n_mels × (1 + n_fft/2)`` mel filter bank.
+
+    Identical to the bank ``librosa.feature.melspectrogram`` rebuilds
+    on every call.
+    """
+    basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+    basis.setflags(write=False)
+    return basis
+
+
+def mel_power(power: np.ndarray, sr: int, n_fft: int = N_FFT, n_mels: int = N_MELS) -> np.ndarray:
+    """Project a power spectrogram onto the mel scale.
+
+    Same result as ``librosa.feature.melspectrogram(S=power, sr=sr)``.
+    """
+    return np.einsum("...ft,mf->...mt", power, mel_filter_bank(sr, n_fft, n_mels), optimize=True)
+
+
+def _stats(name: str, values: np.ndarray) -> dict[str, float]:
+    return {f"{name}_mean": float(np.mean(values)), f"{name}_std": float(np.std(values))}
+
+
+def summarize_timbre(
+    mfcc: np.ndarray,
+    centroid: np.ndarray,
+    rolloff: np.ndarray,
+    flatness: np.ndarray,
+    zcr: np.ndarray,
+) -> dict[str, float]:
+    """Summarise frame-wise descriptors by their mean and deviation.
+
+    Args:
+        mfcc: MFCC matrix, shape ``(n_mfcc, n_frames)``.
+        centroid: Spectral centroid per frame (Hz).
+        rolloff: Spectral roll-off per frame (Hz).
+        flatness: Spectral flatness per frame (0–1).
+        zcr: Zero-crossing rate per frame (0–1).
+
+    Returns:
+        ``centroid_mean``, ``centroid_std``, ``rolloff_*``,
+        ``flatness_*``, ``zcr_*`` and ``mfcc1_mean`` … ``mfccN_std``.
+    """
+    summary = {
+        **_stats("centroid", centroid),
+        **_stats("rolloff", rolloff),
+        **_stats("flatness", flatness),
+        **_stats("zcr", zcr),
+    }
+    for i, coefficient in enumerate(np.atleast_2d(mfcc), start=1):
+        summary.update(_stats(f"mfcc{i}", coefficient))
+    return summary
@@ -2,15 +2,27 @@
 
 Stores only scalar results (file, bpm, key) to keep the file small.
 Full feature arrays (spectrograms, chromagrams) are NOT persisted.
+
+The history file is always replaced atomically (temporary file, fsync,
+rename), so a crash leaves either the previous or the new version on
+disk, never a truncated one.  The GUI saves through a
+:class:`HistoryWriter`, which batches entries on a background thread.
 """
 
 from __future__ import annotations
 
+import contextlib
 import json
 import logging
+import os
+import threading
 from pathlib import Path
 from typing import Any
 
+from atomic_io import write_text
+from config import HISTORY_FLUSH_BATCH, HISTORY_FLUSH_INTERVAL_S
+from tracing import span
+
 logger = logging.getLogger(__name__)
 
 _HISTORY_DIR = Path.home() / ".music-analyzer"
@@ -22,26 +34,43 @@ def _ensure_dir() -> None:
     _HISTORY_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def to_record(entry: dict[str, Any]) -> dict[str, Any]:
+    """Return the scalar (JSON-safe) part of a features dictionary."""
+    return {k: v for k, v in entry.items() if isinstance(v, (str, float, int, bool))}
+
+
+def _read_for_update(path: Path) -> list[dict[str, Any]]:
+    """Read *path* before rewriting it.
+
+    An unreadable file is moved aside to ``<name>.corrupt`` instead of
+    being overwritten, so its entries can still be recovered by hand.
+    """
+    if not path.exists():
+        return []
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError) as exc:
+        logger.warning("Corrupt history file, starting fresh: %s", exc)
+        with contextlib.suppress(OSError):
+            os.replace(path, path.with_name(path.name + ".corrupt"))
+        return []
+
+
+def _dump(history: list[dict[str, Any]]) -> str:
+    return json.dumps(history, indent=2, ensure_ascii=False)
+
+
 def save_entry(entry: dict[str, Any]) -> None:
-    """Append a single analysis entry to the history file.
+    """Append a single analysis entry to the history file (synchronously).
 
     Args:
         entry: Dictionary with keys ``file``, ``bpm``, ``key``, etc.
                May include extra metadata (but NOT full signal arrays).
     """
     _ensure_dir()
-    history = []
-    if _HISTORY_FILE.exists():
-        try:
-            history = json.loads(_HISTORY_FILE.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError) as exc:
-            logger.warning("Corrupt history file, starting fresh: %s", exc)
-
-    # Keep only scalar entries for persistence
-    scalar = {k: v for k, v in entry.items() if isinstance(v, (str, float, int, bool))}
-    history.append(scalar)
-
-    _HISTORY_FILE.write_text(json.dumps(history, indent=2, ensure_ascii=False), encoding="utf-8")
+    history = _read_for_update(_HISTORY_FILE)
+    history.append(to_record(entry))
+    write_text(_HISTORY_FILE, _dump(history))
     logger.debug("History saved (%d entries)", len(history))
 
 
@@ -60,3 +89,127 @@ def load_history() -> list[dict[str, Any]]:
     except (json.JSONDecodeError, OSError) as exc:
         logger.warning("Failed to load history: %s", exc)
         return []
+
+
+class HistoryWriter:
+    """Write-behind history persistence on a background thread.
+
+    :meth:`submit` only queues the entry.  The writer thread appends
+    queued entries to the file every *interval* seconds, or as soon as
+    *batch* entries are pending, with one atomic rewrite per flush.
+    Entries that fail to write are retried on the next flush.
+
+    Args:
+        path: History file (defaults to ``~/.music-analyzer/history.json``).
+        interval: Longest time (s) an entry stays queued.
+        batch: Number of queued entries that triggers an early flush.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        interval: float = HISTORY_FLUSH_INTERVAL_S,
+        batch: int = HISTORY_FLUSH_BATCH,
+    ) -> None:
+        self._path = Path(path) if path is not None else _HISTORY_FILE
+        self._interval = interval
+        self._batch = batch
+
+        self._cond = threading.Condition()
+        self._pending: list[dict[str, Any]] = []
+        self._submitted = 0
+        self._written = 0
+        self._failures = 0
+        self._flush_requested = False
+        self._closed = False
+
+        # The file's contents, read once by the writer thread
+        self._history: list[dict[str, Any]] | None = None
+
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self) -> Path:
+        """The history file."""
+        return self._path
+
+    def submit(self, entry: dict[str, Any]) -> None:
+        """Queue the scalar part of *entry* for writing."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("HistoryWriter is closed")
+            self._pending.append(to_record(entry))
+            self._submitted += 1
+            if len(self._pending) >= self._batch:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write everything submitted so far and wait for it.
+
+        Returns:
+            ``True`` if the entries reached the disk within *timeout*,
+            ``False`` on timeout or if the write failed.
+        """
+        with self._cond:
+            target, failures = self._submitted, self._failures
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: (
+                    self._written >= target
+                    or self._failures > failures
+                    or not self._thread.is_alive()
+                ),
+                timeout,
+            )
+            return self._written >= target
+
+    def close(self, timeout: float | None = None) -> None:
+        """Flush the queued entries and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: (
+                        self._closed or self._flush_requested or len(self._pending) >= self._batch
+                    ),
+                    self._interval,
+                )
+                batch, self._pending = self._pending, []
+                self._flush_requested = False
+                closed = self._closed
+
+            if batch:
+                written = self._write(batch)
+                with self._cond:
+                    if written:
+                        self._written += len(batch)
+                    else:
+                        self._failures += 1
+                        self._pending[:0] = batch
+                    self._cond.notify_all()
+            if closed:
+                if self._pending:
+                    logger.error("%d history entries could not be saved", len(self._pending))
+                return
+
+    def _write(self, batch: list[dict[str, Any]]) -> bool:
+        """Append *batch* to the file; return ``False`` if the write failed."""
+        try:
+            with span("history write", "persist", entries=len(batch)):
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                if self._history is None:
+                    self._history = _read_for_update(self._path)
+                write_text(self._path, _dump([*self._history, *batch]))
+        except OSError as exc:
+            logger.warning("Could not save history (%d entries pending): %s", len(batch), exc)
+            return False
+        self._history.extend(batch)
+        logger.debug("History saved (%d entries, %d new)", len(self._history), len(batch))
+        return True
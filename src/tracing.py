@@ -0,0 +1,234 @@
+"""Opt-in span tracing in the Chrome trace-event format.
+
+When tracing is on (``--trace PATH``), instrumented code records a
+*span* — name, category, start, duration, process and thread — for
+audio loading, every DSP stage of the feature graph, result signals,
+history writes and plot draws::
+
+    with span("load_audio", "io", path=path):
+        ...
+
+:func:`write_trace` saves the spans as Chrome trace-event JSON, which
+``chrome://tracing``, Perfetto or speedscope show as one lane per
+process and thread, so serialisation points and idle workers stand out.
+
+Timestamps come from :func:`time.perf_counter_ns`, a system-wide
+monotonic clock, so spans from worker processes line up with the
+parent's.  Spawned workers inherit tracing through an environment
+variable and ship their spans back with each result (see
+:func:`metrics.call_with_metrics`).  While tracing is off, :func:`span`
+returns a shared no-op context manager.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from atomic_io import write_text
+from config import TRACE_MAX_EVENTS
+
+logger = logging.getLogger(__name__)
+
+TRACE_ENV = "TUNESCOPE_TRACE"
+"""Environment variable that turns tracing on in spawned worker processes."""
+
+
+class _NullSpan:
+    """What :func:`span` returns while tracing is off."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Records one complete (``"ph": "X"``) event when its block exits."""
+
+    __slots__ = ("_tracer", "_name", "_cat", "_args", "_start")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._args = args
+        self._start = 0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter_ns()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        end = time.perf_counter_ns()
+        args = self._args
+        if exc_type is not None:
+            args = {**args, "error": exc_type.__name__}
+        self._tracer.add(self._name, self._cat, self._start, end - self._start, args)
+
+
+class Tracer:
+    """Collects trace events of this process, up to *max_events*."""
+
+    def __init__(self, max_events: int = TRACE_MAX_EVENTS) -> None:
+        self.enabled = False
+        self._max_events = max_events
+        self._events: list[dict[str, Any]] = []
+        self._threads: set[tuple[int, int]] = set()
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, cat: str, start_ns: int, dur_ns: int, args: dict[str, Any]) -> None:
+        """Record a complete event that started at ``perf_counter_ns()`` *start_ns*."""
+        pid = os.getpid()
+        tid = threading.get_native_id()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": dur_ns / 1000,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = {key: _jsonable(value) for key, value in args.items()}
+        with self._lock:
+            if len(self._events) >= self._max_events:
+                self._dropped += 1
+                return
+            if (pid, tid) not in self._threads:
+                self._threads.add((pid, tid))
+                self._events.append(_thread_name_event(pid, tid))
+            self._events.append(event)
+
+    def extend(self, events: list[dict[str, Any]]) -> None:
+        """Add events recorded by another process."""
+        with self._lock:
+            room = max(0, self._max_events - len(self._events))
+            self._events.extend(events[:room])
+            self._dropped += len(events) - min(room, len(events))
+
+    def drain(self) -> list[dict[str, Any]]:
+        """Return and forget the events recorded so far."""
+        with self._lock:
+            events, self._events = self._events, []
+            self._threads.clear()
+            return events
+
+    @property
+    def dropped(self) -> int:
+        """Events discarded because the buffer was full."""
+        return self._dropped
+
+
+def _jsonable(value: Any) -> Any:
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+def _thread_name_event(pid: int, tid: int) -> dict[str, Any]:
+    name = threading.current_thread().name
+    if name.startswith("Dummy-"):
+        # Started outside Python (QThreadPool); a generic name is all we get
+        name = f"pool thread {tid}"
+    return {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+
+
+_tracer = Tracer()
+_tracer.enabled = os.environ.get(TRACE_ENV) == "1"
+
+
+def enabled() -> bool:
+    """Return ``True`` while spans are being recorded."""
+    return _tracer.enabled
+
+
+def start() -> None:
+    """Start recording spans here and in worker processes spawned from now on."""
+    os.environ[TRACE_ENV] = "1"
+    _tracer.enabled = True
+
+
+def stop() -> list[dict[str, Any]]:
+    """Stop recording and return every event collected (workers' included)."""
+    os.environ.pop(TRACE_ENV, None)
+    _tracer.enabled = False
+    if _tracer.dropped:
+        logger.warning("Trace buffer full: %d events dropped", _tracer.dropped)
+    return _tracer.drain()
+
+
+def span(name: str, cat: str = "app", **args: Any) -> _Span | _NullSpan:
+    """Return a context manager recording the ``with`` block as a span.
+
+    Args:
+        name: Span name shown in the viewer.
+        cat: Category (``"io"``, ``"dsp"``, ``"signal"``, ...).
+        **args: Scalars shown in the span's details.
+    """
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _Span(_tracer, name, cat, args)
+
+
+def drain() -> list[dict[str, Any]]:
+    """Return and forget this process's events (used by worker processes)."""
+    return _tracer.drain() if _tracer.enabled else []
+
+
+def add_events(events: list[dict[str, Any]]) -> None:
+    """Merge events shipped back by a worker process."""
+    if events and _tracer.enabled:
+        _tracer.extend(events)
+
+
+def write_trace(path: Path | str, events: list[dict[str, Any]]) -> Path:
+    """Write *events* as a Chrome trace-event JSON file (atomically).
+
+    Returns:
+        The path written.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    path = Path(path)
+    # Workers repeat their thread names with every shipment
+    seen: set[tuple[Any, ...]] = set()
+    unique = []
+    for event in events:
+        if event["ph"] == "M":
+            key = (event["name"], event["pid"], event.get("tid"))
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(event)
+    pids = sorted({event["pid"] for event in unique})
+    main_pid = os.getpid()
+    names = [
+        {
+            "name": "process_name",
+            "ph": "M",
+            "pid": pid,
+            "args": {"name": "main" if pid == main_pid else f"worker {pid}"},
+        }
+        for pid in pids
+    ]
+    document = {"traceEvents": names + unique, "displayTimeUnit": "ms"}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text(path, json.dumps(document, ensure_ascii=False, separators=(",", ":")))
+    logger.info("Trace of %d events written to %s", len(unique), path)
+    return path
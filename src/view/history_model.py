@@ -0,0 +1,240 @@
+"""Qt item models exposing a :class:`HistoryStore` to list views.
+
+The models never copy the store: labels are produced on demand in
+``data()``.  :class:`HistoryListModel` hands rows to the view in
+batches of :data:`~config.HISTORY_FETCH_BATCH` through Qt's
+``canFetchMore``/``fetchMore`` protocol, and announces new records with
+a single row insertion instead of a full reset.  A :class:`QListView`
+therefore only ever touches the rows it displays.
+
+:class:`HistoryFilterModel` shows a subset of the store (search
+results), appended chunk by chunk as they are streamed in.
+
+Both models expose the store row of each item through
+:data:`ROW_ROLE`, which is what views report back to the controller.
+Given a :class:`~controller.thumbnail_loader.ThumbnailLoader` they also
+decorate rows with thumbnails, which are requested only as the view
+paints the rows and filled in once loaded.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from typing import TYPE_CHECKING, Any
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QObject, QPersistentModelIndex, Qt
+
+from config import HISTORY_FETCH_BATCH
+from model.history_store import HistoryStore
+from model.thumbnail_cache import thumbnail_key
+
+if TYPE_CHECKING:
+    from controller.thumbnail_loader import ThumbnailLoader
+
+logger = logging.getLogger(__name__)
+
+_Index = QModelIndex | QPersistentModelIndex
+
+RECORD_ROLE = Qt.ItemDataRole.UserRole
+"""Item data role returning the row's record dict."""
+
+ROW_ROLE = Qt.ItemDataRole.UserRole + 1
+"""Item data role returning the item's row in the :class:`HistoryStore`."""
+
+
+def _record_data(store: HistoryStore, row: int, role: int) -> Any:
+    """Return *role* data for store *row* (shared by both models)."""
+    if role == Qt.ItemDataRole.DisplayRole:
+        return store.label(row)
+    if role == Qt.ItemDataRole.ToolTipRole:
+        return str(store[row].get("path", ""))
+    if role == RECORD_ROLE:
+        return store[row]
+    if role == ROW_ROLE:
+        return row
+    return None
+
+
+class _ThumbnailModel(QAbstractListModel):
+    """Shared thumbnail decoration of the history models."""
+
+    def __init__(self, store: HistoryStore, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._store = store
+        self._loader: ThumbnailLoader | None = None
+        # Rows painted before their thumbnail was ready; records of the
+        # same audio share a key, so one key may wait for several rows
+        self._waiting: dict[str, set[int]] = {}
+
+    def set_thumbnails(self, loader: ThumbnailLoader) -> None:
+        """Decorate rows with thumbnails supplied by *loader*."""
+        self._loader = loader
+        loader.ready.connect(self._on_thumbnail_ready)
+
+    def _row_data(self, row: int, role: int) -> Any:
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._thumbnail(row)
+        return _record_data(self._store, row, role)
+
+    def _thumbnail(self, row: int) -> Any:
+        if self._loader is None:
+            return None
+        record = self._store[row]
+        image = self._loader.thumbnail(record)
+        if image is None:
+            key = thumbnail_key(record)
+            if key is not None:
+                self._waiting.setdefault(key, set()).add(row)
+        return image
+
+    def _view_index(self, row: int) -> QModelIndex:
+        """Return the index showing store *row* without fetching it.
+
+        Raises:
+            NotImplementedError: Subclasses must implement this.
+        """
+        raise NotImplementedError("_view_index() debe ser implementado por la subclase.")
+
+    def _on_thumbnail_ready(self, key: str) -> None:
+        for row in sorted(self._waiting.pop(key, ())):
+            index = self._view_index(row)
+            if index.isValid():
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+
+class HistoryListModel(_ThumbnailModel):
+    """Lazily fetched list model over a :class:`HistoryStore`.
+
+    Args:
+        store: Records to expose (shared, not copied).
+        batch: Rows revealed per :meth:`fetchMore` call.
+        parent: Optional Qt parent.
+    """
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        batch: int = HISTORY_FETCH_BATCH,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(store, parent)
+        self._batch = max(1, batch)
+        self._fetched = 0
+
+    @property
+    def store(self) -> HistoryStore:
+        """The underlying record store."""
+        return self._store
+
+    # ------------------------------------------------------------------
+    # QAbstractListModel interface
+    # ------------------------------------------------------------------
+
+    def rowCount(self, parent: _Index = QModelIndex()) -> int:  # noqa: N802
+        return 0 if parent.isValid() else self._fetched
+
+    def data(self, index: _Index, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or not 0 <= index.row() < self._fetched:
+            return None
+        return self._row_data(index.row(), role)
+
+    def canFetchMore(self, parent: _Index = QModelIndex()) -> bool:  # noqa: N802
+        return not parent.isValid() and self._fetched < len(self._store)
+
+    def fetchMore(self, parent: _Index = QModelIndex()) -> None:  # noqa: N802
+        if parent.isValid():
+            return
+        count = min(self._batch, len(self._store) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def append(self, record: dict[str, Any], persisted: bool = False) -> int:
+        """Add *record* to the store and return its row.
+
+        The row is announced to views immediately if every earlier row
+        has been fetched; otherwise it is revealed by a later fetch.
+        """
+        visible = self._fetched == len(self._store)
+        row = self._store.append(record, persisted)
+        if visible:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._fetched += 1
+            self.endInsertRows()
+        return row
+
+    def extend(self, records: list[dict[str, Any]], persisted: bool = False) -> range:
+        """Add several records; only the first batch is fetched eagerly."""
+        visible = self._fetched == len(self._store)
+        rows = self._store.extend(records, persisted)
+        if visible:
+            self.fetchMore()
+        return rows
+
+    def ensure_fetched(self, row: int) -> None:
+        """Fetch rows until *row* is part of the model."""
+        while row >= self._fetched and self.canFetchMore():
+            self.fetchMore()
+
+    def index_for_row(self, row: int) -> QModelIndex:
+        """Return the model index showing store *row* (fetching it)."""
+        self.ensure_fetched(row)
+        return self.index(row)
+
+    def _view_index(self, row: int) -> QModelIndex:
+        return self.index(row) if row < self._fetched else QModelIndex()
+
+
+class HistoryFilterModel(_ThumbnailModel):
+    """List model over a subset of :class:`HistoryStore` rows.
+
+    Args:
+        store: Records to expose (shared, not copied).
+        parent: Optional Qt parent.
+    """
+
+    def __init__(self, store: HistoryStore, parent: QObject | None = None) -> None:
+        super().__init__(store, parent)
+        self._rows: list[int] = []
+
+    def rowCount(self, parent: _Index = QModelIndex()) -> int:  # noqa: N802
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: _Index, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        return self._row_data(self._rows[index.row()], role)
+
+    def clear(self) -> None:
+        """Remove every row (a new search is starting)."""
+        self.beginResetModel()
+        self._rows = []
+        self._waiting.clear()
+        self.endResetModel()
+
+    def append_rows(self, rows: list[int]) -> None:
+        """Append a chunk of matching store rows."""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def index_for_row(self, row: int) -> QModelIndex:
+        """Return the model index showing store *row* (invalid if filtered out)."""
+        # Rows arrive in ascending order, so the position is a bisection.
+        pos = bisect.bisect_left(self._rows, row)
+        if pos < len(self._rows) and self._rows[pos] == row:
+            return self.index(pos)
+        return QModelIndex()
+
+    def _view_index(self, row: int) -> QModelIndex:
+        return self.index_for_row(row)
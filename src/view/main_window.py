@@ -12,14 +12,16 @@ import os
 import sys
 from typing import Any
 
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import QModelIndex, QSize, Qt, QTimer, Signal
 from PySide6.QtGui import QFont, QIcon
 from PySide6.QtWidgets import (
+    QComboBox,
+    QFormLayout,
     QFrame,
     QHBoxLayout,
     QLabel,
-    QListWidget,
-    QListWidgetItem,
+    QLineEdit,
+    QListView,
     QMainWindow,
     QProgressBar,
     QPushButton,
@@ -30,6 +32,8 @@ from PySide6.QtWidgets import (
 
 from config import (
     CONTROL_PANEL_WIDTH,
+    DISPLAY_CHOICES,
+    SEARCH_DEBOUNCE_MS,
     STYLE_FILEPATH_LABEL,
     STYLE_STATUS_ERROR,
     STYLE_STATUS_INFO,
@@ -37,11 +41,14 @@ from config import (
     STYLE_STATUS_WARN,
     STYLE_SUMMARY_OUTPUT,
     SUMMARY_ICONS,
+    THUMBNAIL_PX,
     WINDOW_MIN_HEIGHT,
     WINDOW_MIN_WIDTH,
     WINDOW_TITLE,
 )
+from tracing import span
 
+from .history_model import ROW_ROLE, HistoryFilterModel, HistoryListModel
 from .visualizer import KeyVisualizer, SpectrogramVisualizer, WaveformVisualizer
 
 logger = logging.getLogger(__name__)
@@ -69,13 +76,20 @@ class MainWindow(QMainWindow):
         Emitted when the user clicks *Load & Analyse*.  Connected
         by the Controller to its :meth:`handle_analyze_request` slot.
     signal_history_item_selected(int):
-        Emitted when the user clicks a past analysis entry in the
-        history :class:`QListWidget`.
+        Emitted with the row of the history entry the user clicked
+        (a row of the :class:`HistoryStore` behind the list).
+    signal_history_search(str):
+        Emitted with the search box text once the user pauses typing.
+    signal_display_settings(dict):
+        Emitted with :meth:`display_settings` whenever the user changes
+        one of them.
     """
 
     signal_analyze_request = Signal(str)
     signal_history_item_selected = Signal(int)
+    signal_history_search = Signal(str)
     signal_export_request = Signal(str)
+    signal_display_settings = Signal(dict)
 
     def __init__(self) -> None:
         super().__init__()
@@ -147,26 +161,59 @@ class MainWindow(QMainWindow):
         self.export_button.setEnabled(False)
         self.export_button.setMinimumHeight(30)
 
-        # 6. History section
+        # 6. Display settings (redraw the current result, no re-analysis)
+        display_title = QLabel("--- Visualización ---")
+        display_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        display_title.setFont(font_title)
+
+        display_form = QFormLayout()
+        self.display_controls: dict[str, QComboBox] = {}
+        labels = {
+            "ref": "Referencia dB:",
+            "top_db": "Rango dinámico:",
+            "freq_scale": "Eje de frecuencia:",
+            "chroma_norm": "Normalización croma:",
+        }
+        for name, choices in DISPLAY_CHOICES.items():
+            combo = QComboBox()
+            combo.addItems([label for label, _value in choices])
+            combo.currentIndexChanged.connect(self._on_display_changed)
+            display_form.addRow(labels[name], combo)
+            self.display_controls[name] = combo
+
+        # 7. History section
         history_title = QLabel("--- Historial de Análisis ---")
         history_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
         history_title.setFont(font_title)
 
-        self.history_list = QListWidget()
-        self.history_list.setMaximumHeight(120)
-        self.history_list.itemClicked.connect(self._on_history_clicked)
-
-        # 7. Separator
+        self.history_search = QLineEdit()
+        self.history_search.setPlaceholderText("Buscar: nombre  bpm:120-130  key:~Am")
+        self.history_search.setClearButtonEnabled(True)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._on_search_timeout)
+        self.history_search.textChanged.connect(lambda _text: self._search_timer.start())
+
+        self.history_list = QListView()
+        self.history_list.setMaximumHeight(160)
+        self.history_list.setIconSize(QSize(*THUMBNAIL_PX))
+        # Every row has the same height, so the view never measures
+        # rows it does not show.
+        self.history_list.setUniformItemSizes(True)
+        self.history_list.clicked.connect(self._on_history_clicked)
+
+        # 8. Separator
         line = QFrame()
         line.setFrameShape(QFrame.Shape.HLine)
         line.setFrameShadow(QFrame.Shadow.Sunken)
 
-        # 8. Progress bar
+        # 9. Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         self.progress_bar.setMaximumHeight(20)
 
-        # 9. Status
+        # 10. Status
         self.status_label = QLabel("Listo para cargar.")
         self.status_label.setStyleSheet(STYLE_STATUS_OK)
 
@@ -181,8 +228,12 @@ class MainWindow(QMainWindow):
         layout.addSpacing(5)
         layout.addWidget(self.export_button)
         layout.addSpacing(10)
+        layout.addWidget(display_title)
+        layout.addLayout(display_form)
+        layout.addSpacing(10)
         layout.addWidget(history_title)
         layout.addSpacing(5)
+        layout.addWidget(self.history_search)
         layout.addWidget(self.history_list)
         layout.addSpacing(5)
         layout.addWidget(self.progress_bar)
@@ -226,15 +277,36 @@ class MainWindow(QMainWindow):
         """Emit ``signal_analyze_request`` so the Controller opens the dialog."""
         self.signal_analyze_request.emit("")
 
-    def _on_history_clicked(self, item: QListWidgetItem) -> None:
-        """Emit the index of the clicked history entry."""
-        row = self.history_list.row(item)
-        self.signal_history_item_selected.emit(row)
+    def _on_history_clicked(self, index: QModelIndex) -> None:
+        """Emit the store row of the clicked history entry."""
+        row = index.data(ROW_ROLE)
+        if row is not None:
+            self.signal_history_item_selected.emit(row)
+
+    def _on_search_timeout(self) -> None:
+        """Emit the search text after the debounce interval."""
+        self.signal_history_search.emit(self.history_search.text())
 
     def _on_export_clicked(self) -> None:
         """Emit ``signal_export_request`` so the Controller opens the save dialog."""
         self.signal_export_request.emit("")
 
+    def _on_display_changed(self, _index: int) -> None:
+        """Emit the display settings after the user picked another one."""
+        self.signal_display_settings.emit(self.display_settings())
+
+    def display_settings(self) -> dict[str, Any]:
+        """Return the chosen display settings.
+
+        Returns:
+            Keyword arguments of ``FeatureExtractor.redisplay`` (``ref``,
+            ``top_db``, ``freq_scale`` and ``chroma_norm``).
+        """
+        return {
+            name: DISPLAY_CHOICES[name][combo.currentIndex()][1]
+            for name, combo in self.display_controls.items()
+        }
+
     # ------------------------------------------------------------------
     # Drag & Drop  (accept audio files)
     # ------------------------------------------------------------------
@@ -290,33 +362,50 @@ class MainWindow(QMainWindow):
         ]
         self.summary_output.setText("".join(html_parts))
 
+    def display_preview(self, preview: dict[str, Any]) -> None:
+        """Draw a low-resolution preview while the full analysis runs.
+
+        Only the waveform and spectrogram are available at this point;
+        the chromagram is cleared.  Export stays tied to the last full
+        result.
+        """
+        with span("display_preview", "view"):
+            self.waveform_viz.draw_data(preview)
+            self.spectrogram_viz.draw_data(preview)
+            self.key_viz.draw_data(preview)
+
     def display_analysis(self, features: dict[str, Any]) -> None:
         """Pass feature data to each visualiser widget.
 
         Each visualiser's ``draw_data()`` is called — **polymorphism**
-        in action since every subclass implements it differently.
+        in action since every subclass implements it differently.  A
+        preview already on screen is replaced in place.
         """
         self._last_features = features
-        self.waveform_viz.draw_data(features)
-        self.spectrogram_viz.draw_data(features)
-        self.key_viz.draw_data(features)
+        with span("display_analysis", "view"):
+            self.waveform_viz.draw_data(features)
+            self.spectrogram_viz.draw_data(features)
+            self.key_viz.draw_data(features)
         self.export_button.setEnabled(True)
 
-    def update_history_list(self, names: list[str]) -> None:
-        """Replace the history :class:`QListWidget` contents with *names*.
+    def set_history_model(self, model: HistoryListModel | HistoryFilterModel) -> None:
+        """Show *model* (full history or search results) in the history list.
 
-        Args:
-            names: Display labels for each analysed track.
+        The view fetches rows lazily and picks up appended rows by
+        itself, so no further calls are needed when history grows.
         """
-        self.history_list.clear()
-        for name in names:
-            QListWidgetItem(name, self.history_list)
-
-    def highlight_history_item(self, index: int) -> None:
-        """Select and scroll to the *index*-th history entry."""
-        item = self.history_list.item(index)
-        if item:
-            self.history_list.setCurrentItem(item)
+        if self.history_list.model() is not model:
+            self.history_list.setModel(model)
+
+    def highlight_history_item(self, row: int) -> None:
+        """Select and scroll to the history entry for store *row*."""
+        model = self.history_list.model()
+        if not isinstance(model, (HistoryListModel, HistoryFilterModel)):
+            return
+        index = model.index_for_row(row)
+        if index.isValid():
+            self.history_list.setCurrentIndex(index)
+            self.history_list.scrollTo(index)
 
     def update_progress(self, value: int) -> None:
         """Update the progress bar during analysis.
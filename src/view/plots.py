@@ -0,0 +1,215 @@
+"""Qt-free drawing of analysis results onto Matplotlib axes.
+
+The GUI visualisers (:mod:`view.visualizer`) and the headless report
+renderer (:mod:`view.report`) draw through these functions, so a
+report looks exactly like the application's panels.  Each function
+draws one feature onto an existing :class:`~matplotlib.axes.Axes`,
+labels it and returns the data artist(s); colour bars and redraws are
+left to the caller.  Callers drawing at a known pixel width (reports,
+thumbnails) pass ``max_frames`` to max-pool the time axis down to it,
+which cuts the mesh size, and so the draw time, by the same factor.
+:func:`spectrogram_window` and :func:`waveform_window` cut the part of
+a result visible after a zoom or pan, pooled to the same screen budget.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import librosa
+import librosa.display
+import numpy as np
+from matplotlib.axes import Axes
+
+SPECTROGRAM_TITLE = "Espectrograma de Potencia (dB)"
+CHROMA_TITLE = "Cromagrama Normalizado (Tonalidad)"
+WAVEFORM_TITLE = "Forma de Onda"
+WAVEFORM_COLOR = "steelblue"
+
+
+def fit_mesh(ax: Axes, mesh: Any) -> None:
+    """Set the axes limits to the extent of a ``pcolormesh`` artist."""
+    coords = mesh.get_coordinates()
+    ax.set_xlim(coords[..., 0].min(), coords[..., 0].max())
+    ax.set_ylim(coords[..., 1].min(), coords[..., 1].max())
+
+
+def decimate_frames(
+    values: np.ndarray, hop_length: int, max_frames: int | None
+) -> tuple[np.ndarray, int]:
+    """Max-pool the columns (frames) of *values* down to at most *max_frames*.
+
+    Returns:
+        The pooled matrix and its hop length, so time axes stay aligned.
+    """
+    frames = values.shape[1]
+    factor = math.ceil(frames / max_frames) if max_frames else 1
+    if factor <= 1:
+        return np.asarray(values), hop_length
+    whole = frames // factor * factor
+    pooled = np.asarray(values[:, :whole]).reshape(values.shape[0], -1, factor).max(axis=2)
+    if whole < frames:
+        pooled = np.hstack((pooled, np.max(values[:, whole:], axis=1, keepdims=True)))
+    return pooled, hop_length * factor
+
+
+def spectrogram_window(
+    spec: np.ndarray,
+    sr: int,
+    hop_length: int,
+    bin_edges: np.ndarray,
+    xlim: tuple[float, float],
+    ylim: tuple[float, float],
+    max_frames: int,
+    max_bins: int | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+    """Cut the visible window of a spectrogram, pooled to the screen.
+
+    Only the frames and bins inside the window are read, so zooming into
+    a few seconds of a long (or memory-mapped) spectrogram is as fast as
+    drawing a short one.
+
+    Args:
+        spec: Full-resolution spectrogram (bins x frames), e.g. ``D``.
+        sr: Sample rate.
+        hop_length: Hop of *spec*.
+        bin_edges: Frequency (Hz) of the ``bins + 1`` bin edges.
+        xlim: Visible time range (s).
+        ylim: Visible frequency range (Hz).
+        max_frames: Columns to pool the window down to (the pixel width).
+        max_bins: Rows to pool the window down to (``None``: every bin).
+
+    Returns:
+        The pooled window and its time and frequency edges (for
+        ``pcolormesh``), or ``None`` if the window holds no data.
+    """
+    bins, frames = spec.shape
+    step = hop_length / sr
+    lo, hi = sorted(xlim)
+    first = max(0, math.floor(lo / step))
+    last = min(frames, math.ceil(hi / step))
+    lo, hi = sorted(ylim)
+    low = max(0, int(np.searchsorted(bin_edges, lo, side="right")) - 1)
+    high = min(bins, int(np.searchsorted(bin_edges, hi, side="left")))
+    if last <= first or high <= low:
+        return None
+
+    window, pooled_hop = decimate_frames(spec[low:high, first:last], hop_length, max_frames)
+    x_edges = _edges(np.arange(first, last + 1) * step, pooled_hop // hop_length)
+    y_edges = np.asarray(bin_edges[low : high + 1])
+    if max_bins:
+        pooled, factor = decimate_frames(window.T, 1, max_bins)
+        window, y_edges = pooled.T, _edges(y_edges, factor)
+    return window, x_edges, y_edges
+
+
+def waveform_window(
+    y: np.ndarray, sr: int, xlim: tuple[float, float], max_points: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+    """Cut the visible window of a signal, reduced to the screen.
+
+    Returns:
+        Times with the lower and upper envelope: the samples themselves
+        (both envelopes equal) when at most *max_points* are visible,
+        otherwise the minimum and maximum of each of *max_points*
+        groups.  ``None`` if fewer than two samples are visible.
+    """
+    lo, hi = sorted(xlim)
+    first = max(0, math.floor(lo * sr))
+    last = min(len(y), math.ceil(hi * sr) + 1)
+    if last - first < 2:
+        return None
+    window = np.asarray(y[first:last])
+    if len(window) <= max_points:
+        return (first + np.arange(len(window))) / sr, window, window
+
+    factor = math.ceil(len(window) / max_points)
+    starts = np.arange(0, len(window), factor)
+    lower = np.minimum.reduceat(window, starts)
+    upper = np.maximum.reduceat(window, starts)
+    return (first + starts + factor / 2) / sr, lower, upper
+
+
+def _edges(edges: np.ndarray, factor: int) -> np.ndarray:
+    """Keep every *factor*-th of *edges* (and the last), matching pooled cells."""
+    if factor <= 1:
+        return edges
+    kept = edges[::factor]
+    return kept if (len(edges) - 1) % factor == 0 else np.append(kept, edges[-1])
+
+
+def _label(ax: Axes, title: str, xlabel: str, ylabel: str) -> None:
+    ax.set_axis_on()
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+
+
+def draw_spectrogram(
+    ax: Axes,
+    features: dict[str, Any],
+    title: str = SPECTROGRAM_TITLE,
+    max_frames: int | None = None,
+) -> Any:
+    """Draw *features['D']* (dB) over time and return the mesh.
+
+    Uses a logarithmic frequency axis unless ``freq_scale`` is
+    ``"linear"``, and the ``magma`` colour map.
+    """
+    spec, hop_length = decimate_frames(features["D"], features.get("hop_length", 512), max_frames)
+    img = librosa.display.specshow(
+        spec,
+        sr=features["sr"],
+        x_axis="time",
+        y_axis=features.get("freq_scale", "log"),
+        ax=ax,
+        cmap="magma",
+        hop_length=hop_length,
+    )
+    fit_mesh(ax, img)
+    _label(ax, title, "Tiempo (s)", "Frecuencia (Hz)")
+    return img
+
+
+def draw_chromagram(
+    ax: Axes,
+    features: dict[str, Any],
+    title: str = CHROMA_TITLE,
+    max_frames: int | None = None,
+) -> Any:
+    """Draw *features['chroma']* (12 pitch classes) over time and return the mesh."""
+    chroma, hop_length = decimate_frames(
+        features["chroma"], features.get("hop_length", 512), max_frames
+    )
+    img = librosa.display.specshow(
+        chroma,
+        sr=features["sr"],
+        y_axis="chroma",
+        x_axis="time",
+        ax=ax,
+        cmap="viridis",
+        hop_length=hop_length,
+    )
+    fit_mesh(ax, img)
+    _label(ax, title, "Tiempo (s)", "Clase de Tono")
+    return img
+
+
+def draw_waveform(ax: Axes, features: dict[str, Any], title: str = WAVEFORM_TITLE) -> Any:
+    """Draw *features['y']* and return what ``waveshow`` returned.
+
+    Restored analyses keep a decimated waveform whose rate is given as
+    ``y_sr``.
+    """
+    y = np.asarray(features["y"])
+    sr: int = features.get("y_sr", features["sr"])
+
+    adaptor = librosa.display.waveshow(y, sr=sr, ax=ax, color=WAVEFORM_COLOR)
+
+    peak = float(np.max(np.abs(y))) if len(y) else 0.0
+    limit = 1.05 * peak if peak > 0 else 1.0
+    ax.set_xlim(0.0, len(y) / sr)
+    ax.set_ylim(-limit, limit)
+    _label(ax, title, "Tiempo (s)", "Amplitud")
+    return adaptor
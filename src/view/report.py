@@ -0,0 +1,339 @@
+"""Headless analysis reports rendered with Matplotlib's Agg backend.
+
+Nothing here imports Qt: figures are plain
+:class:`~matplotlib.figure.Figure` objects attached to an Agg canvas
+and drawn through :mod:`view.plots`, the same code the GUI panels use.
+
+- :func:`render_report` — one track's waveform, spectrogram and
+  chromagram as a PNG or SVG page.
+- :func:`render_cell` / :func:`write_contact_sheet` — a captioned
+  spectrogram thumbnail per track, tiled into one contact sheet.
+- :func:`render_reports` — decode, analyse and render a whole batch in
+  worker processes, yielding a small JSON-serialisable record per track.
+
+Example::
+
+    for record in render_reports(paths, "reports", sheet="reports/sheet.png"):
+        print(record["path"], record.get("report"), record.get("error"))
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import signal
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any
+
+import matplotlib
+import matplotlib.image
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from config import (
+    MAX_WORKER_THREADS,
+    REPORT_DPI,
+    REPORT_FORMAT,
+    REPORT_SIZE_IN,
+    SHEET_CELL_PX,
+    SHEET_COLUMNS,
+    TEMPO_MODE,
+)
+from metrics import QUEUE_DEPTH, call_with_metrics, file_done, merge_worker_metrics
+from model.audio_file import AudioFile
+from model.feature_extractor import FeatureExtractor
+from model.pipeline import validate_options
+from tracing import span
+
+from . import plots
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS: frozenset[str] = frozenset({"png", "svg"})
+"""Image formats :func:`render_reports` can write."""
+
+REPORT_FEATURES: frozenset[str] = frozenset({"tempo", "key", "D", "chroma", "y", "loudness"})
+"""Features computed for a report."""
+
+
+def _headline(features: dict[str, Any]) -> str:
+    """Return the caption line of a track: name, tempo, key and loudness."""
+    parts = [Path(str(features.get("path", ""))).name or "—"]
+    if features.get("tempo"):
+        parts.append(f"{float(features['tempo']):.1f} BPM")
+    if features.get("key"):
+        parts.append(str(features["key"]))
+    loudness = features.get("loudness") or {}
+    if "integrated_lufs" in loudness:
+        parts.append(f"{loudness['integrated_lufs']:.1f} LUFS")
+    return " · ".join(parts)
+
+
+def render_report(
+    features: dict[str, Any],
+    out_path: Path | str,
+    size: tuple[float, float] = REPORT_SIZE_IN,
+    dpi: int = REPORT_DPI,
+) -> Path:
+    """Draw one track's waveform, spectrogram and chromagram to a file.
+
+    Works with fresh results and archived ones (see
+    :meth:`FeatureArchive.load`); a missing chromagram leaves its panel
+    empty.
+
+    Args:
+        features: At least ``y``, ``sr`` and ``D``.
+        out_path: Destination; the suffix (``.png``/``.svg``) picks the format.
+        size: Figure width and height in inches.
+        dpi: Raster resolution.
+
+    Returns:
+        *out_path* as a :class:`Path`.
+    """
+    fig = Figure(figsize=size, dpi=dpi, layout="constrained")
+    FigureCanvasAgg(fig)
+    wave_ax, spec_ax, chroma_ax = fig.subplots(3, 1)
+    # No more frames than the page has pixel columns
+    columns = int(size[0] * dpi)
+
+    plots.draw_waveform(wave_ax, features)
+    mesh = plots.draw_spectrogram(spec_ax, features, max_frames=columns)
+    # Vector output keeps the meshes as embedded images
+    mesh.set_rasterized(True)
+    fig.colorbar(mesh, ax=spec_ax, format="%+2.0f dB")
+    if features.get("chroma") is not None:
+        mesh = plots.draw_chromagram(chroma_ax, features, max_frames=columns)
+        mesh.set_rasterized(True)
+        fig.colorbar(mesh, ax=chroma_ax)
+    else:
+        chroma_ax.set_axis_off()
+    fig.suptitle(_headline(features))
+
+    out = Path(out_path)
+    fig.savefig(out)
+    return out
+
+
+def render_cell(
+    features: dict[str, Any], size: tuple[int, int] = SHEET_CELL_PX, dpi: int = REPORT_DPI
+) -> np.ndarray:
+    """Render a captioned spectrogram thumbnail for a contact sheet.
+
+    Results without a spectrogram (errors) get a caption-only cell.
+
+    Returns:
+        An ``(height, width, 3)`` ``uint8`` RGB image of *size* pixels.
+    """
+    width, height = size
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    caption = _headline(features)
+    if features.get("D") is not None:
+        ax = fig.add_axes((0.0, 0.0, 1.0, 0.84))
+        plots.draw_spectrogram(ax, features, title="", max_frames=width)
+        ax.set_axis_off()
+    else:
+        fig.set_facecolor("0.9")
+        caption += "\n" + str(features.get("error", ""))
+    fig.text(0.5, 0.98, caption, ha="center", va="top", fontsize=8, wrap=True)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[..., :3].copy()
+
+
+def write_contact_sheet(
+    cells: Sequence[np.ndarray], out_path: Path | str, columns: int = SHEET_COLUMNS
+) -> Path:
+    """Tile equally sized RGB *cells* row by row into one image file.
+
+    The suffix of *out_path* (``.png``/``.svg``) picks the format.
+    """
+    if not cells:
+        raise ValueError("No hay celdas para la hoja de contactos.")
+    columns = max(1, min(columns, len(cells)))
+    height, width, _ = cells[0].shape
+    rows = math.ceil(len(cells) / columns)
+    sheet = np.full((rows * height, columns * width, 3), 255, dtype=np.uint8)
+    for i, cell in enumerate(cells):
+        row, col = divmod(i, columns)
+        sheet[row * height : (row + 1) * height, col * width : (col + 1) * width] = cell
+
+    out = Path(out_path)
+    matplotlib.image.imsave(out, sheet, dpi=REPORT_DPI)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Batch rendering
+# ---------------------------------------------------------------------------
+
+
+def _init_worker() -> None:
+    """Pool initializer: leave Ctrl+C to the parent and stay on Agg."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    matplotlib.use("Agg")
+
+
+def _render_track(
+    index: int, path: str, out_dir: str, fmt: str, cell: bool, options: dict[str, Any]
+) -> dict[str, Any]:
+    """Load, analyse and render one file (runs in a worker process)."""
+    started = time.perf_counter()
+    record: dict[str, Any] = {"path": path}
+    audio = AudioFile()
+    try:
+        if not audio.load_audio(path, sr=options.get("sr")):
+            features: dict[str, Any] = {"path": path, "error": "No se pudo cargar el archivo."}
+        else:
+            features = FeatureExtractor().extract_all_features(
+                audio, features=REPORT_FEATURES, tempo_mode=options.get("tempo_mode", TEMPO_MODE)
+            )
+    except Exception as exc:
+        logger.exception("Analysis of %s failed", path)
+        features = {"path": path, "error": f"Error inesperado durante el análisis: {exc}"}
+
+    if "error" in features:
+        record["error"] = features["error"]
+    else:
+        report = Path(out_dir) / f"{index:04d}_{Path(path).stem}.{fmt}"
+        try:
+            with span("render_report", "view", path=path):
+                record["report"] = str(render_report(features, report))
+        except (OSError, ValueError) as exc:
+            logger.warning("Could not render the report of %s: %s", path, exc)
+            record["error"] = f"No se pudo generar el informe: {exc}"
+        record.update(tempo=float(features["tempo"]), key=features["key"])
+    file_done("error" not in record, started)
+    if cell:
+        record["cell"] = render_cell({**features, **record})
+    record["elapsed"] = time.perf_counter() - started
+    return record
+
+
+def render_reports(
+    paths: Iterable[str],
+    out_dir: Path | str,
+    fmt: str = REPORT_FORMAT,
+    sheet: Path | str | None = None,
+    workers: int = MAX_WORKER_THREADS,
+    columns: int = SHEET_COLUMNS,
+    options: dict[str, Any] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Render a report per file, in parallel worker processes.
+
+    Each worker decodes, analyses and draws its file with the Agg
+    backend and returns only a small record, so no signal or figure
+    crosses the process boundary.  Reports are named
+    ``<index>_<stem>.<fmt>`` after the input position.  At most
+    ``2 * workers`` files are in flight; *paths* is consumed lazily.
+    A worker that dies takes the files in flight with it (they are
+    reported as errors); the remaining files go to a new pool.
+
+    Args:
+        paths: Audio files.
+        out_dir: Directory for the per-track reports (created if needed).
+        fmt: ``"png"`` or ``"svg"``.
+        sheet: Optional contact-sheet file (suffix picks its format),
+            written in input order once every file has been rendered.
+        workers: Worker processes; ``0`` renders in the calling process.
+        columns: Thumbnails per contact-sheet row.
+        options: ``sr`` and ``tempo_mode``, as for
+            :func:`~model.pipeline.analyze_file`.
+
+    Yields:
+        ``{"path", "report", "tempo", "key", "elapsed"}`` per file in
+        completion order — or ``{"path", "error"}`` (plus ``elapsed``
+        when the worker survived), whatever went wrong with the file.
+
+    Raises:
+        ValueError: If *fmt* or *options* is invalid.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Formato de informe desconocido: {fmt}")
+    options = options or {}
+    error = validate_options(options)
+    if error:
+        raise ValueError(error)
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    cells: dict[int, np.ndarray] = {}
+    jobs = (
+        (i, str(path), str(out_dir), fmt, sheet is not None, options)
+        for i, path in enumerate(paths)
+    )
+
+    def collect(record: dict[str, Any], index: int) -> dict[str, Any]:
+        cell = record.pop("cell", None)
+        if cell is not None:
+            cells[index] = cell
+        return record
+
+    if workers <= 0:
+        for job in jobs:
+            yield collect(_render_track(*job), job[0])
+    else:
+
+        def new_pool() -> ProcessPoolExecutor:
+            return ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+
+        executor = new_pool()
+        # (index, path, future of the worker's record and shipped metrics)
+        pending: deque[tuple[int, str, Future[tuple[dict[str, Any], dict[str, Any]]]]] = deque()
+
+        def submit_next() -> bool:
+            nonlocal executor
+            for job in jobs:
+                try:
+                    future = executor.submit(call_with_metrics, _render_track, *job)
+                except BrokenProcessPool:
+                    # The futures in flight fail with the old pool and are
+                    # reported as they are collected
+                    logger.warning("A report worker died; starting a new pool")
+                    executor.shutdown(wait=True)
+                    executor = new_pool()
+                    future = executor.submit(call_with_metrics, _render_track, *job)
+                pending.append((job[0], job[1], future))
+                QUEUE_DEPTH.set(len(pending), queue="report")
+                return True
+            return False
+
+        try:
+            while len(pending) < 2 * workers and submit_next():
+                pass
+            while pending:
+                done, _ = wait([f for _, _, f in pending], return_when=FIRST_COMPLETED)
+                item = next(item for item in pending if item[2] in done)
+                pending.remove(item)
+                index, path, future = item
+                QUEUE_DEPTH.set(len(pending), queue="report")
+                submit_next()
+                try:
+                    record, shipped = future.result()
+                except BrokenProcessPool:
+                    logger.error("The worker rendering %s died", path)
+                    yield {"path": path, "error": "El proceso de análisis se interrumpió."}
+                    continue
+                except Exception as exc:
+                    # The job or its result could not be pickled
+                    logger.exception("Rendering the report of %s failed", path)
+                    yield {"path": path, "error": f"Error inesperado durante el análisis: {exc}"}
+                    continue
+                merge_worker_metrics(shipped)
+                yield collect(record, index)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            QUEUE_DEPTH.set(0, queue="report")
+
+    if sheet is not None and cells:
+        write_contact_sheet([cells[i] for i in sorted(cells)], sheet, columns)
+        logger.info("Contact sheet of %d tracks written to %s", len(cells), sheet)
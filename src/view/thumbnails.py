@@ -0,0 +1,86 @@
+"""Qt-free rendering of history-list thumbnails.
+
+A thumbnail is a tiny RGBA image: the dB spectrogram on a logarithmic
+frequency axis (``magma``, 80 dB range, time max-pooled to one column
+per pixel) above the waveform's min/max envelope.  It is painted
+straight into a NumPy array, without a Matplotlib figure, so rendering
+one costs a few milliseconds and is safe on any thread.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import numpy as np
+from matplotlib import colormaps
+
+from config import SPECTROGRAM_TOP_DB, THUMBNAIL_PX
+
+logger = logging.getLogger(__name__)
+
+_WAVE_RGBA = (70, 130, 180, 255)  # steelblue, as in the waveform panel
+_WAVE_FRACTION = 0.3
+"""Share of the thumbnail height taken by the waveform."""
+
+
+def _pool_columns(values: np.ndarray, width: int, reduce: np.ufunc) -> np.ndarray:
+    """Reduce (or repeat) the last axis of *values* to *width* columns."""
+    n = values.shape[-1]
+    if n >= width:
+        starts = (np.arange(width) * n) // width
+        return reduce.reduceat(values, starts, axis=-1)
+    return values[..., (np.arange(width) * n) // width]
+
+
+def _spectrogram_rgba(spec_db: np.ndarray, width: int, height: int) -> np.ndarray:
+    bins = spec_db.shape[0]
+    rows = np.unique(np.geomspace(1, bins - 1, height).astype(int)) if bins > 2 else [0]
+    # Repeat low rows so the log axis fills the height
+    rows = np.asarray(rows)[(np.arange(height) * len(rows)) // height]
+    image = _pool_columns(np.asarray(spec_db[rows], dtype=np.float32), width, np.maximum)
+    top = float(image.max()) if image.size else 0.0
+    levels = np.clip((image - (top - SPECTROGRAM_TOP_DB)) / SPECTROGRAM_TOP_DB, 0.0, 1.0)
+    return colormaps["magma"](levels[::-1], bytes=True)
+
+
+def _waveform_rgba(y: np.ndarray, width: int, height: int) -> np.ndarray:
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+    if not len(y):
+        return image
+    y = np.asarray(y, dtype=np.float32)
+    low = _pool_columns(y, width, np.minimum)
+    high = _pool_columns(y, width, np.maximum)
+    peak = float(max(high.max(), -low.min())) or 1.0
+    # Amplitude at the centre of each pixel row, top row = +peak
+    levels = peak * (1.0 - (2 * np.arange(height) + 1) / height)[:, None]
+    half_row = peak / height
+    mask = (levels - half_row <= high) & (levels + half_row >= low)
+    image[mask] = _WAVE_RGBA
+    return image
+
+
+def render_thumbnail(
+    features: dict[str, Any], size: tuple[int, int] = THUMBNAIL_PX
+) -> np.ndarray | None:
+    """Paint the thumbnail of an analysis result.
+
+    Args:
+        features: A fresh or archived result with ``D`` and, optionally,
+            ``y``.
+        size: Width and height in pixels.
+
+    Returns:
+        An ``(height, width, 4)`` ``uint8`` RGBA image, or ``None`` if
+        the result has no spectrogram.
+    """
+    spec_db = features.get("D")
+    if spec_db is None or not np.size(spec_db):
+        return None
+    width, height = size
+    y = features.get("y")
+    if y is None:
+        return _spectrogram_rgba(spec_db, width, height)
+    wave_height = round(height * _WAVE_FRACTION)
+    spectrogram = _spectrogram_rgba(spec_db, width, height - wave_height)
+    return np.concatenate([spectrogram, _waveform_rgba(y, width, wave_height)])
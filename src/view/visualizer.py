@@ -6,20 +6,72 @@ Provides an inheritance hierarchy:
 - :class:`SpectrogramVisualizer` — power spectrogram (dB).
 - :class:`KeyVisualizer` — normalised chromagram.
 
-Each subclass implements :meth:`draw_data` **polymorphically**.
+Each subclass implements :meth:`draw_data` **polymorphically**.  Redraws
+swap the data artists in place (axes, labels and colour bar are kept),
+so a progressive preview can be replaced by the full result cheaply.
+The drawing itself lives in the Qt-free :mod:`view.plots`, shared with
+headless reports.
+
+The spectrogram and waveform draw an overview at the canvas' pixel
+width.  After a zoom or pan settles (:data:`~config.VIEWPORT_DEBOUNCE_MS`)
+the visible window is cut from the stored result at screen resolution
+on a pool thread and drawn over it, so a few seconds of a two-hour
+track show in full detail without ever meshing the whole spectrogram.
 """
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from typing import Any
 
-import librosa
-import librosa.display
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.backends.backend_qt import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal, Slot
 from PySide6.QtWidgets import QVBoxLayout, QWidget
 
+from config import VIEWPORT_DEBOUNCE_MS
+from tracing import span
+
+from . import plots
+
+
+class _Canvas(FigureCanvas):
+    """Qt canvas whose renders (usually deferred by ``draw_idle``) are traced."""
+
+    def __init__(self, figure: Any, name: str) -> None:
+        super().__init__(figure)
+        self._trace_name = f"draw {name}"
+
+    def draw(self) -> None:
+        with span(self._trace_name, "view"):
+            super().draw()
+
+
+class _ViewportSignals(QObject):
+    """Signals of the :class:`_ViewportJob` runs of one visualiser."""
+
+    done = Signal(int, object)
+
+
+class _ViewportJob(QRunnable):
+    """Cuts the visible window of a result on a pool thread (deleted by the pool)."""
+
+    def __init__(
+        self, serial: int, task: Callable[[], Any], name: str, signals: _ViewportSignals
+    ) -> None:
+        super().__init__()
+        self._serial = serial
+        self._task = task
+        self._name = name
+        self._signals = signals
+
+    def run(self) -> None:
+        with span(self._name, "view"):
+            payload = self._task()
+        self._signals.done.emit(self._serial, payload)
+
 
 class BaseVisualizer(QWidget):
     """Abstract widget that hosts a Matplotlib figure and toolbar.
@@ -35,7 +87,7 @@ class BaseVisualizer(QWidget):
         self.title = title
 
         self.figure, self.ax = plt.subplots(1, 1, figsize=(5.5, 3.5))
-        self.canvas = FigureCanvas(self.figure)
+        self.canvas = _Canvas(self.figure, type(self).__name__)
         self.toolbar = NavigationToolbar(self.canvas, self)
 
         layout = QVBoxLayout(self)
@@ -45,13 +97,140 @@ class BaseVisualizer(QWidget):
         self.ax.set_title(self.title)
         self.ax.set_axis_off()
 
+        # Data artists currently on the axes and the (reused) colour bar
+        self._artists: list[Any] = []
+        self._colorbar: Any = None
+
+        # Detail of the visible window, drawn over the overview artists
+        # (which it may hide while shown)
+        self._detail: list[Any] = []
+        self._hidden: list[Any] = []
+        self._limit_cids: list[int] = []
+        self._view_serial = 0
+        self._view_signals = _ViewportSignals(self)
+        self._view_signals.done.connect(self._on_viewport_done)
+        self._view_pool = QThreadPool(self)
+        self._view_pool.setMaxThreadCount(1)
+        self._view_timer = QTimer(self)
+        self._view_timer.setSingleShot(True)
+        self._view_timer.setInterval(VIEWPORT_DEBOUNCE_MS)
+        self._view_timer.timeout.connect(self._request_viewport)
+
     def clear_plot(self) -> None:
         """Clear the current axes and redraw the empty canvas."""
-        self.ax.clear()
+        # The colour bar must go first: it restores the parent axes
+        # layout through its (still attached) mappable.
+        if self._colorbar is not None:
+            self._colorbar.remove()
+            self._colorbar = None
+        self._remove_artists()
+        self.ax.clear()  # also drops the limit callbacks
+        self._limit_cids = []
         self.ax.set_title(self.title)
         self.ax.set_axis_off()
         self.canvas.draw()
 
+    def _remove_artists(self) -> None:
+        """Detach the previous data artists, keeping axes decoration."""
+        self._remove_detail()
+        self._view_timer.stop()
+        self._view_serial += 1  # results of queued windows are stale now
+        for artist in self._artists:
+            artist.remove()
+        self._artists = []
+
+    # ------------------------------------------------------------------
+    # Viewport re-rendering
+    # ------------------------------------------------------------------
+
+    def _pixel_size(self) -> tuple[int, int]:
+        """Return the width and height of the axes on screen, in pixels."""
+        box = self.ax.get_window_extent()
+        return max(1, int(box.width)), max(1, int(box.height))
+
+    def _watch_limits(self) -> None:
+        """Re-render the visible window whenever a zoom or pan settles."""
+        for cid in self._limit_cids:
+            self.ax.callbacks.disconnect(cid)
+        self._limit_cids = [
+            self.ax.callbacks.connect(signal, self._on_limits_changed)
+            for signal in ("xlim_changed", "ylim_changed")
+        ]
+
+    def _on_limits_changed(self, _ax: Any) -> None:
+        # Until the new window is ready the overview shows through
+        self._remove_detail()
+        self._view_timer.start()
+
+    def _remove_detail(self) -> None:
+        for artist in self._detail:
+            artist.remove()
+        self._detail = []
+        for artist in self._hidden:
+            artist.set_visible(True)
+        self._hidden = []
+
+    def _hide_overview(self) -> None:
+        """Hide the overview artists until the detail is removed again."""
+        self._hidden = [artist for artist in self._artists if artist.get_visible()]
+        for artist in self._hidden:
+            artist.set_visible(False)
+
+    @Slot()
+    def _request_viewport(self) -> None:
+        self._view_serial += 1
+        # A window still queued was superseded before it started
+        self._view_pool.clear()
+        xlim = self.ax.get_xlim()
+        ylim = self.ax.get_ylim()
+        task = self._viewport_task(xlim, ylim, self._pixel_size())
+        if task is None:
+            return
+        name = f"viewport {type(self).__name__}"
+        self._view_pool.start(_ViewportJob(self._view_serial, task, name, self._view_signals))
+
+    @Slot(int, object)
+    def _on_viewport_done(self, serial: int, payload: Any) -> None:
+        if serial != self._view_serial or payload is None:
+            return
+        self._remove_detail()
+        self._detail = self._draw_detail(payload)
+        self.canvas.draw_idle()
+
+    def _viewport_task(
+        self, xlim: tuple[float, float], ylim: tuple[float, float], pixels: tuple[int, int]
+    ) -> Callable[[], Any] | None:
+        """Return a thread-safe callable cutting the window at *xlim*/*ylim*.
+
+        ``None`` (the default: no re-rendering) means the overview
+        already shows the window at full detail.
+        """
+
+    def _draw_detail(self, payload: Any) -> list[Any]:
+        """Draw what the viewport task returned and return the new artists.
+
+        Raises:
+            NotImplementedError: Subclasses with a viewport task must implement this.
+        """
+        raise NotImplementedError("_draw_detail() debe ser implementado por la subclase.")
+
+    def wait_for_viewport(self, msecs: int = -1) -> bool:
+        """Block until queued windows are cut (used on shutdown and in tests)."""
+        return self._view_pool.waitForDone(msecs)
+
+    def _update_colorbar(self, mappable: Any, **kwargs: Any) -> Any:
+        """Point the colour bar at *mappable*, creating it on first use."""
+        if self._colorbar is None:
+            self._colorbar = self.figure.colorbar(mappable, ax=self.ax, **kwargs)
+        else:
+            self._colorbar.update_normal(mappable)
+            # Mirror what Figure.colorbar() does so that remove() works
+            mappable.colorbar = self._colorbar
+            mappable.colorbar_cid = mappable.callbacks.connect(
+                "changed", self._colorbar.update_normal
+            )
+        return self._colorbar
+
     def draw_data(self, data: Any) -> None:
         """Render *data* onto the canvas.
 
@@ -64,44 +243,83 @@ class BaseVisualizer(QWidget):
 class SpectrogramVisualizer(BaseVisualizer):
     """Displays a power spectrogram (dB) over time.
 
-    Uses ``librosa.display.specshow`` with a logarithmic frequency axis
-    and the ``magma`` colour map.
+    Uses ``librosa.display.specshow`` with a logarithmic (or, when the
+    features ask for it, linear) frequency axis and the ``magma`` colour
+    map.  The overview is pooled to the canvas width; a zoomed window is
+    re-cut from the full-resolution ``D``.
     """
 
     def __init__(self, **kwargs: Any) -> None:
-        super().__init__(title="Espectrograma de Potencia (dB)", **kwargs)
+        super().__init__(title=plots.SPECTROGRAM_TITLE, **kwargs)
+        self._features: dict[str, Any] | None = None
+        self._bin_edges: np.ndarray | None = None
+        self._overview_frames = 0
 
     def draw_data(self, features: dict[str, Any]) -> None:
         """Render the spectrogram from *features['D']*.
 
         Args:
             features: Dictionary with keys ``D`` (spectrogram matrix),
-                      ``sr`` (sample rate).
+                      ``sr`` (sample rate) and optionally ``hop_length``
+                      and ``freq_scale`` (``"log"`` or ``"linear"``).
         """
-        self.ax.clear()
-
-        spec_data: Any = features["D"]
-        sr: int = features["sr"]
-
-        img = librosa.display.specshow(
-            spec_data,
-            sr=sr,
-            x_axis="time",
-            y_axis="log",
-            ax=self.ax,
-            cmap="magma",
-            hop_length=512,
-        )
-
-        self.ax.set_title(self.title)
-        self.ax.set_xlabel("Tiempo (s)")
-        self.ax.set_ylabel("Frecuencia (Hz)")
-
-        if img:
-            cbar = self.figure.colorbar(img, format="%+2.0f dB", ax=self.ax)
+        self._remove_artists()
+        width, _ = self._pixel_size()
+        img = plots.draw_spectrogram(self.ax, features, self.title, max_frames=width)
+        self._artists = [img]
+        # Frequency rows are never pooled, so the mesh has every bin edge
+        coords = img.get_coordinates()
+        self._features = features
+        self._bin_edges = coords[:, 0, 1].copy()
+        self._overview_frames = coords.shape[1] - 1
+
+        if self._colorbar is None:
+            cbar = self._update_colorbar(img, format="%+2.0f dB")
             cbar.ax.set_ylabel("Amplitud (dB)", rotation=270, labelpad=15)
+        else:
+            self._update_colorbar(img)
+
+        self._watch_limits()
+        self.canvas.draw_idle()
+
+    def _viewport_task(
+        self, xlim: tuple[float, float], ylim: tuple[float, float], pixels: tuple[int, int]
+    ) -> Callable[[], Any] | None:
+        if self._features is None or self._bin_edges is None:
+            return None
+        spec = self._features["D"]
+        sr = self._features["sr"]
+        hop_length = self._features.get("hop_length", 512)
+        edges = self._bin_edges
+        width, height = pixels
+        duration = spec.shape[1] * hop_length / sr
+        whole = (
+            min(xlim) <= 0.0
+            and max(xlim) >= duration
+            and min(ylim) <= edges[0]
+            and max(ylim) >= edges[-1]
+        )
+        if whole and self._overview_frames >= min(spec.shape[1], width):
+            return None
+        # Log-spaced rows are far apart at the bottom: pool only linear axes
+        max_bins = height if self._features.get("freq_scale", "log") == "linear" else None
+        return lambda: plots.spectrogram_window(
+            spec, sr, hop_length, edges, xlim, ylim, width, max_bins
+        )
 
-        self.canvas.draw()
+    def _draw_detail(self, payload: Any) -> list[Any]:
+        values, x_edges, y_edges = payload
+        overview = self._artists[0]
+        mesh = self.ax.pcolormesh(
+            x_edges,
+            y_edges,
+            values,
+            cmap=overview.get_cmap(),
+            norm=overview.norm,
+            shading="flat",
+            zorder=overview.get_zorder() + 0.1,
+        )
+        return [mesh]
 
 
 class KeyVisualizer(BaseVisualizer):
@@ -112,7 +330,7 @@ class KeyVisualizer(BaseVisualizer):
     """
 
     def __init__(self, **kwargs: Any) -> None:
-        super().__init__(title="Cromagrama Normalizado (Tonalidad)", **kwargs)
+        super().__init__(title=plots.CHROMA_TITLE, **kwargs)
         self.chromas: list[str] = [
             "C",
             "C#",
@@ -131,58 +349,81 @@ class KeyVisualizer(BaseVisualizer):
     def draw_data(self, features: dict[str, Any]) -> None:
         """Render the chromagram from *features['chroma']*.
 
+        Previews carry no chromagram; the plot is cleared until the full
+        result arrives.
+
         Args:
             features: Dictionary with keys ``chroma`` (12×n array),
-                      ``sr`` (sample rate).
+                      ``sr`` (sample rate) and optionally ``hop_length``.
         """
-        self.ax.clear()
-
-        chroma: Any = features["chroma"]
-        sr: int = features["sr"]
-
-        img = librosa.display.specshow(
-            chroma,
-            sr=sr,
-            y_axis="chroma",
-            x_axis="time",
-            ax=self.ax,
-            cmap="viridis",
-        )
+        if features.get("chroma") is None:
+            self.clear_plot()
+            return
 
-        self.ax.set_title(self.title)
-        self.ax.set_xlabel("Tiempo (s)")
-        self.ax.set_ylabel("Clase de Tono")
+        self._remove_artists()
+        img = plots.draw_chromagram(self.ax, features, self.title)
+        self._artists = [img]
 
-        if img:
-            self.figure.colorbar(img, ax=self.ax)
-
-        self.canvas.draw()
+        self._update_colorbar(img)
+        self.canvas.draw_idle()
 
 
 class WaveformVisualizer(BaseVisualizer):
     """Displays the raw audio waveform (time-domain signal).
 
-    Uses ``librosa.display.waveshow`` for an amplitude-over-time plot.
+    Uses ``librosa.display.waveshow`` for the whole signal; a zoomed
+    window is redrawn as the per-pixel envelope of the visible samples,
+    or the samples themselves once they fit the width.
     """
 
     def __init__(self, **kwargs: Any) -> None:
-        super().__init__(title="Forma de Onda", **kwargs)
+        super().__init__(title=plots.WAVEFORM_TITLE, **kwargs)
+        self._wave: tuple[np.ndarray, int] | None = None
 
     def draw_data(self, features: dict[str, Any]) -> None:
         """Render the waveform from *features['y']*.
 
         Args:
             features: Dictionary with keys ``y`` (signal array) and
-                      ``sr`` (sample rate).
+                      ``sr`` (sample rate), plus ``y_sr`` when ``y``
+                      has a different rate than the spectrogram.
         """
-        self.ax.clear()
-
-        y: Any = features["y"]
-        sr: int = features["sr"]
-
-        librosa.display.waveshow(y, sr=sr, ax=self.ax, color="steelblue")
-        self.ax.set_title(self.title)
-        self.ax.set_xlabel("Tiempo (s)")
-        self.ax.set_ylabel("Amplitud")
-
-        self.canvas.draw()
+        self._remove_artists()
+
+        adaptor = plots.draw_waveform(self.ax, features, self.title)
+        # librosa >= 0.10 returns an AdaptiveWaveplot wrapping two artists;
+        # zoomed windows are redrawn here instead, so it stays as drawn
+        if hasattr(adaptor, "steps"):
+            adaptor.disconnect()
+            self._artists = [adaptor.steps, adaptor.envelope]
+        else:
+            self._artists = [adaptor]
+        self._wave = (features["y"], features.get("y_sr", features["sr"]))
+
+        self._watch_limits()
+        self.canvas.draw_idle()
+
+    def _viewport_task(
+        self,
+        xlim: tuple[float, float],
+        ylim: tuple[float, float],  # noqa: ARG002 — only the time axis is re-cut
+        pixels: tuple[int, int],
+    ) -> Callable[[], Any] | None:
+        if self._wave is None:
+            return None
+        y, sr = self._wave
+        if min(xlim) <= 0.0 and max(xlim) >= len(y) / sr:
+            return None
+        width = pixels[0]
+        return lambda: plots.waveform_window(y, sr, xlim, width)
+
+    def _draw_detail(self, payload: Any) -> list[Any]:
+        times, lower, upper = payload
+        self._hide_overview()
+        if lower is upper:
+            (line,) = self.ax.plot(times, lower, color=plots.WAVEFORM_COLOR, linewidth=1.0)
+            return [line]
+        envelope = self.ax.fill_between(
+            times, lower, upper, color=plots.WAVEFORM_COLOR, step="mid", linewidth=0.5
+        )
+        return [envelope]
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 import os
 import sys
+import time
+from collections.abc import Callable
 from typing import Any
 from unittest.mock import MagicMock
 
@@ -17,6 +19,50 @@ _src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
 if _src not in sys.path:
     sys.path.insert(0, _src)
 
+# Qt tests (widgets included) run without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from model.pcm_cache import PCMCache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def pcm_cache(monkeypatch: pytest.MonkeyPatch) -> PCMCache:
+    """Give every test its own shared PCM cache, so no test sees another's signals."""
+    cache = PCMCache()
+    monkeypatch.setattr("model.pcm_cache._shared", cache)
+    return cache
+
+
+@pytest.fixture
+def qapp() -> QCoreApplication:
+    """Return the Qt application shared by every test, creating it on first use.
+
+    It is a :class:`QApplication`, so widget tests can use it as well as
+    tests that only need an event loop.
+    """
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def wait_until(qapp: QCoreApplication) -> Callable[..., None]:
+    """Return a helper that processes Qt events until *predicate* holds.
+
+    The helper fails the test if *predicate* is still false after
+    *timeout* seconds.
+    """
+
+    def wait(predicate: Callable[[], object], timeout: float = 10.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            qapp.processEvents()
+            time.sleep(0.005)
+        assert predicate(), "Timed out waiting for Qt events"
+
+    return wait
+
 
 @pytest.fixture
 def sine_wav() -> np.ndarray:
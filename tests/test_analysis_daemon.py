@@ -0,0 +1,105 @@
+"""Tests for the headless ``AnalysisDaemon`` socket API."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+from analysis_daemon import AnalysisDaemon
+from model.pipeline import validate_options
+
+SINE_WAV = Path(__file__).resolve().parent / "fixtures" / "sine_440.wav"
+
+
+async def _exchange(port: int, request: dict[str, Any], until: str) -> list[dict[str, Any]]:
+    """Send *request* and collect responses up to the first *until* event."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    messages: list[dict[str, Any]] = []
+    while True:
+        line = await asyncio.wait_for(reader.readline(), timeout=120)
+        assert line, "connection closed early"
+        messages.append(json.loads(line))
+        if messages[-1]["event"] in (until, "error"):
+            break
+    writer.close()
+    return messages
+
+
+def test_daemon_round_trip() -> None:
+    """Health, metrics, streamed results, and request validation."""
+
+    async def scenario() -> None:
+        daemon = AnalysisDaemon(workers=1, max_in_flight=1)
+        await daemon.start(port=0)
+        serve = asyncio.create_task(daemon.serve_forever())
+        port = daemon.address[1]
+        try:
+            (health,) = await _exchange(port, {"op": "health"}, "health")
+            assert health["status"] == "ok"
+            assert health["max_in_flight"] == 1
+
+            request = {
+                "op": "analyze",
+                "id": "r1",
+                "paths": [str(SINE_WAV), "/nonexistent.wav"],
+            }
+            messages = await _exchange(port, request, "done")
+            results = [m["result"] for m in messages if m["event"] == "result"]
+            assert messages[-1] == {"id": "r1", "event": "done", "count": 2}
+            by_path = {r["path"]: r for r in results}
+            assert by_path[str(SINE_WAV)]["tempo"] > 0
+            assert by_path[str(SINE_WAV)]["duration"] > 1.9
+            assert "error" in by_path["/nonexistent.wav"]
+
+            (bad,) = await _exchange(
+                port, {"op": "analyze", "paths": [], "options": {"bogus": 1}}, "done"
+            )
+            assert bad["event"] == "error"
+
+            (metrics,) = await _exchange(port, {"op": "metrics"}, "metrics")
+            assert metrics["files_completed"] == 1
+            assert metrics["files_failed"] == 1
+            assert metrics["in_flight"] == 0
+        finally:
+            serve.cancel()
+            await daemon.stop()
+
+    asyncio.run(scenario())
+
+
+def test_control_ops_do_not_wait_for_slots() -> None:
+    """A health check behind a saturating analyze is answered right away."""
+
+    async def scenario() -> None:
+        daemon = AnalysisDaemon(workers=1, max_in_flight=1)
+        await daemon.start(port=0)
+        serve = asyncio.create_task(daemon.serve_forever())
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", daemon.address[1])
+            analyze = {"op": "analyze", "id": "r1", "paths": [str(SINE_WAV)] * 3}
+            for request in (analyze, {"op": "health"}):
+                writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+
+            events = []
+            while not events or events[-1] != "done":
+                message = json.loads(await asyncio.wait_for(reader.readline(), timeout=120))
+                events.append(message["event"])
+            writer.close()
+            # Answered before the first of the queued files finished
+            assert events[0] == "health"
+            assert events.count("result") == 3
+        finally:
+            serve.cancel()
+            await daemon.stop()
+
+    asyncio.run(scenario())
+
+
+def test_options_reject_booleans() -> None:
+    assert validate_options({"sr": True}) is not None
+    assert validate_options({"sr": 22050}) is None
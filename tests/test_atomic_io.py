@@ -0,0 +1,53 @@
+"""Tests for crash-safe file replacement."""
+
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from atomic_io import write_bytes, write_text
+
+
+def test_replaces_the_file_without_leftovers(tmp_path: Path) -> None:
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"old")
+    write_bytes(path, b"new")
+    write_text(tmp_path / "text.txt", "añadido")
+
+    assert path.read_bytes() == b"new"
+    assert (tmp_path / "text.txt").read_text(encoding="utf-8") == "añadido"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.bin", "text.txt"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_mode(tmp_path: Path) -> None:
+    umask = os.umask(0o022)
+    try:
+        write_text(tmp_path / "new", "x")
+        write_text(tmp_path / "shared", "x", mode=0o640)
+        (tmp_path / "private").write_text("old")
+        os.chmod(tmp_path / "private", 0o600)
+        write_text(tmp_path / "private", "new")
+    finally:
+        os.umask(umask)
+
+    assert stat.S_IMODE((tmp_path / "new").stat().st_mode) == 0o644  # as open() would
+    assert stat.S_IMODE((tmp_path / "shared").stat().st_mode) == 0o640
+    assert stat.S_IMODE((tmp_path / "private").stat().st_mode) == 0o600  # kept
+
+
+def test_failed_write_keeps_the_old_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"old")
+
+    def fail(*_args: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "fsync", fail)
+    with pytest.raises(OSError):
+        write_bytes(path, b"new")
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.bin"]
@@ -0,0 +1,117 @@
+"""Tests for the on-disk feature archive."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import librosa
+import numpy as np
+import pytest
+
+from config import ARCHIVE_PRUNE_GRACE_S, ARCHIVE_WAVE_SR
+from model.feature_archive import FeatureArchive, QuantizedArray
+
+SR = 22050
+
+
+def _features() -> dict:
+    t = np.arange(4 * SR) / SR
+    y = (0.5 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+    mag = np.abs(librosa.stft(y))
+    return {
+        "path": "/music/song.wav",
+        "tempo": 128.0,
+        "key": "A Menor",
+        "sr": SR,
+        "hop_length": 512,
+        "y": y,
+        "D": librosa.amplitude_to_db(mag, ref=np.max),
+        "chroma": librosa.feature.chroma_stft(S=mag**2, sr=SR),
+    }
+
+
+class TestFeatureArchive:
+    def test_round_trip(self, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path)
+        features = _features()
+        archive_id = archive.save(features)
+        assert archive_id is not None and archive.exists(archive_id)
+
+        restored = archive.load(archive_id)
+        assert restored is not None
+        assert restored["path"] == features["path"]
+        assert restored["tempo"] == 128.0
+        assert restored["key"] == "A Menor"
+        assert restored["archive"] == archive_id
+        assert restored["D"].shape == features["D"].shape
+        assert np.max(np.abs(restored["D"] - features["D"])) <= 80.0 / 255 / 2 + 1e-3
+        assert np.max(np.abs(restored["chroma"] - features["chroma"])) <= 1 / 255
+        assert restored["y_sr"] == ARCHIVE_WAVE_SR
+        assert len(restored["y"]) == len(features["y"]) * ARCHIVE_WAVE_SR // SR
+
+    def test_arrays_are_memory_mapped_and_smaller(self, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path)
+        features = _features()
+        archive_id = archive.save(features)
+
+        assert isinstance(np.load(tmp_path / archive_id / "D.npy", mmap_mode="r"), np.memmap)
+        on_disk = sum(f.stat().st_size for f in (tmp_path / archive_id).iterdir())
+        in_memory = features["y"].nbytes + features["D"].nbytes + features["chroma"].nbytes
+        assert on_disk < in_memory / 3
+
+    def test_missing_and_incomplete_entries(self, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path)
+        assert archive.load("missing") is None
+        assert archive.save({"path": "x", "sr": SR}) is None
+
+        archive_id = archive.save(_features())
+        (tmp_path / archive_id / "D.npy").unlink()
+        assert archive.load(archive_id) is None
+
+        archive.remove(archive_id)
+        assert not archive.exists(archive_id)
+        assert not any(p.name.startswith(".tmp-") for p in tmp_path.iterdir())
+
+    def test_restored_arrays_are_dequantised_on_read(self, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path)
+        features = _features()
+        restored = archive.load(archive.save(features) or "")
+        assert restored is not None
+
+        spec = restored["D"]
+        assert isinstance(spec, QuantizedArray)
+        assert isinstance(spec.data, np.memmap) and spec.data.dtype == np.uint8
+        window = spec[:, 10:20]
+        assert window.dtype == np.float32 and window.shape == (spec.shape[0], 10)
+        np.testing.assert_array_equal(window, np.asarray(spec)[:, 10:20])
+        assert np.max(np.abs(window - features["D"][:, 10:20])) <= 80.0 / 255 / 2 + 1e-3
+
+        wave = restored["y"]
+        assert isinstance(wave.data, np.memmap) and wave.data.dtype == np.int16
+        assert wave[:100].dtype == np.float32
+        assert float(np.max(np.abs(np.asarray(wave)))) == pytest.approx(0.5, abs=1e-3)
+
+    def test_prune_keeps_referenced_entries(self, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path)
+        kept, orphan = archive.save(_features()), archive.save(_features())
+        assert kept and orphan
+        pending = tmp_path / ".tmp-writing"
+        pending.mkdir()
+
+        assert archive.prune([kept], min_age=0.0) == 1
+        assert archive.exists(kept) and not archive.exists(orphan)
+        assert pending.is_dir()
+        assert FeatureArchive(tmp_path / "absent").prune([]) == 0
+
+    def test_prune_spares_recent_entries(self, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path)
+        old, recent = archive.save(_features()), archive.save(_features())
+        assert old and recent
+        stale = time.time() - ARCHIVE_PRUNE_GRACE_S - 1
+        os.utime(tmp_path / old, (stale, stale))
+
+        # The recent entry's history record may not have been flushed yet
+        assert archive.prune([]) == 1
+        assert not archive.exists(old) and archive.exists(recent)
@@ -81,3 +81,29 @@ class TestExtractAllFeatures:
         assert "Desconocida" not in result["key"]
         assert result["D"].ndim == 2
         assert result["chroma"].shape[0] == 12
+
+
+class TestExtractPreview:
+    """Tests for the cheap progressive-rendering preview."""
+
+    def test_preview_is_decimated_and_drawable(self, sine_wav: np.ndarray) -> None:
+        from config import PREVIEW_HOP_LENGTH, PREVIEW_SR
+        from model.audio_file import AudioFile
+
+        audio = AudioFile()
+        audio._y = sine_wav  # noqa: SLF001
+        audio._sr = 22050  # noqa: SLF001
+
+        preview = FeatureExtractor().extract_preview(audio)
+
+        assert preview["preview"] is True
+        assert preview["sr"] == PREVIEW_SR
+        assert len(preview["y"]) == pytest.approx(len(sine_wav) * PREVIEW_SR / 22050, abs=2)
+        assert preview["D"].ndim == 2
+        assert preview["hop_length"] == PREVIEW_HOP_LENGTH
+        assert "chroma" not in preview
+
+    def test_preview_without_audio_returns_error(self) -> None:
+        from model.audio_file import AudioFile
+
+        assert "error" in FeatureExtractor().extract_preview(AudioFile())
@@ -0,0 +1,121 @@
+"""Tests for the lazy feature graph and feature subsets."""
+
+from __future__ import annotations
+
+import librosa
+import numpy as np
+import pytest
+
+from config import HOP_LENGTH
+from model.audio_file import AudioFile
+from model.feature_extractor import FEATURES, FeatureExtractor
+from model.feature_graph import FeatureGraph, FeatureRegistry
+from model.tempo import estimate_tempo
+
+
+@pytest.fixture
+def counting_registry() -> tuple[FeatureRegistry, list[str]]:
+    calls: list[str] = []
+    registry = FeatureRegistry()
+
+    @registry.feature("double", "x")
+    def _double(x: int) -> int:
+        calls.append("double")
+        return 2 * x
+
+    @registry.feature("quad", "double")
+    def _quad(double: int) -> int:
+        calls.append("quad")
+        return 2 * double
+
+    @registry.feature("other", "x")
+    def _other(x: int) -> int:
+        calls.append("other")
+        return -x
+
+    return registry, calls
+
+
+class TestFeatureGraph:
+    def test_computes_only_what_is_needed_once(
+        self, counting_registry: tuple[FeatureRegistry, list[str]]
+    ) -> None:
+        registry, calls = counting_registry
+        graph = FeatureGraph(registry, x=3)
+
+        assert graph["quad"] == 12
+        assert graph["quad"] == 12
+        assert calls == ["double", "quad"]
+        assert graph.computed() == {"x", "double", "quad"}
+        assert "other" in graph and "other" not in graph.computed()
+
+    def test_seeded_values_are_not_recomputed(
+        self, counting_registry: tuple[FeatureRegistry, list[str]]
+    ) -> None:
+        registry, calls = counting_registry
+        graph = FeatureGraph(registry, x=3, double=100)
+        assert graph.select(["quad"]) == {"quad": 200}
+        assert calls == ["quad"]
+
+    def test_unknown_feature_raises_key_error(
+        self, counting_registry: tuple[FeatureRegistry, list[str]]
+    ) -> None:
+        registry, _ = counting_registry
+        with pytest.raises(KeyError):
+            FeatureGraph(registry, x=1)["nope"]
+
+    def test_duplicate_registration_is_rejected(
+        self, counting_registry: tuple[FeatureRegistry, list[str]]
+    ) -> None:
+        registry, _ = counting_registry
+        with pytest.raises(ValueError):
+            registry.feature("double", "x")(lambda x: x)
+
+
+class TestFeatureSubsets:
+    @pytest.fixture
+    def audio(self, sine_wav: np.ndarray) -> AudioFile:
+        audio = AudioFile()
+        audio._y, audio._sr, audio._path = sine_wav, 22050, "test.wav"  # noqa: SLF001
+        return audio
+
+    def test_tempo_and_key_skip_the_db_spectrogram(self, audio: AudioFile) -> None:
+        extractor = FeatureExtractor()
+        graph = extractor.feature_graph(audio)
+        assert graph is not None
+
+        graph.select(["tempo", "key"])
+
+        assert {"D", "times", "fingerprint"}.isdisjoint(graph.computed())
+        assert FEATURES.requires(["key"]) >= {"chroma", "power", "stft_mag", "y"}
+
+    def test_subset_result_contains_only_requested_features(self, audio: AudioFile) -> None:
+        result = FeatureExtractor().extract_all_features(audio, features={"tempo", "key"})
+        assert set(result) == {"path", "sr", "hop_length", "tempo", "key"}
+
+    def test_unknown_feature_is_an_error(self, audio: AudioFile) -> None:
+        result = FeatureExtractor().extract_all_features(audio, features={"bogus"})
+        assert "bogus" in result["error"]
+
+    def test_shared_stft_matches_librosa_defaults(
+        self, audio: AudioFile, sine_wav: np.ndarray
+    ) -> None:
+        result = FeatureExtractor().extract_all_features(audio, features={"chroma", "D"})
+        expected = librosa.feature.chroma_stft(y=sine_wav, sr=22050)
+        np.testing.assert_allclose(result["chroma"], expected, rtol=1e-5, atol=1e-6)
+        assert result["D"].shape[1] == expected.shape[1]
+
+    def test_graph_tempo_matches_librosa_from_signal(
+        self, audio: AudioFile, sine_wav: np.ndarray
+    ) -> None:
+        result = FeatureExtractor().extract_all_features(audio, features={"tempo"})
+        expected = estimate_tempo(y=sine_wav, sr=22050, hop_length=HOP_LENGTH)
+        assert result["tempo"] == pytest.approx(expected)
+
+    def test_cached_features_are_reused(self, audio: AudioFile) -> None:
+        extractor = FeatureExtractor()
+        first = extractor.extract_all_features(audio, features={"key"})
+        graph = extractor.feature_graph(audio)
+        assert graph is not None
+        assert graph["key"] == first["key"]
+        assert "stft_mag" not in graph.computed()
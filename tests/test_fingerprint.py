@@ -0,0 +1,135 @@
+"""Tests for audio fingerprints and the duplicate-track index."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import librosa
+import numpy as np
+import pytest
+
+from controller.job_scheduler import JobScheduler
+from model.audio_file import AudioFile
+from model.feature_archive import FeatureArchive
+from model.feature_extractor import FeatureExtractor
+from model.fingerprint import (
+    FingerprintIndex,
+    bit_error_rate,
+    decode_fingerprint,
+    encode_fingerprint,
+)
+
+SR = 22050
+
+
+def _melody(seed: int, seconds: float = 20.0, sr: int = SR) -> np.ndarray:
+    """Random sequence of two-note chords, one every 0.4 s."""
+    rng = np.random.default_rng(seed)
+    note_len = int(0.4 * sr)
+    notes = []
+    t = np.arange(note_len) / sr
+    for _ in range(int(seconds / 0.4)):
+        f1, f2 = 220.0 * 2 ** (rng.integers(0, 24, size=2) / 12)
+        notes.append(0.3 * np.sin(2 * np.pi * f1 * t) + 0.2 * np.sin(2 * np.pi * f2 * t))
+    return np.concatenate(notes).astype(np.float32)
+
+
+def _fingerprint(y: np.ndarray, sr: int) -> np.ndarray:
+    audio = AudioFile()
+    audio._y, audio._sr, audio._path = y, sr, "mem"  # noqa: SLF001
+    return decode_fingerprint(FeatureExtractor().extract_preview(audio)["fingerprint"])
+
+
+class TestFingerprint:
+    def test_encoding_round_trips(self) -> None:
+        codes = np.array([0, 1, 2**24 - 1, 12345], dtype=np.uint32)
+        assert decode_fingerprint(encode_fingerprint(codes)).tolist() == codes.tolist()
+
+    def test_survives_gain_noise_and_resampling(self) -> None:
+        y = _melody(0)
+        copy = librosa.resample(y, orig_sr=SR, target_sr=44100) * 0.5
+        copy += np.random.default_rng(1).standard_normal(len(copy)).astype(np.float32) * 0.005
+
+        a, b = _fingerprint(y, SR), _fingerprint(copy, 44100)
+        assert len(a) > 20
+        assert bit_error_rate(a, b) < 0.1
+        assert bit_error_rate(a, _fingerprint(_melody(1), SR)) > 0.3
+
+
+class TestFingerprintIndex:
+    def test_finds_a_copy_among_many_tracks(self) -> None:
+        index = FingerprintIndex()
+        for seed in range(20):
+            index.add(f"track{seed}.wav", _fingerprint(_melody(seed), SR), {"seed": seed})
+
+        # A copy that starts a few seconds into the original still matches
+        y = _melody(7)[3 * SR :]
+        match = index.match(_fingerprint(y, SR))
+        assert match is not None
+        track_id, payload, ber = match
+        assert track_id == "track7.wav"
+        assert payload == {"seed": 7}
+        assert ber < 0.1
+
+    def test_unknown_recording_has_no_match(self) -> None:
+        index = FingerprintIndex()
+        for seed in range(5):
+            index.add(f"track{seed}.wav", _fingerprint(_melody(seed), SR))
+        assert index.match(_fingerprint(_melody(99), SR)) is None
+        assert index.match(np.zeros(10, dtype=np.uint32)) is None
+
+
+def _run(wait_until: Callable[..., None], scheduler: JobScheduler, path: str) -> dict:
+    results: list[dict] = []
+    scheduler.job_finished.connect(lambda _id, features: results.append(features))
+    scheduler.submit(path)
+    wait_until(lambda: bool(results), timeout=60)
+    scheduler.job_finished.disconnect()
+    return results[0]
+
+
+class _CountingExtractor(FeatureExtractor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.runs = 0
+
+    def extract_all_features(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        self.runs += 1
+        return super().extract_all_features(*args, **kwargs)
+
+
+@pytest.mark.parametrize("policy", ["link", "skip"])
+def test_scheduler_reuses_features_of_a_renamed_copy(
+    wait_until: Callable[..., None], tmp_path: Path, policy: str
+) -> None:
+    import soundfile as sf  # noqa: PLC0415
+
+    y = _melody(3, seconds=8.0)
+    original = tmp_path / "song.wav"
+    copy = tmp_path / "song (copy).flac"
+    sf.write(original, y, SR)
+    sf.write(copy, y, SR)
+
+    extractor = _CountingExtractor()
+    archive = FeatureArchive(tmp_path / "archive")
+    scheduler = JobScheduler(extractor, max_workers=1, duplicate_policy=policy, archive=archive)
+    first = _run(wait_until, scheduler, str(original))
+    second = _run(wait_until, scheduler, str(copy))
+
+    assert "duplicate_of" not in first
+    assert second["duplicate_of"] == str(original)
+    assert second["path"] == str(copy)
+    assert extractor.runs == 1  # no second DSP run
+    assert (second["tempo"], second["key"]) == (first["tempo"], first["key"])
+    assert np.shape(second["D"]) == np.shape(first["D"])  # restored from the archive
+    assert second.get("skipped", False) is (policy == "skip")
+
+    # The session index keeps the small record, not the signal and spectrograms
+    assert scheduler.fingerprints is not None
+    match = scheduler.fingerprints.match(decode_fingerprint(first["fingerprint"]))
+    assert match is not None
+    _, payload, _ = match
+    assert payload["archive"] == first["archive"]
+    assert not any(isinstance(value, np.ndarray) for value in payload.values())
@@ -0,0 +1,125 @@
+"""Tests for history search — query parsing, index lookups, streaming."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from config import CHROMA_NAMES
+from controller.history_search import HistorySearch
+from model.history_index import HistoryIndex, HistoryQuery, compatible_keys, parse_key
+from model.history_store import HistoryStore
+
+KEYS = [f"{name} {mode}" for name in CHROMA_NAMES for mode in ("Mayor", "Menor")]
+
+
+def _store(n: int, seed: int = 0) -> HistoryStore:
+    rng = np.random.default_rng(seed)
+    store = HistoryStore()
+    store.extend(
+        (
+            {
+                "path": f"/Music/Artist {i % 97}/track_{i:06d}.mp3",
+                "tempo": float(rng.uniform(60, 180)),
+                "key": KEYS[i % len(KEYS)],
+            }
+            for i in range(n)
+        ),
+        persisted=True,
+    )
+    return store
+
+
+def _brute_force(store: HistoryStore, query: HistoryQuery) -> list[int]:
+    rows = []
+    for row in range(len(store)):
+        record = store[row]
+        tempo = record["tempo"]
+        if query.bpm_min is not None and tempo < query.bpm_min:
+            continue
+        if query.bpm_max is not None and tempo > query.bpm_max:
+            continue
+        if query.keys is not None and record["key"] not in query.keys:
+            continue
+        if not all(t in record["path"].lower() for t in query.terms):
+            continue
+        rows.append(row)
+    return rows
+
+
+class TestQueryParsing:
+    def test_tokens(self) -> None:
+        query = HistoryQuery.parse("bpm:120-130 key:Am Artist 5")
+        assert (query.bpm_min, query.bpm_max) == (120.0, 130.0)
+        assert query.keys == {"A Menor"}
+        assert query.terms == ("artist", "5")
+
+    def test_open_ranges_and_single_values(self) -> None:
+        assert HistoryQuery.parse("bpm:-100").bpm_max == 100.0
+        assert HistoryQuery.parse("bpm:140-").bpm_min == 140.0
+        single = HistoryQuery.parse("bpm:128")
+        assert (single.bpm_min, single.bpm_max) == (127.5, 128.5)
+
+    def test_malformed_filters_become_terms(self) -> None:
+        assert HistoryQuery.parse("bpm:fast key:H").terms == ("bpm:fast", "key:h")
+
+    def test_short_key_notation(self) -> None:
+        assert parse_key("C") == "C Mayor"
+        assert parse_key("Bbm") == "A# Menor"
+        assert parse_key("f#m") == "F# Menor"
+        assert parse_key("X") is None
+
+    def test_compatible_keys_follow_the_camelot_wheel(self) -> None:
+        assert compatible_keys("A Menor") == {"A Menor", "E Menor", "D Menor", "C Mayor"}
+        assert compatible_keys("C Mayor") == {"C Mayor", "G Mayor", "F Mayor", "A Menor"}
+        assert compatible_keys("Desconocida") == frozenset()
+
+
+class TestHistoryIndex:
+    @pytest.mark.parametrize(
+        "text",
+        ["", "bpm:100-110", "key:~Am", "artist 5", "bpm:120- key:C track_0001", "nothing"],
+    )
+    def test_matches_brute_force(self, text: str) -> None:
+        store = _store(3000)
+        query = HistoryQuery.parse(text)
+        assert HistoryIndex(store).search(query).tolist() == _brute_force(store, query)
+
+    def test_picks_up_appended_rows(self) -> None:
+        store = _store(500)
+        index = HistoryIndex(store)
+        query = HistoryQuery.parse("bpm:99.5-100.5 new")
+        assert len(index.search(query)) == 0
+
+        row = store.append({"path": "/tmp/NEW.wav", "tempo": 100.0, "key": "C Mayor"})
+        assert index.search(query).tolist() == [row]
+        assert len(index) == 501
+
+    def test_large_history_queries_are_fast(self) -> None:
+        index = HistoryIndex(_store(100_000))
+        index.search(HistoryQuery())  # initial build
+        for text in ("bpm:120-125 key:~Am", "artist 42", "track_0999"):
+            started = time.perf_counter()
+            index.search(HistoryQuery.parse(text))
+            assert time.perf_counter() - started < 0.1, text
+
+
+def test_search_streams_chunks_and_drops_stale_queries(wait_until: Callable[..., None]) -> None:
+    search = HistorySearch(_store(10_000))
+    chunks: list[list[int]] = []
+    totals: list[int] = []
+    search.rows_found.connect(chunks.append)
+    search.finished.connect(lambda total, _seconds: totals.append(total))
+
+    search.search("track_")  # superseded before its results are delivered
+    search.search("bpm:60-180")
+    wait_until(lambda: bool(totals))
+
+    rows = [row for chunk in chunks for row in chunk]
+    expected = search.index.search(HistoryQuery.parse("bpm:60-180")).tolist()
+    assert totals == [len(expected)]
+    assert rows == expected
+    assert len(chunks) > 1
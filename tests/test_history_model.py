@@ -0,0 +1,76 @@
+"""Tests for the history store and its lazily fetched list model."""
+
+from __future__ import annotations
+
+import pytest
+from PySide6.QtCore import Qt
+
+from model.history_store import HistoryStore
+from view.history_model import RECORD_ROLE, HistoryListModel
+
+
+def _records(n: int) -> list[dict]:
+    return [
+        {"path": f"/music/track{i}.wav", "tempo": 100.0 + i, "key": "C Mayor"} for i in range(n)
+    ]
+
+
+class TestHistoryStore:
+    def test_rows_are_stable_and_labelled(self) -> None:
+        store = HistoryStore()
+        store.extend(_records(2), persisted=True)
+        row = store.append({"path": "/tmp/new.mp3", "tempo": 90.0})
+
+        assert row == 2
+        assert store.label(0) == "track0.wav (prev)"
+        assert store.label(2) == "new.mp3"
+        assert store.is_persisted(1) and not store.is_persisted(2)
+
+    def test_legacy_file_key_is_used_for_labels(self) -> None:
+        store = HistoryStore()
+        store.append({"file": "/a/b/old.flac", "bpm": 120.0}, persisted=True)
+        assert store.label(0) == "old.flac (prev)"
+
+
+@pytest.mark.usefixtures("qapp")
+class TestHistoryListModel:
+    def test_rows_are_fetched_in_batches(self) -> None:
+        model = HistoryListModel(HistoryStore(), batch=100)
+        model.extend(_records(1000), persisted=True)
+
+        assert model.rowCount() == 100
+        assert model.canFetchMore()
+        model.fetchMore()
+        assert model.rowCount() == 200
+
+        model.ensure_fetched(750)
+        assert model.rowCount() == 800
+        assert model.data(model.index(750)) == "track750.wav (prev)"
+        assert model.data(model.index(750), RECORD_ROLE)["tempo"] == 850.0
+        assert model.data(model.index(900)) is None  # not fetched yet
+
+    def test_append_inserts_a_single_row(self) -> None:
+        model = HistoryListModel(HistoryStore(), batch=10)
+        model.extend(_records(3), persisted=True)
+        inserted: list[tuple[int, int]] = []
+        resets: list[bool] = []
+        model.rowsInserted.connect(lambda _parent, first, last: inserted.append((first, last)))
+        model.modelReset.connect(lambda: resets.append(True))
+
+        row = model.append({"path": "/x/session.wav", "tempo": 128.0})
+
+        assert row == 3
+        assert inserted == [(3, 3)]
+        assert not resets
+        assert model.data(model.index(3), Qt.ItemDataRole.DisplayRole) == "session.wav"
+
+    def test_append_beyond_unfetched_rows_waits_for_fetch(self) -> None:
+        model = HistoryListModel(HistoryStore(), batch=10)
+        model.extend(_records(50), persisted=True)
+
+        row = model.append({"path": "/x/late.wav", "tempo": 1.0})
+
+        assert row == 50
+        assert model.rowCount() == 10
+        model.ensure_fetched(row)
+        assert model.data(model.index(row)) == "late.wav"
@@ -0,0 +1,132 @@
+"""Tests for ``JobScheduler`` — isolation, bounded queue, and ordering."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from controller.job_scheduler import JobScheduler
+from model.audio_file import AudioFile
+
+SINE_WAV = Path(__file__).resolve().parent / "fixtures" / "sine_440.wav"
+
+
+class _SlowExtractor:
+    """Stand-in extractor whose latency depends on the file name.
+
+    Earlier submissions sleep longer so that jobs complete out of order.
+    """
+
+    def __init__(self, delays: dict[str, float]) -> None:
+        self._delays = delays
+        self.seen: list[int] = []
+
+    def extract_preview(self, audio_file: AudioFile) -> dict[str, Any]:
+        return {"path": audio_file.get_path(), "preview": True}
+
+    def extract_all_features(
+        self,
+        audio_file: AudioFile,
+        features: frozenset[str] | None = None,  # noqa: ARG002
+        tempo_mode: str = "accurate",  # noqa: ARG002
+    ) -> dict[str, Any]:
+        path = str(audio_file.get_path())
+        self.seen.append(id(audio_file))
+        time.sleep(self._delays.get(path, 0.0))
+        if path == "fail":
+            return {"error": "boom"}
+        return {"path": path, "tempo": 120.0, "key": "C Mayor"}
+
+
+@pytest.fixture
+def load_by_name(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Make ``AudioFile.load_audio`` accept any name (``missing`` fails)."""
+    real_load = AudioFile.load_audio
+
+    def fake_load(
+        self: AudioFile,
+        path: str,
+        sr: int | None = None,
+        use_cache: bool = False,  # noqa: ARG001 — every name is the same file
+    ) -> bool:
+        ok = real_load(self, str(SINE_WAV), sr)
+        self._path = path  # noqa: SLF001
+        return ok and path != "missing"
+
+    monkeypatch.setattr(AudioFile, "load_audio", fake_load)
+
+
+@pytest.mark.usefixtures("load_by_name")
+class TestJobScheduler:
+    def test_results_are_delivered_in_submission_order(
+        self, wait_until: Callable[..., None]
+    ) -> None:
+        extractor = _SlowExtractor({"a": 0.3, "b": 0.1, "c": 0.0})
+        scheduler = JobScheduler(extractor, max_workers=3)  # type: ignore[arg-type]
+        delivered: list[tuple[int, str]] = []
+        previews: list[int] = []
+        scheduler.job_finished.connect(lambda jid, f: delivered.append((jid, f["path"])))
+        scheduler.job_preview.connect(lambda jid, _p: previews.append(jid))
+
+        ids = [scheduler.submit(p) for p in ("a", "b", "c")]
+        wait_until(lambda: len(delivered) == 3)
+
+        assert [jid for jid, _ in delivered] == ids
+        assert [p for _, p in delivered] == ["a", "b", "c"]
+        # Every job got its own AudioFile instance
+        assert len(set(extractor.seen)) == 3
+        # Previews arrive before results, without ordering guarantees
+        assert sorted(previews) == ids
+
+    def test_failures_keep_their_place_in_order(self, wait_until: Callable[..., None]) -> None:
+        extractor = _SlowExtractor({"a": 0.2})
+        scheduler = JobScheduler(extractor, max_workers=3)  # type: ignore[arg-type]
+        events: list[str] = []
+        scheduler.job_finished.connect(lambda _jid, f: events.append(f["path"]))
+        scheduler.job_failed.connect(lambda _jid, msg: events.append(msg))
+
+        for p in ("a", "missing", "fail"):
+            scheduler.submit(p)
+        wait_until(lambda: len(events) == 3)
+
+        assert events[0] == "a"
+        assert "No se pudo cargar" in events[1]
+        assert events[2] == "ERROR: boom"
+
+    def test_queue_is_bounded(self, wait_until: Callable[..., None]) -> None:
+        extractor = _SlowExtractor({"a": 0.2, "b": 0.2})
+        scheduler = JobScheduler(extractor, max_workers=1, max_queued=2)  # type: ignore[arg-type]
+        idle: list[bool] = []
+        scheduler.idle.connect(lambda: idle.append(True))
+
+        assert scheduler.submit("a") is not None
+        assert scheduler.submit("b") is not None
+        assert not scheduler.has_capacity()
+        assert scheduler.submit("c") is None
+
+        wait_until(lambda: bool(idle))
+        assert scheduler.pending_count() == 0
+        assert scheduler.has_capacity()
+
+    def test_cancel_pending_drops_queued_jobs(self, wait_until: Callable[..., None]) -> None:
+        extractor = _SlowExtractor({"a": 0.3})
+        scheduler = JobScheduler(extractor, max_workers=1, duplicate_policy="off")  # type: ignore[arg-type]
+        delivered: list[str] = []
+        idle: list[bool] = []
+        scheduler.job_finished.connect(lambda _id, features: delivered.append(features["path"]))
+        scheduler.idle.connect(lambda: idle.append(True))
+
+        for name in ("a", "b", "c"):
+            scheduler.submit(name)
+        wait_until(lambda: bool(extractor.seen))  # "a" is running
+        assert scheduler.cancel_pending() == 2
+
+        assert scheduler.wait_for_done(5000)
+        wait_until(lambda: bool(idle))
+        assert delivered == ["a"]
+        assert scheduler.memory.used == 0
+        assert scheduler.pending_count() == 0
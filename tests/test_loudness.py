@@ -0,0 +1,148 @@
+"""Tests for the single-pass loudness and dynamics meter."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+from model.audio_file import AudioFile
+from model.feature_extractor import FeatureExtractor
+from model.loudness import SILENCE_DB, LoudnessMeter, k_weighting, measure_loudness
+from model.pcm_cache import PCMCache
+from model.playlist_analyzer import SingleTrackResult
+from model.stream_analyzer import analyze_file_blocks
+
+SR = 48000
+
+
+def _tone(db: float, seconds: float, freq: float = 1000.0, sr: int = SR) -> np.ndarray:
+    t = np.arange(int(seconds * sr)) / sr
+    return (10 ** (db / 20) * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+class TestLoudnessMeter:
+    def test_k_weighting_matches_the_standard_at_48k(self) -> None:
+        sos = k_weighting(48000)
+        np.testing.assert_allclose(
+            sos[0], [1.53512486, -2.69169619, 1.19839281, 1.0, -1.69065929, 0.73248077]
+        )
+        np.testing.assert_allclose(sos[1], [1.0, -2.0, 1.0, 1.0, -1.99004745, 0.99007225])
+
+    def test_reference_tone(self) -> None:
+        # A full-scale-referenced 1 kHz sine at -20 dBFS reads -23 LUFS (mono)
+        summary = measure_loudness(_tone(-20.0, 10.0), SR).summary()
+        assert summary["integrated_lufs"] == pytest.approx(-23.0, abs=0.05)
+        assert summary["short_term_max_lufs"] == pytest.approx(-23.0, abs=0.05)
+        assert summary["rms_dbfs"] == pytest.approx(-23.01, abs=0.01)
+        assert summary["crest_factor_db"] == pytest.approx(3.01, abs=0.01)
+        assert summary["loudness_range_lu"] == pytest.approx(0.0, abs=0.01)
+
+    def test_result_does_not_depend_on_block_size(self) -> None:
+        y = np.random.default_rng(0).standard_normal(SR * 8).astype(np.float32) * 0.1
+        whole = LoudnessMeter(SR)
+        whole.push(y)
+        blocks = measure_loudness(y, SR, block_frames=777)
+        assert blocks.summary() == pytest.approx(whole.summary())
+        np.testing.assert_allclose(blocks.short_term(), whole.short_term())
+
+    def test_gating_and_loudness_range(self) -> None:
+        silence = np.zeros(SR * 5, dtype=np.float32)
+        # Silence is gated out (only blocks straddling the edge pull it down)
+        gated = measure_loudness(np.concatenate([_tone(-20.0, 10.0), silence]), SR)
+        assert gated.summary()["integrated_lufs"] == pytest.approx(-23.0, abs=0.1)
+
+        loud_quiet = np.concatenate([_tone(-20.0, 20.0), _tone(-30.0, 20.0)])
+        assert measure_loudness(loud_quiet, SR).summary()["loudness_range_lu"] == pytest.approx(
+            10.0, abs=0.5
+        )
+        assert measure_loudness(silence, SR).summary()["integrated_lufs"] == SILENCE_DB
+
+    def test_true_peak_exceeds_the_sample_peak(self) -> None:
+        # A quarter-rate sine sampled 45° off its crests
+        n = np.arange(SR)
+        y = np.sin(2 * np.pi * n / 4 + np.pi / 4)
+        summary = measure_loudness(y, SR).summary()
+        assert summary["sample_peak_dbfs"] == pytest.approx(-3.01, abs=0.01)
+        assert summary["true_peak_dbtp"] == pytest.approx(0.0, abs=0.2)
+
+    def test_channel_energies_are_summed(self) -> None:
+        y = _tone(-20.0, 10.0)
+        stereo = measure_loudness(np.stack([y, y], axis=1), SR).summary()
+        # Two identical channels carry twice the energy of one: +3 LU
+        assert stereo["integrated_lufs"] == pytest.approx(-23.0 + 3.01, abs=0.05)
+        assert stereo["rms_dbfs"] == pytest.approx(-23.01, abs=0.01)
+        left_only = measure_loudness(np.stack([y, np.zeros_like(y)], axis=1), SR).summary()
+        assert left_only["integrated_lufs"] == pytest.approx(-23.0, abs=0.05)
+        assert left_only["true_peak_dbtp"] == pytest.approx(-20.0, abs=0.1)
+
+        # 5.1: the LFE is ignored and the surrounds weigh 1.41
+        silent = np.zeros_like(y)
+        lfe = measure_loudness(np.stack([silent] * 3 + [y] + [silent] * 2, axis=1), SR)
+        assert lfe.summary()["integrated_lufs"] == SILENCE_DB
+        surround = measure_loudness(np.stack([silent] * 4 + [y, silent], axis=1), SR)
+        assert surround.summary()["integrated_lufs"] == pytest.approx(-23.0 + 1.49, abs=0.05)
+
+        with pytest.raises(ValueError):
+            LoudnessMeter(SR, channels=2).push(y)
+
+
+class TestLoudnessInTheAnalysis:
+    def test_extractor_computes_loudness_without_the_stft(self) -> None:
+        audio = AudioFile()
+        audio._y, audio._sr, audio._path = _tone(-20.0, 5.0, sr=22050), 22050, "mem"  # noqa: SLF001
+        graph = FeatureExtractor().feature_graph(audio)
+        assert graph is not None
+        assert graph["loudness"]["integrated_lufs"] == pytest.approx(-23.0, abs=0.05)
+        assert "stft_mag" not in graph.computed()
+
+        summary = SingleTrackResult({"tempo": 0.0, "loudness": graph["loudness"]}).get_summary()
+        assert summary["Loudness"].startswith("-23.0 LUFS")
+        assert summary["True peak"].endswith("dBTP")
+
+    def test_block_analysis_matches_the_decoded_signal(self, tmp_path: Path) -> None:
+        y = _tone(-12.0, 6.0, freq=440.0, sr=22050)
+        path = tmp_path / "tone.wav"
+        sf.write(path, y, 22050, subtype="FLOAT")
+
+        streamed = analyze_file_blocks(str(path), block_frames=3000)["loudness"]
+        assert streamed == pytest.approx(measure_loudness(y, 22050).summary(), abs=1e-3)
+
+    def test_stereo_files_are_metered_per_channel(self, tmp_path: Path) -> None:
+        y = _tone(-20.0, 6.0, sr=22050)
+        path = tmp_path / "stereo.wav"
+        sf.write(path, np.stack([y, y], axis=1), 22050, subtype="FLOAT")
+        expected = measure_loudness(np.stack([y, y], axis=1), 22050).summary()
+
+        audio = AudioFile()
+        assert audio.load_audio(str(path), use_cache=False)
+        decoded = FeatureExtractor().extract_all_features(audio, features={"loudness"})
+        assert decoded["loudness"] == pytest.approx(expected, abs=1e-3)
+        assert decoded["loudness"]["integrated_lufs"] == pytest.approx(-20.0, abs=0.1)
+        streamed = analyze_file_blocks(str(path), block_frames=3000)["loudness"]
+        assert streamed == pytest.approx(expected, abs=1e-3)
+
+    def test_channels_are_metered_from_the_single_decode(
+        self, tmp_path: Path, pcm_cache: PCMCache
+    ) -> None:
+        y = _tone(-20.0, 6.0, sr=22050)
+        path = tmp_path / "stereo.wav"
+        sf.write(path, np.stack([y, y], axis=1), 22050, subtype="FLOAT")
+        expected = measure_loudness(np.stack([y, y], axis=1), 22050).summary()
+
+        with (
+            patch("model.audio_file.librosa.load", wraps=librosa.load) as load,
+            patch("soundfile.blocks", wraps=sf.blocks) as reread,
+        ):
+            for _ in range(2):  # decoded once, then served by the PCM cache
+                audio = AudioFile()
+                assert audio.load_audio(str(path), use_cache=True)
+                assert audio.get_signal().ndim == 1  # type: ignore[union-attr]
+                loudness = FeatureExtractor().extract_all_features(audio, features={"loudness"})
+                assert loudness["loudness"] == pytest.approx(expected, abs=1e-3)
+        assert load.call_count == 1 and pcm_cache.hits == 1
+        reread.assert_not_called()
@@ -0,0 +1,90 @@
+"""Integration tests for the controller's display-settings path."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+import persist
+from controller.main_controller import MainController
+from model.feature_archive import FeatureArchive
+from model.feature_extractor import FeatureExtractor
+from model.thumbnail_cache import ThumbnailCache
+from view.main_window import MainWindow
+
+SR = 22050
+
+
+@pytest.fixture
+def controller(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[MainController]:
+    # Keep history, archive and thumbnails out of the user's home
+    monkeypatch.setattr(persist, "_HISTORY_DIR", tmp_path)
+    monkeypatch.setattr(persist, "_HISTORY_FILE", tmp_path / "history.json")
+    monkeypatch.setattr(
+        "controller.main_controller.FeatureArchive", lambda: FeatureArchive(tmp_path / "archive")
+    )
+    monkeypatch.setattr(
+        "controller.main_controller.ThumbnailCache", lambda: ThumbnailCache(tmp_path / "thumbs")
+    )
+    controller = MainController(FeatureExtractor(), MainWindow())
+    yield controller
+    controller.shutdown()
+    controller.view_window.close()
+
+
+@pytest.fixture
+def chord_wav(tmp_path: Path) -> str:
+    t = np.arange(3 * SR) / SR
+    y = sum(np.sin(2 * np.pi * f * t) for f in (261.63, 329.63, 392.0)) / 4
+    path = tmp_path / "chord.wav"
+    sf.write(path, y.astype(np.float32), SR)
+    return str(path)
+
+
+@pytest.mark.usefixtures("qapp")
+class TestDisplaySettings:
+    def test_settings_redraw_without_reanalysing(
+        self, controller: MainController, chord_wav: str, wait_until: Callable[..., None]
+    ) -> None:
+        window = controller.view_window
+        controller.handle_analyze_request(chord_wav)
+        wait_until(lambda: window._last_features is not None, timeout=60.0)  # noqa: SLF001
+        analysed = window._last_features  # noqa: SLF001
+        assert analysed is not None and analysed["stft"] is not None
+        assert np.ptp(analysed["D"]) == pytest.approx(80.0)
+
+        with patch.object(
+            FeatureExtractor, "extract_all_features", side_effect=AssertionError
+        ) as extract:
+            window.display_controls["top_db"].setCurrentText("60 dB")
+            window.display_controls["freq_scale"].setCurrentText("Lineal")
+            window.display_controls["chroma_norm"].setCurrentText("Ninguna")
+        extract.assert_not_called()
+
+        shown = window._last_features  # noqa: SLF001
+        assert shown is not None and shown is not analysed
+        assert np.ptp(shown["D"]) == pytest.approx(60.0)
+        assert shown["freq_scale"] == "linear"
+        assert shown["chroma"].max() > 1.0
+        assert shown["key"] == analysed["key"]
+
+        # Restoring a history entry keeps the chosen settings
+        controller._restore_from_history(0)  # noqa: SLF001
+        restored = window._last_features  # noqa: SLF001
+        assert restored is not None and restored["freq_scale"] == "linear"
+        assert np.ptp(restored["D"]) == pytest.approx(60.0)
+
+    def test_results_without_the_stft_are_left_as_analysed(
+        self, controller: MainController
+    ) -> None:
+        window = controller.view_window
+        features = {"path": "old.wav", "D": np.zeros((4, 4)), "key": "C Mayor"}
+        window._last_features = features  # noqa: SLF001
+        window.display_controls["top_db"].setCurrentText("60 dB")
+        assert window._last_features is features  # noqa: SLF001
+        assert "STFT" in window.status_label.text()
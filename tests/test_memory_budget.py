@@ -0,0 +1,202 @@
+"""Tests for memory estimates, analysis plans and scheduler admission."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from config import DEFAULT_FEATURES
+from controller.job_scheduler import JobScheduler
+from model.audio_file import AudioFile
+from model.memory_budget import (
+    MODE_FULL,
+    MODE_REDUCED,
+    MODE_STREAM,
+    AudioProbe,
+    MemoryBudget,
+    estimate_peak_bytes,
+    guess_probe,
+    plan_analysis,
+    probe_audio,
+)
+from model.pcm_cache import PCMCache
+from model.stream_analyzer import analyze_file_blocks
+
+SINE_WAV = Path(__file__).resolve().parent / "fixtures" / "sine_440.wav"
+
+
+class TestEstimates:
+    def test_probe_reads_the_header(self, tmp_path: Path) -> None:
+        path = tmp_path / "stereo.wav"
+        sf.write(path, np.zeros((44100 * 3, 2), dtype=np.float32), 44100)
+        probe = probe_audio(str(path))
+        assert probe is not None
+        assert (probe.samplerate, probe.channels, probe.frames) == (44100, 2, 44100 * 3)
+        assert probe.duration == pytest.approx(3.0)
+        assert probe_audio(str(tmp_path / "missing.wav")) is None
+
+    def test_estimate_scales_with_length_and_rate(self) -> None:
+        short = AudioProbe("a", 44100, 2, 44100 * 60)
+        long = AudioProbe("b", 44100, 2, 44100 * 600)
+        assert estimate_peak_bytes(long) > 9 * estimate_peak_bytes(short)
+        assert estimate_peak_bytes(long, sr=11025) < estimate_peak_bytes(long) / 3
+        with_stft = DEFAULT_FEATURES | {"stft"}
+        assert estimate_peak_bytes(long, features=with_stft) > estimate_peak_bytes(long)
+
+    def test_plan_degrades_with_the_budget(self) -> None:
+        probe = AudioProbe("x", 44100, 2, 44100 * 3600)
+        full = estimate_peak_bytes(probe)
+        reduced = estimate_peak_bytes(probe, sr=22050)
+
+        assert plan_analysis(probe, full).mode == MODE_FULL
+        plan = plan_analysis(probe, reduced)
+        assert (plan.mode, plan.sr, plan.nbytes) == (MODE_REDUCED, 22050, reduced)
+        plan = plan_analysis(probe, 50 * 1024**2)
+        assert plan.mode == MODE_STREAM and plan.nbytes < 50 * 1024**2
+        assert plan_analysis(None, 0).nbytes == 0
+        with_stft = plan_analysis(probe, full * 2, DEFAULT_FEATURES | {"stft"})
+        assert with_stft.nbytes == estimate_peak_bytes(probe, features=DEFAULT_FEATURES | {"stft"})
+
+    def test_unreadable_headers_are_guessed_from_the_size(self, tmp_path: Path) -> None:
+        path = tmp_path / "song.mp3"
+        path.write_bytes(b"\0" * 1_000_000)  # ~1 minute at 128 kbit/s
+        assert probe_audio(str(path)) is None
+        probe = guess_probe(str(path), ratio=11.0)
+        assert probe is not None and probe.estimated
+        assert probe.duration == pytest.approx(62.4, rel=0.01)
+        assert plan_analysis(probe, 10 * 1024**3).nbytes == estimate_peak_bytes(probe)
+        assert guess_probe(str(tmp_path / "missing.mp3")) is None
+
+        # Streaming needs a readable header: the lowest rate is used instead
+        plan = plan_analysis(probe, 1)
+        assert (plan.mode, plan.sr) == (MODE_REDUCED, 11025)
+
+
+class TestMemoryBudget:
+    def test_reservations_within_capacity(self) -> None:
+        budget = MemoryBudget(100)
+        assert budget.try_acquire(60)
+        assert not budget.try_acquire(60)
+        budget.release(60)
+        # An oversized request is admitted when nothing else is running
+        assert budget.try_acquire(500)
+        assert budget.used == 500
+
+
+def test_streamed_analysis_matches_the_key(sine_wav: np.ndarray, tmp_path: Path) -> None:
+    path = tmp_path / "sine.wav"
+    sf.write(path, sine_wav, 22050)
+    result = analyze_file_blocks(str(path), block_frames=1000)
+    assert result["key"].startswith("A ")
+    assert "D" not in result
+    assert "error" in analyze_file_blocks(str(tmp_path / "missing.wav"))
+
+
+class _CountingExtractor:
+    """Records how many analyses run at the same time."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def extract_preview(self, audio_file: AudioFile) -> dict[str, Any]:
+        return {"path": audio_file.get_path()}
+
+    def extract_all_features(
+        self,
+        audio_file: AudioFile,
+        features: frozenset[str] | None = None,  # noqa: ARG002
+        tempo_mode: str = "accurate",  # noqa: ARG002
+    ) -> dict[str, Any]:
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.2)
+        with self._lock:
+            self.running -= 1
+        return {"path": audio_file.get_path(), "tempo": 120.0, "key": "A Menor"}
+
+
+def _drain(wait_until: Callable[..., None], scheduler: JobScheduler, count: int) -> list[dict]:
+    results: list[dict] = []
+    scheduler.job_finished.connect(lambda _id, features: results.append(features))
+    for _ in range(count):
+        scheduler.submit(str(SINE_WAV))
+    wait_until(lambda: len(results) == count, timeout=30)
+    return results
+
+
+def _scheduler(extractor: _CountingExtractor, capacity: int) -> JobScheduler:
+    return JobScheduler(
+        extractor,  # type: ignore[arg-type]
+        max_workers=3,
+        duplicate_policy="off",
+        memory=MemoryBudget(capacity),
+    )
+
+
+def test_scheduler_admits_jobs_within_the_budget(
+    wait_until: Callable[..., None], pcm_cache: PCMCache
+) -> None:
+    probe = probe_audio(str(SINE_WAV))
+    assert probe is not None
+    one_job = estimate_peak_bytes(probe)
+
+    roomy = _CountingExtractor()
+    _drain(wait_until, _scheduler(roomy, 10 * one_job), 3)
+    assert roomy.peak == 3
+
+    tight = _CountingExtractor()
+    scheduler = _scheduler(tight, one_job + one_job // 2)
+    results = _drain(wait_until, scheduler, 3)
+    assert tight.peak == 1
+    # Only the decoded audio kept by the PCM cache is still reserved
+    assert scheduler.memory.used == pcm_cache.memory_bytes > 0
+    assert all("analysis_mode" not in r for r in results)
+
+
+@pytest.mark.parametrize(("jobs", "hits"), [(10, 1), (1, 0)])
+def test_cached_audio_is_trimmed_for_waiting_jobs(
+    wait_until: Callable[..., None], pcm_cache: PCMCache, jobs: int, hits: int
+) -> None:
+    probe = probe_audio(str(SINE_WAV))
+    assert probe is not None
+    scheduler = _scheduler(_CountingExtractor(), jobs * estimate_peak_bytes(probe))
+
+    _drain(wait_until, scheduler, 1)
+    assert scheduler.memory.used == pcm_cache.memory_bytes > 0
+    # With room for one job only, the cached signal is evicted to admit the next
+    _drain(wait_until, scheduler, 1)
+    assert pcm_cache.hits == hits
+    assert scheduler.memory.used == pcm_cache.memory_bytes
+
+
+def test_scheduler_probes_off_the_calling_thread(
+    wait_until: Callable[..., None], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    threads: list[threading.Thread] = []
+
+    def probe(path: str) -> AudioProbe | None:
+        threads.append(threading.current_thread())
+        return probe_audio(path)
+
+    monkeypatch.setattr("controller.job_scheduler.probe_audio", probe)
+    results = _drain(wait_until, _scheduler(_CountingExtractor(), 10 * 1024**3), 2)
+    assert len(results) == 2 and len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_scheduler_streams_files_larger_than_the_budget(wait_until: Callable[..., None]) -> None:
+    extractor = _CountingExtractor()
+    results = _drain(wait_until, _scheduler(extractor, 1), 2)
+    assert extractor.peak == 0  # never decoded
+    assert [r["analysis_mode"] for r in results] == [MODE_STREAM, MODE_STREAM]
+    assert results[0]["key"].startswith("A ")
@@ -0,0 +1,191 @@
+"""Peak-memory budgets for loading and analysing a file.
+
+The full signal, the STFT matrices and their derived spectrograms all
+live at once while a file is analysed, which makes memory the first
+thing to run out on long tracks.  These tests run ``load_audio`` +
+``extract_all_features`` on generated files of several lengths and
+fail when the peak grows past the budget of the duration analysed:
+
+* allocations seen by :mod:`tracemalloc` (NumPy registers its buffers
+  with it), which is deterministic, and
+* the process RSS sampled from ``/proc`` (Linux only), which also sees
+  what native code allocates outside Python.
+
+The per-minute figures were measured on the current pipeline.  When a
+change lowers the peak, lower them too so the gain cannot be lost
+silently.  The same files check that
+:func:`~model.memory_budget.estimate_peak_bytes`, which admission
+control relies on, never underestimates the traced peak.
+
+The tier is slow and sensitive to other load, so the default run
+deselects it; run it alone with ``pytest -m memory`` (CI does so in a
+separate step).
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from model.audio_file import AudioFile
+from model.feature_extractor import FeatureExtractor
+from model.memory_budget import estimate_peak_bytes, probe_audio
+
+pytestmark = pytest.mark.memory
+
+MIB = 1024**2
+
+PEAK_PER_MINUTE = {(22050, 1): 110 * MIB, (44100, 2): 258 * MIB}
+"""Measured peak per minute of audio, keyed by (sample rate, channels)."""
+
+PEAK_OVERHEAD = 4 * MIB
+"""Fixed allowance on top of the per-minute figure (filter banks, small arrays)."""
+
+TRACEMALLOC_MARGIN = 1.15
+"""Growth over the measured peak tolerated before a test fails."""
+
+RSS_MARGIN = 1.5
+"""Looser margin for the RSS, which includes allocator slack."""
+
+_STATM = Path("/proc/self/statm")
+
+FIXTURES = [(15.0, 22050, 1), (30.0, 22050, 1), (60.0, 22050, 1), (30.0, 44100, 2)]
+"""Generated files as (seconds, sample rate, channels)."""
+
+
+def _write_fixture(path: Path, seconds: float, sr: int, channels: int) -> Path:
+    """Write a noisy 440 Hz tone as 16-bit PCM, the usual size of a WAV."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr), dtype=np.float32) / sr
+    y = 0.3 * np.sin(2 * np.pi * 440.0 * t) + 0.05 * rng.standard_normal(t.size)
+    y = y.astype(np.float32)
+    sf.write(path, np.stack([y] * channels, axis=1) if channels > 1 else y, sr, "PCM_16")
+    return path
+
+
+def _analyse(path: Path) -> dict:
+    audio = AudioFile()
+    assert audio.load_audio(str(path), use_cache=False)
+    features = FeatureExtractor().extract_all_features(audio)
+    assert "error" not in features
+    return features
+
+
+def _budget(seconds: float, sr: int, channels: int) -> float:
+    return PEAK_OVERHEAD + PEAK_PER_MINUTE[(sr, channels)] * seconds / 60
+
+
+def _traced_peak(func: Callable[[], object]) -> int:
+    """Return the peak of the allocations traced while *func* runs."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _rss() -> int:
+    return int(_STATM.read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss_growth(func: Callable[[], object], interval: float = 0.002) -> int:
+    """Return how far the RSS rose above its starting value while *func* ran."""
+    gc.collect()
+    start = _rss()
+    peak = start
+    done = threading.Event()
+
+    def sample() -> None:
+        nonlocal peak
+        while not done.wait(interval):
+            peak = max(peak, _rss())
+
+    sampler = threading.Thread(target=sample, name="rss_sampler", daemon=True)
+    sampler.start()
+    try:
+        func()
+    finally:
+        done.set()
+        sampler.join()
+    return max(peak, _rss()) - start
+
+
+@pytest.fixture(scope="module")
+def fixtures(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Callable[..., Path]]:
+    """Build (and reuse) generated WAVs; analyse a short one to warm up caches."""
+    root = tmp_path_factory.mktemp("memory")
+    made: dict[tuple[float, int, int], Path] = {}
+
+    def get(seconds: float, sr: int = 22050, channels: int = 1) -> Path:
+        key = (seconds, sr, channels)
+        if key not in made:
+            name = f"tone_{seconds:g}s_{sr}_{channels}ch.wav"
+            made[key] = _write_fixture(root / name, seconds, sr, channels)
+        return made[key]
+
+    # Imports, filter banks and FFT plans are one-off costs, not per file
+    _analyse(get(1.0))
+    _analyse(get(1.0, 44100, 2))
+    yield get
+
+
+@pytest.mark.parametrize(("seconds", "sr", "channels"), FIXTURES)
+def test_traced_peak_within_budget(
+    fixtures: Callable[..., Path], seconds: float, sr: int, channels: int
+) -> None:
+    path = fixtures(seconds, sr, channels)
+    peak = _traced_peak(lambda: _analyse(path))
+
+    budget = _budget(seconds, sr, channels) * TRACEMALLOC_MARGIN
+    assert peak <= budget, (
+        f"{seconds:g} s @ {sr} Hz x{channels}: peak {peak / MIB:.1f} MiB "
+        f"exceeds the budget of {budget / MIB:.1f} MiB"
+    )
+
+
+@pytest.mark.parametrize(("seconds", "sr", "channels"), FIXTURES)
+def test_estimate_covers_traced_peak(
+    fixtures: Callable[..., Path], seconds: float, sr: int, channels: int
+) -> None:
+    path = fixtures(seconds, sr, channels)
+    probe = probe_audio(str(path))
+    assert probe is not None
+    peak = _traced_peak(lambda: _analyse(path))
+
+    estimate = estimate_peak_bytes(probe)
+    assert estimate >= peak, (
+        f"{seconds:g} s @ {sr} Hz x{channels}: estimate {estimate / MIB:.1f} MiB "
+        f"is below the traced peak of {peak / MIB:.1f} MiB"
+    )
+
+
+def test_peak_grows_linearly(fixtures: Callable[..., Path]) -> None:
+    short = _traced_peak(lambda: _analyse(fixtures(15.0)))
+    long = _traced_peak(lambda: _analyse(fixtures(60.0)))
+    # Four times the audio may cost at most four times the memory (plus slack)
+    assert long <= 4 * short * TRACEMALLOC_MARGIN
+
+
+@pytest.mark.skipif(not _STATM.exists(), reason="needs /proc/self/statm")
+@pytest.mark.parametrize(("seconds", "sr", "channels"), [(60.0, 22050, 1), (30.0, 44100, 2)])
+def test_rss_growth_within_budget(
+    fixtures: Callable[..., Path], seconds: float, sr: int, channels: int
+) -> None:
+    path = fixtures(seconds, sr, channels)
+    growth = _rss_growth(lambda: _analyse(path))
+
+    budget = _budget(seconds, sr, channels) * RSS_MARGIN
+    assert growth <= budget, (
+        f"{seconds:g} s @ {sr} Hz x{channels}: RSS grew {growth / MIB:.1f} MiB, "
+        f"budget {budget / MIB:.1f} MiB"
+    )
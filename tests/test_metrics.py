@@ -0,0 +1,155 @@
+"""Tests for the metrics registry, its exporters and the instrumented stages."""
+
+from __future__ import annotations
+
+import math
+import os
+import stat
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import metrics
+from metrics import MetricsFileWriter, MetricsRegistry, MetricsServer
+from model.audio_file import AudioFile
+from model.feature_graph import FeatureGraph, FeatureRegistry
+from model.pcm_cache import PCMCache
+from model.pipeline import analyze_many
+
+SINE_WAV = Path(__file__).resolve().parent / "fixtures" / "sine_440.wav"
+
+
+class TestRegistry:
+    def test_prometheus_text(self) -> None:
+        reg = MetricsRegistry()
+        files = reg.counter("files_total", "Files.", ("status",))
+        files.inc(status="ok")
+        files.inc(2, status="error")
+        reg.gauge("depth", "Queue depth.").set(3)
+        seconds = reg.histogram("seconds", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            seconds.observe(value)
+
+        text = reg.render()
+        assert "# TYPE files_total counter" in text
+        assert 'files_total{status="error"} 2.0' in text
+        assert "depth 3.0" in text
+        assert 'seconds_bucket{le="0.1"} 1' in text
+        assert 'seconds_bucket{le="1.0"} 2' in text
+        assert 'seconds_bucket{le="+Inf"} 3' in text
+        assert "seconds_count 3" in text
+        assert seconds.total() == pytest.approx(5.55)
+
+    def test_metrics_are_shared_by_name(self) -> None:
+        reg = MetricsRegistry()
+        assert reg.counter("a", "A.") is reg.counter("a", "A.")
+        with pytest.raises(ValueError):
+            reg.gauge("a", "A.")
+        with pytest.raises(ValueError):
+            reg.counter("a", "A.").inc(-1)
+        with pytest.raises(ValueError):
+            reg.counter("b", "B.", ("cache",)).inc()
+
+    def test_label_values_are_escaped(self) -> None:
+        reg = MetricsRegistry()
+        reg.counter("c", "C.", ("path",)).inc(path='a "b"\\c')
+        assert 'c{path="a \\"b\\"\\\\c"} 1.0' in reg.render()
+
+    def test_snapshot_merge(self) -> None:
+        worker = MetricsRegistry()
+        worker.counter("files_total", "Files.", ("status",)).inc(status="ok")
+        worker.histogram("seconds", "Latency.", ("stage",)).observe(0.2, stage="stft")
+        worker.gauge("depth", "Queue depth.").set(7)
+
+        parent = MetricsRegistry()
+        parent.merge(worker.snapshot(reset=True))
+        parent.merge(worker.snapshot(reset=True))  # nothing new since the reset
+
+        assert parent.counter("files_total", "Files.", ("status",)).value(status="ok") == 1
+        assert parent.histogram("seconds", "Latency.", ("stage",)).count(stage="stft") == 1
+        assert "depth" not in parent.render()  # gauges stay per process
+
+    def test_call_with_metrics_ships_and_resets(self) -> None:
+        metrics.DECODE_SECONDS.observe(0.01)
+        before = metrics.DECODE_SECONDS.count()
+        result, shipped = metrics.call_with_metrics(max, 1, 2)
+
+        assert result == 2
+        assert metrics.DECODE_SECONDS.count() == 0
+        metrics.merge_worker_metrics(shipped)
+        assert metrics.DECODE_SECONDS.count() == before
+        if shipped["peak_rss"] is not None:
+            assert metrics.PEAK_RSS.value(process="worker") > 0
+
+    def test_peak_rss_is_collected(self) -> None:
+        text = metrics.registry().render()
+        if metrics.peak_rss_bytes() is not None:
+            assert 'tunescope_peak_rss_bytes{process="main"}' in text
+
+
+class TestExporters:
+    def test_http_endpoint(self) -> None:
+        reg = MetricsRegistry()
+        reg.counter("served_total", "Served.").inc()
+        server = MetricsServer(0, source=reg)
+        try:
+            host, port = server.address[:2]
+            with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as resp:
+                assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert "served_total 1.0" in resp.read().decode()
+        finally:
+            server.close()
+
+    def test_periodic_file(self, tmp_path: Path) -> None:
+        reg = MetricsRegistry()
+        counter = reg.counter("dumped_total", "Dumped.")
+        out = tmp_path / "metrics" / "tunescope.prom"
+        writer = MetricsFileWriter(out, interval=3600, source=reg)
+        counter.inc()
+        writer.close()
+
+        assert "dumped_total 1.0" in out.read_text()
+        assert [p.name for p in out.parent.iterdir()] == ["tunescope.prom"]
+        if os.name == "posix":  # readable by the exporter, not just the owner
+            assert stat.S_IMODE(out.stat().st_mode) == 0o644
+
+
+class TestInstrumentation:
+    def test_stage_times_exclude_dependencies(self) -> None:
+        features = FeatureRegistry()
+        features.feature("metrics_test_a", "x")(lambda x: x + 1)
+        features.feature("metrics_test_b", "metrics_test_a")(lambda a: a * 2)
+        before = metrics.STAGE_SECONDS.count(stage="metrics_test_a")
+
+        assert FeatureGraph(features, x=1)["metrics_test_b"] == 4
+        assert metrics.STAGE_SECONDS.count(stage="metrics_test_a") == before + 1
+        assert metrics.STAGE_SECONDS.count(stage="metrics_test_b") >= 1
+
+    def test_pcm_cache_hits_and_misses(self) -> None:
+        hits = metrics.CACHE_REQUESTS.value(cache="pcm", result="hit")
+        misses = metrics.CACHE_REQUESTS.value(cache="pcm", result="miss")
+        cache = PCMCache(10_000_000)
+
+        assert cache.get(str(SINE_WAV), None) is None
+        cache.put(str(SINE_WAV), None, np.zeros(10, dtype=np.float32), 22050)
+        assert cache.get(str(SINE_WAV), None) is not None
+        assert metrics.CACHE_REQUESTS.value(cache="pcm", result="miss") == misses + 1
+        assert metrics.CACHE_REQUESTS.value(cache="pcm", result="hit") == hits + 1
+
+    def test_decode_and_files(self, tmp_path: Path) -> None:
+        decodes = metrics.DECODE_SECONDS.count()
+        ok = metrics.FILES_ANALYSED.value(status="ok")
+        errors = metrics.FILES_ANALYSED.value(status="error")
+
+        assert AudioFile().load_audio(str(SINE_WAV), use_cache=False)
+        assert metrics.DECODE_SECONDS.count() == decodes + 1
+
+        paths = [str(SINE_WAV), str(tmp_path / "missing.wav")]
+        results = list(analyze_many(paths, features={"tempo"}, workers=1, decoders=0))
+        assert len(results) == 2
+        assert metrics.FILES_ANALYSED.value(status="ok") == ok + 1
+        assert metrics.FILES_ANALYSED.value(status="error") == errors + 1
+        assert metrics.QUEUE_DEPTH.value(queue="pipeline") == 0
+        assert not math.isnan(metrics.FILE_SECONDS.total())
@@ -0,0 +1,74 @@
+"""Tests for the chunked, multi-threaded STFT."""
+
+from __future__ import annotations
+
+import os
+import time
+
+import librosa
+import numpy as np
+import pytest
+
+from model.parallel_stft import stft_magnitude
+
+SR = 22050
+
+
+def _stft(y: np.ndarray) -> np.ndarray:
+    return np.abs(librosa.stft(y, n_fft=2048, hop_length=512, pad_mode="constant"))
+
+
+@pytest.fixture
+def stft_calls(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Record the length of every segment passed to ``librosa.stft``."""
+    calls: list[int] = []
+    stft = librosa.stft
+
+    def counting(y: np.ndarray, **kwargs: object) -> np.ndarray:
+        calls.append(len(y))
+        return stft(y, **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(librosa, "stft", counting)
+    return calls
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("extra", [0, 17, 511, 2047])
+def test_matches_single_librosa_call(dtype: type, extra: int, stft_calls: list[int]) -> None:
+    # 30 s is 1292 frames: four workers get chunks of 300 frames, above the minimum
+    y = np.random.default_rng(extra).standard_normal(SR * 30 + extra).astype(dtype)
+    expected = _stft(y)
+    stft_calls.clear()
+
+    result = stft_magnitude(y, n_fft=2048, hop_length=512, workers=4, chunk_frames=300)
+
+    assert len(stft_calls) == 5  # split into chunks, not the single-call fallback
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_short_signals_use_a_single_call(stft_calls: list[int]) -> None:
+    y = np.random.default_rng(0).standard_normal(4096).astype(np.float32)
+    expected = _stft(y)
+    stft_calls.clear()
+
+    np.testing.assert_array_equal(stft_magnitude(y, workers=4), expected)
+    assert stft_calls == [len(y)]
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="needs several cores")
+def test_latency_falls_with_the_core_count() -> None:
+    y = np.random.default_rng(0).standard_normal(SR * 180).astype(np.float32)
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, min(4, cores), cores})
+    latency = {}
+    for workers in counts:
+        stft_magnitude(y, workers=workers)  # warm up the pool
+        started = time.perf_counter()
+        for _ in range(3):
+            stft_magnitude(y, workers=workers)
+        latency[workers] = (time.perf_counter() - started) / 3
+    print("STFT of a 3-minute track:", {w: f"{t * 1000:.0f} ms" for w, t in latency.items()})
+
+    assert min(latency[w] for w in counts if w > 1) < 0.8 * latency[1]
@@ -0,0 +1,98 @@
+"""Tests for the decoded-PCM LRU cache."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+from model.audio_file import AudioFile
+from model.pcm_cache import PCMCache
+from model.pipeline import analyze_file, analyze_many
+from view import report
+
+SR = 22050
+
+
+@pytest.fixture
+def wavs(tmp_path: Path) -> list[str]:
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"tone{i}.wav"
+        sf.write(path, np.full(SR, 0.1 * (i + 1), dtype=np.float32), SR)
+        paths.append(str(path))
+    return paths
+
+
+class TestPCMCache:
+    def test_lru_within_the_byte_capacity(self, wavs: list[str]) -> None:
+        y = np.zeros(1000, dtype=np.float32)  # 4000 bytes each
+        cache = PCMCache(capacity=9000)
+        for path in wavs:
+            cache.put(path, None, y.copy(), SR)
+        assert cache.memory_bytes == 8000
+        assert cache.get(wavs[0], None) is None  # least recently used went first
+        assert cache.get(wavs[2], None) is not None
+        assert cache.get(wavs[1], 11025) is None  # other rate, other entry
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_modified_files_are_not_served_stale(self, wavs: list[str]) -> None:
+        cache = PCMCache(capacity=10**6)
+        cache.put(wavs[0], None, np.zeros(10, dtype=np.float32), SR)
+        stat = os.stat(wavs[0])
+        os.utime(wavs[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert cache.get(wavs[0], None) is None
+
+    def test_spills_evicted_signals_memory_mapped(self, wavs: list[str], tmp_path: Path) -> None:
+        cache = PCMCache(capacity=5000, spill_dir=tmp_path / "scratch")
+        arrays = [np.full(1000, i, dtype=np.float32) for i in range(3)]
+        for path, y in zip(wavs, arrays):
+            cache.put(path, None, y, SR)
+        assert cache.memory_bytes == 4000 and cache.spilled_bytes == 8000
+
+        y, sr, meter = cache.get(wavs[0], None)  # type: ignore[misc]
+        assert isinstance(y, np.memmap) and sr == SR and meter is None
+        np.testing.assert_array_equal(y, arrays[0])
+
+        scratch = next((tmp_path / "scratch").iterdir())
+        assert len(list(scratch.iterdir())) == 2
+        cache.clear()
+        assert not list(scratch.iterdir())
+
+    def test_trim_evicts_the_least_recently_used(self, wavs: list[str]) -> None:
+        cache = PCMCache(capacity=10**6)
+        for path in wavs:
+            cache.put(path, None, np.zeros(1000, dtype=np.float32), SR)
+        assert cache.trim(8500) == 8000
+        assert cache.get(wavs[0], None) is None and cache.get(wavs[2], None) is not None
+        assert cache.trim(0) == 0 and cache.memory_bytes == 0
+
+
+class TestAudioFileCache:
+    def test_reloading_skips_decoding(self, wavs: list[str], pcm_cache: PCMCache) -> None:
+        with patch("model.audio_file.librosa.load", wraps=librosa.load) as load:
+            first, second = AudioFile(), AudioFile()
+            assert first.load_audio(wavs[0], use_cache=True)
+            assert second.load_audio(wavs[0], use_cache=True)
+            assert load.call_count == 1
+            assert second.get_signal() is first.get_signal()
+            assert not second.get_signal().flags.writeable
+
+            assert AudioFile().load_audio(wavs[0], sr=11025, use_cache=True)
+            assert AudioFile().load_audio(wavs[0])
+            assert load.call_count == 3
+        assert pcm_cache.memory_bytes > 0
+
+    def test_headless_entry_points_leave_the_cache_alone(
+        self, wavs: list[str], pcm_cache: PCMCache, tmp_path: Path
+    ) -> None:
+        assert "error" not in analyze_file(wavs[0])
+        assert all("error" not in r for r in analyze_many(wavs[:2]))
+        record = report._render_track(0, wavs[0], str(tmp_path), "png", False, {})  # noqa: SLF001
+        assert "report" in record
+        assert pcm_cache.memory_bytes == 0 and pcm_cache.misses == 0
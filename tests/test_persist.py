@@ -0,0 +1,96 @@
+"""Tests for history persistence."""
+
+from __future__ import annotations
+
+import json
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+import persist
+from persist import HistoryWriter
+
+
+def _entry(i: int) -> dict:
+    return {"path": f"/music/{i}.wav", "tempo": 120.0 + i, "key": "A Menor", "y": [0.0]}
+
+
+def _read(path: Path) -> list[dict]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+class TestHistoryWriter:
+    def test_batches_entries_and_keeps_existing_history(self, tmp_path: Path) -> None:
+        path = tmp_path / "history.json"
+        path.write_text(json.dumps([{"path": "old.wav"}]), encoding="utf-8")
+        writer = HistoryWriter(path, interval=60.0)
+        for i in range(3):
+            writer.submit(_entry(i))
+        assert len(_read(path)) == 1  # nothing written yet
+
+        assert writer.flush(timeout=5)
+        history = _read(path)
+        assert [h["path"] for h in history] == [
+            "old.wav",
+            "/music/0.wav",
+            "/music/1.wav",
+            "/music/2.wav",
+        ]
+        assert "y" not in history[1]  # only scalars are persisted
+        writer.close()
+        assert [p.name for p in tmp_path.iterdir()] == ["history.json"]
+
+    @pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+    def test_rewrite_keeps_the_file_mode(self, tmp_path: Path) -> None:
+        path = tmp_path / "history.json"
+        path.write_text("[]", encoding="utf-8")
+        os.chmod(path, 0o644)
+        writer = HistoryWriter(path, interval=60.0)
+        writer.submit(_entry(0))
+        writer.close(timeout=5)
+        assert stat.S_IMODE(path.stat().st_mode) == 0o644
+
+    def test_threshold_and_close_flush_without_waiting(self, tmp_path: Path) -> None:
+        path = tmp_path / "history.json"
+        writer = HistoryWriter(path, interval=60.0, batch=2)
+        writer.submit(_entry(0))
+        writer.submit(_entry(1))
+        writer.submit(_entry(2))
+        writer.close(timeout=5)
+        assert len(_read(path)) == 3
+        with pytest.raises(RuntimeError):
+            writer.submit(_entry(3))
+
+    def test_failed_write_keeps_old_file_and_retries(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        path = tmp_path / "history.json"
+        writer = HistoryWriter(path, interval=60.0)
+        writer.submit(_entry(0))
+        assert writer.flush(timeout=5)
+
+        def fail(*_args: object) -> None:
+            raise OSError("disk full")
+
+        monkeypatch.setattr(os, "replace", fail)
+        writer.submit(_entry(1))
+        assert not writer.flush(timeout=5)
+        assert len(_read(path)) == 1
+        assert [p.name for p in tmp_path.iterdir()] == ["history.json"]
+
+        monkeypatch.undo()
+        assert writer.flush(timeout=5)
+        assert len(_read(path)) == 2
+        writer.close()
+
+
+def test_corrupt_file_is_moved_aside(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(persist, "_HISTORY_DIR", tmp_path)
+    monkeypatch.setattr(persist, "_HISTORY_FILE", tmp_path / "history.json")
+    (tmp_path / "history.json").write_text("[{truncated", encoding="utf-8")
+
+    persist.save_entry(_entry(0))
+    assert len(persist.load_history()) == 1
+    assert (tmp_path / "history.json.corrupt").read_text(encoding="utf-8") == "[{truncated"
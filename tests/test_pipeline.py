@@ -0,0 +1,158 @@
+"""Tests for the generator API that streams many tracks through the model."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from model import pipeline
+from model.pipeline import analyze_many
+
+SINE_WAV = Path(__file__).resolve().parent / "fixtures" / "sine_440.wav"
+
+
+class TestAnalyzeMany:
+    def test_yields_features_for_every_path(self, tmp_path: Path) -> None:
+        missing = str(tmp_path / "missing.wav")
+        results = list(analyze_many([str(SINE_WAV), missing], workers=2, ordered=True))
+
+        assert [r["path"] for r in results] == [str(SINE_WAV), missing]
+        assert results[0]["key"].startswith("A ")
+        assert {"tempo", "timbre", "loudness", "elapsed"} <= set(results[0])
+        assert "D" not in results[0]
+        assert "error" in results[1]
+
+    def test_requested_features_only(self) -> None:
+        (result,) = analyze_many([str(SINE_WAV)], features={"chroma"})
+        assert result["chroma"].shape[0] == 12
+        assert "tempo" not in result
+
+    def test_invalid_arguments_raise(self) -> None:
+        with pytest.raises(ValueError):
+            next(analyze_many([str(SINE_WAV)], features={"bogus"}))
+        with pytest.raises(ValueError):
+            next(analyze_many([str(SINE_WAV)], options={"tempo_mode": "turbo"}))
+
+
+class _SlowStages:
+    """Stands in for decoding and analysis; later paths analyse faster."""
+
+    def __init__(self, decode_s: float = 0.0) -> None:
+        self.decoded: list[str] = []
+        self._decode_s = decode_s
+        self._lock = threading.Lock()
+
+    def decode(self, path: str, _sr: Any) -> str:
+        time.sleep(self._decode_s)
+        with self._lock:
+            self.decoded.append(path)
+        return path
+
+    def extract(
+        self, path: str, _audio: Any, _features: Any, _options: Any, _started: float
+    ) -> dict[str, Any]:
+        time.sleep(0.05 * (3 - int(path) % 3))
+        return {"path": path}
+
+
+class TestScheduling:
+    @pytest.fixture
+    def stages(self, monkeypatch: pytest.MonkeyPatch) -> _SlowStages:
+        stages = _SlowStages()
+        monkeypatch.setattr(pipeline, "_decode", stages.decode)
+        monkeypatch.setattr(pipeline, "_extract", stages.extract)
+        return stages
+
+    def test_input_and_completion_order(self, stages: _SlowStages) -> None:
+        paths = [str(i) for i in range(6)]
+        ordered = [r["path"] for r in analyze_many(paths, workers=3, ordered=True)]
+        assert ordered == paths
+
+        completed = [r["path"] for r in analyze_many(paths, workers=3)]
+        assert sorted(completed) == paths
+        assert completed != paths
+        assert len(stages.decoded) == 12
+
+    def test_paths_are_consumed_lazily_within_the_bound(
+        self, stages: _SlowStages, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        submitted: list[str] = []
+        submit = pipeline._submit_track  # noqa: SLF001
+
+        def counting_submit(path: str, *args: Any) -> Any:
+            submitted.append(path)
+            return submit(path, *args)
+
+        monkeypatch.setattr(pipeline, "_submit_track", counting_submit)
+        endless = (str(i) for i in itertools.count())
+        results = analyze_many(endless, workers=2, prefetch=1)
+        first = [next(results)["path"] for _ in range(4)]
+        results.close()
+
+        assert len(first) == 4
+        # Four yielded, each refilled once, plus the initial window
+        assert len(submitted) <= 4 + 3
+        assert len(stages.decoded) <= len(submitted)
+
+    def test_clock_starts_when_decoding_starts(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        decoded_at: dict[str, float] = {}
+        started_at: dict[str, float] = {}
+
+        def decode(path: str, _sr: Any) -> str:
+            time.sleep(0.05)
+            decoded_at[path] = time.perf_counter()
+            return path
+
+        def extract(
+            path: str, _audio: Any, _features: Any, _options: Any, started: float
+        ) -> dict[str, Any]:
+            started_at[path] = started
+            return {"path": path}
+
+        monkeypatch.setattr(pipeline, "_decode", decode)
+        monkeypatch.setattr(pipeline, "_extract", extract)
+        list(analyze_many(["0", "1"], workers=1, decoders=1))
+        # One decoding thread: the second file waited for the first, off the clock
+        assert started_at["1"] >= decoded_at["0"]
+
+    @pytest.mark.parametrize(("decoders", "overlaps"), [(1, 7), (0, 0)])
+    def test_decoding_overlaps_analysis(
+        self, monkeypatch: pytest.MonkeyPatch, decoders: int, overlaps: int
+    ) -> None:
+        stages = _HandshakeStages(8, timeout=5.0 if decoders else 0.01)
+        monkeypatch.setattr(pipeline, "_decode", stages.decode)
+        monkeypatch.setattr(pipeline, "_extract", stages.extract)
+        paths = [str(i) for i in range(8)]
+
+        assert len(list(analyze_many(paths, workers=1, decoders=decoders))) == len(paths)
+        assert stages.overlaps == overlaps
+
+
+class _HandshakeStages:
+    """Analysing file *i* waits (up to *timeout*) for file *i + 1* to be decoded.
+
+    The wait succeeds only when decoding runs alongside the analysis;
+    :attr:`overlaps` counts the analyses that saw it happen.
+    """
+
+    def __init__(self, count: int, timeout: float) -> None:
+        self._decoding = [threading.Event() for _ in range(count)]
+        self._timeout = timeout
+        self.overlaps = 0
+
+    def decode(self, path: str, _sr: Any) -> str:
+        self._decoding[int(path)].set()
+        return path
+
+    def extract(
+        self, path: str, _audio: Any, _features: Any, _options: Any, _started: float
+    ) -> dict[str, Any]:
+        following = int(path) + 1
+        if following < len(self._decoding) and self._decoding[following].wait(self._timeout):
+            self.overlaps += 1
+        return {"path": path}
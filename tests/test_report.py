@@ -0,0 +1,144 @@
+"""Tests for headless (Agg) report rendering."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import matplotlib.image
+import numpy as np
+import pytest
+
+from config import SHEET_CELL_PX
+from model.audio_file import AudioFile
+from model.feature_extractor import FeatureExtractor
+from view.plots import decimate_frames
+from view.report import _render_track, render_report, render_reports
+
+SINE_WAV = Path(__file__).resolve().parent / "fixtures" / "sine_440.wav"
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def _features() -> dict:
+    rng = np.random.default_rng(0)
+    return {
+        "path": "/music/song.wav",
+        "tempo": 128.0,
+        "key": "A Menor",
+        "sr": 22050,
+        "hop_length": 512,
+        "y": rng.standard_normal(22050 * 3).astype(np.float32) * 0.1,
+        "D": rng.uniform(-80.0, 0.0, (1025, 130)).astype(np.float32),
+        "chroma": rng.uniform(0.0, 1.0, (12, 130)).astype(np.float32),
+    }
+
+
+def _render_or_die(index: int, path: str, *args: object) -> dict:
+    """Worker job that kills its process on files named ``crash``."""
+    if Path(path).stem == "crash":
+        os._exit(1)
+    return _render_track(index, path, *args)  # type: ignore[arg-type]
+
+
+class TestRendering:
+    def test_decimation_keeps_peaks_and_time_axis(self) -> None:
+        values = np.arange(10.0)[None, :]
+        pooled, hop = decimate_frames(values, 512, max_frames=4)
+        assert pooled.tolist() == [[2.0, 5.0, 8.0, 9.0]]
+        assert hop == 512 * 3
+        assert decimate_frames(values, 512, None)[0] is values
+
+    @pytest.mark.parametrize("suffix", ["png", "svg"])
+    def test_report_files(self, tmp_path: Path, suffix: str) -> None:
+        out = render_report(_features(), tmp_path / f"song.{suffix}")
+        head = out.read_bytes()[:200]
+        assert head.startswith(b"\x89PNG") if suffix == "png" else b"<svg" in head
+
+        archived = {**_features(), "chroma": None, "y_sr": 8000}
+        assert render_report(archived, tmp_path / f"archived.{suffix}").is_file()
+
+    def test_no_qt_is_imported(self) -> None:
+        code = (
+            "import json, sys, view.report; "
+            "print(json.dumps(sorted(m for m in sys.modules if m.startswith('PySide6'))))"
+        )
+        done = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=SRC,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert json.loads(done.stdout.splitlines()[-1]) == []
+
+
+class TestBatch:
+    def test_reports_and_contact_sheet(self, tmp_path: Path) -> None:
+        missing = str(tmp_path / "missing.wav")
+        sheet = tmp_path / "sheet.png"
+        records = list(
+            render_reports([str(SINE_WAV), missing], tmp_path / "out", sheet=sheet, workers=0)
+        )
+
+        assert [r["path"] for r in records] == [str(SINE_WAV), missing]
+        assert records[0]["key"].startswith("A ")
+        assert Path(records[0]["report"]).name == "0000_sine_440.png"
+        assert "error" in records[1] and "report" not in records[1]
+        json.dumps(records)  # small, serialisable records only
+
+        width, height = SHEET_CELL_PX
+        assert matplotlib.image.imread(sheet).shape[:2] == (height, 2 * width)
+
+    def test_worker_processes(self, tmp_path: Path) -> None:
+        (record,) = render_reports([str(SINE_WAV)], tmp_path, fmt="svg", workers=1)
+        assert record["report"].endswith(".svg") and Path(record["report"]).is_file()
+
+    def test_failing_file_becomes_an_error_record(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        def extract(self: FeatureExtractor, audio: AudioFile, **kwargs: object) -> dict:
+            if audio.get_path() == str(SINE_WAV):
+                raise RuntimeError("boom")
+            return real(self, audio, **kwargs)
+
+        real = FeatureExtractor.extract_all_features
+        monkeypatch.setattr(FeatureExtractor, "extract_all_features", extract)
+        copy = tmp_path / "copy.wav"
+        copy.write_bytes(SINE_WAV.read_bytes())
+        failed, rendered = render_reports([str(SINE_WAV), str(copy)], tmp_path, workers=0)
+
+        assert failed["path"] == str(SINE_WAV) and "boom" in failed["error"]
+        assert "report" not in failed and Path(rendered["report"]).is_file()
+
+    def test_lost_worker_result_becomes_an_error_record(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # A local function cannot be pickled, so the job fails in the pool
+        monkeypatch.setattr("view.report._render_track", lambda *_: {})
+        (record,) = render_reports([str(SINE_WAV)], tmp_path, workers=1)
+        assert record["path"] == str(SINE_WAV) and "error" in record
+
+    def test_dead_worker_fails_its_files_and_the_rest_still_render(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr("view.report._render_track", _render_or_die)
+        paths = []
+        for name in ("crash", "queued", "later", "last"):
+            path = tmp_path / f"{name}.wav"
+            path.write_bytes(SINE_WAV.read_bytes())
+            paths.append(str(path))
+
+        # One worker: "queued" is in flight when the worker dies with "crash"
+        records = {r["path"]: r for r in render_reports(paths, tmp_path / "out", workers=1)}
+
+        assert set(records) == set(paths)
+        assert "error" in records[paths[0]] and "error" in records[paths[1]]
+        for path in paths[2:]:
+            assert Path(records[path]["report"]).is_file()
+
+    def test_invalid_format(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError):
+            next(render_reports([str(SINE_WAV)], tmp_path, fmt="jpeg"))
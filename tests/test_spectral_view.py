@@ -0,0 +1,71 @@
+"""Tests for re-rendering results from the cached magnitude STFT."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from config import DEFAULT_FEATURES
+from model.audio_file import AudioFile
+from model.feature_archive import FeatureArchive
+from model.feature_extractor import FeatureExtractor
+from model.spectral_view import compact_magnitude
+
+SR = 22050
+
+
+@pytest.fixture
+def analysed(sine_wav: np.ndarray) -> dict:
+    audio = AudioFile()
+    audio._y, audio._sr, audio._path = sine_wav, SR, "mem"  # noqa: SLF001
+    return FeatureExtractor().extract_all_features(audio, features=DEFAULT_FEATURES | {"stft"})
+
+
+class TestRedisplay:
+    def test_defaults_reproduce_the_analysis(self, analysed: dict) -> None:
+        assert analysed["stft"].dtype == np.float16
+        assert analysed["stft"].shape == analysed["D"].shape
+
+        redrawn = FeatureExtractor().redisplay(analysed)
+        np.testing.assert_allclose(redrawn["D"], analysed["D"], atol=0.01)
+        np.testing.assert_allclose(redrawn["chroma"], analysed["chroma"], atol=1e-3)
+        assert redrawn["key"] == analysed["key"]
+
+    def test_display_settings_change_only_the_views(self, analysed: dict) -> None:
+        with patch("model.feature_extractor.stft_magnitude") as stft:
+            redrawn = FeatureExtractor().redisplay(
+                analysed, ref=1.0, top_db=None, chroma_norm=None, freq_scale="linear"
+            )
+        stft.assert_not_called()
+        assert redrawn["D"].max() > 0.0  # absolute reference, no longer peak-relative
+        assert np.ptp(redrawn["D"]) > 80.0
+        assert redrawn["chroma"].max() > 1.0
+        assert redrawn["freq_scale"] == "linear"
+        assert redrawn["tempo"] == analysed["tempo"]
+        assert np.ptp(analysed["D"]) == pytest.approx(80.0)  # original left untouched
+
+    def test_invalid_requests(self, analysed: dict) -> None:
+        extractor = FeatureExtractor()
+        assert "error" in extractor.redisplay(analysed, freq_scale="mel")
+        assert "error" in extractor.redisplay({k: v for k, v in analysed.items() if k != "stft"})
+
+    def test_archived_results_can_be_redisplayed(self, analysed: dict, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path)
+        restored = archive.load(archive.save(analysed) or "")
+        assert restored is not None
+        assert isinstance(restored["stft"], np.memmap)
+        assert restored["tuning"] == analysed["tuning"]
+
+        redrawn = FeatureExtractor().redisplay(restored, top_db=60.0)
+        assert np.ptp(redrawn["D"]) == pytest.approx(60.0)
+        assert redrawn["key"] == analysed["key"]
+
+        unarchived = FeatureArchive(tmp_path / "small", keep_stft=False)
+        assert unarchived.load(unarchived.save(analysed) or "")["stft"] is None  # type: ignore[index]
+
+    def test_compact_magnitude_saturates(self) -> None:
+        mag = np.array([0.5, 1e6], dtype=np.float32)
+        assert np.isfinite(compact_magnitude(mag)).all()
@@ -0,0 +1,88 @@
+"""Tests for live stream analysis — ring buffers and rolling updates."""
+
+from __future__ import annotations
+
+import io
+
+import numpy as np
+import pytest
+
+from model.stream_analyzer import RingBuffer, StreamAnalyzer, analyze_stream
+
+SR = 22050
+
+
+def _a_minor_with_clicks(seconds: float, bpm: float = 120.0) -> np.ndarray:
+    """A-minor triad plus a noise click on every beat."""
+    t = np.arange(int(seconds * SR)) / SR
+    y = sum(0.2 * np.sin(2 * np.pi * f * t) for f in (440.0, 523.25, 659.25))
+    rng = np.random.default_rng(0)
+    for beat in np.arange(0.0, seconds, 60.0 / bpm):
+        i = int(beat * SR)
+        y[i : i + 200] += rng.standard_normal(len(y[i : i + 200])) * 0.8
+    return (y / 2).astype(np.float32)
+
+
+class TestRingBuffer:
+    def test_keeps_most_recent_rows_in_order(self) -> None:
+        ring = RingBuffer(4)
+        ring.extend(np.arange(3, dtype=np.float32))
+        ring.extend(np.arange(3, 6, dtype=np.float32))
+        assert len(ring) == 4
+        assert ring.values().tolist() == [2, 3, 4, 5]
+
+    def test_oversized_extend_keeps_tail(self) -> None:
+        ring = RingBuffer(3, width=2)
+        ring.extend(np.arange(20, dtype=np.float32).reshape(10, 2))
+        assert ring.values()[:, 0].tolist() == [14, 16, 18]
+
+    def test_unordered_has_same_rows(self) -> None:
+        ring = RingBuffer(5)
+        ring.extend(np.arange(8, dtype=np.float32))
+        assert sorted(ring.unordered().tolist()) == ring.values().tolist()
+
+
+class TestStreamAnalyzer:
+    def test_updates_follow_the_configured_interval(self) -> None:
+        analyzer = StreamAnalyzer(SR, window_seconds=6.0, update_seconds=2.0)
+        signal = _a_minor_with_clicks(10.0)
+        updates = []
+        for start in range(0, len(signal), 1000):  # odd block size on purpose
+            updates.extend(analyzer.push(signal[start : start + 1000]))
+
+        assert len(updates) == 4
+        times = [u["time"] for u in updates]
+        assert np.diff(times) == pytest.approx([2.0] * 3, abs=0.05)
+        # The rolling window never grows beyond its configured length
+        assert updates[-1]["window"] == pytest.approx(6.0, abs=0.05)
+
+    def test_detects_key_and_tempo(self) -> None:
+        analyzer = StreamAnalyzer(SR, window_seconds=8.0, update_seconds=4.0)
+        updates = analyzer.push(_a_minor_with_clicks(12.0))
+        last = updates[-1]
+        assert last["key"] == "A Menor"
+        assert last["tempo"] == pytest.approx(120.0, rel=0.05)
+        assert len(last["chroma"]) == 12
+
+    def test_memory_is_constant_over_long_runs(self) -> None:
+        analyzer = StreamAnalyzer(SR, window_seconds=4.0, update_seconds=1.0)
+        block = _a_minor_with_clicks(1.0)
+        for _ in range(5):
+            analyzer.push(block)
+        sizes = (analyzer._chroma._data.nbytes, analyzer._onset._data.nbytes)  # noqa: SLF001
+        for _ in range(30):
+            analyzer.push(block)
+        assert (analyzer._chroma._data.nbytes, analyzer._onset._data.nbytes) == sizes  # noqa: SLF001
+        assert len(analyzer._tail) < analyzer.n_fft  # noqa: SLF001
+        assert analyzer.seconds_processed > 34.0
+
+
+def test_analyze_stream_decodes_interleaved_pcm() -> None:
+    mono = _a_minor_with_clicks(6.0)
+    stereo = np.repeat(mono, 2)  # L/R interleaved, identical channels
+    raw = io.BytesIO((stereo * 32767).astype("<i2").tobytes())
+
+    updates = list(analyze_stream(raw, SR, fmt="s16le", channels=2, update_seconds=3.0))
+
+    assert len(updates) == 1
+    assert updates[0]["key"] == "A Menor"
@@ -0,0 +1,128 @@
+"""Tests for the accurate and fast tempo estimators."""
+
+from __future__ import annotations
+
+import time
+import warnings
+
+import numpy as np
+import pytest
+
+from model.audio_file import AudioFile
+from model.feature_extractor import FeatureExtractor
+from model.pipeline import validate_options
+from model.tempo import estimate_tempo, tempo_candidates
+
+SR = 22050
+
+TEMPI_44100 = (72.0, 80.0, 90.0, 100.0, 110.0, 120.0, 128.0, 140.0, 150.0, 160.0, 170.0, 174.0)
+
+
+def _drum_loop(bpm: float, seconds: float = 20.0, sr: int = SR) -> np.ndarray:
+    """Kick on every beat, hi-hat on every off-beat, light noise floor."""
+    rng = np.random.default_rng(int(bpm))
+    y = rng.standard_normal(int(seconds * sr)).astype(np.float32) * 0.01
+    t = np.arange(int(0.05 * sr)) / sr
+    kick = np.sin(2 * np.pi * 60 * t) * np.exp(-t * 40)
+    hat = rng.standard_normal(len(t)) * np.exp(-t * 120) * 0.3
+    beat = 60.0 / bpm * sr
+    for i in range(int(len(y) / beat) - 1):
+        y[int(i * beat) : int(i * beat) + len(t)] += kick
+        y[int((i + 0.5) * beat) : int((i + 0.5) * beat) + len(t)] += hat
+    return y
+
+
+def _audio(y: np.ndarray, sr: int = SR) -> AudioFile:
+    audio = AudioFile()
+    audio._y, audio._sr, audio._path = y, sr, "mem"  # noqa: SLF001
+    return audio
+
+
+@pytest.fixture(scope="module")
+def onsets() -> dict[float, np.ndarray]:
+    extractor = FeatureExtractor()
+    return {
+        bpm: extractor.feature_graph(_audio(_drum_loop(bpm)))["onset"]  # type: ignore[index]
+        for bpm in (72.0, 100.0, 128.0, 150.0, 174.0)
+    }
+
+
+class TestFastTempo:
+    def test_accuracy_matches_the_accurate_path(self, onsets: dict[float, np.ndarray]) -> None:
+        fast_err, accurate_err = [], []
+        for bpm, onset in onsets.items():
+            candidates = tempo_candidates(onset, SR)
+            assert sum(c for _, c in candidates) == pytest.approx(1.0)
+            fast_err.append(abs(candidates[0][0] - bpm) / bpm)
+            accurate = estimate_tempo(onset_envelope=onset, sr=SR, hop_length=512)
+            accurate_err.append(abs(accurate - bpm) / bpm)
+
+        assert max(fast_err) < 0.02
+        assert np.mean(fast_err) <= np.mean(accurate_err) + 0.01
+
+    @pytest.mark.benchmark
+    def test_is_much_faster(self, onsets: dict[float, np.ndarray]) -> None:
+        onset = onsets[128.0]
+        started = time.perf_counter()
+        for _ in range(5):
+            estimate_tempo(onset_envelope=onset, sr=SR, hop_length=512)
+        accurate = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(5):
+            tempo_candidates(onset, SR)
+        fast = time.perf_counter() - started
+        assert fast * 10 < accurate
+
+    def test_prior_and_range_are_configurable(self, onsets: dict[float, np.ndarray]) -> None:
+        onset = onsets[150.0]
+        # Restricting the range to the half tempo forces that octave
+        (bpm, _), *_ = tempo_candidates(onset, SR, bpm_range=(60.0, 100.0))
+        assert bpm == pytest.approx(75.0, rel=0.02)
+        assert tempo_candidates(np.zeros(500), SR) == []
+
+    def test_downsamples_high_rate_envelopes(self) -> None:
+        onset = FeatureExtractor().feature_graph(_audio(_drum_loop(128.0, sr=44100), 44100))
+        assert onset is not None
+        (bpm, _), *_ = tempo_candidates(onset["onset"], 44100)
+        assert bpm == pytest.approx(128.0, rel=0.02)
+
+    def test_accuracy_at_44100(self) -> None:
+        extractor = FeatureExtractor()
+        fast_err, accurate_err = [], []
+        for bpm in TEMPI_44100:
+            graph = extractor.feature_graph(_audio(_drum_loop(bpm, 30.0, 44100), 44100))
+            assert graph is not None
+            candidates = tempo_candidates(graph["onset"], 44100)
+            fast_err.append(abs(candidates[0][0] - bpm) / bpm)
+            accurate = estimate_tempo(onset_envelope=graph["onset"], sr=44100, hop_length=512)
+            accurate_err.append(abs(accurate - bpm) / bpm)
+
+        # Same tolerance as at 22.05 kHz: no octave errors
+        assert max(fast_err) < 0.02
+        assert np.mean(fast_err) <= np.mean(accurate_err) + 0.01
+
+
+class TestTempoModes:
+    def test_extractor_reports_candidates_in_fast_mode(self) -> None:
+        audio = _audio(_drum_loop(128.0, seconds=10.0))
+        extractor = FeatureExtractor()
+        fast = extractor.extract_all_features(audio, features={"tempo"}, tempo_mode="fast")
+        assert fast["tempo"] == pytest.approx(128.0, rel=0.02)
+        assert fast["tempo_candidates"][0][0] == fast["tempo"]
+        # Fast tempi are not cached in place of the accurate one
+        assert "tempo" not in audio.get_features_cache()
+
+        accurate = extractor.extract_all_features(audio, features={"tempo"})
+        assert "tempo_candidates" not in accurate
+        assert "error" in extractor.extract_all_features(audio, tempo_mode="bogus")
+
+    def test_accurate_path_uses_the_current_librosa_api(self) -> None:
+        onset = np.abs(np.random.default_rng(0).standard_normal(2000))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", FutureWarning)
+            estimate_tempo(onset_envelope=onset, sr=SR, hop_length=512)
+
+    def test_pipeline_option(self) -> None:
+        assert validate_options({"tempo_mode": "fast"}) is None
+        assert validate_options({"tempo_mode": "turbo"}) is not None
@@ -0,0 +1,198 @@
+"""Tests for history thumbnails: rendering, on-disk cache and lazy loading."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PySide6.QtCore import QCoreApplication, Qt
+
+from config import THUMBNAIL_PX
+from controller.thumbnail_loader import ThumbnailLoader
+from model.feature_archive import FeatureArchive
+from model.history_store import HistoryStore
+from model.thumbnail_cache import ThumbnailCache, thumbnail_key
+from view.history_model import HistoryFilterModel, HistoryListModel
+from view.thumbnails import render_thumbnail
+
+
+def _features() -> dict:
+    rng = np.random.default_rng(0)
+    return {
+        "path": "/music/song.wav",
+        "tempo": 128.0,
+        "key": "A Menor",
+        "sr": 22050,
+        "hop_length": 512,
+        "y": rng.standard_normal(22050 * 3).astype(np.float32) * 0.1,
+        "D": rng.uniform(-80.0, 0.0, (1025, 130)).astype(np.float32),
+        "chroma": rng.uniform(0.0, 1.0, (12, 130)).astype(np.float32),
+    }
+
+
+def _settle(loader: ThumbnailLoader) -> None:
+    """Let queued jobs finish and deliver their results."""
+    assert loader.wait_for_done(5000)
+    QCoreApplication.processEvents()
+
+
+class TestThumbnailCache:
+    def test_keys(self) -> None:
+        assert thumbnail_key({"archive": "abc", "path": "/a.wav"}) == "abc"
+        assert thumbnail_key({"tempo": 120.0}) is None
+
+        first = thumbnail_key({"path": "/a.wav", "tempo": 120.0, "key": "C Mayor"})
+        assert first == thumbnail_key({"file": "/a.wav", "tempo": 120.0, "key": "C Mayor"})
+        assert first != thumbnail_key({"path": "/a.wav", "tempo": 121.0, "key": "C Mayor"})
+        assert first != thumbnail_key({"path": "/a.wav", "fingerprint": "AAAA"})
+
+    def test_round_trip(self, tmp_path: Path) -> None:
+        cache = ThumbnailCache(tmp_path / "thumbs")
+        image = np.arange(2 * 3 * 4, dtype=np.uint8).reshape(2, 3, 4)
+
+        assert cache.get("k") is None
+        assert cache.put("k", image)
+        np.testing.assert_array_equal(cache.get("k"), image)
+        assert [p.name for p in cache.root.iterdir()] == ["k.npy"]  # no temporaries left
+
+        cache.remove("k")
+        cache.remove("k")
+        assert cache.get("k") is None
+
+    def test_unexpected_files_are_ignored(self, tmp_path: Path) -> None:
+        cache = ThumbnailCache(tmp_path)
+        np.save(tmp_path / "gray.npy", np.zeros((2, 3), dtype=np.uint8))
+        (tmp_path / "broken.npy").write_bytes(b"not numpy")
+        assert cache.get("gray") is None
+        assert cache.get("broken") is None
+
+    def test_prune_keeps_referenced_thumbnails(self, tmp_path: Path) -> None:
+        cache = ThumbnailCache(tmp_path)
+        image = np.zeros((2, 3, 4), dtype=np.uint8)
+        for key in ("kept", "orphan"):
+            cache.put(key, image)
+        (tmp_path / ".tmp-write.npy").write_bytes(b"")
+
+        assert cache.prune(["kept", "never-rendered"]) == 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == [".tmp-write.npy", "kept.npy"]
+        assert ThumbnailCache(tmp_path / "missing").prune([]) == 0
+
+
+class TestRendering:
+    def test_shape_and_layout(self) -> None:
+        image = render_thumbnail(_features())
+        width, height = THUMBNAIL_PX
+
+        assert image is not None
+        assert image.shape == (height, width, 4) and image.dtype == np.uint8
+        # Opaque spectrogram on top, waveform on a transparent background below
+        assert (image[0, :, 3] == 255).all()
+        assert (image[-1, :, 3] == 0).any()
+
+    def test_without_waveform_or_spectrogram(self) -> None:
+        features = {**_features(), "y": None}
+        image = render_thumbnail(features, size=(40, 10))
+        assert image is not None and (image[..., 3] == 255).all()
+
+        assert render_thumbnail({"tempo": 120.0}) is None
+
+
+@pytest.mark.usefixtures("qapp")
+class TestLoader:
+    def test_new_result_is_rendered_cached_and_shown(self, tmp_path: Path) -> None:
+        cache = ThumbnailCache(tmp_path)
+        loader = ThumbnailLoader(cache)
+        model = HistoryListModel(HistoryStore())
+        model.set_thumbnails(loader)
+        changed: list[int] = []
+        model.dataChanged.connect(lambda first, _last, _roles: changed.append(first.row()))
+
+        features = _features()
+        record = {"path": features["path"], "tempo": 128.0, "key": "A Menor"}
+        model.append(record)
+        assert model.data(model.index(0), Qt.ItemDataRole.DecorationRole) is None
+
+        loader.add(record, features)
+        _settle(loader)
+
+        key = thumbnail_key(record)
+        assert key is not None and cache.get(key) is not None
+        assert changed == [0]
+        image = model.data(model.index(0), Qt.ItemDataRole.DecorationRole)
+        assert (image.width(), image.height()) == THUMBNAIL_PX
+
+    def test_cached_and_archived_thumbnails_load_lazily(self, tmp_path: Path) -> None:
+        archive = FeatureArchive(tmp_path / "archive")
+        archive_id = archive.save(_features())
+        assert archive_id
+        cache = ThumbnailCache(tmp_path / "thumbs")
+        cached = {"path": "/music/cached.wav", "tempo": 90.0, "key": "C Mayor"}
+        cache.put(str(thumbnail_key(cached)), render_thumbnail(_features()))
+        records = [
+            cached,
+            {"path": "/music/archived.wav", "archive": archive_id},
+            {"path": "/music/unknown.wav", "tempo": 100.0},
+        ]
+        store = HistoryStore()
+        store.extend(records, persisted=True)
+        loader = ThumbnailLoader(cache, archive)
+        model = HistoryFilterModel(store)
+        model.set_thumbnails(loader)
+        model.append_rows([0, 1, 2])
+
+        for row in range(3):
+            assert model.data(model.index(row), Qt.ItemDataRole.DecorationRole) is None
+        _settle(loader)
+
+        icons = [model.data(model.index(row), Qt.ItemDataRole.DecorationRole) for row in range(3)]
+        assert icons[0] is not None and icons[1] is not None and icons[2] is None
+        assert cache.get(archive_id) is not None  # rendered once, then cached
+        # Known misses are not retried
+        assert model.data(model.index(2), Qt.ItemDataRole.DecorationRole) is None
+        assert loader.wait_for_done(0)
+
+    def test_duplicate_records_all_get_the_icon(self, tmp_path: Path) -> None:
+        loader = ThumbnailLoader(ThumbnailCache(tmp_path))
+        model = HistoryListModel(HistoryStore())
+        model.set_thumbnails(loader)
+        changed: list[int] = []
+        model.dataChanged.connect(lambda first, _last, _roles: changed.append(first.row()))
+
+        features = _features()
+        record = {"path": features["path"], "tempo": 128.0, "key": "A Menor"}
+        model.append(record)
+        model.append(dict(record))  # the same file analysed twice
+        assert model.data(model.index(0), Qt.ItemDataRole.DecorationRole) is None
+        assert model.data(model.index(1), Qt.ItemDataRole.DecorationRole) is None
+
+        loader.add(record, features)
+        _settle(loader)
+        assert changed == [0, 1]
+        for row in range(2):
+            assert model.data(model.index(row), Qt.ItemDataRole.DecorationRole) is not None
+
+    def test_prune_by_records(self, tmp_path: Path) -> None:
+        cache = ThumbnailCache(tmp_path)
+        loader = ThumbnailLoader(cache)
+        records = [{"path": f"/music/{i}.wav", "tempo": float(i)} for i in range(2)]
+        for record in records:
+            loader.add(record, _features())
+        _settle(loader)
+
+        assert loader.prune(records[1:] + [{"tempo": 1.0}]) == 1
+        assert cache.get(str(thumbnail_key(records[0]))) is None
+        assert cache.get(str(thumbnail_key(records[1]))) is not None
+
+    def test_memory_is_bounded(self, tmp_path: Path) -> None:
+        cache = ThumbnailCache(tmp_path)
+        loader = ThumbnailLoader(cache, capacity=1)
+        records = [{"path": f"/music/{i}.wav", "tempo": float(i)} for i in range(2)]
+        for record in records:
+            loader.add(record, _features())
+        _settle(loader)
+
+        assert loader.thumbnail(records[1]) is not None
+        assert loader.thumbnail(records[0]) is None  # evicted, reloading from disk
+        _settle(loader)
+        assert loader.thumbnail(records[0]) is not None
@@ -0,0 +1,90 @@
+"""Tests for the timbre descriptors computed from the shared spectrogram."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import librosa
+import numpy as np
+import pytest
+
+from model.audio_file import AudioFile
+from model.feature_archive import FeatureArchive
+from model.feature_extractor import FeatureExtractor
+from model.playlist_analyzer import SingleTrackResult
+from model.timbre import mel_filter_bank
+
+SR = 22050
+
+
+@pytest.fixture
+def noisy_tone() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    tone = librosa.tone(440, sr=SR, duration=3.0)
+    return (tone + 0.1 * rng.standard_normal(len(tone))).astype(np.float32)
+
+
+def _audio(y: np.ndarray) -> AudioFile:
+    audio = AudioFile()
+    audio._y, audio._sr, audio._path = y, SR, "/music/tone.wav"  # noqa: SLF001
+    return audio
+
+
+class TestDescriptors:
+    def test_match_the_signal_based_librosa_features(self, noisy_tone: np.ndarray) -> None:
+        graph = FeatureExtractor().feature_graph(_audio(noisy_tone))
+        assert graph is not None
+        y = noisy_tone
+        np.testing.assert_allclose(
+            graph["mfcc"], librosa.feature.mfcc(y=y, sr=SR, n_mfcc=13), atol=1e-4
+        )
+        np.testing.assert_allclose(
+            graph["spectral_centroid"], librosa.feature.spectral_centroid(y=y, sr=SR)[0]
+        )
+        np.testing.assert_allclose(
+            graph["spectral_rolloff"], librosa.feature.spectral_rolloff(y=y, sr=SR)[0]
+        )
+        np.testing.assert_allclose(
+            graph["spectral_flatness"], librosa.feature.spectral_flatness(y=y)[0], rtol=1e-5
+        )
+        np.testing.assert_array_equal(graph["zcr"], librosa.feature.zero_crossing_rate(y)[0])
+
+    def test_reuse_the_single_stft(
+        self, noisy_tone: np.ndarray, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        calls = []
+        stft = librosa.stft
+        monkeypatch.setattr(librosa, "stft", lambda *a, **k: calls.append(1) or stft(*a, **k))
+
+        features = FeatureExtractor().extract_all_features(
+            _audio(noisy_tone), features={"tempo", "key", "timbre"}
+        )
+        assert len(calls) == 1
+        timbre = features["timbre"]
+        assert timbre["centroid_mean"] > 440.0
+        assert 0.0 < timbre["flatness_mean"] < 1.0
+        assert {f"mfcc{i}_std" for i in range(1, 14)} <= set(timbre)
+
+    def test_mel_filter_bank_is_cached(self) -> None:
+        assert mel_filter_bank(SR) is mel_filter_bank(SR)
+        assert not mel_filter_bank(SR).flags.writeable
+
+
+class TestTimbreOutputs:
+    @pytest.fixture
+    def features(self, noisy_tone: np.ndarray) -> dict[str, Any]:
+        return FeatureExtractor().extract_all_features(_audio(noisy_tone))
+
+    def test_summary_shows_the_statistics(self, features: dict[str, Any]) -> None:
+        summary = SingleTrackResult(features).get_summary()
+        assert summary["Centroid"].endswith(" Hz") and "±" in summary["Centroid"]
+        assert {"Roll-off", "Flatness", "ZCR"} <= set(summary)
+        assert len(summary["MFCC"].split(", ")) == 13
+
+    def test_archive_keeps_the_statistics(self, features: dict[str, Any], tmp_path: Any) -> None:
+        archive = FeatureArchive(tmp_path)
+        archive_id = archive.save(features)
+        assert archive_id is not None
+        restored = archive.load(archive_id)
+        assert restored is not None
+        assert restored["timbre"] == pytest.approx(features["timbre"])
@@ -0,0 +1,121 @@
+"""Tests for span tracing and the Chrome trace-event export."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+import tracing
+from metrics import call_with_metrics, merge_worker_metrics
+from model.audio_file import AudioFile
+from model.feature_graph import FeatureGraph, FeatureRegistry
+from tracing import Tracer, span, write_trace
+
+SINE_WAV = Path(__file__).resolve().parent / "fixtures" / "sine_440.wav"
+
+
+@pytest.fixture
+def traced() -> Iterator[None]:
+    tracing.start()
+    try:
+        yield
+    finally:
+        tracing.stop()
+
+
+def _spans(events: list[dict]) -> dict[str, dict]:
+    return {event["name"]: event for event in events if event["ph"] == "X"}
+
+
+class TestSpans:
+    def test_off_by_default(self) -> None:
+        assert not tracing.enabled()
+        with span("ignored"):
+            pass
+        assert tracing.drain() == []
+
+    @pytest.mark.usefixtures("traced")
+    def test_spans_carry_process_thread_and_args(self) -> None:
+        with span("outer", "test", path="/a.wav"), span("inner", "test"):
+            pass
+
+        def worker() -> None:
+            with span("threaded", "test"):
+                pass
+
+        thread = threading.Thread(target=worker, name="analysis_7")
+        thread.start()
+        thread.join()
+        events = tracing.stop()
+
+        spans = _spans(events)
+        outer, inner = spans["outer"], spans["inner"]
+        assert outer["pid"] == os.getpid() and outer["args"] == {"path": "/a.wav"}
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+        assert spans["threaded"]["tid"] != outer["tid"]
+        names = {e["tid"]: e["args"]["name"] for e in events if e["name"] == "thread_name"}
+        assert names[spans["threaded"]["tid"]] == "analysis_7"
+
+    @pytest.mark.usefixtures("traced")
+    def test_failed_blocks_are_marked(self) -> None:
+        with pytest.raises(KeyError), span("failing"):
+            raise KeyError("x")
+        assert _spans(tracing.stop())["failing"]["args"] == {"error": "KeyError"}
+
+    def test_buffer_is_bounded(self) -> None:
+        tracer = Tracer(max_events=3)
+        for i in range(5):
+            tracer.add(f"s{i}", "test", 0, 1, {})
+        assert len(tracer.drain()) == 3  # thread name + two spans
+        assert tracer.dropped == 3
+
+
+@pytest.mark.usefixtures("traced")
+class TestInstrumentation:
+    def test_load_and_stage_spans(self) -> None:
+        registry = FeatureRegistry()
+        registry.feature("tracing_test_double", "x")(lambda x: 2 * x)
+
+        assert AudioFile().load_audio(str(SINE_WAV), use_cache=False)
+        assert FeatureGraph(registry, x=2)["tracing_test_double"] == 4
+
+        spans = _spans(tracing.stop())
+        assert spans["load_audio"]["cat"] == "io"
+        assert spans["load_audio"]["args"]["path"] == str(SINE_WAV)
+        assert spans["tracing_test_double"]["cat"] == "dsp"
+
+    def test_worker_spans_are_shipped(self) -> None:
+        def work() -> int:
+            with span("in_worker"):
+                return 1
+
+        result, shipped = call_with_metrics(work)
+        assert result == 1 and tracing.drain() == []  # moved into the shipment
+        merge_worker_metrics(shipped)
+        assert "in_worker" in _spans(tracing.stop())
+
+
+class TestExport:
+    def test_chrome_trace_file(self, tmp_path: Path) -> None:
+        tracer = Tracer()
+        tracer.add("stage", "dsp", 1_000_000, 2_500, {"n": 1})
+        events = tracer.drain()
+        worker = {**events[1], "pid": 4242}
+        events += [{**events[0], "pid": 4242}, {**events[0], "pid": 4242}, worker]
+
+        out = write_trace(tmp_path / "trace.json", events)
+        document = json.loads(out.read_text())
+
+        trace = document["traceEvents"]
+        processes = {e["pid"]: e["args"]["name"] for e in trace if e["name"] == "process_name"}
+        assert processes == {os.getpid(): "main", 4242: "worker 4242"}
+        assert sum(e["name"] == "thread_name" for e in trace) == 2  # duplicates dropped
+        stage = next(e for e in trace if e["name"] == "stage" and e["pid"] == os.getpid())
+        assert (stage["ph"], stage["ts"], stage["dur"]) == ("X", 1000.0, 2.5)
+        assert [p.name for p in tmp_path.iterdir()] == ["trace.json"]
@@ -0,0 +1,128 @@
+"""Tests for cutting the visible window of a result at screen resolution."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from PySide6.QtCore import QCoreApplication
+
+from view.plots import decimate_frames, spectrogram_window, waveform_window
+from view.visualizer import WaveformVisualizer
+
+SR = 22050
+HOP = 512
+STEP = HOP / SR
+
+
+def _spectrogram(bins: int = 64, frames: int = 20_000) -> tuple[np.ndarray, np.ndarray]:
+    spec = np.random.default_rng(0).uniform(-80.0, 0.0, (bins, frames)).astype(np.float32)
+    return spec, np.linspace(0.0, SR / 2, bins + 1)
+
+
+class TestSpectrogramWindow:
+    def test_zoomed_window_keeps_full_detail(self) -> None:
+        spec, edges = _spectrogram()
+        cut = spectrogram_window(spec, SR, HOP, edges, (100.0, 110.0), (0.0, SR / 2), 800)
+
+        assert cut is not None
+        values, x_edges, y_edges = cut
+        first, last = int(100.0 // STEP), int(np.ceil(110.0 / STEP))
+        np.testing.assert_array_equal(values, spec[:, first:last])
+        assert x_edges[0] <= 100.0 and x_edges[-1] >= 110.0
+        assert len(x_edges) == values.shape[1] + 1 and len(y_edges) == values.shape[0] + 1
+
+    def test_wide_window_is_pooled_to_the_width(self) -> None:
+        spec, edges = _spectrogram()
+        duration = spec.shape[1] * STEP
+        cut = spectrogram_window(spec, SR, HOP, edges, (0.0, duration), (0.0, SR / 2), 300)
+
+        assert cut is not None
+        values, x_edges, _ = cut
+        pooled, _ = decimate_frames(spec, HOP, 300)
+        np.testing.assert_array_equal(values, pooled)
+        assert values.shape[1] <= 300
+        assert x_edges[0] == 0.0 and x_edges[-1] == duration
+
+    def test_frequency_window_and_row_pooling(self) -> None:
+        spec, edges = _spectrogram()
+        low = spectrogram_window(spec, SR, HOP, edges, (0.0, 1.0), (0.0, 1000.0), 800)
+        assert low is not None
+        values, _, y_edges = low
+        assert y_edges[0] == 0.0 and y_edges[-2] < 1000.0 <= y_edges[-1]
+        np.testing.assert_array_equal(values, spec[: len(y_edges) - 1, : values.shape[1]])
+
+        pooled = spectrogram_window(spec, SR, HOP, edges, (0.0, 1.0), (0.0, SR / 2), 800, 10)
+        assert pooled is not None
+        values, _, y_edges = pooled
+        assert values.shape[0] <= 10 and len(y_edges) == values.shape[0] + 1
+        assert (y_edges[0], y_edges[-1]) == (0.0, SR / 2)
+        assert values.max() == spec[:, : values.shape[1]].max()
+
+    def test_window_outside_the_data(self) -> None:
+        spec, edges = _spectrogram(frames=100)
+        assert spectrogram_window(spec, SR, HOP, edges, (50.0, 60.0), (0.0, SR / 2), 800) is None
+        assert spectrogram_window(spec, SR, HOP, edges, (0.0, 1.0), (-5.0, -1.0), 800) is None
+
+
+class TestWaveformWindow:
+    def test_few_samples_are_shown_as_they_are(self) -> None:
+        y = np.random.default_rng(1).standard_normal(SR * 60).astype(np.float32)
+        cut = waveform_window(y, SR, (30.0, 30.01), 800)
+
+        assert cut is not None
+        times, lower, upper = cut
+        assert lower is upper and len(times) == len(lower) <= 800
+        first = int(30.0 * SR)
+        np.testing.assert_array_equal(lower, y[first : first + len(lower)])
+        assert times[0] == first / SR
+
+    def test_many_samples_become_an_envelope(self) -> None:
+        y = np.random.default_rng(2).standard_normal(SR * 60).astype(np.float32)
+        cut = waveform_window(y, SR, (10.0, 20.0), 500)
+
+        assert cut is not None
+        times, lower, upper = cut
+        assert len(times) == len(lower) == len(upper) <= 500
+        window = y[int(10.0 * SR) : int(20.0 * SR) + 1]
+        assert lower.min() == window.min() and upper.max() == window.max()
+        assert (lower <= upper).all() and 10.0 < times[0] < times[-1] < 20.0
+
+    def test_nothing_visible(self) -> None:
+        y = np.zeros(SR, dtype=np.float32)
+        assert waveform_window(y, SR, (5.0, 6.0), 800) is None
+
+
+class TestViewportRerender:
+    def test_zoom_is_debounced_and_reset_restores_the_overview(
+        self, qapp: QCoreApplication, wait_until: Callable[..., None]
+    ) -> None:
+        y = np.random.default_rng(3).standard_normal(SR * 60).astype(np.float32)
+        vis = WaveformVisualizer()
+        vis.draw_data({"y": y, "sr": SR})
+        ax = vis.ax
+        overview = [*ax.lines, *ax.collections]
+        shown = [artist.get_visible() for artist in overview]
+
+        def detail() -> list[Any]:
+            return [a for a in [*ax.lines, *ax.collections] if a not in overview]
+
+        # Two zooms before the debounce timer can fire: one window is cut
+        ax.set_xlim(5.0, 25.0)
+        ax.set_xlim(10.0, 20.0)
+        wait_until(detail)
+        assert vis.wait_for_viewport(5000)
+        qapp.processEvents()
+        assert len(detail()) == 1
+        assert not any(artist.get_visible() for artist in overview)
+
+        # Back to the whole signal, which the overview already shows in full
+        ax.set_xlim(0.0, len(y) / SR)
+        assert detail() == []
+        wait_until(lambda: not vis._view_timer.isActive())  # noqa: SLF001
+        assert vis.wait_for_viewport(5000)
+        qapp.processEvents()
+        assert detail() == []
+        assert [artist.get_visible() for artist in overview] == shown
+        vis.deleteLater()